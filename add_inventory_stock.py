@@ -6,6 +6,7 @@ django.setup()
 
 from django.contrib.auth.models import User
 from inventory.models import Product, ExpiryStock, UserProfile
+from inventory.stock_ledger import add_batch
 from datetime import date, timedelta
 import random
 
@@ -66,12 +67,12 @@ for user in inventory_users:
             expiry_date = date.today() + timedelta(days=days_to_expiry)
             
             # Create stock entry
-            ExpiryStock.objects.create(
+            add_batch(ExpiryStock(
                 product=product,
                 quantity=quantity,
                 expiry_date=expiry_date,
                 user=user
-            )
+            ), None, reason='Initial stock')
             
             user_stock_count += 1
             total_added += 1
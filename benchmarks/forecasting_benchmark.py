@@ -0,0 +1,89 @@
+"""
+Benchmark for the nightly demand forecast refit (inventory/forecasting.py)
+
+Builds a throwaway SQLite database with N products and their daily sales
+history (a mix of steady and intermittent sellers), then times
+forecasting.refit() end to end: the grouped history query, the vectorized
+fit and the DemandForecast upsert. Target: 10,000 SKUs well under a minute.
+
+Run with: python benchmarks/forecasting_benchmark.py --skus 10000 --days 120
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_inventory.settings')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--skus', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    workdir = tempfile.mkdtemp(prefix='forecast_bench_')
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(workdir, 'bench.sqlite3'),
+    }
+
+    import django
+    django.setup()
+
+    from datetime import timedelta
+    from django.core.management import call_command
+    from django.utils import timezone
+    from inventory.models import Product, DailySales
+    from inventory.forecasting import refit
+
+    print(f"📦 Preparing {args.skus} SKUs x {args.days} days in {workdir} ...")
+    call_command('migrate', verbosity=0)
+
+    rng = np.random.default_rng(args.seed)
+    Product.objects.bulk_create([
+        Product(name=f'Bench Product {i}', name_key=f'bench product {i}', category='Bench', cost_price=10, selling_price=15, new_price=15)
+        for i in range(args.skus)
+    ], batch_size=2000)
+    ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+
+    # Half steady sellers (Poisson), half intermittent (sells on ~1 day in 5)
+    rates = rng.gamma(2.0, 3.0, size=args.skus)
+    sales = rng.poisson(rates[:, None], size=(args.skus, args.days))
+    intermittent = np.arange(args.skus) % 2 == 1
+    sales[intermittent] *= rng.random((intermittent.sum(), args.days)) < 0.2
+
+    end = timezone.localdate() - timedelta(days=1)
+    start = end - timedelta(days=args.days - 1)
+    rows, cols = np.nonzero(sales)
+    DailySales.objects.bulk_create([
+        DailySales(product_id=ids[r], date=start + timedelta(days=int(c)), quantity=int(sales[r, c]), sale_count=1)
+        for r, c in zip(rows, cols)
+    ], batch_size=5000)
+    print(f"   {len(rows)} daily sales rows")
+
+    for run in ('first fit (inserts)', 'refit (upserts)'):
+        started = time.perf_counter()
+        stats = refit(days=args.days)
+        total = time.perf_counter() - started
+        print(f"⏱️  {run}: {total:.2f}s  "
+              f"(load {stats['load_seconds']:.2f}s, fit {stats['fit_seconds']:.2f}s, save {stats['save_seconds']:.2f}s)  "
+              f"{stats['methods']}")
+
+    print(f"✅ {stats['products'] / total:,.0f} SKUs/second")
+
+    from django.db import connections
+    connections.close_all()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+"""
+Load test for concurrent POS terminals (billing and CSV billing)
+
+Seeds a throwaway SQLite database with a few stores, a small catalog and
+deliberately scarce stock, then runs N cashier terminals at once. Terminals
+are spread over the stores, so several share one store login, as at a real
+till. Each terminal posts multi-product bills to /billing/ and, every
+--csv-every submissions, a CSV upload to /csv-billing/. Every submission
+carries an idempotency key, and a share of them (--resend) is posted twice,
+like a double-clicked or timed-out form.
+
+The app runs either in-process, one Django test client and database
+connection per terminal thread (--server threads), or as a real gunicorn
+server on a local port (--server gunicorn; needs gunicorn and requests).
+
+Afterwards it reports throughput and p50/p95/p99 latency, and checks these
+invariants on the database (exit code 1 if any fails):
+
+    no stock batch below zero
+    no bill number used twice
+    stock conserved: units seeded = units on hand + units billed
+    the stock ledger, StockOnHand and DailySales agree with the bills
+    every bill has lines, and its total matches them
+
+Run with: python benchmarks/pos_load_test.py --cashiers 8 --submissions 25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_inventory.settings')
+
+PASSWORD = 'bench-pass-123'
+LINES_PER_BILL = 3
+UNIT_PRICE = 15
+
+
+def seed(stores, products, stock, result_path):
+    import django
+    django.setup()
+
+    from datetime import timedelta
+    from decimal import Decimal
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db.models import Sum
+    from django.utils import timezone
+    from inventory.models import ExpiryStock, Product, UserProfile
+    from inventory.stock_ledger import rebuild_projections
+
+    call_command('migrate', verbosity=0)
+
+    owners = []
+    for i in range(stores):
+        user = User.objects.create_user(username=f'pos_store_{i}', password=PASSWORD)
+        UserProfile.objects.create(user=user, role='inventory', store_name=f'POS Store {i}')
+        owners.append(user)
+
+    catalog = Product.objects.bulk_create([
+        Product(
+            name=f'POS Product {i}', name_key=f'pos product {i}', category='Food',
+            cost_price=Decimal(10), selling_price=Decimal(UNIT_PRICE), new_price=Decimal(UNIT_PRICE)
+        )
+        for i in range(products)
+    ])
+    # Two batches per product and store: FEFO has to split lines across them
+    today = timezone.localdate()
+    ExpiryStock.objects.bulk_create([
+        ExpiryStock(
+            product=product, user=owner, store=owner.userprofile.store, quantity=stock,
+            expiry_date=today + timedelta(days=30 + n)
+        )
+        for product in catalog for owner in owners for n in range(2)
+    ])
+    # Start StockOnHand and DailySales from the seeded batches
+    rebuild_projections()
+
+    with open(result_path, 'w') as handle:
+        json.dump({'units': ExpiryStock.objects.aggregate(total=Sum('quantity'))['total']}, handle)
+
+
+# ----------------------------------------------------------------------------
+# Terminals
+# ----------------------------------------------------------------------------
+
+class ClientTerminal:
+    """In-process terminal: Django test client on this thread's own connection"""
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client()
+
+    def login(self, username):
+        return self.client.login(username=username, password=PASSWORD)
+
+    def post(self, url, data, upload=None):
+        if upload is not None:
+            from django.core.files.uploadedfile import SimpleUploadedFile
+            field, filename, content = upload
+            data = dict(data, **{field: SimpleUploadedFile(filename, content, content_type='text/csv')})
+        return self.client.post(url, data).status_code
+
+    def close(self):
+        from django.db import connection
+        connection.close()
+
+
+class HttpTerminal:
+    """Terminal talking HTTP to a running server, with its own session cookies"""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url
+        self.session = requests.Session()
+        # Any 32-character secret works as an unmasked CSRF token for cookie and form alike;
+        # set for the server's host so the rotated token from login replaces it
+        self.session.cookies.set('csrftoken', secrets.token_hex(16), domain=urlsplit(base_url).hostname, path='/')
+
+    def login(self, username):
+        return self.post('/login/', {'username': username, 'password': PASSWORD}) == 302
+
+    def post(self, url, data, upload=None):
+        files = None
+        if upload is not None:
+            field, filename, content = upload
+            files = {field: (filename, content, 'text/csv')}
+        response = self.session.post(
+            # Logging in rotates the token, so always send the current cookie
+            self.base_url + url, data=dict(data, csrfmiddlewaretoken=self.session.cookies['csrftoken']), files=files,
+            headers={'Referer': self.base_url + '/'}, allow_redirects=False
+        )
+        return response.status_code
+
+    def close(self):
+        self.session.close()
+
+
+# ----------------------------------------------------------------------------
+# Load
+# ----------------------------------------------------------------------------
+
+def _bill_lines(rng, products):
+    picked = rng.sample(range(products), min(LINES_PER_BILL, products))
+    return [(index, rng.randint(1, 3)) for index in picked]
+
+
+def _submission(rng, n, products, csv_every):
+    """(url, form data, upload or None, units asked for) for one bill or CSV upload"""
+    key = uuid.uuid4().hex
+    lines = _bill_lines(rng, products)
+    units = sum(quantity for _, quantity in lines)
+    if csv_every and n % csv_every == csv_every - 1:
+        # Names as a person types them: the lookup ignores case and spacing
+        rows = ''.join(f'{rng.choice(["POS PRODUCT", "pos product", "Pos  Product"])} {index},{quantity}\n'
+                       for index, quantity in lines)
+        upload = ('csv_file', 'pos.csv', f'product_name,quantity\n{rows}'.encode())
+        return '/csv-billing/', {'idempotency_key': key}, upload, units
+    return '/billing/', {'idempotency_key': key, 'products_data': json.dumps([
+        {'name': f'POS Product {index}', 'quantity': quantity,
+         'unitPrice': str(UNIT_PRICE), 'total': str(UNIT_PRICE * quantity)}
+        for index, quantity in lines
+    ])}, None, units
+
+
+def run_load(make_terminal, cashiers, stores, submissions, products, csv_every, resend):
+    latencies = []
+    statuses = {}
+    counts = {'submissions': 0, 'resent': 0, 'csv': 0, 'units': 0}
+    lock = threading.Lock()
+    ready = threading.Barrier(cashiers + 1)
+    failures = []
+
+    def cashier(number):
+        rng = random.Random(number)
+        terminal = make_terminal()
+        mine = []
+        status_counts = {}
+        sent = {'submissions': 0, 'resent': 0, 'csv': 0, 'units': 0}
+        try:
+            if not terminal.login(f'pos_store_{number % stores}'):
+                raise RuntimeError(f'terminal {number} could not log in')
+        except Exception as e:
+            failures.append(f'terminal {number}: {e!r}')
+            ready.wait()
+            return
+        ready.wait()
+        try:
+            for n in range(submissions):
+                url, data, upload, units = _submission(rng, n, products, csv_every)
+                attempts = 2 if rng.random() < resend else 1
+                for _ in range(attempts):
+                    started = time.perf_counter()
+                    status = terminal.post(url, data, upload)
+                    mine.append(time.perf_counter() - started)
+                    status_counts[status] = status_counts.get(status, 0) + 1
+                sent['submissions'] += 1
+                sent['resent'] += attempts - 1
+                sent['csv'] += upload is not None
+                sent['units'] += units
+        except Exception as e:
+            failures.append(f'terminal {number}: {e!r}')
+        terminal.close()
+        with lock:
+            latencies.extend(mine)
+            for status, count in status_counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+            for key, value in sent.items():
+                counts[key] += value
+
+    workers = [threading.Thread(target=cashier, args=(i,)) for i in range(cashiers)]
+    # The views print debug output; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in workers:
+            thread.start()
+        ready.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    if failures:
+        raise SystemExit('❌ ' + '; '.join(failures))
+    return dict(counts, elapsed=elapsed, latencies=latencies, statuses={str(k): v for k, v in statuses.items()})
+
+
+def measure(args):
+    """--server threads: terminals in this process, one database connection each"""
+    from django.conf import settings
+    settings.STATIC_ROOT = os.path.join(os.path.dirname(args.result), 'static')
+    os.makedirs(settings.STATIC_ROOT, exist_ok=True)
+
+    import django
+    django.setup()
+    report = run_load(ClientTerminal, args.cashiers, args.stores, args.submissions,
+                      args.products, args.csv_every, args.resend)
+    with open(args.result, 'w') as handle:
+        json.dump(report, handle)
+
+
+def serve_and_measure(args, env, workdir):
+    """--server gunicorn: terminals over HTTP against a local gunicorn"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    log = open(os.path.join(workdir, 'gunicorn.log'), 'w')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'smart_inventory.wsgi:application',
+         '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers), '--threads', str(args.threads)],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    try:
+        deadline = time.time() + 30
+        while True:
+            with contextlib.suppress(OSError), socket.create_connection(('127.0.0.1', port), timeout=1):
+                break
+            if server.poll() is not None or time.time() > deadline:
+                raise SystemExit(f'❌ gunicorn did not start, see {log.name}')
+            time.sleep(0.2)
+        base_url = f'http://127.0.0.1:{port}'
+        return run_load(lambda: HttpTerminal(base_url), args.cashiers, args.stores, args.submissions,
+                        args.products, args.csv_every, args.resend)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        log.close()
+
+
+# ----------------------------------------------------------------------------
+# Invariants
+# ----------------------------------------------------------------------------
+
+def verify(seeded_units, result_path):
+    import django
+    django.setup()
+
+    from collections import defaultdict
+    from django.db.models import Count, F, Sum
+    from inventory.models import DailySales, ExpiryStock, SalesBill, SalesBillItem, StockMovement, StockOnHand
+
+    def total(queryset, field='quantity'):
+        return queryset.aggregate(total=Sum(field))['total'] or 0
+
+    on_hand = total(ExpiryStock.objects.all())
+    sold = total(SalesBillItem.objects.all())
+
+    batch_sums = defaultdict(int)
+    for row in ExpiryStock.objects.values('product_id', 'user_id').annotate(units=Sum('quantity')):
+        batch_sums[(row['product_id'], row['user_id'])] = row['units']
+    projected = {
+        (row['product_id'], row['user_id']): row['quantity']
+        for row in StockOnHand.objects.values('product_id', 'user_id', 'quantity')
+    }
+    on_hand_mismatches = sum(
+        1 for pair in set(batch_sums) | set(projected) if batch_sums.get(pair, 0) != projected.get(pair, 0)
+    )
+
+    bills = SalesBill.objects.annotate(lines=Count('items'), lines_total=Sum('items__total'))
+    checks = [
+        ('no negative stock batches', ExpiryStock.objects.filter(quantity__lt=0).count() == 0,
+         f"{ExpiryStock.objects.filter(quantity__lt=0).count()} below zero"),
+        ('no duplicate bill numbers',
+         not SalesBill.objects.values('bill_number').annotate(n=Count('id')).filter(n__gt=1).exists(),
+         f"{SalesBill.objects.count()} bills"),
+        ('stock conserved', seeded_units == on_hand + sold,
+         f"{seeded_units} seeded = {on_hand} on hand + {sold} billed"),
+        ('ledger deductions match units billed',
+         total(StockMovement.objects.filter(movement_type='deduct')) == sold,
+         f"{total(StockMovement.objects.filter(movement_type='deduct'))} deducted"),
+        ('StockOnHand matches the batches', on_hand_mismatches == 0, f"{on_hand_mismatches} mismatched rows"),
+        ('DailySales matches units billed', total(DailySales.objects.all()) == sold,
+         f"{total(DailySales.objects.all())} in DailySales"),
+        ('every bill has lines', not bills.filter(lines=0).exists(), f"{bills.filter(lines=0).count()} empty"),
+        ('bill totals match their lines', not bills.exclude(total_amount=F('lines_total')).exists(),
+         f"{bills.exclude(total_amount=F('lines_total')).count()} mismatched"),
+    ]
+
+    with open(result_path, 'w') as handle:
+        json.dump({
+            'checks': checks,
+            'bills': SalesBill.objects.count(),
+            'lines': SalesBillItem.objects.count(),
+            'sold': sold,
+        }, handle)
+
+
+# ----------------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------------
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_child(mode, env, *args):
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, *args], env=env, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cashiers', type=int, default=8, help='concurrent terminals')
+    parser.add_argument('--submissions', type=int, default=25, help='bills and CSV uploads per terminal')
+    parser.add_argument('--stores', type=int, default=2, help='store logins the terminals share')
+    parser.add_argument('--products', type=int, default=12)
+    parser.add_argument('--stock', type=int, default=25, help='units per stock batch (two per product and store)')
+    parser.add_argument('--csv-every', type=int, default=5, help='every Nth submission is a CSV upload (0: none)')
+    parser.add_argument('--resend', type=float, default=0.1, help='share of submissions posted twice')
+    parser.add_argument('--server', choices=['threads', 'gunicorn'], default='threads')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=2, help='gunicorn threads per worker')
+    parser.add_argument('--database-url', help='run against this empty database instead of a throwaway SQLite file')
+    parser.add_argument('--keep', action='store_true', help='keep the work directory')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    parser.add_argument('--seeded-units', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'seed':
+        return seed(args.stores, args.products, args.stock, args.result)
+    if args.child == 'measure':
+        return measure(args)
+    if args.child == 'verify':
+        return verify(args.seeded_units, args.result)
+
+    workdir = tempfile.mkdtemp(prefix='pos_load_')
+    env = dict(
+        os.environ,
+        DJANGO_ENV='development',
+        DJANGO_DEBUG='false',
+        DATABASE_URL=args.database_url or f"sqlite:///{os.path.join(workdir, 'pos.sqlite3')}",
+        CACHE_LOCATION=os.path.join(workdir, 'cache'),
+    )
+
+    print(f"📦 Seeding {args.stores} stores, {args.products} products, {args.stock} units per batch in {workdir} ...")
+    seed_path = os.path.join(workdir, 'seed.json')
+    run_child('seed', env, '--stores', str(args.stores), '--products', str(args.products),
+              '--stock', str(args.stock), '--result', seed_path)
+    with open(seed_path) as handle:
+        seeded_units = json.load(handle)['units']
+
+    print(f"⏱️  {args.cashiers} terminals x {args.submissions} submissions ({args.server}) ...")
+    if args.server == 'gunicorn':
+        report = serve_and_measure(args, env, workdir)
+    else:
+        result_path = os.path.join(workdir, 'load.json')
+        run_child('measure', env, '--cashiers', str(args.cashiers), '--submissions', str(args.submissions),
+                  '--stores', str(args.stores), '--products', str(args.products),
+                  '--csv-every', str(args.csv_every), '--resend', str(args.resend), '--result', result_path)
+        with open(result_path) as handle:
+            report = json.load(handle)
+
+    verify_path = os.path.join(workdir, 'verify.json')
+    run_child('verify', env, '--seeded-units', str(seeded_units), '--result', verify_path)
+    with open(verify_path) as handle:
+        checked = json.load(handle)
+
+    requests_sent = len(report['latencies'])
+    latencies_ms = [value * 1000 for value in report['latencies']]
+    print()
+    print(f"Submissions: {report['submissions']} ({report['csv']} CSV uploads) + {report['resent']} resent"
+          f" = {requests_sent} requests in {report['elapsed']:.1f}s")
+    print(f"HTTP status: {', '.join(f'{status} x{count}' for status, count in sorted(report['statuses'].items()))}")
+    print(f"Throughput:  {requests_sent / report['elapsed']:.1f} requests/s,"
+          f" {checked['bills'] / report['elapsed']:.1f} bills/s"
+          f" ({checked['bills']} bills, {checked['lines']} lines)")
+    print(f"Units:       {checked['sold']} billed of {report['units']} asked for"
+          f" (the rest was short on stock when its terminal billed it)")
+    print(f"Latency ms:  p50 {percentile(latencies_ms, 50):.1f}  p95 {percentile(latencies_ms, 95):.1f}"
+          f"  p99 {percentile(latencies_ms, 99):.1f}  max {max(latencies_ms, default=0):.1f}")
+
+    # Handled submissions redirect back to the billing page, accepted or not
+    unhandled = requests_sent - report['statuses'].get('302', 0)
+    checked['checks'].insert(0, ('every request handled', unhandled == 0, f"{unhandled} without a 302 redirect"))
+
+    print()
+    print("Invariants:")
+    for label, passed, detail in checked['checks']:
+        print(f"  {'✅' if passed else '❌'} {label} ({detail})")
+
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not all(passed for _, passed, _ in checked['checks']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
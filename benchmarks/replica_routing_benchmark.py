@@ -0,0 +1,167 @@
+"""
+Benchmark for read replica routing (inventory/db_routing.py)
+
+Runs the app with two database aliases on local SQLite files: the primary
+('default') and a copy of it taken after seeding as the 'replica'. The
+copy never receives later writes, which makes replication lag easy to see.
+
+For each read-heavy page it reports the queries per request that each alias
+served. It then checks read-your-writes: a store bills a sale, and right
+away opens the new bill page. That store is pinned to the primary, so the
+page is found. A visitor without the pin reads the replica, where the bill
+does not exist yet.
+
+Run with: python benchmarks/replica_routing_benchmark.py --requests 20
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_inventory.settings')
+
+from settings_profile_benchmark import PASSWORD, seed as seed_catalog  # noqa: E402
+
+# (label, username or None for anonymous, url); {token} is the store's ledger token
+PAGES = [
+    ('trend dashboard', 'bench_store_1', '/trends/'),
+    ('admin dashboard', 'bench_admin', '/admin-panel/'),
+    ('admin stock panel', 'bench_admin', '/admin-panel/panels/stock/'),
+    ('admin billing panel', 'bench_admin', '/admin-panel/panels/billing/'),
+    ('billing search API', 'bench_store_1', '/api/search-products-billing/?q=Bench'),
+    ('autocomplete API', 'bench_admin', '/api/product-autocomplete/?q=Bench'),
+    ('offline ledger', None, '/ledger/{token}/'),
+    ('bill page', None, '/bill/BENCH-000000/'),
+]
+
+
+def seed(products, bills):
+    seed_catalog(products, bills)
+
+    from inventory.models import QRToken, UserProfile
+    QRToken.objects.create(user_profile=UserProfile.objects.get(user__username='bench_store_1'))
+
+
+def measure(requests, result_path):
+    from django.conf import settings
+    settings.STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+    settings.STATIC_ROOT = os.path.join(os.path.dirname(result_path), 'static')
+    os.makedirs(settings.STATIC_ROOT, exist_ok=True)
+
+    import django
+    django.setup()
+    from django.db import connections
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from inventory.db_routing import PIN_COOKIE
+    from inventory.models import QRToken, SalesBill
+
+    token = QRToken.objects.get(user_profile__user__username='bench_store_1').secure_token
+    clients = {None: Client()}
+    results = {}
+
+    # The views print debug output; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, username, url in PAGES:
+            if username not in clients:
+                clients[username] = Client()
+                clients[username].login(username=username, password=PASSWORD)
+                # Logging in is a write; start without the pin it leaves behind
+                clients[username].cookies.pop(PIN_COOKIE, None)
+            client = clients[username]
+            url = url.format(token=token)
+
+            client.get(url)
+            with CaptureQueriesContext(connections['default']) as primary, \
+                    CaptureQueriesContext(connections['replica']) as replica:
+                for _ in range(requests):
+                    response = client.get(url)
+                    assert response.status_code == 200, f'{url}: HTTP {response.status_code}'
+            results[label] = {'primary': len(primary) / requests, 'replica': len(replica) / requests}
+
+        # Read-your-writes: bill a sale, then open the new bill right away
+        store = clients['bench_store_1']
+        store.post('/billing/', {'products_data': json.dumps([
+            {'name': 'Bench Product 0', 'quantity': 1, 'unitPrice': '15', 'total': '15'}
+        ])})
+        bill_number = SalesBill.objects.filter(bill_number__startswith='BILL-').latest('id').bill_number
+        pinned = store.get(f'/bill/{bill_number}/').status_code
+        unpinned = Client().get(f'/bill/{bill_number}/').status_code
+
+    with open(result_path, 'w') as handle:
+        json.dump({
+            'results': results,
+            'pinned': {'cookie': PIN_COOKIE in store.cookies, 'status': pinned},
+            'unpinned_status': unpinned,
+            'bill_number': bill_number,
+        }, handle)
+
+
+def run_child(mode, env, *args):
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, *args], env=env, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20, help='timed requests per page')
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--bills', type=int, default=300)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'seed':
+        return seed(args.products, args.bills)
+    if args.child == 'measure':
+        return measure(args.requests, args.result)
+
+    workdir = tempfile.mkdtemp(prefix='replica_bench_')
+    primary = os.path.join(workdir, 'primary.sqlite3')
+    replica = os.path.join(workdir, 'replica.sqlite3')
+    base_env = dict(
+        os.environ,
+        DJANGO_ENV='development',
+        DJANGO_DEBUG='false',
+        DATABASE_URL=f'sqlite:///{primary}',
+        # A rollback-journal file copies cleanly; WAL would leave pages in the -wal file
+        SQLITE_TUNING='false',
+    )
+
+    print(f"📦 Seeding {args.products} products and {args.bills} bills in {workdir} ...")
+    run_child('seed', base_env, '--products', str(args.products), '--bills', str(args.bills))
+    shutil.copyfile(primary, replica)
+
+    result_path = os.path.join(workdir, 'result.json')
+    print(f"⏱️  {args.requests} requests per page with DATABASE_REPLICA_URL set ...")
+    run_child('measure', dict(base_env, DATABASE_REPLICA_URL=f'sqlite:///{replica}'),
+              '--requests', str(args.requests), '--result', result_path)
+    with open(result_path) as handle:
+        report = json.load(handle)
+
+    print()
+    print(f"{'page':<22}{'primary q/req':>15}{'replica q/req':>15}")
+    for label, _, _ in PAGES:
+        counts = report['results'][label]
+        print(f"{label:<22}{counts['primary']:>15.1f}{counts['replica']:>15.1f}")
+
+    print()
+    pinned = report['pinned']
+    print(f"Bill {report['bill_number']} right after billing it:")
+    print(f"  billing store (pin cookie set: {pinned['cookie']}): HTTP {pinned['status']}"
+          f" {'✅ read from the primary' if pinned['status'] == 200 else '❌ not found'}")
+    print(f"  other visitor (no pin): HTTP {report['unpinned_status']}"
+          f" {'✅ read from the lagging replica' if report['unpinned_status'] != 200 else '❌ expected the replica to miss it'}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
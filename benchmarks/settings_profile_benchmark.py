@@ -0,0 +1,188 @@
+"""
+Benchmark for the settings profiles (smart_inventory/settings.py)
+
+Seeds a throwaway SQLite database (stores, products, stock batches, bills),
+then serves the dashboards in-process with the Django test client under
+each profile - DJANGO_ENV=development and DJANGO_ENV=production - and
+reports requests/second per page. Each profile runs in its own process,
+since settings are read once at startup.
+
+Static files use plain storage in both runs (no collectstatic needed); only
+request handling is measured.
+
+Run with: python benchmarks/settings_profile_benchmark.py --requests 200
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_inventory.settings')
+
+PROFILES = ['development', 'production']
+CATEGORIES = ['Electronics', 'Food', 'Furniture', 'Stationery', 'Clothing']
+PASSWORD = 'bench-pass-123'
+
+# (label, username, url)
+PAGES = [
+    ('inventory dashboard', 'bench_store_1', '/inventory/'),
+    ('trend dashboard', 'bench_store_1', '/trends/'),
+    ('admin dashboard', 'bench_admin', '/admin-panel/'),
+    ('admin stock panel', 'bench_admin', '/admin-panel/panels/stock/'),
+]
+
+
+def seed(products, bills):
+    import django
+    django.setup()
+
+    import random
+    from datetime import timedelta
+    from decimal import Decimal
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.utils import timezone
+    from inventory.models import ExpiryStock, Product, SalesBill, SalesBillItem, Store, UserProfile
+
+    call_command('migrate', verbosity=0)
+    random.seed(42)
+
+    def create_user(username, role, store_name=None, store=None):
+        user = User.objects.create_user(username=username, password=PASSWORD, first_name=username.title())
+        UserProfile.objects.create(user=user, role=role, store_name=store_name, store=store)
+        return user
+
+    create_user('bench_admin', 'admin')
+    warehouse = Store.objects.create(name='Company Warehouse', is_warehouse=True)
+    company = create_user('company_stock', 'admin', 'Company Warehouse', warehouse)
+    stores = [create_user(f'bench_store_{i}', 'inventory', f'Store {i}') for i in (1, 2)]
+
+    catalog = Product.objects.bulk_create([
+        Product(
+            name=f'Bench Product {i}', name_key=f'bench product {i}', category=CATEGORIES[i % len(CATEGORIES)],
+            cost_price=Decimal(10 + i % 50), selling_price=Decimal(15 + i % 50), new_price=Decimal(15 + i % 50),
+            trend_score=round(random.uniform(0, 10), 1)
+        )
+        for i in range(products)
+    ])
+    today = timezone.localdate()
+    ExpiryStock.objects.bulk_create([
+        ExpiryStock(
+            product=product, user=owner, store=owner.userprofile.store, quantity=random.randint(0, 150),
+            expiry_date=today + timedelta(days=random.randint(5, 120))
+        )
+        for product in catalog for owner in [company] + stores
+    ])
+    for n in range(bills):
+        store = stores[n % len(stores)]
+        bill = SalesBill.objects.create(bill_number=f'BENCH-{n:06d}', created_by=store, total_amount=0)
+        items = [
+            SalesBillItem(bill=bill, product=product, quantity=2, price=product.new_price, total=product.new_price * 2)
+            for product in random.sample(catalog, 3)
+        ]
+        SalesBillItem.objects.bulk_create(items)
+        SalesBill.objects.filter(pk=bill.pk).update(total_amount=sum(item.total for item in items))
+
+
+def measure(requests, result_path):
+    from django.conf import settings
+    settings.STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+    settings.STATIC_ROOT = os.path.join(os.path.dirname(result_path), 'static')
+    os.makedirs(settings.STATIC_ROOT, exist_ok=True)
+
+    import django
+    django.setup()
+    from django.test import Client
+
+    clients = {}
+    results = {}
+    for label, username, url in PAGES:
+        if username not in clients:
+            clients[username] = Client()
+            clients[username].login(username=username, password=PASSWORD)
+        client = clients[username]
+
+        # The views print debug output; keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(3):
+                client.get(url)
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = client.get(url)
+                assert response.status_code == 200, f'{url}: HTTP {response.status_code}'
+            elapsed = time.perf_counter() - started
+        results[label] = requests / elapsed
+
+    with open(result_path, 'w') as handle:
+        json.dump({
+            'results': results,
+            'debug': settings.DEBUG,
+            'session_engine': settings.SESSION_ENGINE.rsplit('.', 1)[-1],
+            'conn_max_age': settings.DATABASES['default']['CONN_MAX_AGE'],
+            'cache': settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1],
+        }, handle)
+
+
+def run_child(mode, env, *args):
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, *args], env=env, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per page')
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--bills', type=int, default=300)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'seed':
+        return seed(args.products, args.bills)
+    if args.child == 'measure':
+        return measure(args.requests, args.result)
+
+    workdir = tempfile.mkdtemp(prefix='settings_bench_')
+    base_env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.sqlite3')}",
+        CACHE_LOCATION=os.path.join(workdir, 'cache'),
+        DJANGO_SECRET_KEY='settings-profile-benchmark',
+    )
+
+    print(f"📦 Seeding {args.products} products and {args.bills} bills in {workdir} ...")
+    run_child('seed', dict(base_env, DJANGO_ENV='development'), '--products', str(args.products), '--bills', str(args.bills))
+
+    reports = {}
+    for profile in PROFILES:
+        result_path = os.path.join(workdir, f'{profile}.json')
+        print(f"⏱️  {profile}: {args.requests} requests per page ...")
+        run_child('measure', dict(base_env, DJANGO_ENV=profile), '--requests', str(args.requests), '--result', result_path)
+        with open(result_path) as handle:
+            reports[profile] = json.load(handle)
+
+    print()
+    for profile, report in reports.items():
+        print(
+            f"{profile}: DEBUG={report['debug']}, sessions={report['session_engine']}, "
+            f"CONN_MAX_AGE={report['conn_max_age']}, cache={report['cache']}"
+        )
+    print()
+    print(f"{'page':<22}" + ''.join(f'{profile:>14}' for profile in PROFILES) + f"{'speed-up':>10}")
+    for label, _, _ in PAGES:
+        rates = [reports[profile]['results'][label] for profile in PROFILES]
+        print(f'{label:<22}' + ''.join(f'{rate:>10.1f} r/s' for rate in rates) + f'{rates[1] / rates[0]:>9.2f}x')
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
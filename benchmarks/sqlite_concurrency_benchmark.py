@@ -0,0 +1,201 @@
+"""
+Benchmark for concurrent billing on SQLite (inventory/sqlite_tuning.py)
+
+Seeds a throwaway SQLite database (products with stock batches for a few
+store accounts), then starts N threads that each POST multi-product bills to
+/billing/ at the same time - every thread is its own logged-in store with its
+own database connection, as under a threaded server. It runs once with
+SQLITE_TUNING off (rollback journal, deferred BEGIN) and once with it on
+(WAL, synchronous=NORMAL, busy_timeout, BEGIN IMMEDIATE), each in its own
+process on its own copy of the database, and reports bills/second and the
+bills that failed with "database is locked".
+
+Run with: python benchmarks/sqlite_concurrency_benchmark.py --threads 8 --bills 25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_inventory.settings')
+
+MODES = [('before', 'false'), ('after', 'true')]
+PASSWORD = 'bench-pass-123'
+LINES_PER_BILL = 3
+
+
+def seed(threads, products):
+    import django
+    django.setup()
+
+    from datetime import timedelta
+    from decimal import Decimal
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.utils import timezone
+    from inventory.models import ExpiryStock, Product, UserProfile
+
+    call_command('migrate', verbosity=0)
+
+    stores = []
+    for i in range(threads):
+        user = User.objects.create_user(username=f'bench_store_{i}', password=PASSWORD)
+        UserProfile.objects.create(user=user, role='inventory', store_name=f'Store {i}')
+        stores.append(user)
+
+    catalog = Product.objects.bulk_create([
+        Product(
+            name=f'Bench Product {i}', name_key=f'bench product {i}', category='Food',
+            cost_price=Decimal(10), selling_price=Decimal(15), new_price=Decimal(15)
+        )
+        for i in range(products)
+    ])
+    # Plenty of stock in a few batches per store, so no bill runs short
+    today = timezone.localdate()
+    ExpiryStock.objects.bulk_create([
+        ExpiryStock(
+            product=product, user=store, store=store.userprofile.store, quantity=100000,
+            expiry_date=today + timedelta(days=30 + n)
+        )
+        for product in catalog for store in stores for n in range(2)
+    ])
+
+
+def _bill_payload(thread, n, products):
+    lines = []
+    for k in range(LINES_PER_BILL):
+        index = (thread * 7 + n * LINES_PER_BILL + k) % products
+        lines.append({'name': f'Bench Product {index}', 'quantity': 1, 'unitPrice': '15', 'total': '15'})
+    return {'products_data': json.dumps(lines)}
+
+
+def measure(threads, bills, products, result_path):
+    from django.conf import settings
+    settings.STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+    settings.STATIC_ROOT = os.path.join(os.path.dirname(result_path), 'static')
+    os.makedirs(settings.STATIC_ROOT, exist_ok=True)
+
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test import Client
+    from inventory.models import SalesBill
+
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    connection.close()
+
+    outcome = {'ok': 0, 'locked': 0, 'failed': 0}
+    lock = threading.Lock()
+    ready = threading.Barrier(threads + 1)
+
+    def worker(thread):
+        from django.db import connection as thread_connection
+        client = Client()
+        client.login(username=f'bench_store_{thread}', password=PASSWORD)
+        counts = {'ok': 0, 'locked': 0, 'failed': 0}
+        ready.wait()
+        for n in range(bills):
+            response = client.post('/billing/', _bill_payload(thread, n, products))
+            texts = [str(message) for message in response.wsgi_request._messages]
+            if any('locked' in text for text in texts):
+                counts['locked'] += 1
+            elif any(text.startswith('✅') for text in texts):
+                counts['ok'] += 1
+            else:
+                counts['failed'] += 1
+        thread_connection.close()
+        with lock:
+            for key, value in counts.items():
+                outcome[key] += value
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    # The views print debug output; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in workers:
+            thread.start()
+        ready.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    with open(result_path, 'w') as handle:
+        json.dump(dict(
+            outcome,
+            elapsed=elapsed,
+            bills_in_db=SalesBill.objects.count(),
+            journal_mode=journal_mode,
+        ), handle)
+
+
+def run_child(mode, env, *args):
+    subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, *args], env=env, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8, help='concurrent billing threads')
+    parser.add_argument('--bills', type=int, default=25, help='bills per thread')
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'seed':
+        return seed(args.threads, args.products)
+    if args.child == 'measure':
+        return measure(args.threads, args.bills, args.products, args.result)
+
+    workdir = tempfile.mkdtemp(prefix='sqlite_bench_')
+    seeded = os.path.join(workdir, 'seed.sqlite3')
+    base_env = dict(
+        os.environ,
+        DJANGO_ENV='development',
+        DJANGO_DEBUG='false',
+        CACHE_LOCATION=os.path.join(workdir, 'cache'),
+    )
+
+    print(f"📦 Seeding {args.products} products for {args.threads} stores in {workdir} ...")
+    run_child('seed', dict(base_env, DATABASE_URL=f'sqlite:///{seeded}', SQLITE_TUNING='false'),
+              '--threads', str(args.threads), '--products', str(args.products))
+
+    reports = {}
+    for label, tuning in MODES:
+        # journal_mode=WAL sticks to the file, so every run starts from its own copy
+        database = os.path.join(workdir, f'{label}.sqlite3')
+        shutil.copyfile(seeded, database)
+        result_path = os.path.join(workdir, f'{label}.json')
+        print(f"⏱️  {label} (SQLITE_TUNING={tuning}): {args.threads} threads x {args.bills} bills ...")
+        run_child('measure', dict(base_env, DATABASE_URL=f'sqlite:///{database}', SQLITE_TUNING=tuning),
+                  '--threads', str(args.threads), '--bills', str(args.bills),
+                  '--products', str(args.products), '--result', result_path)
+        with open(result_path) as handle:
+            reports[label] = json.load(handle)
+
+    attempted = args.threads * args.bills
+    print()
+    print(f"{'run':<8}{'journal':>9}{'bills/s':>10}{'created':>10}{'locked':>9}{'other':>8}")
+    for label, _ in MODES:
+        report = reports[label]
+        print(
+            f"{label:<8}{report['journal_mode']:>9}{report['ok'] / report['elapsed']:>10.1f}"
+            f"{report['ok']:>6}/{attempted:<3}{report['locked']:>9}{report['failed']:>8}"
+        )
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
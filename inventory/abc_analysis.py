@@ -0,0 +1,158 @@
+"""
+ABC / XYZ Classification
+ABC ranks products by their share of revenue over the last WINDOW_DAYS:
+one window-function query over SalesBillItem returns every product's
+revenue and the running total in descending revenue order.
+
+    A  products making up the first 80% of revenue
+    B  the next 15%
+    C  the rest, including products without sales
+
+XYZ rates how steady daily demand is (coefficient of variation of units
+sold per day, from the DailySales projection):
+
+    X  CV <= 0.5    Y  CV <= 1.0    Z  above, or no sales
+
+Classes are stored on Product and only rewritten when the revenue shares
+moved by more than TOLERANCE since the last run (half the summed absolute
+change - the share of revenue that changed hands), so day-to-day noise
+does not churn the catalog.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import DecimalField, F, FloatField, OuterRef, Subquery, Sum, Value, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DailySales, Product, SalesBillItem
+
+
+WINDOW_DAYS = 90
+A_CUTOFF = 0.80
+B_CUTOFF = 0.95
+X_CUTOFF = 0.5
+Y_CUTOFF = 1.0
+TOLERANCE = 0.02
+
+
+def revenue_ranking(days=WINDOW_DAYS):
+    """
+    Every product with its revenue in the window, the running revenue total
+    (highest earners first) and the grand total - one query.
+    """
+    since = timezone.now() - timedelta(days=days)
+    money = DecimalField(max_digits=14, decimal_places=2)
+
+    revenue = SalesBillItem.objects.filter(
+        product=OuterRef('pk'),
+        bill__created_at__gte=since
+    ).order_by().values('product').annotate(total=Sum('total')).values('total')
+
+    return Product.objects.annotate(
+        revenue=Coalesce(Subquery(revenue), Value(0), output_field=money)
+    ).annotate(
+        running_revenue=Window(
+            Sum('revenue'),
+            order_by=[F('revenue').desc(), F('id').asc()],
+            frame=RowRange(start=None, end=0)
+        ),
+        total_revenue=Window(Sum('revenue')),
+    ).order_by('-revenue', 'id').values('id', 'revenue', 'running_revenue', 'total_revenue')
+
+
+def abc_classes(ranking):
+    """{product_id: (abc_class, revenue_share)} from revenue_ranking() rows"""
+    classes = {}
+    for row in ranking:
+        total = float(row['total_revenue'] or 0)
+        revenue = float(row['revenue'])
+        if total <= 0 or revenue <= 0:
+            classes[row['id']] = ('C', 0.0)
+            continue
+        # Share of revenue earned by the higher-ranked products
+        before = (float(row['running_revenue']) - revenue) / total
+        if before < A_CUTOFF:
+            abc = 'A'
+        elif before < B_CUTOFF:
+            abc = 'B'
+        else:
+            abc = 'C'
+        classes[row['id']] = (abc, round(revenue / total, 6))
+    return classes
+
+
+def xyz_classes(days=WINDOW_DAYS):
+    """{product_id: xyz_class} for products that sold in the window (others are Z)"""
+    since = timezone.localdate() - timedelta(days=days)
+    rows = DailySales.objects.filter(date__gt=since).values('product_id').annotate(
+        units=Sum('quantity', output_field=FloatField()),
+        squares=Sum(F('quantity') * F('quantity'), output_field=FloatField()),
+    ).order_by()
+
+    classes = {}
+    for row in rows:
+        # Days without sales count as zero demand
+        mean = row['units'] / days
+        variance = max(row['squares'] / days - mean ** 2, 0.0)
+        cv = (variance ** 0.5) / mean if mean > 0 else float('inf')
+        classes[row['product_id']] = 'X' if cv <= X_CUTOFF else 'Y' if cv <= Y_CUTOFF else 'Z'
+    return classes
+
+
+def classify(days=WINDOW_DAYS, tolerance=TOLERANCE, force=False):
+    """
+    Recompute ABC/XYZ and bulk-write the products whose class or share changed.
+    Skips writing when shares moved less than tolerance (unless force, or some
+    products have never been classified).
+    Returns {'drift', 'updated', 'skipped'}.
+    """
+    abc = abc_classes(revenue_ranking(days))
+    xyz = xyz_classes(days)
+    products = list(Product.objects.only(
+        'id', 'abc_classification', 'xyz_classification', 'revenue_share', 'abc_updated_at'
+    ))
+
+    drift = sum(abs(abc.get(p.id, ('C', 0.0))[1] - p.revenue_share) for p in products) / 2
+    unclassified = any(p.abc_updated_at is None for p in products)
+    if drift < tolerance and not force and not unclassified:
+        return {'drift': round(drift, 4), 'updated': 0, 'skipped': True}
+
+    now = timezone.now()
+    changed = []
+    for product in products:
+        abc_class, share = abc.get(product.id, ('C', 0.0))
+        xyz_class = xyz.get(product.id, 'Z')
+        if product.abc_updated_at is None or \
+                (product.abc_classification, product.xyz_classification, product.revenue_share) != (abc_class, xyz_class, share):
+            product.abc_classification = abc_class
+            product.xyz_classification = xyz_class
+            product.revenue_share = share
+            product.abc_updated_at = now
+            changed.append(product)
+
+    with transaction.atomic():
+        if changed:
+            Product.objects.bulk_update(
+                changed,
+                ['abc_classification', 'xyz_classification', 'revenue_share', 'abc_updated_at'],
+                batch_size=500
+            )
+            # bulk_update sends no signals
+            from . import dashboard_cache
+            dashboard_cache.bump_version_on_commit(dashboard_cache.PRODUCTS)
+
+    return {'drift': round(drift, 4), 'updated': len(changed), 'skipped': False}
+
+
+def ensure_current():
+    """Reclassify after new sales and once a day as the window rolls (called by the dashboards)"""
+    from . import dashboard_cache
+    return dashboard_cache.run_once_per_version(
+        'abc_classification',
+        classify,
+        depends_on=[dashboard_cache.SALES],
+        scope=timezone.localdate().isoformat()
+    )
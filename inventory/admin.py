@@ -1,15 +1,21 @@
 from django.contrib import admin
-from .models import Product, ExpiryStock, OrderQueue, SalesBill, SalesBillItem, UserProfile, Notification, ShopOwner, RestockOrder
+from .models import Product, ExpiryStock, OrderQueue, SalesBill, SalesBillItem, UserProfile, Notification, ShopOwner, RestockOrder, LowStockThreshold, LowStockAlert, DemandForecast, TrendScoreSnapshot, Store, StockTransfer, StockTransferLine
+
+@admin.register(Store)
+class StoreAdmin(admin.ModelAdmin):
+    list_display = ['name', 'location', 'is_warehouse', 'created_at']
+    list_filter = ['is_warehouse']
+    search_fields = ['name']
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ['user', 'role']
-    list_filter = ['role']
+    list_display = ['user', 'role', 'store']
+    list_filter = ['role', 'store']
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'cost_price', 'selling_price', 'new_price', 'calculated_abc_class', 'trend_score']
-    list_filter = ['category']
+    list_display = ['name', 'category', 'cost_price', 'selling_price', 'new_price', 'calculated_abc_class', 'xyz_classification', 'revenue_share', 'trend_score']
+    list_filter = ['category', 'abc_classification', 'xyz_classification']
     search_fields = ['name', 'category']
     
     def calculated_abc_class(self, obj):
@@ -18,8 +24,8 @@ class ProductAdmin(admin.ModelAdmin):
 
 @admin.register(ExpiryStock)
 class ExpiryStockAdmin(admin.ModelAdmin):
-    list_display = ['product', 'quantity', 'expiry_date', 'created_at']
-    list_filter = ['expiry_date', 'created_at']
+    list_display = ['product', 'quantity', 'expiry_date', 'store', 'created_at']
+    list_filter = ['store', 'expiry_date', 'created_at']
 
 @admin.register(OrderQueue)
 class OrderQueueAdmin(admin.ModelAdmin):
@@ -37,7 +43,7 @@ class SalesBillItemAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['title', 'notification_type', 'priority', 'target_user_role', 'product', 'is_read', 'created_at']
+    list_display = ['title', 'notification_type', 'priority', 'target_user_role', 'target_user', 'product', 'is_read', 'created_at']
     list_filter = ['notification_type', 'priority', 'target_user_role', 'is_read', 'created_at']
     search_fields = ['title', 'message']
     readonly_fields = ['created_at']
@@ -58,3 +64,38 @@ class RestockOrderAdmin(admin.ModelAdmin):
     list_filter = ['status', 'uploaded_at', 'processed_at']
     search_fields = ['shop_owner__name', 'shop_owner__shop_name']
     readonly_fields = ['uploaded_at', 'processed_at']
+
+@admin.register(LowStockThreshold)
+class LowStockThresholdAdmin(admin.ModelAdmin):
+    list_display = ['user', 'product', 'threshold', 'updated_at']
+    list_filter = ['user']
+    search_fields = ['product__name', 'user__username']
+
+@admin.register(LowStockAlert)
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ['user', 'product', 'quantity', 'threshold', 'created_at']
+    list_filter = ['user']
+    search_fields = ['product__name', 'user__username']
+
+@admin.register(DemandForecast)
+class DemandForecastAdmin(admin.ModelAdmin):
+    list_display = ['product', 'method', 'daily_demand', 'forecast_30d', 'safety_stock', 'reorder_point', 'fitted_at']
+    list_filter = ['method']
+    search_fields = ['product__name']
+    readonly_fields = ['fitted_at']
+
+@admin.register(TrendScoreSnapshot)
+class TrendScoreSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['product', 'date', 'score', 'ai_score', 'computed_score', 'simulated_score']
+    list_filter = ['date']
+    search_fields = ['product__name']
+
+class StockTransferLineInline(admin.TabularInline):
+    model = StockTransferLine
+    extra = 0
+
+@admin.register(StockTransfer)
+class StockTransferAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'from_user', 'to_user', 'created_by', 'created_at']
+    search_fields = ['reference']
+    inlines = [StockTransferLineInline]
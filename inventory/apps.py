@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'inventory'
\ No newline at end of file
+    name = 'inventory'
+    
+    def ready(self):
+        # Register signal handlers (dashboard cache invalidation, SQLite connection setup)
+        from . import signals  # noqa: F401
+        from . import sqlite_tuning  # noqa: F401
@@ -0,0 +1,171 @@
+"""
+Bill Repository
+Loads bills together with everything needed to render them (items, products,
+creator and store profile) in a fixed number of queries, and exposes one
+reusable DTO for the HTML, JSON, email and ledger views.
+
+Query budget: one query for the bills with creator and profile joined,
+one query for all their items with products joined - regardless of how
+many lines a bill has.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db.models import Prefetch
+
+from .models import SalesBill, SalesBillItem
+
+
+@dataclass
+class BillLineDTO:
+    product_id: int
+    product_name: str
+    quantity: int
+    price: Decimal
+    total: Decimal
+
+    def to_json(self):
+        return {
+            'product_name': self.product_name,
+            'quantity': self.quantity,
+            'price': float(self.price),
+            'total': float(self.total),
+        }
+
+
+@dataclass
+class BillDTO:
+    id: int
+    bill_number: str
+    created_at: datetime
+    total_amount: Decimal
+    verification_code: Optional[str]
+    user: Optional[object]
+    user_profile: Optional[object]
+    items: List[BillLineDTO] = field(default_factory=list)
+
+    @property
+    def total_quantity(self):
+        return sum(item.quantity for item in self.items)
+
+    @property
+    def created_by_name(self):
+        if not self.user:
+            return 'Unknown'
+        return self.user.first_name or self.user.username
+
+    @property
+    def store_name(self):
+        if self.user_profile:
+            return self.user_profile.full_identity
+        return self.user.username if self.user else 'N/A'
+
+    @property
+    def store_location(self):
+        if self.user_profile and self.user_profile.store_location:
+            return self.user_profile.store_location
+        return 'N/A'
+
+    def to_json(self, date_format='%d %B %Y, %I:%M %p'):
+        """JSON-ready dict used by the bill detail APIs"""
+        return {
+            'bill_number': self.bill_number,
+            'created_at': self.created_at.strftime(date_format),
+            'total_amount': float(self.total_amount),
+            'created_by': self.created_by_name,
+            'store_name': self.store_name,
+            'store_location': self.store_location,
+            'items': [item.to_json() for item in self.items],
+        }
+
+    def to_email_text(self, recipient_name, intro):
+        """Plain text email body listing every bill line"""
+        lines = [
+            '',
+            f'Dear {recipient_name},',
+            '',
+            intro,
+            '',
+            'Bill Details:',
+            '-------------',
+            f'Bill Number: {self.bill_number}',
+            f'Verification Code: {self.verification_code}',
+            f"Date: {self.created_at.strftime('%B %d, %Y at %H:%M')}",
+            f'Total Amount: ₹{self.total_amount}',
+            '',
+            'Products:',
+            '---------',
+        ]
+        for item in self.items:
+            lines.append(f'• {item.product_name}: {item.quantity} units @ ₹{item.price} = ₹{item.total}')
+        lines += [
+            '',
+            '---------',
+            f'Grand Total: ₹{self.total_amount}',
+            '',
+            f'IMPORTANT: Your Verification Code is {self.verification_code}',
+            'Please keep this code safe for your records.',
+            '',
+            'Thank you for your business!',
+            '',
+            'Best regards,',
+            'NeuroStock Inventory Management',
+            '',
+        ]
+        return '\n'.join(lines)
+
+
+class BillRepository:
+    """Single entry point for loading bills for rendering"""
+
+    @staticmethod
+    def items_prefetch():
+        """Prefetch for bill items with their product names joined in the same query"""
+        items = SalesBillItem.objects.select_related('product').only(
+            'id', 'bill_id', 'quantity', 'price', 'total', 'product__id', 'product__name'
+        ).order_by('id')
+        return Prefetch('items', queryset=items)
+
+    @classmethod
+    def queryset(cls, queryset=None):
+        """SalesBill queryset with creator, profile, items and products preloaded"""
+        if queryset is None:
+            queryset = SalesBill.objects.all()
+        return queryset.select_related('created_by__userprofile').prefetch_related(cls.items_prefetch())
+
+    @staticmethod
+    def to_dto(bill):
+        user = bill.created_by
+        user_profile = getattr(user, 'userprofile', None) if user else None
+        return BillDTO(
+            id=bill.id,
+            bill_number=bill.bill_number,
+            created_at=bill.created_at,
+            total_amount=bill.total_amount,
+            verification_code=bill.verification_code,
+            user=user,
+            user_profile=user_profile,
+            items=[
+                BillLineDTO(
+                    product_id=item.product_id,
+                    product_name=item.product.name,
+                    quantity=item.quantity,
+                    price=item.price,
+                    total=item.total,
+                )
+                for item in bill.items.all()
+            ],
+        )
+
+    @classmethod
+    def get(cls, **lookup):
+        """Load one bill as a DTO. Raises SalesBill.DoesNotExist."""
+        return cls.to_dto(cls.queryset().get(**lookup))
+
+    @classmethod
+    def list(cls, queryset):
+        """Load every bill of a (filtered, ordered, sliced) SalesBill queryset as DTOs"""
+        return [cls.to_dto(bill) for bill in cls.queryset(queryset)]
@@ -0,0 +1,193 @@
+"""
+Bill Service
+Creates a sales bill, its lines and the FEFO stock deductions behind them as
+one transaction:
+
+    create_bill(user, lines, idempotency_key=None)
+
+    1. a bill the user already created with idempotency_key is returned as
+       is, so a retried or double-submitted POST gets the same bill back
+    2. every live batch of the bill's products in the cashier's store (or,
+       for users without a store, their own batches) is fetched and
+       row-locked in one select_for_update query, and each line is checked
+       against them - lines without enough stock are rejected before
+       anything is written
+    3. the bill is numbered and inserted, and its SalesBillItem rows are
+       inserted with one bulk_create
+    4. stock is taken earliest expiry first with one bulk_update and logged
+       in one StockMovement insert (stock_ledger.record), which also keeps
+       StockOnHand and the low-stock alerts current
+
+No bill is written unless at least one line can be filled, so there is never
+a half-built bill to delete afterwards.
+"""
+
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ExpiryStock, SalesBill, SalesBillItem, StockMovement
+
+
+# Tries at a free bill number / verification code when a concurrent bill takes ours
+NUMBERING_ATTEMPTS = 3
+
+
+def next_bill_number():
+    """Next sequential BILL-XXXXXX number for single and multi-product bills"""
+    latest = SalesBill.objects.filter(bill_number__startswith='BILL-').order_by('-bill_number').first()
+    if latest is None:
+        return 'BILL-000001'
+    try:
+        next_number = int(latest.bill_number.split('-')[1]) + 1
+    except (ValueError, IndexError):
+        next_number = SalesBill.objects.count() + 1
+    return f"BILL-{next_number:06d}"
+
+
+def own_batches(user):
+    """Batches user sells from: their store's partition, or their own batches without a store"""
+    from .stores import store_of
+
+    store = store_of(user)
+    return ExpiryStock.objects.for_store(store) if store else ExpiryStock.objects.filter(user=user)
+
+
+def with_sellable_stock(products, user):
+    """Annotate a Product queryset with sellable_stock: the live units create_bill can bill for user"""
+    stock = own_batches(user).filter(
+        product=OuterRef('pk'), quantity__gt=0, expiry_date__gte=timezone.localdate()
+    ).order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    return products.annotate(sellable_stock=Coalesce(Subquery(stock, output_field=IntegerField()), 0))
+
+
+def find_bill(user, idempotency_key):
+    if not idempotency_key:
+        return None
+    return SalesBill.objects.filter(created_by=user, idempotency_key=idempotency_key).first()
+
+
+def create_bill(user, lines, idempotency_key=None):
+    """
+    Bill (product, quantity, unit_price, total) lines for user; callers
+    resolve the products once per request (product_lookup.resolve).
+
+    Returns (bill, created, rejected): created is False when idempotency_key
+    matched an earlier bill, rejected lists the lines that could not be
+    billed as "name (reason)". bill is None when no line could be billed.
+    """
+    from . import change_feed, dashboard_cache
+    from .stock_ledger import SALE, record, record_sale
+
+    idempotency_key = (idempotency_key or '').strip()[:64] or None
+    existing = find_bill(user, idempotency_key)
+    if existing is not None:
+        return existing, False, []
+
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        batches = defaultdict(list)
+        # Sell only from the cashier's store partition, never another shop's or the warehouse's stock
+        for batch in own_batches(user).select_for_update().filter(
+            product_id__in={product.id for product, _, _, _ in lines},
+            quantity__gt=0, expiry_date__gte=today
+        ).order_by('product_id', 'expiry_date', 'id'):
+            batches[batch.product_id].append(batch)
+        available = {product_id: sum(batch.quantity for batch in rows) for product_id, rows in batches.items()}
+
+        accepted = []
+        rejected = []
+        for product, quantity, unit_price, total in lines:
+            try:
+                quantity = int(quantity)
+                unit_price, total = Decimal(str(unit_price)), Decimal(str(total))
+            except (TypeError, ValueError, InvalidOperation):
+                rejected.append(f"{product.name} (Invalid quantity or price)")
+                continue
+            if quantity <= 0:
+                rejected.append(f"{product.name} (Quantity must be positive)")
+            elif available.get(product.id, 0) < quantity:
+                rejected.append(f"{product.name} (Available: {available.get(product.id, 0)}, Requested: {quantity})")
+            else:
+                available[product.id] -= quantity
+                accepted.append(SalesBillItem(product=product, quantity=quantity, price=unit_price, total=total))
+        if not accepted:
+            return None, False, rejected
+
+        bill = _insert_bill(user, idempotency_key, sum(item.total for item in accepted))
+        if bill.pk is None:
+            # The same key was committed by a concurrent request; nothing was written here
+            return find_bill(user, idempotency_key), False, []
+
+        for item in accepted:
+            item.bill = bill
+        SalesBillItem.objects.bulk_create(accepted)
+
+        # FEFO over the locked batches: {(product_id, owner_id): units}
+        taken = defaultdict(int)
+        touched = {}
+        sold = defaultdict(lambda: [0, 0])
+        for item in accepted:
+            remaining = item.quantity
+            for batch in batches[item.product_id]:
+                if remaining <= 0:
+                    break
+                take = min(batch.quantity, remaining)
+                batch.quantity -= take
+                remaining -= take
+                taken[(item.product_id, batch.user_id)] += take
+                touched[batch.id] = batch
+            sold[item.product_id][0] += item.quantity
+            sold[item.product_id][1] += 1
+        ExpiryStock.objects.bulk_update(touched.values(), ['quantity'])
+
+        record([
+            StockMovement(
+                product_id=product_id,
+                user=user,
+                movement_type='deduct',
+                quantity=units,
+                from_user_id=owner_id,
+                reason=SALE,
+                reference_number=bill.bill_number
+            )
+            for (product_id, owner_id), units in taken.items()
+        ])
+        for product_id, (units, bill_lines) in sold.items():
+            record_sale(product_id, units, lines=bill_lines)
+
+        # bulk_update sends no signals
+        dashboard_cache.bump_version_on_commit(*dashboard_cache.stock_groups(touched.values()))
+        for batch in touched.values():
+            change_feed.publish_stock(batch, 'updated')
+
+    return bill, True, rejected
+
+
+def _insert_bill(user, idempotency_key, total_amount):
+    """
+    Insert the bill under a fresh number and verification code. Returns an
+    unsaved bill if idempotency_key turned out to be taken meanwhile.
+    """
+    for attempt in range(NUMBERING_ATTEMPTS):
+        bill = SalesBill(
+            bill_number=next_bill_number(),
+            total_amount=total_amount,
+            created_by=user,
+            idempotency_key=idempotency_key
+        )
+        bill.generate_verification_code()
+        try:
+            with transaction.atomic():
+                bill.save()
+            return bill
+        except IntegrityError:
+            if find_bill(user, idempotency_key) is not None:
+                return SalesBill()
+            if attempt == NUMBERING_ATTEMPTS - 1:
+                raise
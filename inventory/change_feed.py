@@ -0,0 +1,184 @@
+"""
+Change Feed
+Append-only stream of notification, stock and order changes stored in
+ChangeEvent. Every event gets a monotonic id; clients keep the last id they
+saw (their cursor) and only ever fetch the events after it, over
+Server-Sent Events or long-polling - instead of reloading whole dashboards.
+
+Events are written after the surrounding transaction commits, so changes
+that are rolled back are never published. Ids are handed out at insert time,
+so on databases with concurrent writers (PostgreSQL) a lower id can commit
+after a higher one; readers only see events older than
+CHANGE_FEED_COMMIT_LAG seconds so a cursor never moves past an id that is
+still about to commit.
+
+Every open dashboard holds a request while it waits: long-poll (the default
+transport) for at most CHANGE_FEED_MAX_WAIT seconds, an SSE stream
+(CHANGE_FEED_TRANSPORT=sse) for CHANGE_FEED_STREAM_SECONDS. SSE needs
+threaded or async workers (gunicorn --threads), or one tab ties up a sync
+worker.
+"""
+
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChangeEvent
+
+
+# Topics
+NOTIFICATION = 'notification'
+STOCK = 'stock'
+ORDER = 'order'
+
+DEFAULT_LIMIT = 100
+POLL_INTERVAL = 1.0  # seconds between checks while waiting for new events
+
+
+def transport():
+    """'poll' (long-poll, works on sync workers) or 'sse'"""
+    return getattr(settings, 'CHANGE_FEED_TRANSPORT', 'poll')
+
+
+def max_wait():
+    """Longest a long-poll request is held open (seconds)"""
+    return getattr(settings, 'CHANGE_FEED_MAX_WAIT', 10)
+
+
+def stream_seconds():
+    """How long one SSE stream stays open before the browser reconnects"""
+    return getattr(settings, 'CHANGE_FEED_STREAM_SECONDS', 25)
+
+
+def commit_lag():
+    return timedelta(seconds=getattr(settings, 'CHANGE_FEED_COMMIT_LAG', 1.0))
+
+
+def _create_event(topic, action, object_id, payload, target_user_role, target_user_id):
+    try:
+        ChangeEvent.objects.create(
+            topic=topic,
+            action=action,
+            object_id=object_id,
+            payload=payload or {},
+            target_user_role=target_user_role,
+            target_user_id=target_user_id
+        )
+    except IntegrityError:
+        # Target user was deleted in the same transaction - nobody left to notify
+        pass
+
+
+def publish(topic, action, object_id=None, payload=None, target_user_role='all', target_user=None):
+    """Append an event to the feed once the current transaction commits"""
+    target_user_id = getattr(target_user, 'id', target_user)
+    transaction.on_commit(
+        lambda: _create_event(topic, action, object_id, payload, target_user_role, target_user_id)
+    )
+
+
+# ----------------------------------------------------------------------------
+# Payloads for the models that feed the stream
+# ----------------------------------------------------------------------------
+
+def publish_notification(notification, action):
+    publish(NOTIFICATION, action, notification.id, {
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'priority': notification.priority,
+        'product_id': notification.product_id,
+        'is_read': notification.is_read,
+    }, target_user_role=notification.target_user_role, target_user=notification.target_user_id)
+
+
+def publish_stock(stock, action):
+    # Batches without an owner are company stock and visible to everyone
+    publish(STOCK, action, stock.id, {
+        'product_id': stock.product_id,
+        'quantity': stock.quantity,
+        'expiry_date': str(stock.expiry_date),
+        'user_id': stock.user_id,
+    }, target_user=stock.user_id)
+
+
+def publish_order(order, action, previous_status=None):
+    publish(ORDER, action, order.id, {
+        'product_id': order.product_id,
+        'quantity': order.quantity,
+        'status': order.status,
+        'previous_status': previous_status,
+    })
+
+
+# ----------------------------------------------------------------------------
+# Reading the feed
+# ----------------------------------------------------------------------------
+
+def get_user_role(user):
+    if user.is_superuser:
+        return 'admin'
+    profile = getattr(user, 'userprofile', None)
+    return profile.role if profile else None
+
+
+def committed_events():
+    """Events old enough that no lower id can still be committing"""
+    lag = commit_lag()
+    if not lag:
+        return ChangeEvent.objects.all()
+    return ChangeEvent.objects.filter(created_at__lte=timezone.now() - lag)
+
+
+def visible_events(user, role=None):
+    """Events this user may see - admins see everything"""
+    role = role or get_user_role(user)
+    events = committed_events()
+    if role != 'admin':
+        events = events.filter(
+            Q(target_user_role__in=[role, 'all']),
+            Q(target_user__isnull=True) | Q(target_user=user)
+        )
+    return events
+
+
+def head_cursor():
+    """Id of the newest event - the starting cursor for a freshly loaded page"""
+    return committed_events().order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def page_context():
+    """Template context for change_feed.js: starting cursor and transport"""
+    return {'change_cursor': head_cursor(), 'change_transport': transport()}
+
+
+def events_since(user, cursor, role=None, limit=DEFAULT_LIMIT):
+    return list(visible_events(user, role).filter(id__gt=cursor).order_by('id')[:limit])
+
+
+def wait_for_events(user, cursor, timeout=None, role=None, limit=DEFAULT_LIMIT):
+    """Long-poll: return as soon as there are events after cursor, or [] after timeout"""
+    timeout = max_wait() if timeout is None else min(timeout, max_wait())
+    deadline = time.monotonic() + timeout
+    while True:
+        events = events_since(user, cursor, role, limit)
+        if events or time.monotonic() >= deadline:
+            return events
+        time.sleep(POLL_INTERVAL)
+
+
+def format_sse(event):
+    """Server-Sent Events frame; the id lets EventSource resume via Last-Event-ID"""
+    return f"id: {event.id}\nevent: {event.topic}\ndata: {json.dumps(event.to_json())}\n\n"
+
+
+def prune(days=7):
+    """Delete events older than the given number of days, returns the count"""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
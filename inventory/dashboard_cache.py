@@ -0,0 +1,137 @@
+"""
+Dashboard Fragment Cache
+Caches the expensive parts of the dashboards (product tables, KPI cards,
+notification lists, sales summaries) under versioned keys.
+
+Every fragment declares which data groups it depends on. Saving or deleting
+a model bumps the version of its group (see signals.py), which changes the
+key of every dependent fragment - stale entries are never read again and
+simply expire. Works with any Django cache backend (locmem, file, redis);
+use a shared backend (file or redis) when running several worker processes.
+
+Writes also bump the group narrowed to the store or user they belong to
+(scoped(STOCK, 'store:3'), scoped(NOTIFICATIONS, 'user:5')), so per-store and
+per-user fragments depend on their own scope only and stay cached while
+other stores bill. Every key also carries the EVERYTHING version, bumped
+when the data is replaced wholesale (snapshot restore).
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+# Data groups fragments can depend on
+PRODUCTS = 'products'
+STOCK = 'stock'
+SALES = 'sales'
+ORDERS = 'orders'
+NOTIFICATIONS = 'notifications'
+EVERYTHING = 'everything'  # part of every key
+
+KEY_PREFIX = 'dashboard'
+
+
+def get_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def _version_key(group):
+    return f'{KEY_PREFIX}:version:{group}'
+
+
+def get_versions(groups):
+    """Current version of each group; unseen groups start at a time-based value"""
+    cache = get_cache()
+    keys = {group: _version_key(group) for group in groups}
+    found = cache.get_many(keys.values())
+
+    versions = {}
+    for group, key in keys.items():
+        if key not in found:
+            # Time-based start so a version evicted from the cache
+            # can never fall back to a number used before
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+        versions[group] = found[key]
+    return versions
+
+
+def bump_version(*groups):
+    """Invalidate every fragment that depends on the given groups"""
+    cache = get_cache()
+    for group in groups:
+        key = _version_key(group)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_version_on_commit(*groups):
+    """Bump once the surrounding transaction commits (immediately in autocommit)"""
+    transaction.on_commit(lambda: bump_version(*groups))
+
+
+def scoped(group, scope):
+    """A group narrowed to one store or user, e.g. scoped(STOCK, 'store:3')"""
+    return f'{group}:{scope}'
+
+
+def stock_scope(store_id, user_id):
+    """Batches belong to their store; batches of users without a store to their owner"""
+    return f'store:{store_id}' if store_id else f'user:{user_id}'
+
+
+def stock_groups(batches):
+    """STOCK plus the scoped groups of the given batches, for writes that send no signals"""
+    return {STOCK} | {scoped(STOCK, stock_scope(batch.store_id, batch.user_id)) for batch in batches}
+
+
+def notification_groups(role, user_id):
+    """Scoped notification groups a user of this role sees: their role's, everyone's, their own"""
+    return [scoped(NOTIFICATIONS, scope) for scope in (f'role:{role}', 'role:all', f'user:{user_id}')]
+
+
+def fragment_key(name, depends_on, scope=None):
+    depends_on = set(depends_on) | {EVERYTHING}
+    versions = get_versions(depends_on)
+    version_part = '.'.join(f'{group}{versions[group]}' for group in sorted(depends_on))
+    scope_part = scope if scope is not None else 'all'
+    return f'{KEY_PREFIX}:{name}:{scope_part}:{version_part}'
+
+
+def get_fragment(name, compute, depends_on, scope=None, timeout=None):
+    """
+    Return the cached value of a fragment, computing and storing it on a miss.
+    scope separates per-user (or per-role/per-day) variants of the same fragment.
+    """
+    cache = get_cache()
+    key = fragment_key(name, depends_on, scope)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, get_timeout() if timeout is None else timeout)
+    return value
+
+
+def run_once_per_version(name, task, depends_on, scope=None):
+    """
+    Run a maintenance task only when its inputs changed since the last run.
+    Returns True if the task ran.
+    """
+    cache = get_cache()
+    key = fragment_key(f'task:{name}', depends_on, scope)
+    if cache.add(key, True, get_timeout()):
+        task()
+        # The task's own writes bump the versions it depends on - record those
+        # as seen too, otherwise the next request would run it again
+        cache.set(fragment_key(f'task:{name}', depends_on, scope), True, get_timeout())
+        return True
+    return False
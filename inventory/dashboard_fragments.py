@@ -0,0 +1,337 @@
+"""
+Dashboard Fragments
+Data blocks shared by the dashboards, each computed with a fixed number of
+queries and served from the versioned dashboard cache while unchanged.
+"""
+
+from datetime import date
+
+from django.db.models import Case, When, IntegerField, Count, Sum, Q, OuterRef, Subquery
+from django.db.models.functions import TruncMonth
+
+from . import dashboard_cache, stores
+from .models import Product, ExpiryStock, OrderQueue, SalesBill, Notification
+
+
+def attach_stock_totals(products, batches=None):
+    """
+    Set total_stock on already loaded products with one grouped query;
+    batches narrows the count (e.g. to one store's partition)
+    """
+    products = [product for product in products if product is not None]
+    batches = ExpiryStock.objects.all() if batches is None else batches
+    totals = dict(
+        batches.filter(
+            product__in=products,
+            quantity__gt=0,
+            expiry_date__gte=date.today()
+        ).order_by().values_list('product').annotate(total=Sum('quantity'))
+    )
+    for product in products:
+        product.annotated_total_stock = totals.get(product.id, 0)
+    return products
+
+
+# ----------------------------------------------------------------------------
+# Inventory dashboard
+# ----------------------------------------------------------------------------
+
+def _own_stock(user):
+    """The user's store id, its batches (their own without a store) and its cache group"""
+    profile = getattr(user, 'userprofile', None)  # cached on the user after the first call
+    store_id = profile.store_id if profile else None
+    batches = ExpiryStock.objects.for_store(store_id) if store_id else ExpiryStock.objects.filter(user=user)
+    group = dashboard_cache.scoped(dashboard_cache.STOCK, dashboard_cache.stock_scope(store_id, user.id))
+    return store_id, batches, group
+
+
+def _compute_inventory_notifications(user):
+    # Role-wide notifications plus the ones addressed to this user (their own low-stock alerts)
+    base = Notification.objects.filter(
+        Q(target_user__isnull=True) | Q(target_user=user),
+        target_user_role__in=['inventory', 'all']
+    )
+
+    # Prioritize admin messages first, then by priority, then by creation date
+    unread = base.filter(is_read=False).annotate(
+        priority_order=Case(
+            When(priority='urgent', then=4),
+            When(priority='high', then=3),
+            When(priority='medium', then=2),
+            When(priority='low', then=1),
+            default=0,
+            output_field=IntegerField()
+        ),
+        admin_priority=Case(
+            When(notification_type='admin_message', then=1),
+            default=0,
+            output_field=IntegerField()
+        )
+    ).select_related('product').order_by('-admin_priority', '-priority_order', '-created_at')
+
+    counts = dict(unread.order_by().values_list('priority').annotate(count=Count('id')))
+
+    notifications = list(unread[:10])
+    read_notifications = list(base.filter(is_read=True).select_related('product').order_by('-created_at')[:20])
+    # Stock shown next to each alert is the user's own store's
+    attach_stock_totals([notification.product for notification in notifications], _own_stock(user)[1])
+
+    return {
+        'notifications': notifications,
+        'read_notifications': read_notifications,
+        'urgent_count': counts.get('urgent', 0),
+        'high_count': counts.get('high', 0),
+        'total_notifications': sum(counts.values()),
+    }
+
+
+def inventory_notifications(user):
+    """Unread/read notification lists and counters for an inventory user"""
+    return dashboard_cache.get_fragment(
+        'inventory_notifications',
+        lambda: _compute_inventory_notifications(user),
+        depends_on=dashboard_cache.notification_groups('inventory', user.id) + [_own_stock(user)[2]],
+        scope=user.id,
+    )
+
+
+def _compute_inventory_products(user):
+    # The user's store partition; users without a store see their own batches
+    store_id, own_batches, _ = _own_stock(user)
+    products = list(Product.objects.with_store_stock(store_id) if store_id else Product.objects.with_user_stock(user))
+
+    # Count only orders that were actually created by admin and are still pending/ordered
+    pending_orders = dict(
+        OrderQueue.objects.filter(
+            status__in=['pending', 'ordered'],
+            ordered_by__isnull=False,  # Only admin-created orders
+            message_received=True  # Only acknowledged orders
+        ).order_by().values_list('product').annotate(count=Count('id'))
+    )
+
+    products_with_data = []
+    for product in products:
+        product.pending_orders_count = pending_orders.get(product.id, 0)
+        if store_id:
+            # The "My Stock" column reads user_stock; for store users that is the store's stock
+            product.user_stock = product.store_stock
+        products_with_data.append({
+            'id': product.id,
+            'name': product.name,
+            'user_stock': product.user_stock,
+            'pending_orders': product.pending_orders_count
+        })
+
+    # Show only the user's own store's stock in recent stock
+    recent_stock = list(own_batches.select_related('product').order_by('-created_at')[:10])
+
+    return {
+        'products': products,
+        'products_with_data': products_with_data,
+        'recent_stock': recent_stock,
+    }
+
+
+def inventory_products(user):
+    """Product table with the user's store stock plus recent stock entries"""
+    # Only this store's stock: other stores' bills leave the fragment cached
+    return dashboard_cache.get_fragment(
+        'inventory_products',
+        lambda: _compute_inventory_products(user),
+        depends_on=[dashboard_cache.PRODUCTS, _own_stock(user)[2], dashboard_cache.ORDERS],
+        scope=f'{user.id}:{date.today().isoformat()}',
+    )
+
+
+# ----------------------------------------------------------------------------
+# Trend dashboard
+# ----------------------------------------------------------------------------
+
+def _compute_trend_overview():
+    products = list(Product.objects.with_stock_totals())
+
+    high_demand = sum(1 for product in products if product.trend_score >= 7)
+    moderate_demand = sum(1 for product in products if 4 <= product.trend_score < 7)
+    low_demand = sum(1 for product in products if product.trend_score < 4)
+
+    # Products that need price adjustments
+    price_actions_count = sum(
+        1 for product in products
+        if (product.trend_score >= 7 and product.total_stock >= 100) or
+           (product.trend_score < 3 and product.total_stock > 150)
+    )
+
+    updates = [product.last_trend_update for product in products if product.last_trend_update]
+
+    return {
+        'products': products,
+        'high_demand_count': high_demand,
+        'moderate_demand_count': moderate_demand,
+        'low_demand_count': low_demand,
+        'price_actions_count': price_actions_count,
+        'latest_update': max(updates) if updates else None,
+    }
+
+
+def trend_overview():
+    """Product list with stock totals and the trend KPI cards"""
+    return dashboard_cache.get_fragment(
+        'trend_overview',
+        _compute_trend_overview,
+        depends_on=[dashboard_cache.PRODUCTS, dashboard_cache.STOCK],
+        scope=date.today().isoformat(),
+    )
+
+
+# ----------------------------------------------------------------------------
+# Admin dashboard panels
+# ----------------------------------------------------------------------------
+
+def _compute_admin_stock_analysis():
+    today = date.today()
+    nearest_expiry = ExpiryStock.objects.filter(
+        product=OuterRef('pk'),
+        quantity__gt=0,
+        expiry_date__gte=today
+    ).order_by('expiry_date').values('expiry_date')[:1]
+
+    products = Product.objects.with_stock_totals().annotate(nearest_expiry=Subquery(nearest_expiry))
+    company = stores.warehouse()
+    if company:
+        products = products.with_store_stock(company)
+
+    stock_analysis = []
+    for product in products:
+        total_stock = product.total_stock
+        days_to_expiry = (product.nearest_expiry - today).days if product.nearest_expiry else None
+
+        condition = "Normal"
+        if total_stock > 100 and product.trend_score < 3:
+            condition = "Overstock"
+        elif total_stock < 10:
+            condition = "Reorder needed"
+        elif days_to_expiry and days_to_expiry < 15:
+            condition = "Near expiry"
+        elif days_to_expiry and days_to_expiry < 0:
+            condition = "Expired"
+
+        stock_analysis.append({
+            'product': product,
+            'total_stock': total_stock,
+            'company_stock': product.store_stock if company else 0,
+            'days_to_expiry': days_to_expiry,
+            'condition': condition
+        })
+
+    return {'stock_analysis': stock_analysis}
+
+
+def admin_stock_analysis():
+    """Stock condition of every product with company stock and nearest expiry"""
+    return dashboard_cache.get_fragment(
+        'admin_stock_analysis',
+        _compute_admin_stock_analysis,
+        depends_on=[dashboard_cache.PRODUCTS, dashboard_cache.STOCK],
+        scope=date.today().isoformat(),
+    )
+
+
+def _compute_admin_billing():
+    from django.contrib.auth.models import User
+
+    today = date.today()
+    bills = SalesBill.objects.filter(created_by__isnull=False)
+
+    totals = bills.aggregate(
+        count=Count('id'),
+        total=Sum('total_amount'),
+        today=Count('id', filter=Q(created_at__date=today)),
+        month=Count('id', filter=Q(created_at__year=today.year, created_at__month=today.month)),
+    )
+
+    # Monthly summaries by store, newest month first
+    monthly = list(bills.annotate(month=TruncMonth('created_at')).values('created_by', 'month').annotate(
+        bill_count=Count('id'),
+        total_amount=Sum('total_amount')
+    ).order_by('-month'))
+    creators = User.objects.select_related('userprofile').in_bulk({row['created_by'] for row in monthly})
+
+    monthly_summaries = []
+    for row in monthly:
+        user = creators[row['created_by']]
+        try:
+            store_name = user.userprofile.full_identity
+        except User.userprofile.RelatedObjectDoesNotExist:
+            # If user has no profile, use username
+            store_name = user.username
+        total = float(row['total_amount'] or 0)
+        monthly_summaries.append({
+            'store_name': store_name,
+            'month': row['month'].strftime('%B %Y'),
+            'bill_count': row['bill_count'],
+            'total_amount': total,
+            'avg_amount': total / row['bill_count'] if row['bill_count'] > 0 else 0
+        })
+
+    return {
+        'billing_inventory_users': list(User.objects.filter(userprofile__role='inventory').select_related('userprofile')),
+        'total_bills_count': totals['count'],
+        'total_revenue': totals['total'] or 0,
+        'today_bills_count': totals['today'],
+        'month_bills_count': totals['month'],
+        'available_months': sorted({row['month'].strftime('%Y-%m') for row in monthly}, reverse=True),
+        'monthly_summaries': monthly_summaries,
+    }
+
+
+def admin_billing():
+    """Store bill totals and per-store monthly summaries (the bill list is paged by the view)"""
+    return dashboard_cache.get_fragment(
+        'admin_billing',
+        _compute_admin_billing,
+        depends_on=[dashboard_cache.SALES],
+        scope=date.today().isoformat(),
+    )
+
+
+# ----------------------------------------------------------------------------
+# Billing
+# ----------------------------------------------------------------------------
+
+def _compute_sales_summary(user):
+    today = date.today()
+
+    # Show only bills created by the current user
+    recent_bills = list(
+        SalesBill.objects.filter(created_by=user).prefetch_related('items__product').order_by('-created_at')[:10]
+    )
+
+    today_totals = SalesBill.objects.filter(
+        created_at__date=today,
+        created_by=user
+    ).aggregate(count=Count('id'), total=Sum('total_amount'))
+
+    monthly_totals = SalesBill.objects.filter(
+        created_at__year=today.year,
+        created_at__month=today.month,
+        created_by=user
+    ).aggregate(count=Count('id'), total=Sum('total_amount'))
+
+    return {
+        'recent_bills': recent_bills,
+        'today_sales_count': today_totals['count'],
+        'today_sales_amount': today_totals['total'] or 0,
+        'monthly_sales_count': monthly_totals['count'],
+        'monthly_sales_amount': monthly_totals['total'] or 0,
+        'current_month_name': today.strftime('%B %Y'),
+    }
+
+
+def sales_summary(user):
+    """Recent bills and today/month sales totals for one user"""
+    return dashboard_cache.get_fragment(
+        'sales_summary',
+        lambda: _compute_sales_summary(user),
+        depends_on=[dashboard_cache.scoped(dashboard_cache.SALES, f'user:{user.id}')],
+        scope=f'{user.id}:{date.today().isoformat()}',
+    )
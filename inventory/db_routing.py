@@ -0,0 +1,90 @@
+"""
+Read Replica Routing
+Read-heavy pages read from a replica database when DATABASE_REPLICA_URL is
+set; everything else, and every write, uses the primary ('default').
+
+    @replica_reads                  marks a view whose GET/HEAD requests may
+                                    read from the replica
+    ReplicaRouter                   DATABASE_ROUTERS entry; sends reads to the
+                                    replica only inside a @replica_reads view
+    ReadYourWritesMiddleware        after a user's POST (or other unsafe
+                                    request) sets a short-lived cookie that
+                                    keeps their reads on the primary for
+                                    REPLICA_PIN_SECONDS, so they see their own
+                                    changes despite replication lag
+
+Within a request the first write moves the rest of its reads to the primary,
+and reads inside a transaction on the primary stay there. Sessions are always
+read from the primary. Without a replica alias every read goes to the
+primary, so nothing changes.
+"""
+
+import contextvars
+import functools
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+REPLICA = 'replica'
+PIN_COOKIE = 'db_primary_pin'
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def replica_reads(view):
+    """Let a view's safe requests read from the replica"""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD') or not replica_configured()
+                or request.COOKIES.get(PIN_COOKIE)):
+            return view(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # A session created moments ago at login may not have replicated yet
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        if _replica_reads.get() and not transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block:
+            return REPLICA
+        # Explicit, so related lookups from replica-loaded objects come back to the primary
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Read your own write for the rest of this request
+        _replica_reads.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema from the primary
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (replica_configured() and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and request.user.is_authenticated):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
-from .models import Product, ExpiryStock, OrderQueue, SalesBill, SalesBillItem, UserProfile, ShopOwner, RestockOrder
+from .models import Product, ExpiryStock, OrderQueue, SalesBill, SalesBillItem, UserProfile, ShopOwner, RestockOrder, normalize_name
 
 class SignUpForm(UserCreationForm):
     first_name = forms.CharField(
@@ -104,7 +104,7 @@ class StockEntryForm(forms.ModelForm):
     def clean_product(self):
         product_name = self.cleaned_data['product']
         try:
-            product = Product.objects.get(name__iexact=product_name)
+            product = Product.objects.get(name_key=normalize_name(product_name))
             return product
         except Product.DoesNotExist:
             raise forms.ValidationError(f"Product '{product_name}' not found. Please select from the dropdown.")
@@ -129,7 +129,7 @@ class OrderForm(forms.ModelForm):
     def clean_product(self):
         product_name = self.cleaned_data['product']
         try:
-            product = Product.objects.get(name__iexact=product_name)
+            product = Product.objects.get(name_key=normalize_name(product_name))
             return product
         except Product.DoesNotExist:
             raise forms.ValidationError(f"Product '{product_name}' not found. Please select from the dropdown.")
@@ -148,7 +148,7 @@ class DiscountForm(forms.Form):
     def clean_product(self):
         product_name = self.cleaned_data['product']
         try:
-            product = Product.objects.get(name__iexact=product_name)
+            product = Product.objects.get(name_key=normalize_name(product_name))
             return product
         except Product.DoesNotExist:
             raise forms.ValidationError(f"Product '{product_name}' not found. Please select from the dropdown.")
@@ -167,7 +167,7 @@ class SalesForm(forms.Form):
     def clean_product(self):
         product_name = self.cleaned_data['product']
         try:
-            product = Product.objects.get(name__iexact=product_name)
+            product = Product.objects.get(name_key=normalize_name(product_name))
             return product
         except Product.DoesNotExist:
             raise forms.ValidationError(f"Product '{product_name}' not found. Please select from the dropdown.")
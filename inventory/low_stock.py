@@ -0,0 +1,144 @@
+"""
+Low Stock Thresholds
+Compares every owner's on-hand stock (StockOnHand) with their own
+LowStockThreshold for the product - or LOW_STOCK_DEFAULT_THRESHOLD when they
+have not set one - in one set-based query.
+
+Open breaches are kept in LowStockAlert, so a store is notified once when it
+drops below its threshold (not on every check) and the alert is withdrawn
+when stock recovers. The stock ledger re-evaluates just the (product, owner)
+pairs an operation touched; generate_notifications() runs the full pass.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import LowStockAlert, LowStockThreshold, Notification, StockOnHand
+
+
+def get_default_threshold():
+    return getattr(settings, 'LOW_STOCK_DEFAULT_THRESHOLD', 20)
+
+
+def _pair_filter(pairs, product_field='product_id', user_field='user_id'):
+    match = Q()
+    for product_id, user_id in pairs:
+        match |= Q(**{product_field: product_id, user_field: user_id})
+    return match
+
+
+def on_hand_with_thresholds(pairs=None, product_ids=None):
+    """Owned StockOnHand rows annotated with the owner's threshold for the product"""
+    thresholds = LowStockThreshold.objects.filter(
+        user=OuterRef('user'),
+        product=OuterRef('product')
+    ).values('threshold')[:1]
+
+    rows = StockOnHand.objects.filter(user__isnull=False).annotate(
+        threshold=Coalesce(Subquery(thresholds), Value(get_default_threshold()), output_field=IntegerField())
+    )
+    if pairs is not None:
+        rows = rows.filter(_pair_filter(pairs))
+    if product_ids is not None:
+        rows = rows.filter(product_id__in=product_ids)
+    return rows
+
+
+def _alert_notification(row):
+    quantity, threshold, name = row['quantity'], row['threshold'], row['product__name']
+    if quantity <= 0:
+        priority = 'urgent'
+        title = f"🚨 OUT OF STOCK: {name}"
+        action_message = "IMMEDIATE ACTION REQUIRED: Product is completely out of stock!"
+    elif quantity < 5:
+        priority = 'high'
+        title = f"⚠️ CRITICAL LOW: {name} ({quantity} units)"
+        action_message = "URGENT: Stock is critically low!"
+    else:
+        priority = 'medium'
+        title = f"📦 Low Stock: {name} ({quantity} units)"
+        action_message = "Consider reordering soon to avoid stockout"
+
+    # The company warehouse is watched by admins, stores by their own user
+    if row['user__userprofile__role'] == 'admin':
+        target_user_role, target_user_id = 'admin', None
+    else:
+        target_user_role, target_user_id = 'inventory', row['user_id']
+
+    return Notification.objects.create(
+        title=title,
+        message=f"Product: {name}\nYour Stock: {max(quantity, 0)} units\nAlert Threshold: {threshold} units\n\n"
+                f"{action_message}\nRecommendation: Reorder to maintain adequate inventory levels",
+        notification_type='low_stock',
+        priority=priority,
+        target_user_role=target_user_role,
+        target_user_id=target_user_id,
+        product_id=row['product_id']
+    )
+
+
+def evaluate(pairs=None, product_ids=None):
+    """
+    Open alerts for new breaches and close alerts that recovered, for the given
+    (product_id, user_id) pairs, the given products, or everything.
+    Returns {'opened': n, 'closed': n}.
+    """
+    if pairs is not None:
+        pairs = {(product_id, user_id) for product_id, user_id in pairs if user_id is not None}
+        if not pairs:
+            return {'opened': 0, 'closed': 0}
+
+    rows = on_hand_with_thresholds(pairs, product_ids)
+    breached = {
+        (row['product_id'], row['user_id']): row
+        for row in rows.filter(quantity__lt=F('threshold')).values(
+            'product_id', 'user_id', 'quantity', 'threshold', 'product__name', 'user__userprofile__role'
+        )
+    }
+
+    alerts = LowStockAlert.objects.all()
+    if pairs is not None:
+        alerts = alerts.filter(_pair_filter(pairs))
+    if product_ids is not None:
+        alerts = alerts.filter(product_id__in=product_ids)
+    open_alerts = {(alert.product_id, alert.user_id): alert for alert in alerts}
+
+    # Recovered: back at or above the threshold. Pairs whose on-hand row is
+    # gone (rebuilt projection, nothing left) stay open.
+    recovered_keys = set()
+    if open_alerts:
+        recovered_keys = set(
+            on_hand_with_thresholds(open_alerts.keys())
+            .filter(quantity__gte=F('threshold'))
+            .values_list('product_id', 'user_id')
+        )
+    recovered = [open_alerts[key] for key in recovered_keys]
+
+    opened = 0
+    with transaction.atomic():
+        for key, row in breached.items():
+            alert = open_alerts.get(key)
+            if alert is not None and alert.notification_id is not None:
+                continue  # Already notified
+            notification = _alert_notification(row)
+            if alert is None:
+                LowStockAlert.objects.create(
+                    product_id=row['product_id'],
+                    user_id=row['user_id'],
+                    quantity=row['quantity'],
+                    threshold=row['threshold'],
+                    notification=notification
+                )
+            else:
+                # Its notification was cleaned up while the breach lasted - remind again
+                alert.quantity, alert.threshold, alert.notification = row['quantity'], row['threshold'], notification
+                alert.save(update_fields=['quantity', 'threshold', 'notification'])
+            opened += 1
+
+        if recovered:
+            Notification.objects.filter(id__in=[a.notification_id for a in recovered if a.notification_id]).delete()
+            LowStockAlert.objects.filter(id__in=[a.id for a in recovered]).delete()
+
+    return {'opened': opened, 'closed': len(recovered)}
@@ -0,0 +1,62 @@
+"""
+Management command to reprice many products at once
+Run with: python manage.py bulk_reprice --category Dairy --rule discount --percent 10 --ending 0.99
+Shows a preview only; add --apply to write the new prices.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from inventory.pricing import select_products, reprice, PricingError, RULES
+
+
+class Command(BaseCommand):
+    help = 'Reprice all products matching a filter with one UPDATE (dry run unless --apply)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', help='Product category (case-insensitive)')
+        parser.add_argument('--abc', choices=['A', 'B', 'C'], help='ABC class')
+        parser.add_argument('--trend-min', type=float)
+        parser.add_argument('--trend-max', type=float)
+        parser.add_argument('--stock-min', type=int)
+        parser.add_argument('--stock-max', type=int)
+        parser.add_argument('--rule', choices=RULES, default='discount')
+        parser.add_argument('--percent', type=float, help='Discount or markup percent')
+        parser.add_argument('--ending', help='Round to a price ending, e.g. 0.99')
+        parser.add_argument('--floor-at-cost', action='store_true', help='Never price below cost')
+        parser.add_argument('--apply', action='store_true', help='Write the new prices (default is a dry run)')
+        parser.add_argument('--preview', type=int, default=20, help='Number of products to list')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            products = select_products(
+                category=options['category'],
+                abc=options['abc'],
+                trend_min=options['trend_min'],
+                trend_max=options['trend_max'],
+                stock_min=options['stock_min'],
+                stock_max=options['stock_max']
+            )
+            result = reprice(
+                products,
+                rule=options['rule'],
+                percent=options['percent'],
+                ending=options['ending'],
+                floor_at_cost=options['floor_at_cost'],
+                dry_run=not options['apply'],
+                preview_limit=options['preview']
+            )
+        except PricingError as e:
+            raise CommandError(str(e))
+        duration = time.perf_counter() - started
+
+        for row in result['preview']:
+            self.stdout.write(f"  {row['name']} ({row['category']}): ₹{row['old_price']:.2f} → ₹{row['new_price']:.2f}")
+        if result['matched'] > len(result['preview']):
+            self.stdout.write(f"  ... and {result['matched'] - len(result['preview'])} more")
+
+        if result['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run: {result['matched']} products would be repriced. Add --apply to write."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✓ Repriced {result['updated']} products in {duration:.2f}s"))
@@ -0,0 +1,32 @@
+"""
+Management command to reclassify products ABC/XYZ by revenue share and demand variability
+Run with: python manage.py classify_abc
+"""
+
+from django.core.management.base import BaseCommand
+from inventory.abc_analysis import classify, WINDOW_DAYS, TOLERANCE
+
+
+class Command(BaseCommand):
+    help = 'Recompute ABC (revenue share) and XYZ (demand variability) classes for all products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=WINDOW_DAYS, help='Days of sales to rank revenue over')
+        parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                            help='Skip writing when less than this share of revenue moved (e.g. 0.02)')
+        parser.add_argument('--force', action='store_true', help='Write classes even below the tolerance')
+
+    def handle(self, *args, **options):
+        result = classify(options['days'], options['tolerance'], options['force'])
+
+        if result['skipped']:
+            self.stdout.write(f"ℹ️ Revenue shares drifted {result['drift']:.2%} (< {options['tolerance']:.2%}) - classes unchanged")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Reclassified {result['updated']} products (revenue drift {result['drift']:.2%})"
+        ))
+        from inventory.models import Product
+        from django.db.models import Count
+        for row in Product.objects.values('abc_classification', 'xyz_classification').annotate(n=Count('id')).order_by('abc_classification', 'xyz_classification'):
+            self.stdout.write(f"  {row['abc_classification']}{row['xyz_classification']}: {row['n']}")
@@ -0,0 +1,25 @@
+"""
+Management command to recompute AI recommendations for the whole catalog
+Run with: python manage.py generate_recommendations
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from inventory.recommendations import generate_recommendations, actions_queue
+
+
+class Command(BaseCommand):
+    help = 'Recompute pending AI recommendations for every product in one batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ignore-cooldown', action='store_true',
+                            help='Also re-suggest actions applied or dismissed in the last days')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = generate_recommendations(respect_cooldown=not options['ignore_cooldown'])
+        duration = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {written} pending recommendations written in {duration:.2f}s'))
+        self.stdout.write(f'  Actions queue: {actions_queue().count()} items')
@@ -0,0 +1,36 @@
+"""
+Management command to run the replenishment planner and create draft orders
+Run with: python manage.py plan_replenishment [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+from inventory.replenishment import plan, create_drafts, HISTORY_DAYS
+
+
+class Command(BaseCommand):
+    help = 'Compute reorder points and EOQ for every product and stock owner, and draft the orders needed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=HISTORY_DAYS, help='Days of demand history to use')
+        parser.add_argument('--dry-run', action='store_true', help='Only print the plan, create no drafts')
+
+    def handle(self, *args, **options):
+        lines = plan(days=options['days'])
+
+        for line in lines[:20]:
+            cover = f"{line['days_of_cover']}d" if line['days_of_cover'] is not None else '-'
+            self.stdout.write(
+                f"  {line['product_name']} @ {line['owner']}: on hand {line['on_hand']}, "
+                f"ROP {line['reorder_point']}, cover {cover} -> order {line['order_quantity']}"
+            )
+        if len(lines) > 20:
+            self.stdout.write(f'  ... and {len(lines) - 20} more')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run: {len(lines)} lines need an order, nothing created'))
+            return
+
+        created, skipped = create_drafts(lines)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Created {len(created)} draft orders ({skipped} already covered by open orders)'
+        ))
@@ -0,0 +1,61 @@
+"""
+Management command to render QR codes for many bills into one printable sheet
+Run with: python manage.py print_bill_qr_sheet --from 2026-01-01 --to 2026-01-31 --output bills.pdf
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from inventory.models import SalesBill
+from inventory.qr_sheets import select_bills, get_bill_qr_entries, render_qr_sheet, DEFAULT_COLUMNS, DEFAULT_ROWS
+
+
+class Command(BaseCommand):
+    help = 'Render bill QR codes for a date range or bill list into a multi-page PDF or tiled PNG'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First bill date (YYYY-MM-DD, inclusive)')
+        parser.add_argument('--to', dest='date_to', help='Last bill date (YYYY-MM-DD, inclusive)')
+        parser.add_argument('--bills', nargs='*', default=[], help='Explicit bill numbers')
+        parser.add_argument('--user', help='Only include bills created by this username')
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Site URL encoded in the QR codes')
+        parser.add_argument('--format', dest='output_format', choices=['pdf', 'png'], default='pdf')
+        parser.add_argument('--columns', type=int, default=DEFAULT_COLUMNS)
+        parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+        parser.add_argument('--output', required=True, help='File to write the sheet to')
+
+    def handle(self, *args, **options):
+        date_from = parse_date(options['date_from']) if options['date_from'] else None
+        date_to = parse_date(options['date_to']) if options['date_to'] else None
+
+        if not (date_from or date_to or options['bills']):
+            raise CommandError('Provide --from/--to or --bills')
+
+        queryset = SalesBill.objects.filter(created_by__isnull=False)
+        if options['user']:
+            queryset = queryset.filter(created_by__username=options['user'])
+
+        bills = select_bills(queryset, date_from=date_from, date_to=date_to, bill_numbers=options['bills'])
+        entries = get_bill_qr_entries(bills, options['base_url'])
+
+        if not entries:
+            raise CommandError('No bills found for the selection')
+
+        start = time.perf_counter()
+        sheet = render_qr_sheet(
+            entries,
+            output_format=options['output_format'],
+            columns=options['columns'],
+            rows=options['rows'],
+            max_workers=options['workers'],
+        )
+        duration = time.perf_counter() - start
+
+        with open(options['output'], 'wb') as output_file:
+            output_file.write(sheet)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Rendered {len(entries)} bill QR codes to {options["output"]} in {duration:.2f}s'
+        ))
@@ -0,0 +1,18 @@
+"""
+Management command to delete old change feed events
+Run with: python manage.py prune_change_events --days 7
+"""
+
+from django.core.management.base import BaseCommand
+from inventory.change_feed import prune
+
+
+class Command(BaseCommand):
+    help = 'Delete change feed events older than the given number of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Keep events from the last N days (default 7)')
+
+    def handle(self, *args, **options):
+        deleted = prune(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Deleted {deleted} change events older than {options["days"]} days'))
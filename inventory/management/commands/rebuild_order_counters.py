@@ -0,0 +1,17 @@
+"""
+Management command to recount the order counters from the order table
+Run with: python manage.py rebuild_order_counters
+"""
+
+from django.core.management.base import BaseCommand
+from inventory.order_workflow import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-status order counters shown on the admin dashboard'
+
+    def handle(self, *args, **options):
+        totals = rebuild_counters()
+        for name, count in sorted(totals.items()):
+            self.stdout.write(f'  {name}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {len(totals)} order counters'))
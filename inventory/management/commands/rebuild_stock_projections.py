@@ -0,0 +1,17 @@
+"""
+Management command to rebuild the stock ledger projections (on-hand and daily sales)
+Run with: python manage.py rebuild_stock_projections
+"""
+
+from django.core.management.base import BaseCommand
+from inventory.stock_ledger import rebuild_projections
+
+
+class Command(BaseCommand):
+    help = 'Recompute StockOnHand from stock batches and DailySales from bill items'
+
+    def handle(self, *args, **options):
+        counts = rebuild_projections()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Rebuilt {counts['on_hand_rows']} on-hand rows and {counts['daily_sales_rows']} daily sales rows"
+        ))
@@ -0,0 +1,28 @@
+"""
+Management command to refit demand forecasts for every product (run nightly)
+Run with: python manage.py refit_forecasts
+"""
+
+from django.core.management.base import BaseCommand
+from inventory.forecasting import refit, HISTORY_DAYS, LEAD_TIME_DAYS, SERVICE_LEVEL
+
+
+class Command(BaseCommand):
+    help = 'Refit exponential smoothing / Croston forecasts and safety stock for all products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=HISTORY_DAYS, help='Days of sales history to fit on')
+        parser.add_argument('--lead-time', type=int, default=LEAD_TIME_DAYS, help='Replenishment lead time in days')
+        parser.add_argument('--service-level', type=float, default=SERVICE_LEVEL,
+                            help='Target probability of not running out during the lead time (e.g. 0.95)')
+
+    def handle(self, *args, **options):
+        stats = refit(options['days'], options['lead_time'], options['service_level'])
+        total = stats['load_seconds'] + stats['fit_seconds'] + stats['save_seconds']
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Refitted {stats['products']} forecasts in {total:.2f}s"))
+        self.stdout.write(
+            f"  load {stats['load_seconds']:.2f}s, fit {stats['fit_seconds']:.2f}s, save {stats['save_seconds']:.2f}s"
+        )
+        for method, count in sorted(stats['methods'].items()):
+            self.stdout.write(f'  {method}: {count}')
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+from collections import Counter
+
+
+def link_notifications_to_orders(apps, schema_editor):
+    """Order notifications only mentioned the order in their text ("Order ID: #12")"""
+    Notification = apps.get_model('inventory', 'Notification')
+    OrderQueue = apps.get_model('inventory', 'OrderQueue')
+    order_ids = set(OrderQueue.objects.values_list('id', flat=True))
+    
+    for notification in Notification.objects.filter(message__contains='Order ID: #').only('id', 'message'):
+        match = re.search(r'Order ID: #(\d+)', notification.message)
+        if match and int(match.group(1)) in order_ids:
+            Notification.objects.filter(id=notification.id).update(order_id=int(match.group(1)))
+
+
+def build_order_counters(apps, schema_editor):
+    # Same naming as order_workflow.counter_names
+    OrderQueue = apps.get_model('inventory', 'OrderQueue')
+    OrderCounter = apps.get_model('inventory', 'OrderCounter')
+    
+    totals = Counter()
+    for requested_by_id, status, message_received in OrderQueue.objects.values_list('requested_by_id', 'status', 'message_received'):
+        source = 'request' if requested_by_id else 'admin'
+        totals[f'{source}:{status}'] += 1
+        if message_received:
+            totals['acknowledged'] += 1
+    
+    OrderCounter.objects.bulk_create([OrderCounter(name=name, count=count) for name, count in totals.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_changeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='inventory.orderqueue'),
+        ),
+        migrations.AlterField(
+            model_name='orderqueue',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved by Admin'), ('ordered', 'Ordered with Supplier'), ('partially_fulfilled', 'Partially Fulfilled'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('received', 'Received'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='pending', max_length=30),
+        ),
+        migrations.RunPython(link_notifications_to_orders, migrations.RunPython.noop),
+        migrations.RunPython(build_order_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def seed_stock_ledger(apps, schema_editor):
+    """Open the ledger with one 'add' per live batch and build the projections from it"""
+    ExpiryStock = apps.get_model('inventory', 'ExpiryStock')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    StockOnHand = apps.get_model('inventory', 'StockOnHand')
+    
+    batches = list(ExpiryStock.objects.filter(quantity__gt=0))
+    movements = StockMovement.objects.bulk_create([
+        StockMovement(
+            product_id=batch.product_id,
+            user_id=batch.user_id,
+            movement_type='add',
+            quantity=batch.quantity,
+            to_user_id=batch.user_id,
+            reason='Opening balance',
+        )
+        for batch in batches
+    ], batch_size=500)
+    # Keep the original arrival dates (auto_now_add stamped them with now)
+    for movement, batch in zip(movements, batches):
+        movement.created_at = batch.created_at
+    StockMovement.objects.bulk_update(movements, ['created_at'], batch_size=500)
+    
+    totals = ExpiryStock.objects.filter(quantity__gt=0).values('product_id', 'user_id').annotate(total=Sum('quantity'))
+    StockOnHand.objects.bulk_create([
+        StockOnHand(product_id=row['product_id'], user_id=row['user_id'], quantity=row['total'])
+        for row in totals
+    ], batch_size=500)
+
+
+def seed_daily_sales(apps, schema_editor):
+    SalesBillItem = apps.get_model('inventory', 'SalesBillItem')
+    DailySales = apps.get_model('inventory', 'DailySales')
+    
+    rows = SalesBillItem.objects.annotate(day=TruncDate('bill__created_at')).values('product_id', 'day').annotate(
+        units=Sum('quantity'), lines=Count('id')
+    )
+    DailySales.objects.bulk_create([
+        DailySales(product_id=row['product_id'], date=row['day'], quantity=row['units'], sale_count=row['lines'])
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0019_order_workflow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('sale_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockOnHand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='movement_type',
+            field=models.CharField(choices=[('add', 'Stock Added'), ('deduct', 'Stock Deducted'), ('transfer_out', 'Transferred Out'), ('transfer_in', 'Transferred In'), ('damage', 'Damaged/Lost'), ('expired', 'Expired/Removed'), ('return', 'Returned'), ('adjustment', 'Manual Adjustment')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['product', 'movement_type', 'created_at'], name='inventory_s_product_16ba19_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockonhand',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='on_hand', to='inventory.product'),
+        ),
+        migrations.AddField(
+            model_name='stockonhand',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='dailysales',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='inventory.product'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stockonhand',
+            unique_together={('product', 'user')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailysales',
+            unique_together={('product', 'date')},
+        ),
+        migrations.RunPython(seed_stock_ledger, migrations.RunPython.noop),
+        migrations.RunPython(seed_daily_sales, migrations.RunPython.noop),
+    ]
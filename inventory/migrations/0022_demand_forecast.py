@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('ses', 'Exponential Smoothing'), ('croston', 'Croston (intermittent demand)'), ('none', 'No sales history')], max_length=10)),
+                ('alpha', models.FloatField(default=0)),
+                ('daily_demand', models.FloatField(default=0)),
+                ('forecast_7d', models.FloatField(default=0)),
+                ('forecast_30d', models.FloatField(default=0)),
+                ('demand_std', models.FloatField(default=0)),
+                ('safety_stock', models.IntegerField(default=0)),
+                ('reorder_point', models.IntegerField(default=0)),
+                ('history_days', models.IntegerField(default=0)),
+                ('sale_days', models.IntegerField(default=0)),
+                ('fitted_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecast', to='inventory.product')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderqueue',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Suggested by Planner'), ('pending', 'Pending'), ('approved', 'Approved by Admin'), ('ordered', 'Ordered with Supplier'), ('partially_fulfilled', 'Partially Fulfilled'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('received', 'Received'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='pending', max_length=30),
+        ),
+    ]
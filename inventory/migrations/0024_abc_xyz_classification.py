@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0023_order_draft_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='abc_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='revenue_share',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='xyz_classification',
+            field=models.CharField(choices=[('X', 'X - Steady Demand'), ('Y', 'Y - Variable Demand'), ('Z', 'Z - Erratic Demand')], default='Z', max_length=1),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0024_abc_xyz_classification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendScoreSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('score', models.PositiveSmallIntegerField()),
+                ('ai_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('computed_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('simulated_score', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_snapshots', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date'], name='inventory_t_date_9991cc_idx')],
+                'unique_together': {('product', 'date')},
+            },
+        ),
+    ]
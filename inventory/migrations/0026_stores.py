@@ -0,0 +1,88 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+
+
+def assign_stores(apps, schema_editor):
+    """One Store per store name (the company_stock user's is the warehouse), then tag stock and bills"""
+    Store = apps.get_model('inventory', 'Store')
+    UserProfile = apps.get_model('inventory', 'UserProfile')
+    ExpiryStock = apps.get_model('inventory', 'ExpiryStock')
+    SalesBill = apps.get_model('inventory', 'SalesBill')
+    
+    company = UserProfile.objects.filter(user__username='company_stock').first()
+    if company:
+        company.store = Store.objects.create(
+            name=company.store_name or 'Company Warehouse',
+            location=company.store_location,
+            is_warehouse=True
+        )
+        company.save(update_fields=['store'])
+    
+    stores = {}
+    for profile in UserProfile.objects.filter(role='inventory').select_related('user'):
+        name = profile.store_name or profile.user.username
+        if name not in stores:
+            stores[name] = Store.objects.create(name=name, location=profile.store_location)
+        profile.store = stores[name]
+        profile.save(update_fields=['store'])
+    
+    ExpiryStock.objects.filter(user__isnull=False).update(store=Subquery(
+        UserProfile.objects.filter(user=OuterRef('user')).values('store')[:1]
+    ))
+    SalesBill.objects.filter(created_by__isnull=False).update(store=Subquery(
+        UserProfile.objects.filter(user=OuterRef('created_by')).values('store')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0025_trend_score_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Store',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('location', models.CharField(blank=True, max_length=200, null=True)),
+                ('is_warehouse', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='store',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_warehouse', True)), fields=('is_warehouse',), name='single_warehouse_store'),
+        ),
+        migrations.AddField(
+            model_name='expirystock',
+            name='store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='inventory.store'),
+        ),
+        migrations.AddField(
+            model_name='salesbill',
+            name='store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='inventory.store'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='store',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='inventory.store'),
+        ),
+        migrations.AddIndex(
+            model_name='expirystock',
+            index=models.Index(fields=['store', 'product', 'expiry_date'], name='inventory_e_store_i_d23eed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesbill',
+            index=models.Index(fields=['store', 'created_at'], name='inventory_s_store_i_98c5d3_idx'),
+        ),
+        migrations.RunPython(assign_stores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0027_stock_transfers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesbill',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='salesbill',
+            constraint=models.UniqueConstraint(fields=('created_by', 'idempotency_key'), name='unique_bill_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+def fill_name_keys(apps, schema_editor):
+    """Casefolded, whitespace-collapsed names for existing products (see models.normalize_name)"""
+    Product = apps.get_model('inventory', 'Product')
+    products = list(Product.objects.only('id', 'name'))
+    for product in products:
+        product.name_key = ' '.join(product.name.split()).casefold()
+    Product.objects.bulk_update(products, ['name_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0028_bill_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='name_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_name_keys, migrations.RunPython.noop),
+    ]
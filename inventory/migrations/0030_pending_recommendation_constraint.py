@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0029_product_name_key'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='airecommendation',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='airecommendation',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('product', 'recommendation_type'), name='unique_pending_recommendation'),
+        ),
+    ]
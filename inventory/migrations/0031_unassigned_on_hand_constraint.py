@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:05
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_unassigned_rows(apps, schema_editor):
+    """Fold duplicate unassigned (user NULL) StockOnHand rows into one per product"""
+    StockOnHand = apps.get_model('inventory', 'StockOnHand')
+    duplicated = StockOnHand.objects.filter(user__isnull=True).values('product_id').annotate(
+        rows=Count('id'), total=Sum('quantity')
+    ).filter(rows__gt=1)
+    for row in duplicated:
+        rows = StockOnHand.objects.filter(user__isnull=True, product_id=row['product_id']).order_by('id')
+        keep = rows.first()
+        rows.exclude(pk=keep.pk).delete()
+        StockOnHand.objects.filter(pk=keep.pk).update(quantity=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0030_pending_recommendation_constraint'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_unassigned_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stockonhand',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('product',), name='unique_unassigned_on_hand'),
+        ),
+    ]
@@ -4,6 +4,29 @@ from django.utils import timezone
 from datetime import date
 import uuid
 
+class Store(models.Model):
+    """A shop or the company warehouse; stock and bills are partitioned by store (see stores.py)"""
+    name = models.CharField(max_length=100)
+    location = models.CharField(max_length=200, blank=True, null=True)
+    is_warehouse = models.BooleanField(default=False)  # The company warehouse (exactly one)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['is_warehouse'], condition=models.Q(is_warehouse=True), name='single_warehouse_store'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} (Warehouse)" if self.is_warehouse else self.name
+
+
+class StoreScopedQuerySet(models.QuerySet):
+    def for_store(self, store):
+        """Rows of one store's partition"""
+        return self.filter(store=store)
+
+
 class UserProfile(models.Model):
     ROLE_CHOICES = [
         ('inventory', 'Inventory Manager'),
@@ -15,6 +38,7 @@ class UserProfile(models.Model):
     store_name = models.CharField(max_length=100, blank=True, null=True)  # Store/Location name
     store_location = models.CharField(max_length=200, blank=True, null=True)  # Full address
     phone_number = models.CharField(max_length=15, blank=True, null=True)  # Contact number
+    store = models.ForeignKey(Store, on_delete=models.SET_NULL, null=True, blank=True, related_name='members')  # Store this user works for
     
     def __str__(self):
         store_info = f" - {self.store_name}" if self.store_name else ""
@@ -34,6 +58,49 @@ class UserProfile(models.Model):
         if self.store_name:
             return f"{name} ({self.store_name})"
         return name
+    
+    def save(self, *args, **kwargs):
+        # Store users always belong to a Store; same store name, same store
+        if self.store_id is None and self.role == 'inventory':
+            name = self.store_name or self.user.username
+            self.store = (
+                Store.objects.filter(name=name, is_warehouse=False).first()
+                or Store.objects.create(name=name, location=self.store_location)
+            )
+        super().save(*args, **kwargs)
+
+def normalize_name(name):
+    """Product name as matched by lookups: casefolded, runs of whitespace collapsed"""
+    return ' '.join(str(name).split()).casefold()
+
+
+class ProductQuerySet(models.QuerySet):
+    def _stock_subquery(self, **filters):
+        """Correlated subquery summing non-expired stock for each product"""
+        from django.db.models import OuterRef, Subquery, Sum
+        stock = ExpiryStock.objects.filter(
+            product=OuterRef('pk'),
+            quantity__gt=0,
+            expiry_date__gte=date.today(),
+            **filters
+        ).order_by().values('product').annotate(total=Sum('quantity')).values('total')
+        return Subquery(stock, output_field=models.IntegerField())
+    
+    def with_stock_totals(self):
+        """Annotate total non-expired stock so total_stock needs no query per product"""
+        from django.db.models.functions import Coalesce
+        return self.annotate(annotated_total_stock=Coalesce(self._stock_subquery(), 0))
+    
+    def with_user_stock(self, user):
+        """Annotate the given user's non-expired stock as user_stock"""
+        from django.db.models.functions import Coalesce
+        return self.annotate(user_stock=Coalesce(self._stock_subquery(user=user), 0))
+    
+    def with_store_stock(self, store):
+        """Annotate the given store's non-expired stock as store_stock (reads only its partition)"""
+        from django.db.models.functions import Coalesce
+        return self.annotate(store_stock=Coalesce(self._stock_subquery(store=store), 0))
+
 
 class Product(models.Model):
     ABC_CHOICES = [
@@ -42,22 +109,44 @@ class Product(models.Model):
         ('C', 'C - Low Value'),
     ]
     
+    XYZ_CHOICES = [
+        ('X', 'X - Steady Demand'),
+        ('Y', 'Y - Variable Demand'),
+        ('Z', 'Z - Erratic Demand'),
+    ]
+    
     name = models.CharField(max_length=200)
+    name_key = models.CharField(max_length=200, db_index=True, editable=False, default='')  # normalize_name(name), set on save
     category = models.CharField(max_length=100)
     cost_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     selling_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     new_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    abc_classification = models.CharField(max_length=1, choices=ABC_CHOICES, default='C')
+    abc_classification = models.CharField(max_length=1, choices=ABC_CHOICES, default='C')  # Maintained by abc_analysis
+    xyz_classification = models.CharField(max_length=1, choices=XYZ_CHOICES, default='Z')
+    revenue_share = models.FloatField(default=0.0)  # Share of revenue in the ABC window (0-1)
+    abc_updated_at = models.DateTimeField(null=True, blank=True)
     trend_score = models.FloatField(default=0.0)
     discount_percentage = models.FloatField(default=0.0)
     last_trend_update = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        self.name_key = normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'name_key'}
+        super().save(*args, **kwargs)
+    
     @property
     def total_stock(self):
+        # Use the value from with_stock_totals() when the queryset provided it
+        if 'annotated_total_stock' in self.__dict__:
+            return self.annotated_total_stock
         from datetime import date
         # Only count non-expired stock (all users combined)
         return sum(
@@ -93,15 +182,22 @@ class Product(models.Model):
         
         return stock_by_user
     
+    def get_store_stock(self, store):
+        """Get stock held by a store (all of its users)"""
+        from datetime import date
+        return sum(
+            stock.quantity for stock in self.expirystock_set.filter(
+                store=store,
+                quantity__gt=0,
+                expiry_date__gte=date.today()
+            )
+        )
+    
     def get_company_stock(self):
         """Get company warehouse stock (admin's stock)"""
-        from datetime import date
-        from django.contrib.auth.models import User
-        try:
-            company_user = User.objects.get(username='company_stock')
-            return self.get_user_stock(company_user)
-        except User.DoesNotExist:
-            return 0
+        from .stores import warehouse
+        store = warehouse()
+        return self.get_store_stock(store) if store else 0
     
     def get_inventory_users_stock(self):
         """Get total stock across all inventory users (excluding company)"""
@@ -141,13 +237,15 @@ class Product(models.Model):
     
     @property
     def calculated_abc_classification(self):
-        """Calculate ABC classification based on trend score"""
-        if self.trend_score >= 7.0:
-            return 'A'
-        elif self.trend_score >= 4.0:
-            return 'B'
-        else:
+        """ABC class by revenue contribution (stored, kept current by abc_analysis)"""
+        if self.abc_updated_at is None:
+            # Not classified yet - fall back to the trend score
+            if self.trend_score >= 7.0:
+                return 'A'
+            elif self.trend_score >= 4.0:
+                return 'B'
             return 'C'
+        return self.abc_classification
 
 class ExpiryStock(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -155,21 +253,37 @@ class ExpiryStock(models.Model):
     expiry_date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # Track which inventory user owns this stock
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True, blank=True)  # Owner's store, set on save
+    
+    objects = StoreScopedQuerySet.as_manager()
     
     class Meta:
         ordering = ['expiry_date']
+        indexes = [
+            # FEFO order within one store's partition of a product
+            models.Index(fields=['store', 'product', 'expiry_date']),
+        ]
     
     def __str__(self):
         user_name = self.user.username if self.user else "Unassigned"
         return f"{self.product.name} - {self.quantity} units (Expires: {self.expiry_date}) - Owner: {user_name}"
+    
+    def save(self, *args, **kwargs):
+        if self.store_id is None and self.user_id is not None:
+            from .stores import store_id_for
+            self.store_id = store_id_for(self.user_id)
+        super().save(*args, **kwargs)
 
 class OrderQueue(models.Model):
     STATUS_CHOICES = [
+        ('draft', 'Suggested by Planner'),
         ('pending', 'Pending'),
         ('approved', 'Approved by Admin'),
+        ('ordered', 'Ordered with Supplier'),
         ('partially_fulfilled', 'Partially Fulfilled'),
         ('shipped', 'Shipped'),
         ('delivered', 'Delivered'),
+        ('received', 'Received'),
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     ]
@@ -220,6 +334,24 @@ class SalesBill(models.Model):
     verification_code = models.CharField(max_length=8, unique=True, null=True, blank=True)  # Unique code for shop owner
     email_sent = models.BooleanField(default=False)  # Track if email was sent
     email_sent_at = models.DateTimeField(null=True, blank=True)  # When email was sent
+    store = models.ForeignKey(Store, on_delete=models.SET_NULL, null=True, blank=True)  # Creator's store, set on save
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)  # Client token; a retried POST gets this bill back
+    
+    objects = StoreScopedQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['store', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['created_by', 'idempotency_key'], name='unique_bill_idempotency_key'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.store_id is None and self.created_by_id is not None:
+            from .stores import store_id_for
+            self.store_id = store_id_for(self.created_by_id)
+        super().save(*args, **kwargs)
     
     def generate_verification_code(self):
         """Generate a unique 8-character verification code"""
@@ -259,7 +391,9 @@ class Notification(models.Model):
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     priority = models.CharField(max_length=10, choices=PRIORITY_LEVELS, default='medium')
     target_user_role = models.CharField(max_length=20, default='inventory')  # inventory, marketing, admin, all
+    target_user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='personal_notifications')  # Only this user, empty = whole role
     product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True)
+    order = models.ForeignKey(OrderQueue, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications')  # Order this notification is about
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)  # Track when notification was last updated (marked as read)
@@ -311,7 +445,14 @@ class AIRecommendation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
-        unique_together = ['product', 'recommendation_type', 'status']  # Prevent duplicate pending recommendations
+        constraints = [
+            # One open recommendation per product/type; applied and dismissed rows are kept as history
+            models.UniqueConstraint(
+                fields=['product', 'recommendation_type'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_recommendation'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.product.name} - {self.get_recommendation_type_display()} ({self.status})"
@@ -331,6 +472,21 @@ class LowStockThreshold(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.product.name} (Threshold: {self.threshold})"
 
+class LowStockAlert(models.Model):
+    """Open low-stock breach for one owner and product (maintained by low_stock)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.IntegerField()  # On hand when the breach was detected
+    threshold = models.IntegerField()
+    notification = models.ForeignKey(Notification, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['user', 'product']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.product.name}: {self.quantity} < {self.threshold}"
+
 class StockMovement(models.Model):
     """Complete audit trail of all stock movements"""
     MOVEMENT_TYPES = [
@@ -339,12 +495,13 @@ class StockMovement(models.Model):
         ('transfer_out', 'Transferred Out'),
         ('transfer_in', 'Transferred In'),
         ('damage', 'Damaged/Lost'),
+        ('expired', 'Expired/Removed'),
         ('return', 'Returned'),
         ('adjustment', 'Manual Adjustment'),
     ]
     
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)  # Who performed the action
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # Who performed the action, empty = system
     movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPES)
     quantity = models.IntegerField()
     from_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_transfers_out')
@@ -355,9 +512,120 @@ class StockMovement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'movement_type', 'created_at']),
+        ]
     
     def __str__(self):
-        return f"{self.movement_type} - {self.product.name} ({self.quantity} units) by {self.user.username}"
+        performed_by = self.user.username if self.user else "system"
+        return f"{self.movement_type} - {self.product.name} ({self.quantity} units) by {performed_by}"
+
+
+class StockTransfer(models.Model):
+    """Transfer document: stock moved from one owner to another in one operation (see transfers.py)"""
+    reference = models.CharField(max_length=50, unique=True)  # Also the StockMovement reference_number
+    from_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='transfers_out')
+    to_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='transfers_in')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reason = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.reference}: {self.from_user} → {self.to_user}"
+
+
+class StockTransferLine(models.Model):
+    transfer = models.ForeignKey(StockTransfer, on_delete=models.CASCADE, related_name='lines')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f"{self.transfer.reference} - {self.product.name}: {self.quantity}"
+
+
+class StockOnHand(models.Model):
+    """Projection of StockMovement: units on hand per product and owner (maintained by stock_ledger)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='on_hand')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # Stock owner, empty = unassigned
+    quantity = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['product', 'user']
+        constraints = [
+            # unique_together does not cover NULL owners; one unassigned row per product
+            models.UniqueConstraint(
+                fields=['product'], condition=models.Q(user__isnull=True), name='unique_unassigned_on_hand'
+            ),
+        ]
+    
+    def __str__(self):
+        owner = self.user.username if self.user else "Unassigned"
+        return f"{self.product.name} - {owner}: {self.quantity}"
+
+
+class DailySales(models.Model):
+    """Projection of StockMovement: units sold and sale lines per product per day (maintained by stock_ledger)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+    quantity = models.IntegerField(default=0)  # Units sold
+    sale_count = models.IntegerField(default=0)  # Bill lines
+    
+    class Meta:
+        unique_together = ['product', 'date']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.date}: {self.quantity} units"
+
+class DemandForecast(models.Model):
+    """Latest demand forecast per product (refitted nightly by forecasting.refit)"""
+    METHODS = [
+        ('ses', 'Exponential Smoothing'),
+        ('croston', 'Croston (intermittent demand)'),
+        ('none', 'No sales history'),
+    ]
+    
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='demand_forecast')
+    method = models.CharField(max_length=10, choices=METHODS)
+    alpha = models.FloatField(default=0)  # Smoothing constant picked for this product
+    daily_demand = models.FloatField(default=0)  # Expected units per day
+    forecast_7d = models.FloatField(default=0)
+    forecast_30d = models.FloatField(default=0)
+    demand_std = models.FloatField(default=0)  # Std of one-step forecast errors (units/day)
+    safety_stock = models.IntegerField(default=0)
+    reorder_point = models.IntegerField(default=0)  # Lead-time demand + safety stock
+    history_days = models.IntegerField(default=0)
+    sale_days = models.IntegerField(default=0)  # Days with at least one sale
+    fitted_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.product.name}: {self.daily_demand:.2f}/day ({self.method})"
+
+
+class TrendScoreSnapshot(models.Model):
+    """
+    Trend score history: one row per product per day (written by trend_history).
+    Scores are stored in tenths (0-100) - trend scores have one decimal.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='trend_snapshots')
+    date = models.DateField()
+    score = models.PositiveSmallIntegerField()  # Last score of the day, whatever produced it
+    ai_score = models.PositiveSmallIntegerField(null=True, blank=True)  # Gemini analysis
+    computed_score = models.PositiveSmallIntegerField(null=True, blank=True)  # trend_calculator
+    simulated_score = models.PositiveSmallIntegerField(null=True, blank=True)  # trend_simulation
+    
+    class Meta:
+        unique_together = ['product', 'date']
+        indexes = [models.Index(fields=['date'])]
+        ordering = ['date']
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.date}: {self.score / 10:.1f}"
+
 
 class OrderStatusHistory(models.Model):
     """Track order status changes"""
@@ -374,6 +642,15 @@ class OrderStatusHistory(models.Model):
         return f"Order #{self.order.id} - {self.status} at {self.created_at}"
 
 
+class OrderCounter(models.Model):
+    """Running order counts per source/status, maintained by order_workflow"""
+    name = models.CharField(max_length=50, unique=True)  # e.g. 'request:pending', 'admin:ordered', 'acknowledged'
+    count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name}: {self.count}"
+
+
 class QRToken(models.Model):
     """
     Offline Recovery Feature: Secure QR token for customer transaction history
@@ -465,3 +742,39 @@ class RestockOrder(models.Model):
         self.processed_by = user
         self.processed_at = timezone.now()
         self.save()
+
+
+class ChangeEvent(models.Model):
+    """
+    Append-only change feed (notifications, stock and order changes)
+    The auto-increment id is the cursor clients resume from.
+    """
+    TOPIC_CHOICES = [
+        ('notification', 'Notification'),
+        ('stock', 'Stock'),
+        ('order', 'Order'),
+    ]
+    
+    topic = models.CharField(max_length=20, choices=TOPIC_CHOICES)
+    action = models.CharField(max_length=20)  # created, updated, deleted, status_changed, read
+    object_id = models.BigIntegerField(null=True, blank=True)
+    target_user_role = models.CharField(max_length=20, default='all')  # inventory, marketing, admin, all
+    target_user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='change_events')  # Only this user (and admins) see it
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.id} {self.topic}.{self.action} ({self.object_id})"
+    
+    def to_json(self):
+        return {
+            'id': self.id,
+            'topic': self.topic,
+            'action': self.action,
+            'object_id': self.object_id,
+            'payload': self.payload,
+            'created_at': self.created_at.isoformat(),
+        }
@@ -0,0 +1,374 @@
+"""
+Order Workflow
+Explicit state machine for OrderQueue.
+
+Every status change goes through transition(): the move is validated against
+TRANSITIONS and saved in one transaction together with an OrderStatusHistory
+row. Running counts per source/status live in OrderCounter and are kept in
+step by the OrderQueue signals (signals.py), so dashboards read a handful of
+counter rows instead of counting the whole order table.
+
+Sources: 'request' - requested by an inventory user (requested_by set)
+         'admin'   - created by an admin for the inventory team
+
+'draft' orders are suggestions from the replenishment planner; an admin
+approves them (store drafts) or sends them to inventory (warehouse drafts).
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OrderQueue, OrderStatusHistory, OrderCounter
+
+
+# Allowed status changes
+TRANSITIONS = {
+    'draft': {'pending', 'approved', 'cancelled'},
+    'pending': {'approved', 'ordered', 'received', 'cancelled'},
+    'approved': {'partially_fulfilled', 'shipped', 'delivered', 'completed', 'received', 'cancelled'},
+    'ordered': {'pending', 'shipped', 'delivered', 'received', 'cancelled'},
+    'partially_fulfilled': {'shipped', 'delivered', 'completed', 'received', 'cancelled'},
+    'shipped': {'delivered', 'completed', 'received'},
+    'delivered': {'completed', 'received'},
+    'completed': set(),
+    'received': set(),
+    'cancelled': set(),
+}
+
+# Statuses that count as handled by admin on the dashboard
+COMPLETED_STATUSES = ['approved', 'partially_fulfilled', 'shipped', 'delivered', 'completed']
+
+ACKNOWLEDGED = 'acknowledged'
+
+
+class InvalidTransition(Exception):
+    """Raised when an order cannot move to the requested status"""
+
+
+def can_transition(order, new_status):
+    return new_status in TRANSITIONS.get(order.status, set())
+
+
+# ----------------------------------------------------------------------------
+# Transitions
+# ----------------------------------------------------------------------------
+
+def create_order(changed_by=None, notes='Order created', **fields):
+    """Create an order in 'pending' and record the first history row"""
+    with transaction.atomic():
+        order = OrderQueue.objects.create(**fields)
+        OrderStatusHistory.objects.create(order=order, status=order.status, changed_by=changed_by, notes=notes)
+    return order
+
+
+def transition(order, new_status, user=None, notes='', **fields):
+    """
+    Move an order to new_status, updating any extra fields in the same save.
+    Raises InvalidTransition if the move is not allowed from the current status.
+    """
+    with transaction.atomic():
+        # Re-read under lock so two requests cannot both move the same order
+        order = OrderQueue.objects.select_for_update().get(pk=order.pk)
+        if not can_transition(order, new_status):
+            raise InvalidTransition(
+                f"Order #{order.id} cannot go from '{order.status}' to '{new_status}'"
+            )
+
+        old_status = order.status
+        order.status = new_status
+        for name, value in fields.items():
+            setattr(order, name, value)
+        order.save()
+
+        OrderStatusHistory.objects.create(
+            order=order,
+            status=new_status,
+            changed_by=user,
+            notes=notes or f'{old_status} → {new_status}'
+        )
+    return order
+
+
+def create_orders(orders, changed_by=None, notes='Order created'):
+    """
+    Bulk version of create_order for unsaved OrderQueue objects: one insert for
+    the orders and one for their history. bulk_create sends no signals, so the
+    counters, dashboard cache and change feed are updated here.
+    """
+    from collections import Counter
+    from . import change_feed, dashboard_cache
+
+    if not orders:
+        return []
+    with transaction.atomic():
+        orders = OrderQueue.objects.bulk_create(orders, batch_size=500)
+        OrderStatusHistory.objects.bulk_create([
+            OrderStatusHistory(order=order, status=order.status, changed_by=changed_by, notes=notes)
+            for order in orders
+        ], batch_size=500)
+
+        totals = Counter()
+        for order in orders:
+            totals.update(order_counter_names(order))
+        for name, count in totals.items():
+            _bump_counter(name, count)
+
+        dashboard_cache.bump_version_on_commit(dashboard_cache.ORDERS)
+        change_feed.publish(change_feed.ORDER, 'created', payload={
+            'ids': [order.id for order in orders],
+            'status': orders[0].status,
+        }, target_user_role='admin')
+    return orders
+
+
+def approve(order, user, approved_quantity):
+    return transition(
+        order, 'approved', user,
+        notes=f'Approved {approved_quantity} units',
+        approved_quantity=approved_quantity
+    )
+
+
+def approve_request(order, user, approved_quantity):
+    """
+    Approve a store's request (or planner draft) and send the stock: bills the
+    requesting user, transfers approved_quantity from the company warehouse
+    (FEFO, same expiry dates) and notifies the store.
+    Returns (order, bill, short) - short is always 0, a transfer is all or nothing.
+    Raises InvalidTransition if the order cannot be approved or the warehouse
+    does not hold enough stock.
+    """
+    (order,), bill = approve_requests([(order, approved_quantity)], user)
+    return order, bill, 0
+
+
+def approve_requests(approvals, user):
+    """
+    Approve several (order, approved_quantity) requests from one store as one
+    operation: one bill with a line per order and one warehouse-to-store
+    transfer document, all in a single transaction - if any order cannot be
+    approved or any line is not in stock, nothing changes.
+    Returns (orders, bill).
+    """
+    from datetime import datetime
+    from .models import SalesBill, SalesBillItem, Notification
+    from .stores import warehouse_user
+    from .transfers import transfer, TransferError
+
+    if not approvals:
+        raise InvalidTransition('Nothing to approve')
+    requesters = {order.requested_by_id for order, _ in approvals}
+    if len(requesters) != 1 or None in requesters:
+        raise InvalidTransition('Requests approved together must come from one store')
+
+    company_user = warehouse_user()
+    if company_user is None:
+        raise InvalidTransition('Company warehouse not found! Please run setup_company_stock.py')
+
+    with transaction.atomic():
+        orders = [approve(order, user, approved_quantity) for order, approved_quantity in approvals]
+        requested_by = orders[0].requested_by
+        products = {order.product_id: order.product for order, _ in approvals}
+
+        # Bill for the inventory user who requested
+        bill_number = f"BILL-{datetime.now().strftime('%Y%m%d%H%M%S')}-{orders[0].id}"
+        items = [
+            SalesBillItem(
+                product=products[order.product_id],
+                quantity=order.approved_quantity,
+                price=products[order.product_id].selling_price,
+                total=products[order.product_id].selling_price * order.approved_quantity
+            )
+            for order in orders
+        ]
+        bill = SalesBill.objects.create(
+            bill_number=bill_number,
+            created_by=requested_by,
+            total_amount=sum(item.total for item in items)
+        )
+        for item in items:
+            item.bill = bill
+        SalesBillItem.objects.bulk_create(items)
+
+        OrderQueue.objects.filter(pk__in=[order.pk for order in orders]).update(
+            bill=bill, bill_generated=True, updated_at=timezone.now()
+        )
+        for order in orders:
+            order.bill = bill
+            order.bill_generated = True
+
+        try:
+            transfer(
+                [(order.product_id, order.approved_quantity) for order in orders],
+                from_user=company_user,
+                to_user=requested_by,
+                performed_by=user,
+                reason='Approved request ' + ', '.join(f'#{order.id}' for order in orders),
+                reference=bill_number,
+                record_sales=True
+            )
+        except TransferError as e:
+            # Name the product and what the warehouse holds where possible
+            for order in orders:
+                company_stock = products[order.product_id].get_user_stock(company_user)
+                if order.approved_quantity > company_stock:
+                    raise InvalidTransition(
+                        f'Not enough stock in company warehouse for {products[order.product_id].name}! '
+                        f'Available: {company_stock} units, Requested: {order.approved_quantity} units'
+                    )
+            raise InvalidTransition(str(e))
+
+        for order in orders:
+            product = products[order.product_id]
+            Notification.objects.create(
+                title=f"✅ Request Approved: {product.name}",
+                message=f"📦 Product: {product.name} | "
+                       f"🔢 Requested: {order.quantity} units | "
+                       f"✅ Approved: {order.approved_quantity} units | "
+                       f"💰 Amount: ₹{product.selling_price * order.approved_quantity} | "
+                       f"📄 Bill: {bill_number} | "
+                       f"📊 Your Stock: {product.get_user_stock(requested_by)} units | "
+                       f"📅 {timezone.now().strftime('%d %b %Y, %H:%M')}",
+                notification_type='admin_message',
+                priority='high',
+                target_user_role='inventory',
+                product=product,
+                order=order
+            )
+
+    # Update trend scores automatically
+    from inventory.trend_calculator import update_product_trend_score
+    for product in products.values():
+        update_product_trend_score(product)
+
+    return orders, bill
+
+
+def mark_supplier_ordered(order, user):
+    """Inventory placed the order with the supplier"""
+    return transition(
+        order, 'ordered', user,
+        notes='Order placed with supplier',
+        inventory_action='ordered',
+        inventory_action_by=user,
+        inventory_action_at=timezone.now()
+    )
+
+
+def mark_received(order, user):
+    """Admin marks the order as received (final step)"""
+    return transition(
+        order, 'received', user,
+        notes='Marked as received by admin',
+        admin_marked_received=True,
+        admin_marked_received_at=timezone.now()
+    )
+
+
+def acknowledge(order, user):
+    """
+    Inventory acknowledges an admin order message. Not a status change,
+    but recorded in the history so the full timeline is in one place.
+    """
+    with transaction.atomic():
+        order = OrderQueue.objects.select_for_update().get(pk=order.pk)
+        if order.message_received:
+            raise InvalidTransition(f'Order #{order.id} is already acknowledged')
+
+        now = timezone.now()
+        order.message_received = True
+        order.message_received_at = now
+        order.inventory_action = 'acknowledged'
+        order.inventory_action_by = user
+        order.inventory_action_at = now
+        order.save()
+
+        OrderStatusHistory.objects.create(
+            order=order,
+            status=order.status,
+            changed_by=user,
+            notes='Order message acknowledged by inventory'
+        )
+    return order
+
+
+# ----------------------------------------------------------------------------
+# Counters
+# ----------------------------------------------------------------------------
+
+def counter_names(requested_by_id, status, message_received):
+    """Counter rows one order contributes to"""
+    source = 'request' if requested_by_id else 'admin'
+    names = [f'{source}:{status}']
+    if message_received:
+        names.append(ACKNOWLEDGED)
+    return names
+
+
+def order_counter_names(order):
+    return counter_names(order.requested_by_id, order.status, order.message_received)
+
+
+def adjust_counters(old_names, new_names):
+    """Move one order's contribution from old_names to new_names"""
+    for name in set(old_names) - set(new_names):
+        _bump_counter(name, -1)
+    for name in set(new_names) - set(old_names):
+        _bump_counter(name, 1)
+
+
+def _bump_counter(name, delta):
+    if OrderCounter.objects.filter(name=name).update(count=F('count') + delta):
+        return
+    try:
+        # Savepoint, so losing the race for the row does not abort the order's save
+        with transaction.atomic():
+            _, created = OrderCounter.objects.get_or_create(name=name, defaults={'count': delta})
+    except IntegrityError:
+        created = False
+    if not created:
+        # A concurrent first bump created the row meanwhile
+        OrderCounter.objects.filter(name=name).update(count=F('count') + delta)
+
+
+def rebuild_counters():
+    """Recount every counter from the order table (fixes drift after raw SQL/bulk updates)"""
+    from collections import Counter
+
+    totals = Counter()
+    rows = OrderQueue.objects.values_list('requested_by_id', 'status', 'message_received')
+    for requested_by_id, status, message_received in rows.iterator():
+        totals.update(counter_names(requested_by_id, status, message_received))
+
+    with transaction.atomic():
+        OrderCounter.objects.all().delete()
+        OrderCounter.objects.bulk_create([
+            OrderCounter(name=name, count=count) for name, count in totals.items()
+        ])
+    return dict(totals)
+
+
+def get_counts():
+    return dict(OrderCounter.objects.values_list('name', 'count'))
+
+
+def status_count(status, counts=None):
+    """Orders in a status across both sources"""
+    counts = get_counts() if counts is None else counts
+    return counts.get(f'request:{status}', 0) + counts.get(f'admin:{status}', 0)
+
+
+def dashboard_counts():
+    """Order counters shown on the admin dashboard - one query"""
+    counts = get_counts()
+    return {
+        # Orders requested by inventory that admin still needs to review
+        'pending_orders_count': counts.get('request:pending', 0),
+        # All orders placed by the inventory team (planner drafts are not placed yet)
+        'ordered_count': sum(count for name, count in counts.items() if name.startswith('request:') and name != 'request:draft'),
+        # Inventory requests admin has approved/processed
+        'completed_orders_count': sum(counts.get(f'request:{status}', 0) for status in COMPLETED_STATUSES),
+        'actual_received_count': status_count('delivered', counts),
+        'admin_seen_count': counts.get(ACKNOWLEDGED, 0),
+    }
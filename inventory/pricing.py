@@ -0,0 +1,147 @@
+"""
+Bulk Pricing
+Reprices every product matching a filter (category, ABC class, trend band,
+stock band) with one rule in a single UPDATE statement:
+
+    discount  new_price = selling_price * (1 - percent/100), discount_percentage = percent
+    markup    new_price = cost_price * (1 + percent/100),    discount_percentage = 0
+    reset     new_price = selling_price,                     discount_percentage = 0
+
+Optionally rounds to a price ending (e.g. 0.99 -> ₹105.99) and never goes
+below cost. A dry run returns the same computation as a preview without
+writing anything.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import F, Value, DecimalField, ExpressionWrapper
+from django.db.models.functions import Floor, Greatest, Round
+
+from .models import Product
+
+
+RULES = ['discount', 'markup', 'reset']
+
+PREVIEW_LIMIT = 50
+
+
+class PricingError(ValueError):
+    """Invalid filter or rule"""
+
+
+def _decimal(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise PricingError(f'{name} must be a number')
+
+
+def select_products(category=None, abc=None, trend_min=None, trend_max=None, stock_min=None, stock_max=None):
+    """Products matching every given filter (stock = current non-expired total)"""
+    products = Product.objects.all()
+
+    if category:
+        products = products.filter(category__iexact=category)
+
+    if abc:
+        abc = abc.upper()
+        if abc not in ['A', 'B', 'C']:
+            raise PricingError('abc must be A, B or C')
+        products = products.filter(abc_classification=abc)
+
+    trend_min, trend_max = _decimal(trend_min, 'trend_min'), _decimal(trend_max, 'trend_max')
+    if trend_min is not None:
+        products = products.filter(trend_score__gte=float(trend_min))
+    if trend_max is not None:
+        products = products.filter(trend_score__lte=float(trend_max))
+
+    stock_min, stock_max = _decimal(stock_min, 'stock_min'), _decimal(stock_max, 'stock_max')
+    if stock_min is not None or stock_max is not None:
+        products = products.with_stock_totals()
+        if stock_min is not None:
+            products = products.filter(annotated_total_stock__gte=stock_min)
+        if stock_max is not None:
+            products = products.filter(annotated_total_stock__lte=stock_max)
+
+    return products
+
+
+def price_expression(rule, percent=None, ending=None, floor_at_cost=False):
+    """(new_price expression, discount_percentage value) for a rule"""
+    price_field = DecimalField(max_digits=10, decimal_places=2)
+
+    if rule not in RULES:
+        raise PricingError(f"rule must be one of {', '.join(RULES)}")
+
+    percent = _decimal(percent, 'percent')
+    if rule in ['discount', 'markup'] and percent is None:
+        raise PricingError(f'{rule} needs a percent')
+    if percent is not None and (percent < 0 or (rule == 'discount' and percent > 100)):
+        raise PricingError('percent must be between 0 and 100 for discounts and at least 0 for markups')
+
+    if rule == 'discount':
+        factor = (Decimal('1') - percent / Decimal('100'))
+        price = ExpressionWrapper(F('selling_price') * Value(factor), output_field=price_field)
+        discount = float(percent)
+    elif rule == 'markup':
+        factor = (Decimal('1') + percent / Decimal('100'))
+        price = ExpressionWrapper(F('cost_price') * Value(factor), output_field=price_field)
+        discount = 0.0
+    else:
+        price = F('selling_price')
+        discount = 0.0
+
+    ending = _decimal(ending, 'ending')
+    if ending is not None:
+        if not (0 <= ending < 1):
+            raise PricingError('ending must be a fraction like 0.99 or 0.49')
+        # Keep the rupees, replace the paise: 105.37 -> 105.99
+        price = ExpressionWrapper(Floor(price) + Value(ending), output_field=price_field)
+
+    if floor_at_cost:
+        price = Greatest(price, F('cost_price'), output_field=price_field)
+
+    return Round(price, 2, output_field=price_field), discount
+
+
+def reprice(products, rule, percent=None, ending=None, floor_at_cost=False, dry_run=True, preview_limit=PREVIEW_LIMIT):
+    """
+    Apply a pricing rule to a Product queryset with one UPDATE.
+    Returns {'matched', 'updated', 'dry_run', 'preview'} where preview lists
+    up to preview_limit products with their old and new prices.
+    """
+    new_price, discount = price_expression(rule, percent, ending, floor_at_cost)
+
+    preview_rows = products.annotate(proposed_price=new_price).order_by('category', 'name').values(
+        'id', 'name', 'category', 'new_price', 'discount_percentage', 'proposed_price'
+    )[:preview_limit]
+    preview = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category'],
+            'old_price': float(row['new_price']),
+            'new_price': float(row['proposed_price']),
+            'old_discount': row['discount_percentage'],
+            'new_discount': discount,
+        }
+        for row in preview_rows
+    ]
+
+    matched = products.count()
+    updated = 0
+    if not dry_run:
+        updated = products.update(new_price=new_price, discount_percentage=discount)
+        # update() sends no signals
+        from . import dashboard_cache
+        dashboard_cache.bump_version_on_commit(dashboard_cache.PRODUCTS)
+
+    return {
+        'matched': matched,
+        'updated': updated,
+        'dry_run': dry_run,
+        'discount_percentage': discount,
+        'preview': preview,
+    }
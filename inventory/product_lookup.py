@@ -0,0 +1,55 @@
+"""
+Product Lookup
+Billing payloads and CSV uploads refer to products by id or by name.
+resolve() turns every reference in a request into products with one in_bulk
+query - ids by primary key, names by the indexed Product.name_key
+(normalize_name: casefolded, whitespace collapsed, so "  milk 1L" finds
+"Milk 1L") - and the ProductMap it returns answers each later lookup in the
+request from memory:
+
+    products = resolve(ids=[...], names=[...])
+    product = products.get(product_id=line.get('id'), name=line['name'])
+"""
+
+from django.db.models import Q
+
+from .models import Product, normalize_name
+
+
+class ProductMap:
+    def __init__(self, products):
+        self.by_id = products
+        self.by_key = {}
+        for product_id in sorted(products, reverse=True):
+            # Lowest id wins when names collide
+            self.by_key[products[product_id].name_key] = products[product_id]
+
+    def get(self, product_id=None, name=None):
+        """The product with this id, else the one with this name, else None"""
+        product = self.by_id.get(_as_id(product_id))
+        if product is None and name:
+            product = self.by_key.get(normalize_name(name))
+        return product
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve(ids=(), names=(), queryset=None):
+    """
+    ProductMap of the products with these ids or names, fetched in one query.
+    queryset narrows or annotates the fetch (e.g. with_stock_totals()).
+    """
+    ids = {_as_id(value) for value in ids} - {None}
+    keys = {normalize_name(name) for name in names if name}
+    if not ids and not keys:
+        return ProductMap({})
+    queryset = Product.objects.all() if queryset is None else queryset
+    return ProductMap(queryset.filter(Q(pk__in=ids) | Q(name_key__in=keys)).in_bulk())
@@ -0,0 +1,202 @@
+"""
+Batch QR Sheet Generation
+Renders bill QR codes for many bills at once and composes them into
+printable sheets (multi-page PDF or tiled PNG) labelled with bill numbers.
+
+QR rendering is CPU bound, so large batches (print_bill_qr_sheet command)
+render tiles in a process pool and only compose pages in the calling
+process. Web requests are capped at MAX_WEB_TILES and render in-process,
+so a request never starts worker processes or ties up a server for long.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import os
+
+
+# A4 at 150 DPI
+PAGE_WIDTH = 1240
+PAGE_HEIGHT = 1754
+PAGE_MARGIN = 60
+
+DEFAULT_COLUMNS = 4
+DEFAULT_ROWS = 5
+
+# Below this many bills the pool start-up costs more than it saves
+MIN_PARALLEL_BATCH = 16
+
+# Most bills one web request may render (10 default pages); more goes through the command
+MAX_WEB_TILES = DEFAULT_COLUMNS * DEFAULT_ROWS * 10
+
+
+def render_qr_tile(payload):
+    """
+    Render one labelled QR tile and return it as PNG bytes.
+    Top-level function so it can be pickled into worker processes.
+    payload: (bill_number, qr_url, tile_width, tile_height)
+    """
+    import qrcode
+    from PIL import Image, ImageDraw, ImageFont
+
+    bill_number, qr_url, tile_width, tile_height = payload
+
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=4,
+        border=2,
+    )
+    qr.add_data(qr_url)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white").get_image().convert('L')
+
+    # Leave room for the bill number caption under the code
+    caption_height = 28
+    max_side = min(tile_width, tile_height - caption_height)
+    # Scale by a whole factor so every module stays the same size
+    scale = max_side // qr_img.width
+    qr_side = qr_img.width * scale if scale >= 1 else max_side
+    qr_img = qr_img.resize((qr_side, qr_side), Image.NEAREST)
+
+    tile = Image.new('L', (tile_width, tile_height), 255)
+    tile.paste(qr_img, ((tile_width - qr_side) // 2, 0))
+
+    draw = ImageDraw.Draw(tile)
+    font = ImageFont.load_default()
+    text_width = draw.textlength(bill_number, font=font)
+    draw.text(((tile_width - text_width) / 2, qr_side + 8), bill_number, fill=0, font=font)
+
+    buffer = BytesIO()
+    tile.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_qr_svg(data, box_size=10, border=2):
+    """Single QR code as an SVG document (no Pillow, scales cleanly when printed)"""
+    import qrcode
+    import qrcode.image.svg
+
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=box_size,
+        border=border,
+        image_factory=qrcode.image.svg.SvgPathImage,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.make_image().to_string(encoding='unicode')
+
+
+def render_tiles(entries, tile_width, tile_height, max_workers=None):
+    """
+    Render tiles for (bill_number, qr_url) entries, in parallel for large batches.
+    Returns PNG bytes in the same order as entries.
+    """
+    payloads = [(bill_number, qr_url, tile_width, tile_height) for bill_number, qr_url in entries]
+
+    if len(payloads) < MIN_PARALLEL_BATCH or max_workers == 1:
+        return [render_qr_tile(payload) for payload in payloads]
+
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(payloads) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render_qr_tile, payloads, chunksize=chunksize))
+
+
+def compose_pages(tiles, columns, rows, tile_width, tile_height):
+    """Paste rendered tiles onto A4 pages, row by row"""
+    from PIL import Image
+
+    per_page = columns * rows
+    gap_x = (PAGE_WIDTH - 2 * PAGE_MARGIN - columns * tile_width) // max(columns - 1, 1)
+    gap_y = (PAGE_HEIGHT - 2 * PAGE_MARGIN - rows * tile_height) // max(rows - 1, 1)
+
+    pages = []
+    for page_start in range(0, len(tiles), per_page):
+        page = Image.new('L', (PAGE_WIDTH, PAGE_HEIGHT), 255)
+        for index, tile_bytes in enumerate(tiles[page_start:page_start + per_page]):
+            row, column = divmod(index, columns)
+            x = PAGE_MARGIN + column * (tile_width + gap_x)
+            y = PAGE_MARGIN + row * (tile_height + gap_y)
+            page.paste(Image.open(BytesIO(tile_bytes)), (x, y))
+        pages.append(page)
+    return pages
+
+
+def render_qr_sheet(entries, output_format='pdf', columns=DEFAULT_COLUMNS, rows=DEFAULT_ROWS, max_workers=None):
+    """
+    Build a printable QR sheet for a list of (bill_number, qr_url) entries.
+    output_format 'pdf' returns a multi-page PDF, 'png' returns a single
+    tall PNG with all pages stacked vertically.
+    """
+    from PIL import Image
+
+    if not entries:
+        raise ValueError('No bills to render')
+
+    tile_width = (PAGE_WIDTH - 2 * PAGE_MARGIN) // columns - 20
+    tile_height = (PAGE_HEIGHT - 2 * PAGE_MARGIN) // rows - 20
+
+    tiles = render_tiles(entries, tile_width, tile_height, max_workers=max_workers)
+    pages = compose_pages(tiles, columns, rows, tile_width, tile_height)
+
+    buffer = BytesIO()
+    if output_format == 'pdf':
+        pages[0].save(buffer, format='PDF', save_all=True, append_images=pages[1:], resolution=150.0)
+    elif output_format == 'png':
+        sheet = Image.new('L', (PAGE_WIDTH, PAGE_HEIGHT * len(pages)), 255)
+        for index, page in enumerate(pages):
+            sheet.paste(page, (0, index * PAGE_HEIGHT))
+        sheet.save(buffer, format='PNG', optimize=True)
+    else:
+        raise ValueError(f'Unsupported format: {output_format}')
+    return buffer.getvalue()
+
+
+def get_bill_qr_entries(bills, base_url):
+    """
+    Resolve the offline ledger QR URL for each bill.
+    Each bill links to its creator's ledger token; missing tokens are created
+    in one bulk insert instead of one get_or_create per bill.
+    Returns a list of (bill_number, qr_url) tuples.
+    """
+    from .models import QRToken, UserProfile
+
+    bills = list(bills)
+    creator_ids = {bill.created_by_id for bill in bills if bill.created_by_id}
+
+    profiles = {
+        profile.user_id: profile
+        for profile in UserProfile.objects.filter(user_id__in=creator_ids)
+    }
+    tokens = {
+        token.user_profile.user_id: token
+        for token in QRToken.objects.filter(user_profile__in=profiles.values()).select_related('user_profile')
+    }
+
+    missing = [profile for user_id, profile in profiles.items() if user_id not in tokens]
+    if missing:
+        QRToken.objects.bulk_create([QRToken(user_profile=profile) for profile in missing])
+        for token in QRToken.objects.filter(user_profile__in=missing).select_related('user_profile'):
+            tokens[token.user_profile.user_id] = token
+
+    base_url = base_url.rstrip('/')
+    entries = []
+    for bill in bills:
+        token = tokens.get(bill.created_by_id)
+        if not token:
+            continue  # Bills without a store profile have no ledger to link to
+        entries.append((bill.bill_number, f"{base_url}{token.get_qr_url()}?bill={bill.bill_number}"))
+    return entries
+
+
+def select_bills(queryset, date_from=None, date_to=None, bill_numbers=None):
+    """Filter a SalesBill queryset by an inclusive date range and/or explicit bill numbers"""
+    if date_from:
+        queryset = queryset.filter(created_at__date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__date__lte=date_to)
+    if bill_numbers:
+        queryset = queryset.filter(bill_number__in=bill_numbers)
+    return queryset.only('bill_number', 'created_by').order_by('created_at', 'id')
@@ -0,0 +1,256 @@
+"""
+Recommendation Engine
+Evaluates the whole catalog in one pass over annotated stock totals and
+trend scores, and keeps one pending AIRecommendation per product/type up to
+date with one bulk_update and one bulk_create. Admins work through the
+ranked actions queue and apply or dismiss many recommendations at once;
+applied and dismissed rows stay as the record of what was decided.
+
+Rules (same as the per-product apply_recommendation view used):
+    trend >= 7 and stock < 100   -> increase_stock
+    trend >= 7 and stock >= 100  -> raise_price (+10%)
+    trend < 3 and stock > 150    -> apply_discount (15%)
+    trend < 3                    -> reduce_orders
+    stock < 50                   -> reorder_soon
+    otherwise                    -> monitor
+"""
+
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, When, IntegerField
+from django.utils import timezone
+
+from .models import AIRecommendation, Product
+
+
+PRICE_INCREASE = Decimal('1.10')
+DISCOUNT_PERCENT = 15
+COOLDOWN_DAYS = 7  # Don't re-suggest what was applied/dismissed this recently
+
+# Higher comes first in the actions queue
+PRIORITY = {
+    'increase_stock': 5,
+    'reorder_soon': 4,
+    'raise_price': 3,
+    'apply_discount': 3,
+    'reduce_orders': 2,
+    'monitor': 0,
+}
+
+UPDATE_FIELDS = ['recommendation_text', 'trend_score', 'stock_level', 'suggested_value', 'suggested_quantity']
+
+
+def decide(product, stock):
+    """Return (recommendation_type, text, suggested_value, suggested_quantity)"""
+    trend = product.trend_score
+
+    if trend >= 7 and stock < 100:
+        return ('increase_stock', f'Increase stock for {product.name} due to high demand',
+                None, max(200, stock * 2))
+    if trend >= 7:
+        new_price = (product.new_price * PRICE_INCREASE).quantize(Decimal('0.01'), ROUND_HALF_UP)
+        return ('raise_price', f'Raise price for {product.name} due to high demand',
+                new_price, None)
+    if trend < 3 and stock > 150:
+        return ('apply_discount', f'Apply discount for {product.name} due to low demand and overstock',
+                Decimal(DISCOUNT_PERCENT), None)
+    if trend < 3:
+        return ('reduce_orders', f'Reduce future orders for {product.name} due to low demand',
+                None, None)
+    if stock < 50:
+        return ('reorder_soon', f'Reorder {product.name} soon due to low stock',
+                None, max(100, stock * 3))
+    return ('monitor', f'Continue monitoring {product.name} - stable conditions', None, None)
+
+
+def build_recommendation(product):
+    """Unsaved pending AIRecommendation for a product loaded with_stock_totals()"""
+    stock = product.total_stock
+    recommendation_type, text, suggested_value, suggested_quantity = decide(product, stock)
+    return AIRecommendation(
+        product=product,
+        recommendation_type=recommendation_type,
+        recommendation_text=text,
+        trend_score=product.trend_score,
+        stock_level=stock,
+        suggested_value=suggested_value,
+        suggested_quantity=suggested_quantity,
+        status='pending'
+    )
+
+
+def _recently_handled():
+    """(product_id, type) pairs applied or dismissed within the cooldown"""
+    since = timezone.now() - timedelta(days=COOLDOWN_DAYS)
+    return set(
+        AIRecommendation.objects.filter(
+            status__in=['applied', 'dismissed'],
+            applied_at__gte=since
+        ).values_list('product_id', 'recommendation_type')
+    )
+
+
+def generate_recommendations(products=None, respect_cooldown=True):
+    """
+    Recompute pending recommendations for the catalog (or the given Product
+    queryset): existing pending rows are updated, new ones inserted. Pending
+    rows whose rule no longer applies are removed. Returns the number of
+    pending rows written.
+    """
+    queryset = products if products is not None else Product.objects.all()
+    products = list(queryset.with_stock_totals())
+    skip = _recently_handled() if respect_cooldown else set()
+
+    recommendations = []
+    for product in products:
+        recommendation = build_recommendation(product)
+        if (product.id, recommendation.recommendation_type) not in skip:
+            recommendations.append(recommendation)
+
+    with transaction.atomic():
+        # The unique constraint only covers pending rows, which ON CONFLICT
+        # cannot target - match the existing ones up front instead
+        existing = {
+            (row.product_id, row.recommendation_type): row
+            for row in AIRecommendation.objects.filter(
+                status='pending', product__in=[p.id for p in products]
+            ).only('id', 'product_id', 'recommendation_type')
+        }
+        updated = []
+        created = []
+        for recommendation in recommendations:
+            row = existing.get((recommendation.product_id, recommendation.recommendation_type))
+            if row is None:
+                created.append(recommendation)
+                continue
+            for field in UPDATE_FIELDS:
+                setattr(row, field, getattr(recommendation, field))
+            updated.append(row)
+        AIRecommendation.objects.bulk_update(updated, UPDATE_FIELDS, batch_size=500)
+        # A concurrent run may have inserted the same pending row meanwhile
+        AIRecommendation.objects.bulk_create(created, batch_size=500, ignore_conflicts=True)
+
+        # Drop pending rows for product/type pairs that no longer apply
+        current = {}
+        for recommendation in recommendations:
+            current.setdefault(recommendation.recommendation_type, []).append(recommendation.product_id)
+        stale = AIRecommendation.objects.filter(status='pending', product__in=[p.id for p in products])
+        for recommendation_type, product_ids in current.items():
+            stale = stale.exclude(recommendation_type=recommendation_type, product_id__in=product_ids)
+        stale.delete()
+
+    return len(recommendations)
+
+
+def refresh_product(product):
+    """Recompute and return the (single) pending recommendation for one product"""
+    generate_recommendations(Product.objects.filter(id=product.id), respect_cooldown=False)
+    return AIRecommendation.objects.select_related('product').get(product_id=product.id, status='pending')
+
+
+# ----------------------------------------------------------------------------
+# Actions queue
+# ----------------------------------------------------------------------------
+
+def actions_queue(recommendation_type=None, include_monitor=False):
+    """Pending recommendations ranked by urgency, then by trend score and lowest stock"""
+    queue = AIRecommendation.objects.filter(status='pending').select_related('product').annotate(
+        priority=Case(
+            *[When(recommendation_type=name, then=value) for name, value in PRIORITY.items()],
+            default=0,
+            output_field=IntegerField()
+        )
+    )
+    if recommendation_type:
+        queue = queue.filter(recommendation_type=recommendation_type)
+    elif not include_monitor:
+        queue = queue.exclude(recommendation_type='monitor')
+    return queue.order_by('-priority', '-trend_score', 'stock_level', 'id')
+
+
+def to_json(recommendation):
+    return {
+        'id': recommendation.id,
+        'product_id': recommendation.product_id,
+        'product_name': recommendation.product.name,
+        'category': recommendation.product.category,
+        'type': recommendation.recommendation_type,
+        'type_display': recommendation.get_recommendation_type_display(),
+        'text': recommendation.recommendation_text,
+        'trend_score': recommendation.trend_score,
+        'stock_level': recommendation.stock_level,
+        'current_price': float(recommendation.product.new_price),
+        'suggested_value': float(recommendation.suggested_value) if recommendation.suggested_value is not None else None,
+        'suggested_quantity': recommendation.suggested_quantity,
+        'priority': getattr(recommendation, 'priority', PRIORITY.get(recommendation.recommendation_type, 0)),
+    }
+
+
+# ----------------------------------------------------------------------------
+# Bulk apply / dismiss
+# ----------------------------------------------------------------------------
+
+def _close(recommendations, status, username):
+    """
+    Mark pending recommendations applied/dismissed. Closed rows are kept;
+    the next pending row for the same product/type is a new one.
+    """
+    if not recommendations:
+        return
+    AIRecommendation.objects.filter(id__in=[r.id for r in recommendations]).update(
+        status=status,
+        applied_by=username,
+        applied_at=timezone.now()
+    )
+
+
+def apply_recommendations(recommendations, user):
+    """
+    Apply pending recommendations in bulk. Price changes are written with one
+    bulk_update; stock/order advice is recorded as applied.
+    Returns {recommendation_id: message}.
+    """
+    recommendations = [r for r in recommendations if r.status == 'pending']
+    messages = {}
+    changed_products = []
+
+    for recommendation in recommendations:
+        product = recommendation.product
+        old_price = product.new_price
+
+        if recommendation.recommendation_type == 'raise_price':
+            product.new_price = recommendation.suggested_value
+            changed_products.append(product)
+            messages[recommendation.id] = f"Price raised from ₹{old_price} to ₹{product.new_price} (10% increase)"
+        elif recommendation.recommendation_type == 'apply_discount':
+            percent = recommendation.suggested_value
+            product.new_price = (old_price * (Decimal('1') - percent / Decimal('100'))).quantize(Decimal('0.01'), ROUND_HALF_UP)
+            product.discount_percentage = float(percent)
+            changed_products.append(product)
+            messages[recommendation.id] = f"Discount applied: {percent.normalize():f}% off. Price reduced from ₹{old_price} to ₹{product.new_price}"
+        elif recommendation.recommendation_type == 'increase_stock':
+            messages[recommendation.id] = "Increase Stock recommendation noted"
+        elif recommendation.recommendation_type == 'reduce_orders':
+            messages[recommendation.id] = "Reduce orders recommendation noted for low demand product"
+        elif recommendation.recommendation_type == 'reorder_soon':
+            messages[recommendation.id] = "Reorder recommendation noted for low stock product"
+        else:
+            messages[recommendation.id] = "Product marked for monitoring"
+
+    with transaction.atomic():
+        if changed_products:
+            Product.objects.bulk_update(changed_products, ['new_price', 'discount_percentage'], batch_size=500)
+            from . import dashboard_cache
+            dashboard_cache.bump_version_on_commit(dashboard_cache.PRODUCTS)
+        _close(recommendations, 'applied', user.username)
+
+    return messages
+
+
+def dismiss_recommendations(recommendations, user):
+    recommendations = [r for r in recommendations if r.status == 'pending']
+    with transaction.atomic():
+        _close(recommendations, 'dismissed', user.username)
+    return len(recommendations)
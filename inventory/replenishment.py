@@ -0,0 +1,252 @@
+"""
+Replenishment Planner
+Works out, for every product at every stock owner (each store and the
+company warehouse), when and how much to reorder - in one batched pass:
+
+    daily demand   mean of the owner's daily outflow (sales and transfers)
+                   from the stock ledger over the last HISTORY_DAYS
+    reorder point  demand over the lead time + safety stock
+                   (z(service level) x std of daily demand x sqrt(lead time))
+    EOQ            sqrt(2 x annual demand x order cost / (cost price x HOLDING_RATE)),
+                   capped at MAX_COVER_DAYS of demand so perishables are not overbought
+    days of cover  units on hand / daily demand
+
+Lead time is STORE_LEAD_TIME_DAYS for stores (restocked from the warehouse)
+and SUPPLIER_LEAD_TIME_DAYS for the warehouse (restocked from suppliers).
+Owners at or below their reorder point get an OrderQueue draft for
+max(EOQ, shortfall), unless an open order already covers that product.
+Admins approve or cancel drafts in batches.
+"""
+
+import math
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import stores
+from .models import OrderQueue, Product, StockMovement, StockOnHand
+
+
+HISTORY_DAYS = 30
+STORE_LEAD_TIME_DAYS = 2
+SUPPLIER_LEAD_TIME_DAYS = 7
+SERVICE_LEVEL = 0.95
+STORE_ORDER_COST = 50.0  # ₹ per warehouse-to-store restock
+SUPPLIER_ORDER_COST = 500.0  # ₹ per purchase order with a supplier
+HOLDING_RATE = 0.25  # Yearly holding cost as a share of the unit cost
+MAX_COVER_DAYS = 60
+
+# Orders that already cover a product for an owner
+OPEN_STATUSES = ['draft', 'pending', 'approved', 'ordered', 'partially_fulfilled', 'shipped']
+OUTFLOW_TYPES = ['deduct', 'transfer_out']
+
+
+def _outflow(days):
+    """{(product_id, owner_id): daily outflow array} from one grouped ledger query"""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = StockMovement.objects.filter(
+        movement_type__in=OUTFLOW_TYPES,
+        from_user__isnull=False,
+        created_at__date__gte=start
+    ).annotate(day=TruncDate('created_at')).values('product_id', 'from_user_id', 'day').annotate(
+        units=Sum('quantity')
+    ).order_by()
+
+    series = {}
+    for row in rows:
+        key = (row['product_id'], row['from_user_id'])
+        if key not in series:
+            series[key] = np.zeros(days)
+        index = (row['day'] - start).days
+        if 0 <= index < days:
+            series[key][index] += row['units']
+    return series
+
+
+def plan(days=HISTORY_DAYS, service_level=SERVICE_LEVEL, include_ok=False):
+    """
+    Plan lines for every (product, owner) with stock or recent demand, most
+    urgent (fewest days of cover) first. Only lines that need an order unless
+    include_ok.
+    """
+    from django.contrib.auth.models import User
+
+    series = _outflow(days)
+    on_hand = {
+        (product_id, user_id): quantity
+        for product_id, user_id, quantity in StockOnHand.objects.filter(user__isnull=False).values_list(
+            'product_id', 'user_id', 'quantity'
+        )
+    }
+    keys = sorted(set(series) | set(on_hand))
+    if not keys:
+        return []
+
+    products = Product.objects.in_bulk({product_id for product_id, _ in keys})
+    owners = dict(User.objects.filter(id__in={user_id for _, user_id in keys}).values_list('id', 'username'))
+    warehouse_ids = stores.warehouse_user_ids()
+
+    history = np.array([series.get(key, np.zeros(days)) for key in keys])
+    stock = np.array([max(on_hand.get(key, 0), 0) for key in keys], dtype=float)
+    cost = np.array([float(products[product_id].cost_price) for product_id, _ in keys])
+    warehouse = np.array([user_id in warehouse_ids for _, user_id in keys])
+    lead = np.where(warehouse, SUPPLIER_LEAD_TIME_DAYS, STORE_LEAD_TIME_DAYS).astype(float)
+    order_cost = np.where(warehouse, SUPPLIER_ORDER_COST, STORE_ORDER_COST)
+
+    demand = history.mean(axis=1)
+    spread = history.std(axis=1)
+    z = NormalDist().inv_cdf(service_level)
+    safety_stock = np.ceil(z * spread * np.sqrt(lead))
+    reorder_point = np.ceil(demand * lead + safety_stock)
+
+    holding = cost * HOLDING_RATE
+    eoq = np.sqrt(np.divide(2 * demand * 365 * order_cost, holding, out=np.zeros_like(holding), where=holding > 0))
+    eoq = np.ceil(np.minimum(eoq, demand * MAX_COVER_DAYS))
+    cover = np.divide(stock, demand, out=np.full_like(stock, np.inf), where=demand > 0)
+    needs_order = (demand > 0) & (stock <= reorder_point)
+    order_quantity = np.where(needs_order, np.maximum(eoq, reorder_point - stock), 0)
+    order_quantity = np.where(needs_order, np.maximum(order_quantity, 1), 0)
+
+    lines = []
+    for i, (product_id, user_id) in enumerate(keys):
+        if not (include_ok or needs_order[i]):
+            continue
+        lines.append({
+            'product_id': product_id,
+            'product_name': products[product_id].name,
+            'user_id': user_id,
+            'owner': owners.get(user_id),
+            'is_warehouse': bool(warehouse[i]),
+            'on_hand': int(stock[i]),
+            'daily_demand': round(float(demand[i]), 2),
+            'lead_time_days': int(lead[i]),
+            'safety_stock': int(safety_stock[i]),
+            'reorder_point': int(reorder_point[i]),
+            'eoq': int(eoq[i]),
+            'days_of_cover': round(float(cover[i]), 1) if math.isfinite(cover[i]) else None,
+            'order_quantity': int(order_quantity[i]),
+        })
+
+    lines.sort(key=lambda line: (line['days_of_cover'] is None, line['days_of_cover'] or 0, -line['daily_demand']))
+    return lines
+
+
+# ----------------------------------------------------------------------------
+# Drafts
+# ----------------------------------------------------------------------------
+
+def _open_pairs():
+    """(product_id, requested_by_id) pairs that already have an open order"""
+    return set(OrderQueue.objects.filter(status__in=OPEN_STATUSES).values_list('product_id', 'requested_by_id'))
+
+
+def create_drafts(lines, created_by=None):
+    """
+    Bulk-create OrderQueue drafts for plan lines. Store lines become requests
+    from that store; warehouse lines become admin orders for the inventory team.
+    Lines whose product/owner already has an open order are skipped.
+    Returns (created_orders, skipped_count).
+    """
+    from .order_workflow import create_orders
+
+    existing = _open_pairs()
+    drafts = []
+    for line in lines:
+        requested_by_id = None if line['is_warehouse'] else line['user_id']
+        if (line['product_id'], requested_by_id) in existing or line['order_quantity'] <= 0:
+            continue
+        existing.add((line['product_id'], requested_by_id))
+        cover = f"{line['days_of_cover']} days" if line['days_of_cover'] is not None else 'n/a'
+        drafts.append(OrderQueue(
+            product_id=line['product_id'],
+            quantity=line['order_quantity'],
+            status='draft',
+            requested_by_id=requested_by_id,
+            order_notes=(
+                f"Replenishment planner ({line['owner']}): on hand {line['on_hand']}, "
+                f"{line['daily_demand']}/day, cover {cover}, reorder point {line['reorder_point']}, "
+                f"EOQ {line['eoq']}, lead time {line['lead_time_days']} days"
+            )
+        ))
+
+    created = create_orders(drafts, changed_by=created_by, notes='Suggested by replenishment planner')
+    return created, len(lines) - len(created)
+
+
+def approve_drafts(orders, user):
+    """
+    Approve drafts in one go. Store drafts are approved and shipped from the
+    warehouse like store requests - one bill and one transfer document per
+    store, all of a store's drafts or none of them; warehouse drafts are sent
+    to the inventory team as admin orders. Returns one result dict per order.
+    """
+    from collections import defaultdict
+    from .models import Notification
+    from .order_workflow import approve_requests, transition, InvalidTransition
+
+    results = []
+    store_drafts = defaultdict(list)
+    for order in orders:
+        if order.requested_by_id:
+            store_drafts[order.requested_by_id].append(order)
+            continue
+        try:
+            order = transition(
+                order, 'pending', user,
+                notes='Planner suggestion sent to inventory',
+                ordered_by=user,
+                message_sent=True
+            )
+            Notification.objects.create(
+                title=f"📦 NEW ORDER REQUEST: {order.product.name}",
+                message=f"Admin has requested to order:\n\n"
+                       f"Product: {order.product.name}\n"
+                       f"Requested Quantity: {order.quantity} units\n"
+                       f"Order Notes: {order.order_notes}\n\n"
+                       f"📋 ACTION REQUIRED:\n"
+                       f"1. Click 'Receive Message' to acknowledge\n"
+                       f"2. Contact supplier to place order\n"
+                       f"3. Update order status when placed\n"
+                       f"4. Add received stock when delivered\n\n"
+                       f"Order ID: #{order.id}\n"
+                       f"Requested by: {user.first_name or user.username}",
+                notification_type='order_request',
+                priority='high',
+                target_user_role='inventory',
+                product=order.product,
+                order=order
+            )
+            results.append({'id': order.id, 'success': True, 'message': f"Sent to inventory: {order.quantity} units"})
+        except InvalidTransition as e:
+            results.append({'id': order.id, 'success': False, 'message': str(e)})
+
+    for drafts in store_drafts.values():
+        try:
+            approved, bill = approve_requests([(order, order.quantity) for order in drafts], user)
+        except InvalidTransition as e:
+            results.extend({'id': order.id, 'success': False, 'message': str(e)} for order in drafts)
+            continue
+        results.extend(
+            {'id': order.id, 'success': True, 'message': f"Approved {order.quantity} units, bill {bill.bill_number}"}
+            for order in approved
+        )
+    return results
+
+
+def cancel_drafts(orders, user):
+    from .order_workflow import transition, InvalidTransition
+
+    cancelled = 0
+    for order in orders:
+        try:
+            transition(order, 'cancelled', user, notes='Planner suggestion dismissed')
+            cancelled += 1
+        except InvalidTransition:
+            pass
+    return cancelled
@@ -0,0 +1,30 @@
+"""
+Session Refresh
+Keeps persistent logins alive without writing the session on every request
+(SESSION_SAVE_EVERY_REQUEST): a logged-in user's session is re-saved - which
+pushes its expiry out by its full age again - only once
+SESSION_REFRESH_AFTER seconds have passed since it was last refreshed.
+Every other request, cached dashboard hits included, leaves the session
+row alone.
+"""
+
+import time
+
+from django.conf import settings
+
+
+REFRESHED_AT = '_refreshed_at'
+
+
+class SessionRefreshMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.user.is_authenticated:
+            now = int(time.time())
+            refresh_after = getattr(settings, 'SESSION_REFRESH_AFTER', 60 * 60 * 24)
+            if now - request.session.get(REFRESHED_AT, 0) >= refresh_after:
+                # Marks the session modified, so SessionMiddleware saves it with a new expiry
+                request.session[REFRESHED_AT] = now
+        return self.get_response(request)
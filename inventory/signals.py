@@ -0,0 +1,142 @@
+"""
+Model signal handlers
+Bump dashboard cache versions whenever the underlying data changes,
+publish notification, stock and order changes to the change feed, keep
+the order counters (order_workflow.py) in step with OrderQueue and drop
+the cached warehouse (stores.py) when stores or memberships change.
+"""
+
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from . import change_feed, dashboard_cache, order_workflow, stores
+from .models import Product, ExpiryStock, SalesBill, SalesBillItem, OrderQueue, Notification, Store, UserProfile
+
+
+# Which dashboard data groups each model feeds
+MODEL_CACHE_GROUPS = {
+    Product: (dashboard_cache.PRODUCTS,),
+    ExpiryStock: (dashboard_cache.STOCK,),
+    SalesBill: (dashboard_cache.SALES,),
+    SalesBillItem: (dashboard_cache.SALES,),
+    OrderQueue: (dashboard_cache.ORDERS,),
+    Notification: (dashboard_cache.NOTIFICATIONS,),
+}
+
+
+def _bill_scope(item):
+    try:
+        return f'user:{item.bill.created_by_id}'
+    except SalesBill.DoesNotExist:
+        return None
+
+
+# The store or user a row belongs to; its groups are bumped for that scope too
+MODEL_CACHE_SCOPES = {
+    ExpiryStock: lambda batch: dashboard_cache.stock_scope(batch.store_id, batch.user_id),
+    SalesBill: lambda bill: f'user:{bill.created_by_id}',
+    SalesBillItem: _bill_scope,
+    Notification: lambda notification: (
+        f'user:{notification.target_user_id}' if notification.target_user_id
+        else f'role:{notification.target_user_role}'
+    ),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_dashboard_cache(sender, instance, **kwargs):
+    groups = MODEL_CACHE_GROUPS.get(sender)
+    if not groups:
+        return
+    scope = MODEL_CACHE_SCOPES[sender](instance) if sender in MODEL_CACHE_SCOPES else None
+    if scope:
+        groups = groups + tuple(dashboard_cache.scoped(group, scope) for group in groups)
+    dashboard_cache.bump_version_on_commit(*groups)
+
+
+# ----------------------------------------------------------------------------
+# Change feed
+# ----------------------------------------------------------------------------
+
+@receiver(post_save, sender=Notification)
+def publish_notification_saved(sender, instance, created, **kwargs):
+    change_feed.publish_notification(instance, 'created' if created else 'updated')
+
+
+@receiver(post_delete, sender=Notification)
+def publish_notification_deleted(sender, instance, **kwargs):
+    change_feed.publish_notification(instance, 'deleted')
+
+
+@receiver(post_save, sender=ExpiryStock)
+def publish_stock_saved(sender, instance, created, **kwargs):
+    change_feed.publish_stock(instance, 'created' if created else 'updated')
+
+
+@receiver(post_delete, sender=ExpiryStock)
+def publish_stock_deleted(sender, instance, **kwargs):
+    change_feed.publish_stock(instance, 'deleted')
+
+
+@receiver(post_init, sender=OrderQueue)
+def remember_order_state(sender, instance, **kwargs):
+    # Status as loaded, to detect transitions on save (deferred fields stay unknown)
+    instance._feed_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=OrderQueue)
+def publish_order_saved(sender, instance, created, **kwargs):
+    previous_status = getattr(instance, '_feed_status', None)
+    if created:
+        change_feed.publish_order(instance, 'created')
+    elif instance.status != previous_status:
+        change_feed.publish_order(instance, 'status_changed', previous_status)
+    instance._feed_status = instance.status
+
+
+# ----------------------------------------------------------------------------
+# Order counters
+# ----------------------------------------------------------------------------
+
+def _stored_counter_names(order):
+    # Counted from the row as stored, not as this instance loaded it: another
+    # request may have moved the order on since (one query by primary key)
+    stored = OrderQueue.objects.filter(pk=order.pk).values_list(
+        'requested_by_id', 'status', 'message_received'
+    ).first()
+    return order_workflow.counter_names(*stored) if stored else []
+
+
+@receiver(pre_save, sender=OrderQueue)
+def load_order_counter_state(sender, instance, **kwargs):
+    instance._counter_names = [] if instance.pk is None else _stored_counter_names(instance)
+
+
+@receiver(post_save, sender=OrderQueue)
+def update_order_counters(sender, instance, created, **kwargs):
+    new_names = order_workflow.order_counter_names(instance)
+    old_names = [] if created else instance._counter_names
+    order_workflow.adjust_counters(old_names, new_names)
+
+
+@receiver(pre_delete, sender=OrderQueue)
+def load_deleted_order_counter_state(sender, instance, **kwargs):
+    instance._counter_names = _stored_counter_names(instance)
+
+
+@receiver(post_delete, sender=OrderQueue)
+def remove_order_from_counters(sender, instance, **kwargs):
+    order_workflow.adjust_counters(instance._counter_names, [])
+
+
+# ----------------------------------------------------------------------------
+# Stores
+# ----------------------------------------------------------------------------
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def clear_warehouse_cache(sender, **kwargs):
+    stores.clear_cache()
@@ -0,0 +1,322 @@
+"""
+Inventory Snapshots
+Point-in-time export of the inventory tables for reporting datasets and
+backups, and a fast restore.
+
+    export_snapshot(directory, fmt)   streams each table with
+                                      iterator(chunk_size) into one file per
+                                      table - gzip CSV, or Parquet when pyarrow
+                                      is installed - plus manifest.json
+    import_snapshot(directory)        bulk_creates each table in batches inside
+                                      one transaction, then rebuilds what is
+                                      derived from it (stock projections, order
+                                      counters, dashboard cache)
+
+Rows keep their ids, and their created/updated timestamps are written as
+exported (auto_now/auto_now_add are held off during the import). Foreign keys
+to users are written as usernames and matched by username on import, so a
+snapshot can be restored into another database that has the same accounts.
+Stores are written and matched by name the same way (created if missing).
+bulk_create sends no model signals, so nothing fires per row.
+"""
+
+import csv
+import gzip
+import json
+import os
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import ExpiryStock, OrderQueue, Product, SalesBill, SalesBillItem, StockMovement, Store, normalize_name
+
+
+# Export / restore order (parents before children)
+TABLES = [
+    ('products', Product),
+    ('stock_batches', ExpiryStock),
+    ('stock_movements', StockMovement),
+    ('bills', SalesBill),
+    ('bill_items', SalesBillItem),
+    ('orders', OrderQueue),
+]
+FORMATS = ['csv', 'parquet']
+CHUNK_SIZE = 5000
+
+# Foreign keys written as a natural key instead of an id
+NATURAL_KEYS = {User: 'username', Store: 'name'}
+
+
+class SnapshotError(Exception):
+    """Snapshot cannot be written or restored"""
+
+
+def _natural_key(field):
+    return NATURAL_KEYS.get(field.related_model) if field.is_relation else None
+
+
+def _columns(model):
+    """(column name, field) for every stored field; user and store FKs are exported by natural key"""
+    columns = []
+    for field in model._meta.concrete_fields:
+        if _natural_key(field):
+            columns.append((field.name, field))
+        else:
+            columns.append((field.attname, field))
+    return columns
+
+
+def _lookups(model):
+    return [
+        f'{field.name}__{_natural_key(field)}' if _natural_key(field) else field.attname
+        for field in model._meta.concrete_fields
+    ]
+
+
+def _file_name(table, fmt):
+    return f'{table}.csv.gz' if fmt == 'csv' else f'{table}.parquet'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SnapshotError('Parquet needs pyarrow (pip install pyarrow) - use the csv format instead')
+    return pyarrow
+
+
+# ----------------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------------
+
+def _chunks(model):
+    """Lists of row tuples, CHUNK_SIZE at a time, streamed from the database"""
+    rows = model.objects.order_by('pk').values_list(*_lookups(model)).iterator(chunk_size=CHUNK_SIZE)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _write_csv(path, model, columns):
+    count = 0
+    with gzip.open(path, 'wt', newline='', encoding='utf-8', compresslevel=6) as handle:
+        writer = csv.writer(handle)
+        writer.writerow([name for name, _ in columns])
+        for chunk in _chunks(model):
+            writer.writerows([_csv_value(value) for value in row] for row in chunk)
+            count += len(chunk)
+    return count
+
+
+def _arrow_type(pa, field):
+    if _natural_key(field):
+        return pa.string()
+    if field.is_relation or isinstance(field, (models.AutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    return pa.string()
+
+
+def _write_parquet(path, model, columns):
+    pa = _require_pyarrow()
+    schema = pa.schema([(name, _arrow_type(pa, field)) for name, field in columns])
+    count = 0
+    with pa.parquet.ParquetWriter(path, schema, compression='zstd') as writer:
+        for chunk in _chunks(model):
+            arrays = [pa.array(values, type=schema.field(i).type) for i, values in enumerate(zip(*chunk))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def export_snapshot(directory, fmt='csv'):
+    """Write every table to directory; returns the manifest"""
+    if fmt not in FORMATS:
+        raise SnapshotError(f'format must be one of {", ".join(FORMATS)}')
+    if fmt == 'parquet':
+        _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {'exported_at': timezone.now().isoformat(), 'format': fmt, 'tables': {}}
+    # One read transaction, so every table reflects the same moment
+    with transaction.atomic():
+        for table, model in TABLES:
+            columns = _columns(model)
+            path = os.path.join(directory, _file_name(table, fmt))
+            write = _write_csv if fmt == 'csv' else _write_parquet
+            manifest['tables'][table] = {
+                'file': os.path.basename(path),
+                'rows': write(path, model, columns),
+                'columns': [name for name, _ in columns],
+            }
+
+    with open(os.path.join(directory, 'manifest.json'), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+# ----------------------------------------------------------------------------
+# Import
+# ----------------------------------------------------------------------------
+
+def _read_csv(path):
+    with gzip.open(path, 'rt', newline='', encoding='utf-8') as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        chunk = []
+        for row in reader:
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+
+
+def _read_parquet(path):
+    pa = _require_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=CHUNK_SIZE):
+        yield batch.schema.names, list(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+@contextmanager
+def _stored_timestamps(model):
+    """Keep exported created/updated timestamps instead of stamping the import time"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _converter(field, user_ids, store_ids):
+    if field.is_relation and field.related_model is User:
+        def convert(value):
+            if value in (None, ''):
+                return None
+            if value not in user_ids:
+                if not field.null:
+                    raise SnapshotError(f'{field.model.__name__}.{field.name}: unknown user "{value}"')
+                return None
+            return user_ids[value]
+        return field.attname, convert
+
+    if field.is_relation and field.related_model is Store:
+        def convert(value):
+            if value in (None, ''):
+                return None
+            if value not in store_ids:
+                store_ids[value] = Store.objects.create(name=value).id
+            return store_ids[value]
+        return field.attname, convert
+
+    def convert(value):
+        if value == '' and (field.null or not isinstance(field, (models.CharField, models.TextField))):
+            return None
+        return field.to_python(value)
+    return field.attname, convert
+
+
+def import_snapshot(directory):
+    """
+    Restore a snapshot into empty inventory tables.
+    Returns {table: rows restored}.
+    """
+    manifest_path = os.path.join(directory, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f'No manifest.json in {directory}')
+    with open(manifest_path) as handle:
+        manifest = json.load(handle)
+
+    fmt = manifest['format']
+    read = _read_csv if fmt == 'csv' else _read_parquet
+    if fmt == 'parquet':
+        _require_pyarrow()
+
+    occupied = [table for table, model in TABLES if model.objects.exists()]
+    if occupied:
+        raise SnapshotError(
+            f'Tables already hold data ({", ".join(occupied)}) - restore into a freshly migrated database'
+        )
+
+    user_ids = dict(User.objects.values_list('username', 'id'))
+    store_ids = {}
+    for name, store_id in Store.objects.order_by('-is_warehouse', 'id').values_list('name', 'id'):
+        store_ids.setdefault(name, store_id)  # The warehouse, then the oldest store of that name
+    restored = {}
+    with transaction.atomic():
+        for table, model in TABLES:
+            if table not in manifest['tables']:
+                continue
+            fields = {name: field for name, field in _columns(model)}
+            path = os.path.join(directory, manifest['tables'][table]['file'])
+            count = 0
+            with _stored_timestamps(model):
+                for header, rows in read(path):
+                    converters = [_converter(fields[name], user_ids, store_ids) for name in header]
+                    model.objects.bulk_create([
+                        model(**{attname: convert(value) for (attname, convert), value in zip(converters, row)})
+                        for row in rows
+                    ], batch_size=1000)
+                    count += len(rows)
+            restored[table] = count
+
+        _after_restore()
+    return restored
+
+
+def _after_restore():
+    """Rebuild everything derived from the restored rows"""
+    from django.core.management.color import no_style
+    from . import dashboard_cache, order_workflow, stock_ledger
+
+    # Explicit ids leave sequences behind on PostgreSQL (no-op on SQLite)
+    statements = connection.ops.sequence_reset_sql(no_style(), [model for _, model in TABLES])
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    # Snapshots taken before Product.name_key existed restore it empty
+    unkeyed = list(Product.objects.filter(name_key='').only('id', 'name'))
+    for product in unkeyed:
+        product.name_key = normalize_name(product.name)
+    Product.objects.bulk_update(unkeyed, ['name_key'], batch_size=1000)
+
+    stock_ledger.rebuild_projections()
+    order_workflow.rebuild_counters()
+    # Every store's and user's scoped fragments are stale too
+    dashboard_cache.bump_version_on_commit(dashboard_cache.EVERYTHING)
@@ -0,0 +1,50 @@
+"""
+SQLite Tuning
+Applied to every new SQLite connection (connection_created signal).
+
+    journal_mode=WAL        readers keep reading while a bill is being
+                            written, instead of waiting for the writer's lock
+    synchronous=NORMAL      fsync at checkpoints rather than every commit
+                            (safe with WAL: a power cut can only lose the
+                            last commits, never corrupt the file)
+    busy_timeout            a writer that finds the database locked waits
+                            this long for it instead of failing at once
+                            with "database is locked"
+    cache_size, mmap_size   page cache per connection and memory-mapped I/O
+
+Transactions also start with BEGIN IMMEDIATE, so a transaction.atomic()
+block takes the write lock up front. With the default deferred BEGIN two
+transactions can both read and then both try to write; one of them fails
+straight away (busy_timeout cannot help once it holds a read snapshot).
+
+journal_mode is stored in the database file, so it stays on once set. All
+of this is controlled by SQLITE_TUNING and the SQLITE_* settings; other
+databases are left alone.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def _start_immediate_transaction(connection):
+    def start_transaction_under_autocommit():
+        connection.cursor().execute('BEGIN IMMEDIATE')
+    return start_transaction_under_autocommit
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not getattr(settings, 'SQLITE_TUNING', False):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}')
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f'PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}')
+        cursor.execute(f'PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}')
+
+    # Django 4.2 has no OPTIONS['transaction_mode'] (added in 5.1); atomic()
+    # opens its transaction through this hook on SQLite
+    connection._start_transaction_under_autocommit = _start_immediate_transaction(connection)
@@ -0,0 +1,191 @@
+"""
+Stock Ledger
+Every stock change (new batch, FEFO sale, transfer, approval deduction,
+expiry removal) is appended to StockMovement, one bulk insert per operation.
+Two projections are kept up to date from the same writes:
+
+    StockOnHand  units per product and owner
+    DailySales   units sold and bill lines per product per day
+
+so trend scoring and analytics read a few compact rows instead of re-counting
+batches and bill items. rebuild_projections() recomputes both from the
+source tables if they ever drift (raw SQL, admin edits).
+"""
+
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySales, ExpiryStock, SalesBillItem, StockMovement, StockOnHand
+
+
+# Direction of each movement type for the owner's on-hand balance
+INBOUND = {'add', 'transfer_in', 'return'}
+OUTBOUND = {'deduct', 'transfer_out', 'damage', 'expired'}
+
+SALE = 'Sale'
+
+
+def signed_quantity(movement):
+    if movement.movement_type in OUTBOUND:
+        return -movement.quantity
+    # inbound and signed manual adjustments
+    return movement.quantity
+
+
+def owner_id(movement):
+    """Whose on-hand balance a movement changes"""
+    if movement.movement_type in OUTBOUND:
+        return movement.from_user_id
+    return movement.to_user_id
+
+
+# ----------------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------------
+
+def record(movements):
+    """Append movements in one insert, apply them to StockOnHand and re-check thresholds"""
+    from .low_stock import evaluate
+
+    movements = [m for m in movements if m.quantity]
+    if not movements:
+        return []
+
+    deltas = defaultdict(int)
+    for movement in movements:
+        deltas[(movement.product_id, owner_id(movement))] += signed_quantity(movement)
+
+    with transaction.atomic():
+        StockMovement.objects.bulk_create(movements, batch_size=500)
+        for (product_id, user_id), delta in deltas.items():
+            _bump_on_hand(product_id, user_id, delta)
+        # Only the (product, owner) pairs this operation touched
+        evaluate(deltas.keys())
+    return movements
+
+
+def _increment(model, lookup, **counts):
+    """
+    Add counts to the projection row matching lookup, creating it on first
+    use. The insert runs in a savepoint: when a concurrent transaction
+    creates the same row first, the UPDATE is retried instead of the
+    IntegrityError rolling back the caller's bill or transfer.
+    """
+    increments = {field: F(field) + value for field, value in counts.items()}
+    if model.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            _, created = model.objects.get_or_create(**lookup, defaults=counts)
+    except IntegrityError:
+        created = False
+    if not created:
+        model.objects.filter(**lookup).update(**increments)
+
+
+def _bump_on_hand(product_id, user_id, delta):
+    if delta:
+        _increment(StockOnHand, {'product_id': product_id, 'user_id': user_id}, quantity=delta)
+
+
+def record_sale(product_id, quantity, lines=1, day=None):
+    """Add one bill line (or several) to the day's DailySales row"""
+    day = day or timezone.localdate()
+    _increment(DailySales, {'product_id': product_id, 'date': day}, quantity=quantity, sale_count=lines)
+
+
+def add_batch(batch, performed_by, reason='Stock added', reference=''):
+    """Save a new ExpiryStock batch and log its arrival"""
+    with transaction.atomic():
+        batch.save()
+        record([StockMovement(
+            product_id=batch.product_id,
+            user=performed_by,
+            movement_type='add',
+            quantity=batch.quantity,
+            to_user_id=batch.user_id,
+            reason=reason,
+            reference_number=reference or None
+        )])
+    return batch
+
+
+def remove_expired(batches):
+    """Delete expired batches and log what was written off"""
+    batches = list(batches)
+    with transaction.atomic():
+        record([
+            StockMovement(
+                product_id=batch.product_id,
+                user=None,
+                movement_type='expired',
+                quantity=batch.quantity,
+                from_user_id=batch.user_id,
+                reason=f'Expired on {batch.expiry_date}'
+            )
+            for batch in batches if batch.quantity > 0
+        ])
+        for batch in batches:
+            # Per-object delete keeps the stock signals (cache, change feed)
+            batch.delete()
+    return len(batches)
+
+
+# ----------------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------------
+
+def sales_between(product, start, end=None):
+    """{'units', 'lines'} sold from start (inclusive) to end (inclusive, default today)"""
+    rows = DailySales.objects.filter(product=product, date__gte=start)
+    if end is not None:
+        rows = rows.filter(date__lte=end)
+    totals = rows.aggregate(units=Sum('quantity'), lines=Sum('sale_count'))
+    return {'units': totals['units'] or 0, 'lines': totals['lines'] or 0}
+
+
+def on_hand(product, user=None):
+    """Units on hand for a product, for one owner or all owners"""
+    rows = StockOnHand.objects.filter(product=product)
+    if user is not None:
+        rows = rows.filter(user=user)
+    return rows.aggregate(total=Sum('quantity'))['total'] or 0
+
+
+# ----------------------------------------------------------------------------
+# Rebuild
+# ----------------------------------------------------------------------------
+
+def rebuild_projections():
+    """Recompute StockOnHand from live batches and DailySales from bill items"""
+    on_hand_rows = ExpiryStock.objects.filter(quantity__gt=0).values('product_id', 'user_id').annotate(
+        total=Sum('quantity')
+    )
+    sales_rows = SalesBillItem.objects.annotate(day=TruncDate('bill__created_at')).values('product_id', 'day').annotate(
+        units=Sum('quantity'), lines=Count('id')
+    )
+
+    with transaction.atomic():
+        StockOnHand.objects.all().delete()
+        StockOnHand.objects.bulk_create([
+            StockOnHand(product_id=row['product_id'], user_id=row['user_id'], quantity=row['total'])
+            for row in on_hand_rows
+        ], batch_size=500)
+
+        DailySales.objects.all().delete()
+        DailySales.objects.bulk_create([
+            DailySales(product_id=row['product_id'], date=row['day'], quantity=row['units'], sale_count=row['lines'])
+            for row in sales_rows
+        ], batch_size=500)
+
+    from .low_stock import evaluate
+    evaluate()
+
+    return {
+        'on_hand_rows': StockOnHand.objects.count(),
+        'daily_sales_rows': DailySales.objects.count(),
+    }
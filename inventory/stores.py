@@ -0,0 +1,65 @@
+"""
+Stores
+Stock batches (ExpiryStock.store) and bills (SalesBill.store) carry the
+store they belong to, copied from their user's UserProfile.store when saved,
+so per-store pages read one partition through the (store, product) and
+(store, created_at) indexes instead of every store's rows.
+
+    warehouse()              the company warehouse Store, cached in process
+    warehouse_user_ids()     users who hold warehouse stock, cached with it
+    warehouse_user()         the one of them new warehouse stock is booked to
+    store_of(user)           a user's Store (None for admins without one)
+    store_id_for(user_id)    the same, by id
+
+The warehouse cache is dropped when a Store or UserProfile changes in this
+process (see signals.py); other processes pick a new warehouse up on restart.
+"""
+
+from django.contrib.auth.models import User
+
+from .models import Store, UserProfile
+
+
+_warehouse = {}
+
+
+def warehouse():
+    """The store flagged is_warehouse, or None if there is none yet"""
+    if 'store' not in _warehouse:
+        store = Store.objects.filter(is_warehouse=True).first()
+        if store is None:
+            return None
+        _warehouse['store'] = store
+        _warehouse['user_ids'] = frozenset(
+            UserProfile.objects.filter(store=store).values_list('user_id', flat=True)
+        )
+    return _warehouse['store']
+
+
+def warehouse_user_ids():
+    if warehouse() is None:
+        return frozenset()
+    return _warehouse['user_ids']
+
+
+def warehouse_user():
+    """Owner of the warehouse's stock (its first member), or None"""
+    user_ids = warehouse_user_ids()
+    if not user_ids:
+        return None
+    if 'user' not in _warehouse:
+        _warehouse['user'] = User.objects.get(pk=min(user_ids))
+    return _warehouse['user']
+
+
+def clear_cache():
+    _warehouse.clear()
+
+
+def store_of(user):
+    profile = UserProfile.objects.filter(user=user).select_related('store').first()
+    return profile.store if profile else None
+
+
+def store_id_for(user_id):
+    return UserProfile.objects.filter(user_id=user_id).values_list('store_id', flat=True).first()
@@ -0,0 +1,83 @@
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import RequestFactory, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from inventory.db_routing import PIN_COOKIE, REPLICA, replica_configured, replica_reads
+from inventory.models import Product, UserProfile
+
+
+def _queries(alias, table='inventory_'):
+    """Capture queries on one alias; .tables() counts those touching the app's tables"""
+    context = CaptureQueriesContext(connections[alias])
+    context.tables = lambda: sum(table in query['sql'] for query in context.captured_queries)
+    return context
+
+
+@skipUnless(replica_configured(), 'needs the replica alias: --settings=smart_inventory.test_settings')
+class ReplicaRoutingTests(TransactionTestCase):
+    # Not TestCase: its per-test transaction on the primary keeps every read there
+    databases = {DEFAULT_DB_ALIAS, REPLICA} if replica_configured() else {DEFAULT_DB_ALIAS}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='store_1', password='pw12345')
+        UserProfile.objects.create(user=self.user, role='inventory', store_name='Store One')
+        self.product = Product.objects.create(
+            name='Milk 1L', category='Dairy', cost_price=Decimal('40.00'),
+            selling_price=Decimal('50.00'), new_price=Decimal('50.00')
+        )
+        self.get = RequestFactory().get('/')
+
+    def run_view(self, body):
+        return replica_reads(lambda request: body())(self.get)
+
+    def test_reads_in_replica_views_use_the_replica(self):
+        with _queries(REPLICA) as replica, _queries(DEFAULT_DB_ALIAS) as primary:
+            self.assertEqual(self.run_view(lambda: Product.objects.get(pk=self.product.pk)), self.product)
+        self.assertEqual(replica.tables(), 1)
+        self.assertEqual(primary.tables(), 0)
+
+    def test_reads_outside_replica_views_use_the_primary(self):
+        with _queries(REPLICA) as replica:
+            Product.objects.get(pk=self.product.pk)
+        self.assertEqual(len(replica), 0)
+
+    def test_writes_and_later_reads_use_the_primary(self):
+        def body():
+            Product.objects.filter(pk=self.product.pk).update(new_price=Decimal('45.00'))
+            return Product.objects.get(pk=self.product.pk).new_price
+
+        with _queries(REPLICA) as replica, _queries(DEFAULT_DB_ALIAS) as primary:
+            self.assertEqual(self.run_view(body), Decimal('45.00'))
+        self.assertEqual(replica.tables(), 0)
+        self.assertEqual(primary.tables(), 2)
+
+    def test_select_for_update_uses_the_primary(self):
+        def body():
+            with transaction.atomic():
+                return list(Product.objects.select_for_update().filter(pk=self.product.pk))
+
+        with _queries(REPLICA) as replica, _queries(DEFAULT_DB_ALIAS) as primary:
+            self.assertEqual(self.run_view(body), [self.product])
+        self.assertEqual(replica.tables(), 0)
+        self.assertEqual(primary.tables(), 1)
+
+    def test_pin_cookie_after_a_write_keeps_reads_on_the_primary(self):
+        url = '/api/search-products-billing/?q=Milk'
+        self.client.force_login(self.user)
+
+        with _queries(REPLICA) as replica:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertGreater(replica.tables(), 0)
+        self.assertNotIn(PIN_COOKIE, self.client.cookies)
+
+        self.client.post('/api/search-products-billing/')
+        self.assertIn(PIN_COOKIE, self.client.cookies)
+
+        with _queries(REPLICA) as replica, _queries(DEFAULT_DB_ALIAS) as primary:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(replica), 0)
+        self.assertGreater(primary.tables(), 0)
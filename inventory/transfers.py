@@ -0,0 +1,163 @@
+"""
+Stock Transfers
+Moves stock from one owner to another (warehouse to store, store to store)
+as one StockTransfer document with one line per product.
+
+    transfer(lines, from_user, to_user, performed_by)
+
+in a single transaction:
+
+    1. locks the sender's live batches for every product on the document
+       (one select_for_update query) and checks they cover every line -
+       nothing moves unless the whole document can
+    2. takes each line from those batches earliest expiry first
+    3. credits the receiver batch by batch with the same expiry dates,
+       topping up a batch with that expiry if the receiver has one,
+       otherwise creating it
+    4. writes the document and its lines, source and destination batches
+       with bulk_create / bulk_update, and logs one transfer_out and one
+       transfer_in per line in one StockMovement insert referencing the
+       document
+
+StockOnHand, low-stock alerts, the dashboard cache and the change feed are
+updated from the same writes.
+"""
+
+import uuid
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ExpiryStock, Product, StockMovement, StockTransfer, StockTransferLine
+
+
+class TransferError(Exception):
+    """The transfer cannot be made (nothing was moved)"""
+
+
+def _merge_lines(lines):
+    """{product_id: quantity} from (product_id, quantity) pairs, in document order"""
+    merged = {}
+    for product_id, quantity in lines:
+        quantity = int(quantity)
+        if quantity <= 0:
+            raise TransferError(f'Quantity for product {product_id} must be positive')
+        merged[product_id] = merged.get(product_id, 0) + quantity
+    if not merged:
+        raise TransferError('A transfer needs at least one line')
+    return merged
+
+
+def transfer(lines, from_user, to_user, performed_by, reason='', reference=None, record_sales=False):
+    """
+    Move stock for (product_id, quantity) lines from from_user to to_user.
+    record_sales also counts the lines in DailySales (transfers that are
+    billed, like approved store requests). Returns the StockTransfer.
+    Raises TransferError - and moves nothing - if any line is not covered.
+    """
+    from . import change_feed, dashboard_cache
+    from .stock_ledger import record, record_sale
+    from .stores import store_id_for
+
+    if from_user.pk == to_user.pk:
+        raise TransferError('Cannot transfer stock to the same owner')
+    wanted = _merge_lines(lines)
+    today = timezone.localdate()
+    to_store_id = store_id_for(to_user.pk)
+
+    with transaction.atomic():
+        sources = defaultdict(list)
+        for batch in ExpiryStock.objects.select_for_update().filter(
+            product_id__in=wanted, user=from_user, quantity__gt=0, expiry_date__gte=today
+        ).order_by('product_id', 'expiry_date', 'id'):
+            sources[batch.product_id].append(batch)
+
+        shortages = {}
+        for product_id, quantity in wanted.items():
+            available = sum(batch.quantity for batch in sources[product_id])
+            if available < quantity:
+                shortages[product_id] = (available, quantity)
+        if shortages:
+            names = Product.objects.in_bulk(shortages)
+            raise TransferError(f'Not enough stock at {from_user.username} - ' + '; '.join(
+                f'{names[product_id].name if product_id in names else product_id}: '
+                f'{available} available, {quantity} requested'
+                for product_id, (available, quantity) in shortages.items()
+            ))
+
+        # Take FEFO from the sender: {(product_id, expiry_date): units}
+        taken = defaultdict(int)
+        touched = []
+        for product_id, quantity in wanted.items():
+            remaining = quantity
+            for batch in sources[product_id]:
+                if remaining <= 0:
+                    break
+                take = min(batch.quantity, remaining)
+                batch.quantity -= take
+                remaining -= take
+                taken[(product_id, batch.expiry_date)] += take
+                touched.append(batch)
+        ExpiryStock.objects.bulk_update(touched, ['quantity'])
+
+        # Credit the receiver with the same expiry dates
+        existing = {
+            (batch.product_id, batch.expiry_date): batch
+            for batch in ExpiryStock.objects.select_for_update().filter(
+                product_id__in=wanted, user=to_user, expiry_date__in={expiry for _, expiry in taken}
+            ).order_by('id')
+        }
+        topped_up = []
+        created = []
+        for (product_id, expiry_date), units in taken.items():
+            batch = existing.get((product_id, expiry_date))
+            if batch is not None:
+                batch.quantity += units
+                topped_up.append(batch)
+            else:
+                created.append(ExpiryStock(
+                    product_id=product_id, user=to_user, store_id=to_store_id,
+                    quantity=units, expiry_date=expiry_date
+                ))
+        ExpiryStock.objects.bulk_update(topped_up, ['quantity'])
+        created = ExpiryStock.objects.bulk_create(created)
+
+        document = StockTransfer.objects.create(
+            reference=reference or f'TRF-{uuid.uuid4().hex[:10].upper()}',
+            from_user=from_user,
+            to_user=to_user,
+            created_by=performed_by,
+            reason=reason or None
+        )
+        StockTransferLine.objects.bulk_create([
+            StockTransferLine(transfer=document, product_id=product_id, quantity=quantity)
+            for product_id, quantity in wanted.items()
+        ])
+
+        record([
+            StockMovement(
+                product_id=product_id,
+                user=performed_by,
+                movement_type=movement_type,
+                quantity=quantity,
+                from_user=from_user,
+                to_user=to_user,
+                reason=reason or f'Transfer {document.reference}',
+                reference_number=document.reference
+            )
+            for product_id, quantity in wanted.items()
+            for movement_type in ('transfer_out', 'transfer_in')
+        ])
+        if record_sales:
+            for product_id, quantity in wanted.items():
+                record_sale(product_id, quantity)
+
+        # bulk_create / bulk_update send no signals
+        dashboard_cache.bump_version_on_commit(*dashboard_cache.stock_groups(touched + topped_up + created))
+        for batch in touched + topped_up:
+            change_feed.publish_stock(batch, 'updated')
+        for batch in created:
+            change_feed.publish_stock(batch, 'created')
+
+    return document
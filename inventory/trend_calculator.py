@@ -5,6 +5,9 @@ Calculates trend scores based on:
 - Sales frequency
 - Product requests
 - Time-based patterns
+
+Stock and sales inputs come from the stock ledger (StockMovement and its
+StockOnHand/DailySales projections) rather than re-counting batches and bills.
 """
 
 from django.utils import timezone
@@ -46,12 +49,13 @@ def calculate_stock_movement_score(product):
     Score based on how frequently stock is added/removed
     More movement = Higher demand
     """
-    from inventory.models import ExpiryStock
+    from inventory.models import StockMovement
     
-    # Count stock entries in last 30 days
+    # Count stock arrivals in last 30 days
     thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_stock_entries = ExpiryStock.objects.filter(
+    recent_stock_entries = StockMovement.objects.filter(
         product=product,
+        movement_type='add',
         created_at__gte=thirty_days_ago
     ).count()
     
@@ -75,14 +79,11 @@ def calculate_sales_frequency_score(product):
     Score based on billing frequency
     More bills = Higher demand
     """
-    from inventory.models import SalesBillItem
+    from inventory.stock_ledger import sales_between
     
-    # Count bills in last 30 days
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_bills = SalesBillItem.objects.filter(
-        product=product,
-        bill__created_at__gte=thirty_days_ago
-    ).count()
+    # Count bill lines in last 30 days
+    thirty_days_ago = timezone.localdate() - timedelta(days=30)
+    recent_bills = sales_between(product, thirty_days_ago)['lines']
     
     # Score: 0-5 based on bills
     if recent_bills >= 15:
@@ -134,17 +135,16 @@ def calculate_stock_level_score(product):
     Score based on current stock level
     Low stock with activity = High demand
     """
-    total_stock = product.total_stock
+    from inventory.models import OrderQueue
+    from inventory.stock_ledger import on_hand, sales_between
+    
+    total_stock = on_hand(product)
     
     # Get recent activity (bills + requests in last 7 days)
-    from inventory.models import SalesBillItem, OrderQueue
     seven_days_ago = timezone.now() - timedelta(days=7)
     
     recent_activity = (
-        SalesBillItem.objects.filter(
-            product=product,
-            bill__created_at__gte=seven_days_ago
-        ).count() +
+        sales_between(product, timezone.localdate() - timedelta(days=7))['lines'] +
         OrderQueue.objects.filter(
             product=product,
             created_at__gte=seven_days_ago
@@ -171,10 +171,14 @@ def update_all_trend_scores():
     """
     from inventory.models import Product
     
+    from inventory.trend_history import record
+    
     updated_count = 0
+    scores = []
     for product in Product.objects.all():
         old_score = product.trend_score
         new_score = calculate_trend_score(product)
+        scores.append((product.id, new_score))
         
         if old_score != new_score:
             product.trend_score = new_score
@@ -182,6 +186,8 @@ def update_all_trend_scores():
             product.save()
             updated_count += 1
     
+    # History keeps every product's score for the day, changed or not
+    record(scores, 'computed')
     return updated_count
 
 
@@ -194,4 +200,7 @@ def update_product_trend_score(product):
     product.trend_score = new_score
     product.last_trend_update = timezone.now()
     product.save()
+    
+    from inventory.trend_history import record
+    record([(product.id, new_score)], 'computed')
     return new_score
@@ -0,0 +1,113 @@
+"""
+Trend Score History
+Every trend update path records the scores it wrote into TrendScoreSnapshot:
+one row per product per day, upserted in bulk, keeping the day's last score
+plus the last score from each source (AI, computed, simulated) so they can
+be compared.
+
+history() answers range queries for charts in one grouped query. Long ranges
+are downsampled in SQL to weekly or monthly averages so a year of history for
+the whole catalog stays a few thousand points.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Avg
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import TrendScoreSnapshot
+
+
+SOURCES = ['ai', 'computed', 'simulated']
+MAX_POINTS = 120  # Per product, before downsampling kicks in
+
+
+def _tenths(score):
+    return int(round(min(10.0, max(0.0, float(score))) * 10))
+
+
+def record(scores, source, day=None):
+    """Upsert today's snapshot for (product_id, score) pairs from one source"""
+    if source not in SOURCES:
+        raise ValueError(f'source must be one of {", ".join(SOURCES)}')
+
+    day = day or timezone.localdate()
+    column = f'{source}_score'
+    snapshots = []
+    for product_id, score in scores:
+        value = _tenths(score)
+        snapshots.append(TrendScoreSnapshot(product_id=int(product_id), date=day, score=value, **{column: value}))
+    if snapshots:
+        TrendScoreSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['product', 'date'],
+            update_fields=['score', column],
+            batch_size=1000,
+        )
+    return len(snapshots)
+
+
+def _periods(start, end, bucket):
+    """Every bucket start date from start to end"""
+    if bucket == 'day':
+        first, step = start, lambda d: d + timedelta(days=1)
+    elif bucket == 'week':
+        first, step = start - timedelta(days=start.weekday()), lambda d: d + timedelta(days=7)
+    else:
+        first = start.replace(day=1)
+        step = lambda d: (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+    periods = []
+    while first <= end:
+        periods.append(first)
+        first = step(first)
+    return periods
+
+
+def history(product_ids=None, days=365, end=None, source=None, max_points=MAX_POINTS):
+    """
+    Score series for a date range ending on end (default today):
+    {'bucket': 'day'|'week'|'month', 'periods': [iso dates], 'series': {product_id: [score or None]}}.
+    source picks one source's scores instead of the day's last score.
+    """
+    if source is not None and source not in SOURCES:
+        raise ValueError(f'source must be one of {", ".join(SOURCES)}')
+
+    end = end or timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    column = f'{source}_score' if source else 'score'
+
+    if days <= max_points:
+        bucket = 'day'
+    elif days / 7 <= max_points:
+        bucket = 'week'
+    else:
+        bucket = 'month'
+
+    rows = TrendScoreSnapshot.objects.filter(date__gte=start, date__lte=end, **{f'{column}__isnull': False})
+    if product_ids is not None:
+        rows = rows.filter(product_id__in=product_ids)
+
+    if bucket == 'day':
+        rows = rows.values_list('product_id', 'date', column)
+    else:
+        trunc = TruncWeek if bucket == 'week' else TruncMonth
+        rows = rows.annotate(period=trunc('date')).values('product_id', 'period').annotate(
+            value=Avg(column)
+        ).values_list('product_id', 'period', 'value').order_by()
+
+    periods = _periods(start, end, bucket)
+    index = {period: i for i, period in enumerate(periods)}
+    series = {}
+    for product_id, period, value in rows:
+        if product_id not in series:
+            series[product_id] = [None] * len(periods)
+        if period in index:
+            series[product_id][index[period]] = round(value / 10, 2)
+
+    return {
+        'bucket': bucket,
+        'periods': [period.isoformat() for period in periods],
+        'series': series,
+    }
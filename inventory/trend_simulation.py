@@ -0,0 +1,184 @@
+"""
+Trend Simulation
+Market simulation used when no AI trend analysis is available. Scores the
+whole catalog in one pass:
+
+    - product rows (category, ABC class, current score) and non-expired stock
+      totals are read with one annotated query
+    - every random factor for every product is drawn at once from a seeded
+      NumPy generator, so a run can be reproduced from its seed
+    - stock, category, season and ABC factors are array operations
+    - scores are rounded to 0.1, so there are at most 101 distinct values;
+      they are written with one UPDATE per value (in id chunks) rather than
+      bulk_update, whose per-row CASE expressions cost seconds at 10k rows
+
+Two modes:
+
+    drift  nudge the current score (the "Update Trends" simulation)
+    fresh  score from a neutral 5.0 (fallback for products the AI could not score)
+
+Each factor is a uniform draw between a low and high bound picked per product.
+"""
+
+import time
+
+import numpy as np
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Product
+
+
+MODES = ['drift', 'fresh']
+
+LOW_STOCK = 50
+HIGH_STOCK = 200
+WINTER_MONTHS = [11, 12, 1]
+SUMMER_MONTHS = [6, 7, 8]
+
+# (low, high) bounds per mode
+STOCK_BANDS = {
+    #          low stock     high stock     normal
+    'drift': [(0.5, 1.5), (-1.0, -0.2), (-0.3, 0.3)],
+    'fresh': [(1.0, 2.5), (-1.5, 0.5), (-0.5, 1.0)],
+}
+ABC_BANDS = {
+    #          A             B              C
+    'drift': [(0.2, 0.8), (-0.2, 0.4), (-0.5, 0.2)],
+    'fresh': [(0.5, 1.5), (0.0, 0.0), (-1.0, 0.5)],
+}
+# Category keyword (case-insensitive substring) -> bounds; last entry is the default
+CATEGORY_BANDS = {
+    'drift': [('electronic', (0.3, 1.0)), ('food', (-0.2, 0.5)), (None, (-0.3, 0.3))],
+    'fresh': [
+        ('electronic', (1.0, 3.0)),
+        ('food', (0.5, 2.0)),
+        ('furniture', (-1.0, 1.0)),
+        ('stationery', (0.0, 1.5)),
+        (None, (-0.5, 1.5)),
+    ],
+}
+# Winter / summer / rest of the year; fresh mode only lifts electronics in summer
+SEASON_BANDS = {
+    'drift': [(0.5, 1.2), (-0.2, 0.6), (-0.3, 0.3)],
+    'fresh': [(0.5, 2.0), (0.5, 1.5), (0.0, 0.0)],
+}
+NOISE = {'drift': (-0.5, 0.5), 'fresh': (-1.0, 1.0)}
+BASE_SCORE = 5.0
+UPDATE_CHUNK = 500  # ids per UPDATE, below SQLite's bound-parameter limit
+
+
+def _uniform(rng, bounds, choice):
+    """One draw per product between bounds[choice[i]]"""
+    bounds = np.array(bounds, dtype=float)
+    low, high = bounds[choice, 0], bounds[choice, 1]
+    return low + (high - low) * rng.random(len(choice))
+
+
+def _category_choice(categories, bands):
+    """Index into bands of the first keyword each category contains"""
+    lowered = np.char.lower(np.array(categories, dtype=str))
+    choice = np.full(len(categories), len(bands) - 1)
+    for index, (keyword, _) in reversed(list(enumerate(bands[:-1]))):
+        choice = np.where(np.char.find(lowered, keyword) >= 0, index, choice)
+    return choice
+
+
+def scores(current, stock, categories, abc, month, rng, mode='drift'):
+    """
+    New trend scores (rounded to 0.1, within 0-10) for arrays of current
+    scores, stock totals, category names and ABC classes.
+    """
+    n = len(current)
+    stock_choice = np.where(stock < LOW_STOCK, 0, np.where(stock > HIGH_STOCK, 1, 2))
+    abc_choice = np.select([abc == 'A', abc == 'B'], [0, 1], 2)
+    category_bands = CATEGORY_BANDS[mode]
+    category_choice = _category_choice(categories, category_bands)
+
+    if month in WINTER_MONTHS:
+        season_choice = np.zeros(n, dtype=int)
+    elif month in SUMMER_MONTHS:
+        season_choice = np.ones(n, dtype=int)
+    else:
+        season_choice = np.full(n, 2)
+    if mode == 'fresh' and month in SUMMER_MONTHS:
+        # Summer only lifts electronics (fans, ACs)
+        season_choice = np.where(category_choice == 0, 1, 2)
+
+    change = (
+        _uniform(rng, STOCK_BANDS[mode], stock_choice)
+        + _uniform(rng, ABC_BANDS[mode], abc_choice)
+        + _uniform(rng, [bounds for _, bounds in category_bands], category_choice)
+        + _uniform(rng, SEASON_BANDS[mode], season_choice)
+        + _uniform(rng, [NOISE[mode]], np.zeros(n, dtype=int))
+    )
+    base = current if mode == 'drift' else np.full(n, BASE_SCORE)
+    return np.round(np.clip(base + change, 0.0, 10.0), 1)
+
+
+def _save_scores(ids, new_scores, now):
+    """One UPDATE per distinct score (and id chunk), plus the day's history snapshot"""
+    values, groups = np.unique(new_scores, return_inverse=True)
+    with transaction.atomic():
+        for index, value in enumerate(values):
+            group = ids[groups == index].tolist()
+            for start in range(0, len(group), UPDATE_CHUNK):
+                Product.objects.filter(id__in=group[start:start + UPDATE_CHUNK]).update(
+                    trend_score=float(value),
+                    last_trend_update=now
+                )
+        from .trend_history import record
+        record(zip(ids.tolist(), new_scores.tolist()), 'simulated')
+
+        # update() sends no signals
+        from . import dashboard_cache
+        dashboard_cache.bump_version_on_commit(dashboard_cache.PRODUCTS)
+
+
+def simulate(mode='drift', product_ids=None, seed=None, month=None):
+    """
+    Simulate and save new trend scores for the catalog (or the given products).
+    seed defaults to TREND_SIMULATION_SEED, or fresh entropy when unset; the
+    seed used is returned so the run can be replayed.
+    Returns {'updated', 'seed', 'seconds', 'changes'} with changes a list of
+    (product_id, old_score, new_score).
+    """
+    if mode not in MODES:
+        raise ValueError(f'mode must be one of {", ".join(MODES)}')
+
+    started = time.perf_counter()
+    if seed is None:
+        seed = getattr(settings, 'TREND_SIMULATION_SEED', None)
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2 ** 32)
+    rng = np.random.default_rng(seed)
+    month = month or timezone.localdate().month
+
+    products = Product.objects.with_stock_totals()
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+    rows = list(products.values_list('id', 'trend_score', 'annotated_total_stock', 'category', 'abc_classification'))
+    if not rows:
+        return {'updated': 0, 'seed': seed, 'seconds': time.perf_counter() - started, 'changes': []}
+
+    ids, current, stock, categories, abc = zip(*rows)
+    new_scores = scores(
+        np.array(current, dtype=float),
+        np.array(stock, dtype=float),
+        categories,
+        np.array(abc, dtype=str),
+        month,
+        rng,
+        mode,
+    )
+
+    _save_scores(np.array(ids), new_scores, timezone.now())
+
+    return {
+        'updated': len(ids),
+        'seed': seed,
+        'seconds': time.perf_counter() - started,
+        'changes': list(zip(ids, current, new_scores.tolist())),
+    }
@@ -8,9 +8,11 @@ urlpatterns = [
     path('login/', views.user_login, name='login'),
     path('logout/', LogoutView.as_view(next_page='home'), name='logout'),  # Redirect to home after logout
     path('inventory/', views.inventory_dashboard, name='inventory_dashboard'),
+    path('inventory/panels/<str:name>/', views.inventory_dashboard_panel, name='inventory_dashboard_panel'),  # Lazily loaded dashboard tabs
     path('trends/', views.trend_dashboard, name='trend_dashboard'),
     path('trend-dashboard/', views.trend_dashboard, name='trend_dashboard_ajax'),  # Alternative URL for AJAX
     path('admin-panel/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-panel/panels/<str:name>/', views.admin_dashboard_panel, name='admin_dashboard_panel'),  # Lazily loaded dashboard tabs
     path('billing/', views.billing, name='billing'),
     path('billing-working/', views.billing_working, name='billing_working'),
     path('billing-test/', views.billing_test, name='billing_test'),
@@ -35,8 +37,17 @@ urlpatterns = [
     path('api/search-products/', views.search_products, name='search_products'),
     path('api/search-products-billing/', views.search_products_api, name='search_products_api'),  # New API for billing
     path('api/product-autocomplete/', views.product_autocomplete_api, name='product_autocomplete_api'),  # New API for notification autocomplete
+    path('api/changes/', views.change_feed_poll, name='change_feed_poll'),  # Long-poll change feed
+    path('api/changes/stream/', views.change_feed_stream, name='change_feed_stream'),  # Server-Sent Events change feed
     path('apply-recommendation/', views.apply_recommendation, name='apply_recommendation'),
     path('dismiss-recommendation/', views.dismiss_recommendation, name='dismiss_recommendation'),
+    path('api/recommendations/queue/', views.recommendation_queue, name='recommendation_queue'),
+    path('api/recommendations/bulk/', views.bulk_recommendation_action, name='bulk_recommendation_action'),
+    path('api/pricing/bulk/', views.bulk_pricing, name='bulk_pricing'),
+    path('api/trends/history/', views.trend_history, name='trend_history'),
+    path('api/replenishment/plan/', views.replenishment_plan, name='replenishment_plan'),
+    path('api/replenishment/drafts/bulk/', views.bulk_draft_action, name='bulk_draft_action'),
+    path('api/transfers/', views.stock_transfer, name='stock_transfer'),  # Multi-product stock transfer documents
     path('delete-team-member/', views.delete_team_member, name='delete_team_member'),
     path('get-user-profile/', views.get_user_profile, name='get_user_profile'),
     path('test-eye-icon/', views.test_eye_icon, name='test_eye_icon'),  # Test page for eye icon
@@ -45,7 +56,9 @@ urlpatterns = [
     path('ledger/<uuid:token>/', views.offline_ledger, name='offline_ledger'),  # Offline ledger access via QR
     path('generate-qr/', views.generate_qr_token, name='generate_qr_token'),  # Generate QR token
     path('bill/<int:bill_id>/qr-data/', views.get_bill_qr_data, name='get_bill_qr_data'),  # Get QR data for bill
+    path('bill/<str:bill_number>/qr.svg', views.bill_qr_svg, name='bill_qr_svg'),  # QR to the bill page for printed bills
     path('bill/<str:bill_number>/qr-image/', views.get_bill_qr_image, name='get_bill_qr_image'),  # Get QR image for bill
+    path('bills/qr-sheet/', views.bill_qr_sheet, name='bill_qr_sheet'),  # Batch QR sheet (PDF/PNG) for many bills
     path('qr-test/', views.qr_test_page, name='qr_test_page'),  # QR system test page
     path('bill/<str:bill_number>/', views.individual_bill_view, name='individual_bill_view'),  # Individual bill view via QR
 ]
\ No newline at end of file
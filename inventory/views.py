@@ -17,6 +17,7 @@ try:
 except ImportError:
     AIRecommendation = None
 from .forms import ProductForm, StockEntryForm, OrderForm, DiscountForm, SalesForm, SignUpForm
+from .db_routing import replica_reads
 
 def test_ai_connection():
     """Test function to verify Google Gemini AI connection"""
@@ -42,27 +43,35 @@ def test_ai_connection():
     except Exception as e:
         return False, f"Connection failed: {str(e)}"
 
-def get_next_bill_number():
-    """Generate the next sequential bill number for both single and multi-product bills"""
-    # Get all bills with BILL- format to find the highest number
-    bills_with_standard_format = SalesBill.objects.filter(
-        bill_number__startswith='BILL-'
-    ).order_by('-bill_number')
-    
-    if bills_with_standard_format.exists():
-        # Extract the highest number from BILL-XXXXXX format
-        try:
-            latest_standard_bill = bills_with_standard_format.first()
-            last_number = int(latest_standard_bill.bill_number.split('-')[1])
-            next_number = last_number + 1
-        except (ValueError, IndexError):
-            # Fallback to counting all bills + 1
-            next_number = SalesBill.objects.count() + 1
-    else:
-        # No standard format bills exist, start from 1
-        next_number = 1
-    
-    return f"BILL-{next_number:06d}"
+def get_idempotency_key(request):
+    """Client token identifying one bill submission (form field or Idempotency-Key header)"""
+    return request.POST.get('idempotency_key') or request.headers.get('Idempotency-Key')
+
+def new_idempotency_key():
+    """Fresh token for a rendered billing form; resubmitting the form reuses it"""
+    import uuid
+    return uuid.uuid4().hex
+
+def resolve_bill_lines(items):
+    """
+    Bill lines (product, quantity, unit price, total) for billing payload items
+    ({'id' or 'product_id', 'name', 'quantity', 'unitPrice', 'total'}), with
+    every product resolved in one query; returns (lines, not found).
+    """
+    from .product_lookup import resolve
+    products = resolve(
+        ids=[item.get('product_id', item.get('id')) for item in items],
+        names=[item.get('name') for item in items]
+    )
+    lines = []
+    missing = []
+    for item in items:
+        product = products.get(product_id=item.get('product_id', item.get('id')), name=item.get('name'))
+        if product is None:
+            missing.append(f"{item.get('name') or item.get('product_id', item.get('id'))} (Product not found)")
+        else:
+            lines.append((product, item['quantity'], item['unitPrice'], item['total']))
+    return lines, missing
 
 def auto_remove_expired_products():
     """Automatically remove expired products and create notifications"""
@@ -100,11 +109,13 @@ def auto_remove_expired_products():
             product=product
         )
         
-        # Remove the expired batch
-        batch.delete()
         removed_count += 1
         total_quantity_removed += expired_quantity
     
+    # Remove the expired batches and log the write-off
+    from .stock_ledger import remove_expired
+    remove_expired(expired_batches)
+    
     # Check products with zero stock after expiry removal
     for product in products_affected:
         if product.total_stock == 0:
@@ -121,58 +132,9 @@ def auto_remove_expired_products():
     return removed_count, total_quantity_removed
 
 def update_stock_notifications_for_product(product):
-    """Update stock notifications for a specific product when stock changes"""
-    from datetime import date
-    
-    # Refresh product data from database
-    product.refresh_from_db()
-    current_stock = product.total_stock
-    
-    # Remove existing stock notifications for this product
-    Notification.objects.filter(
-        product=product,
-        notification_type='low_stock'
-    ).delete()
-    
-    # Create new notification if stock is low
-    if current_stock < 20:  # Low stock threshold
-        # Get detailed stock information
-        valid_batches = product.expirystock_set.filter(
-            quantity__gt=0,
-            expiry_date__gte=date.today()
-        )
-        
-        # Create detailed stock breakdown
-        stock_details = []
-        for batch in valid_batches:
-            days_to_expiry = (batch.expiry_date - date.today()).days
-            stock_details.append(f"• {batch.quantity} units (expires in {days_to_expiry} days)")
-        
-        stock_breakdown = "\n".join(stock_details) if stock_details else "No valid stock available"
-        
-        if current_stock == 0:
-            priority = 'urgent'
-            title = f"🚨 OUT OF STOCK: {product.name}"
-            action_message = "IMMEDIATE ACTION REQUIRED: Product is completely out of stock!"
-        elif current_stock < 5:
-            priority = 'high'
-            title = f"⚠️ CRITICAL LOW: {product.name} ({current_stock} units)"
-            action_message = "URGENT: Stock is critically low!"
-        else:
-            priority = 'medium'
-            title = f"📦 Low Stock: {product.name} ({current_stock} units)"
-            action_message = "Consider reordering soon to avoid stockout"
-        
-        message = f"Product: {product.name}\nCurrent Stock: {current_stock} units\n\nStock Breakdown:\n{stock_breakdown}\n\n{action_message}\nRecommendation: Reorder immediately to maintain adequate inventory levels"
-        
-        Notification.objects.create(
-            title=title,
-            message=message,
-            notification_type='low_stock',
-            priority=priority,
-            target_user_role='inventory',
-            product=product
-        )
+    """Re-check every owner's low-stock threshold for a product after its stock changed"""
+    from .low_stock import evaluate
+    evaluate(product_ids=[product.id])
 
 def generate_notifications():
     """Generate automatic notifications for inventory management with accurate stock quantities"""
@@ -184,113 +146,63 @@ def generate_notifications():
     if removed_count > 0:
         print(f"🗑️ Auto-removed {removed_count} expired batches ({removed_quantity} units)")
     
-    # Clear old notifications (older than 7 days)
-    old_notifications = Notification.objects.filter(
-        created_at__lt=timezone.now() - timedelta(days=7)
-    )
-    old_notifications.delete()
-    
-    # Clear outdated stock notifications (older than 1 day) to prevent stale data
-    outdated_stock_notifications = Notification.objects.filter(
-        notification_type='low_stock',
-        created_at__lt=timezone.now() - timedelta(days=1)
-    )
-    outdated_stock_notifications.delete()
-    
-    # Get all products with stock
-    products = Product.objects.all()
-    
-    for product in products:
-        # Get real-time stock quantity (refresh from database)
-        product.refresh_from_db()
-        current_stock = product.total_stock
+    # Cleanup and expiry warnings commit together: one write lock instead of one per row
+    from django.db import transaction
+    with transaction.atomic():
+        # Clear old notifications (older than 7 days)
+        old_notifications = Notification.objects.filter(
+            created_at__lt=timezone.now() - timedelta(days=7)
+        )
+        old_notifications.delete()
         
-        # Check for expiry warnings (products expiring in next 15 days)
-        near_expiry_stock = product.expirystock_set.filter(
-            quantity__gt=0,
-            expiry_date__lte=date.today() + timedelta(days=15),
-            expiry_date__gte=date.today()
-        ).order_by('expiry_date')
+        # Get all products with stock
+        products = Product.objects.all()
         
-        if near_expiry_stock.exists():
-            earliest_batch = near_expiry_stock.first()
-            days_left = (earliest_batch.expiry_date - date.today()).days
-            
-            # Check if notification already exists for this product today
-            existing_notification = Notification.objects.filter(
-                product=product,
-                notification_type='expiry_warning',
-                created_at__date=date.today()
-            ).exists()
+        for product in products:
+            # Check for expiry warnings (products expiring in next 15 days)
+            near_expiry_stock = product.expirystock_set.filter(
+                quantity__gt=0,
+                expiry_date__lte=date.today() + timedelta(days=15),
+                expiry_date__gte=date.today()
+            ).order_by('expiry_date')
             
-            if not existing_notification:
-                if days_left <= 3:
-                    priority = 'urgent'
-                    title = f"🚨 URGENT: {product.name} expires in {days_left} days!"
-                elif days_left <= 7:
-                    priority = 'high'
-                    title = f"⚠️ HIGH: {product.name} expires in {days_left} days"
-                else:
-                    priority = 'medium'
-                    title = f"📅 {product.name} expires in {days_left} days"
-                
-                message = f"Product: {product.name}\nQuantity: {earliest_batch.quantity} units\nExpiry Date: {earliest_batch.expiry_date.strftime('%B %d, %Y')}\nAction: Move to front for FEFO (First Expired, First Out)"
+            if near_expiry_stock.exists():
+                earliest_batch = near_expiry_stock.first()
+                days_left = (earliest_batch.expiry_date - date.today()).days
                 
-                Notification.objects.create(
-                    title=title,
-                    message=message,
+                # Check if notification already exists for this product today
+                existing_notification = Notification.objects.filter(
+                    product=product,
                     notification_type='expiry_warning',
-                    priority=priority,
-                    target_user_role='inventory',
-                    product=product
-                )
-        
-        # Check for low stock warnings with accurate current stock
-        if current_stock < 20:  # Low stock threshold
-            existing_low_stock = Notification.objects.filter(
-                product=product,
-                notification_type='low_stock',
-                created_at__date=date.today()
-            ).exists()
-            
-            if not existing_low_stock:
-                # Get detailed stock information for accurate reporting
-                valid_batches = product.expirystock_set.filter(
-                    quantity__gt=0,
-                    expiry_date__gte=date.today()
-                )
-                
-                # Create detailed stock breakdown
-                stock_details = []
-                for batch in valid_batches:
-                    days_to_expiry = (batch.expiry_date - date.today()).days
-                    stock_details.append(f"• {batch.quantity} units (expires in {days_to_expiry} days)")
-                
-                stock_breakdown = "\n".join(stock_details) if stock_details else "No valid stock available"
-                
-                if current_stock == 0:
-                    priority = 'urgent'
-                    title = f"🚨 OUT OF STOCK: {product.name}"
-                    action_message = "IMMEDIATE ACTION REQUIRED: Product is completely out of stock!"
-                elif current_stock < 5:
-                    priority = 'high'
-                    title = f"⚠️ CRITICAL LOW: {product.name} ({current_stock} units)"
-                    action_message = "URGENT: Stock is critically low!"
-                else:
-                    priority = 'medium'
-                    title = f"📦 Low Stock: {product.name} ({current_stock} units)"
-                    action_message = "Consider reordering soon to avoid stockout"
-                
-                message = f"Product: {product.name}\nCurrent Stock: {current_stock} units\n\nStock Breakdown:\n{stock_breakdown}\n\n{action_message}\nRecommendation: Reorder immediately to maintain adequate inventory levels"
-                
-                Notification.objects.create(
-                    title=title,
-                    message=message,
-                    notification_type='low_stock',
-                    priority=priority,
-                    target_user_role='inventory',
-                    product=product
-                )
+                    created_at__date=date.today()
+                ).exists()
+                
+                if not existing_notification:
+                    if days_left <= 3:
+                        priority = 'urgent'
+                        title = f"🚨 URGENT: {product.name} expires in {days_left} days!"
+                    elif days_left <= 7:
+                        priority = 'high'
+                        title = f"⚠️ HIGH: {product.name} expires in {days_left} days"
+                    else:
+                        priority = 'medium'
+                        title = f"📅 {product.name} expires in {days_left} days"
+                    
+                    message = f"Product: {product.name}\nQuantity: {earliest_batch.quantity} units\nExpiry Date: {earliest_batch.expiry_date.strftime('%B %d, %Y')}\nAction: Move to front for FEFO (First Expired, First Out)"
+                    
+                    Notification.objects.create(
+                        title=title,
+                        message=message,
+                        notification_type='expiry_warning',
+                        priority=priority,
+                        target_user_role='inventory',
+                        product=product
+                    )
+    
+    # Low stock: each owner against their own threshold, one set-based pass.
+    # Stock changes re-check their own pairs as they happen (stock_ledger).
+    from .low_stock import evaluate
+    evaluate()
 
 def user_login(request):
     # If user is already logged in, redirect to their dashboard
@@ -448,56 +360,20 @@ def inventory_dashboard(request):
         logout(request)
         return redirect('login')
     
-    # Generate notifications first
-    generate_notifications()
+    from . import dashboard_cache, dashboard_fragments
     
-    products = Product.objects.all()
-    # Show only current user's stock in recent stock
-    recent_stock = ExpiryStock.objects.filter(user=request.user).order_by('-created_at')[:10]
-    
-    # Get unread notifications for inventory role with proper priority ordering
-    # Prioritize admin messages first, then by priority, then by creation date
-    from django.db.models import Case, When, IntegerField
-    
-    notifications_queryset = Notification.objects.filter(
-        target_user_role__in=['inventory', 'all'],
-        is_read=False
-    ).annotate(
-        priority_order=Case(
-            When(priority='urgent', then=4),
-            When(priority='high', then=3),
-            When(priority='medium', then=2),
-            When(priority='low', then=1),
-            default=0,
-            output_field=IntegerField()
-        ),
-        admin_priority=Case(
-            When(notification_type='admin_message', then=1),
-            default=0,
-            output_field=IntegerField()
-        )
-    ).order_by('-admin_priority', '-priority_order', '-created_at')
+    # Generate notifications first - only rescans the catalog when products
+    # or stock changed since the last run (and at least once a day)
+    dashboard_cache.run_once_per_version(
+        'generate_notifications',
+        generate_notifications,
+        depends_on=[dashboard_cache.PRODUCTS, dashboard_cache.STOCK],
+        scope=date.today().isoformat()
+    )
     
-    # Get read notifications for history (last 20)
-    try:
-        read_notifications = Notification.objects.filter(
-            target_user_role__in=['inventory', 'all'],
-            is_read=True
-        ).order_by('-created_at')[:20]  # Use created_at instead of updated_at
-    except Exception:
-        # Fallback if there are any database issues
-        read_notifications = Notification.objects.filter(
-            target_user_role__in=['inventory', 'all'],
-            is_read=True
-        ).order_by('-created_at')[:20]
-    
-    # Count notifications by priority (before slicing)
-    urgent_count = notifications_queryset.filter(priority='urgent').count()
-    high_count = notifications_queryset.filter(priority='high').count()
-    total_notifications = notifications_queryset.count()
-    
-    # Now slice for display (limit to 10)
-    notifications = notifications_queryset[:10]
+    # Keep stored ABC/XYZ classes current with sales
+    from .abc_analysis import ensure_current
+    ensure_current()
     
     if request.method == 'POST':
         if 'add_product' in request.POST:
@@ -514,7 +390,8 @@ def inventory_dashboard(request):
             if stock_form.is_valid():
                 stock_entry = stock_form.save(commit=False)
                 stock_entry.user = request.user  # Assign stock to current user
-                stock_entry.save()
+                from .stock_ledger import add_batch
+                add_batch(stock_entry, request.user)
                 
                 # Update trend score automatically
                 from inventory.trend_calculator import update_product_trend_score
@@ -547,7 +424,8 @@ def inventory_dashboard(request):
                             notification_type='stock_received',
                             priority='medium',
                             target_user_role='admin',
-                            product=stock_entry.product
+                            product=stock_entry.product,
+                            order=order
                         )
                 
                 # Update stock notifications for the product
@@ -573,7 +451,10 @@ def inventory_dashboard(request):
                     quantity = int(quantity)
                     
                     # Create order request
-                    order_request = OrderQueue.objects.create(
+                    from .order_workflow import create_order
+                    order_request = create_order(
+                        changed_by=request.user,
+                        notes='Requested by inventory',
                         product=product,
                         quantity=quantity,
                         requested_by=request.user,
@@ -600,7 +481,8 @@ def inventory_dashboard(request):
                         notification_type='admin_message',
                         priority='high',
                         target_user_role='admin',
-                        product=product
+                        product=product,
+                        order=order_request
                     )
                     
                     messages.success(request, f'✅ Product request sent to admin! You requested {quantity} units of {product.name}. Admin will check availability and send you the approved quantity.')
@@ -686,11 +568,24 @@ def inventory_dashboard(request):
                     
                     # Mark all specified notifications as read
                     updated_count = Notification.objects.filter(
+                        Q(target_user__isnull=True) | Q(target_user=request.user),
                         id__in=notification_ids,
                         target_user_role__in=['inventory', 'all'],
                         is_read=False
                     ).update(is_read=True)
                     
+                    # Bulk update() sends no signals, invalidate cached lists and publish explicitly
+                    dashboard_cache.bump_version_on_commit(
+                        dashboard_cache.NOTIFICATIONS,
+                        *dashboard_cache.notification_groups('inventory', request.user.id)
+                    )
+                    from . import change_feed
+                    change_feed.publish(
+                        change_feed.NOTIFICATION, 'read',
+                        payload={'ids': notification_ids},
+                        target_user_role='inventory'
+                    )
+                    
                     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({
                             'success': True,
@@ -721,48 +616,40 @@ def inventory_dashboard(request):
     product_form = ProductForm()
     stock_form = StockEntryForm()
     
-    # Add user-specific stock and product order data
-    products_with_data = []
-    for product in products:
-        # Count only orders that were actually created by admin and are still pending/ordered
-        pending_orders_count = OrderQueue.objects.filter(
-            product=product,
-            status__in=['pending', 'ordered'],
-            ordered_by__isnull=False,  # Only admin-created orders
-            message_received=True  # Only acknowledged orders
-        ).count()
-        
-        # Get user-specific stock
-        user_stock = product.get_user_stock(request.user)
-        
-        # Add to product object for template access
-        product.user_stock = user_stock
-        product.pending_orders_count = pending_orders_count
-        
-        products_with_data.append({
-            'id': product.id,
-            'name': product.name,
-            'stock': product.total_stock,
-            'user_stock': user_stock,
-            'pending_orders': pending_orders_count
-        })
-
-    
+    from .change_feed import page_context
     context = {
-        'products': products,
-        'recent_stock': recent_stock,
         'product_form': product_form,
         'stock_form': stock_form,
-        'notifications': notifications,
-        'read_notifications': read_notifications,
-        'urgent_count': urgent_count,
-        'high_count': high_count,
-        'total_notifications': total_notifications,
-        'products_with_data': products_with_data,
     }
+    context.update(page_context())  # Live updates start after the newest event
+    
+    # Product table (with user-specific stock and pending orders) and notification
+    # lists come from the dashboard cache while the underlying data is unchanged
+    context.update(dashboard_fragments.inventory_products(request.user))
+    context.update(dashboard_fragments.inventory_notifications(request.user))
     
     return render(request, 'inventory_dashboard.html', context)
 
+# Tab name -> template for the lazily loaded inventory dashboard tabs (both read the inventory_products fragment)
+INVENTORY_PANELS = {
+    'products': 'panels/inventory_products.html',
+    'history': 'panels/inventory_history.html',
+}
+
+@login_required
+def inventory_dashboard_panel(request, name):
+    """One inventory dashboard tab as an HTML fragment, fetched by lazy_panels.js when the tab is opened"""
+    from django.http import Http404, HttpResponseForbidden
+    from .dashboard_fragments import inventory_products
+    
+    if name not in INVENTORY_PANELS:
+        raise Http404(f'Unknown panel: {name}')
+    if not hasattr(request.user, 'userprofile'):
+        return HttpResponseForbidden('User profile not found.')
+    
+    return render(request, INVENTORY_PANELS[name], inventory_products(request.user))
+
+@replica_reads
 @login_required
 def trend_dashboard(request):
     # Check if user has a profile
@@ -772,17 +659,17 @@ def trend_dashboard(request):
         logout(request)
         return redirect('login')
     
+    from .abc_analysis import ensure_current
+    ensure_current()
+    
     products = Product.objects.all()
     
     if request.method == 'POST' and 'update_trends' in request.POST:
         # Check if it's an AJAX request
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             # Real-time trend analysis when user clicks the button
-            import sqlite3
             import time
-            import random
-            from django.conf import settings
-            from datetime import datetime
+            from .trend_simulation import simulate
             
             check_start_time = timezone.now()
             print(f"🕐 Real-Time Trend Analysis Started at: {check_start_time.strftime('%H:%M:%S')}")
@@ -803,7 +690,9 @@ def trend_dashboard(request):
                     model = genai.GenerativeModel('gemini-flash-latest')
                     
                     updated_count = 0
-                    for product in products:
+                    fallback_ids = []
+                    ai_scores = []
+                    for product in products.with_stock_totals():
                         current_time = timezone.now().strftime('%H:%M:%S')
                         print(f"[{current_time}] AI Analyzing: {product.name}")
                         
@@ -836,87 +725,43 @@ Example: "7.5,High demand expected"
                                 product.save(update_fields=['trend_score', 'last_trend_update'])
                                 
                                 print(f"   ✅ {product.name}: {old_score} → {trend_score}")
+                                ai_scores.append((product.id, trend_score))
                                 updated_count += 1
                                 
                                 time.sleep(1)  # Rate limiting
                             
                         except Exception as e:
                             print(f"   ❌ AI Error for {product.name}: {e}")
-                            # Fallback to intelligent simulation
-                            old_score = product.trend_score
-                            new_score = generate_realistic_trend_score(product)
-                            product.trend_score = new_score
-                            product.last_trend_update = timezone.now()
-                            product.save(update_fields=['trend_score', 'last_trend_update'])
-                            print(f"   🔄 Fallback {product.name}: {old_score} → {new_score}")
-                            updated_count += 1
+                            # Scored together by the simulation after the loop
+                            fallback_ids.append(product.id)
+                    
+                    from .trend_history import record
+                    record(ai_scores, 'ai')
+                    
+                    if fallback_ids:
+                        result = simulate('fresh', product_ids=fallback_ids)
+                        print(f"   🔄 Simulated {result['updated']} products the AI could not score (seed {result['seed']})")
+                        updated_count += result['updated']
                 
                 else:
                     # Use intelligent simulation when no AI available
                     print("🔄 Using Intelligent Market Simulation")
-                    updated_count = 0
-                    
-                    for product in products:
-                        current_time = timezone.now().strftime('%H:%M:%S')
-                        print(f"[{current_time}] Analyzing: {product.name}")
-                        
-                        old_score = product.trend_score
-                        new_score = generate_realistic_trend_score(product)
-                        
-                        product.trend_score = new_score
-                        product.last_trend_update = timezone.now()
-                        product.save(update_fields=['trend_score', 'last_trend_update'])
-                        
-                        print(f"   ✅ {product.name}: {old_score} → {new_score}")
-                        updated_count += 1
-                        
-                        time.sleep(0.1)  # Small delay for realism
-                
-                # Calculate updated KPI data
-                updated_products = Product.objects.all()
-                high_demand = updated_products.filter(trend_score__gte=7).count()
-                low_demand = updated_products.filter(trend_score__lt=4).count()
-                
-                price_actions_count = 0
-                for product in updated_products:
-                    if (product.trend_score >= 7 and product.total_stock >= 100) or \
-                       (product.trend_score < 3 and product.total_stock > 150):
-                        price_actions_count += 1
-                
-                latest_update = updated_products.filter(last_trend_update__isnull=False).order_by('-last_trend_update').first()
-                
-                # Prepare response data
-                products_data = []
-                for product in updated_products:
-                    products_data.append({
-                        'id': product.id,
-                        'name': product.name,
-                        'category': product.category,
-                        'total_stock': product.total_stock,
-                        'trend_score': float(product.trend_score),
-                        'last_trend_update': product.last_trend_update.isoformat() if product.last_trend_update else None,
-                    })
+                    result = simulate('fresh')
+                    updated_count = result['updated']
+                    print(f"   ✅ Simulated {updated_count} products in {result['seconds']:.3f}s (seed {result['seed']})")
                 
                 check_end_time = timezone.now()
                 duration = (check_end_time - check_start_time).total_seconds()
                 
                 print(f"✅ Trend Analysis Complete! Updated {updated_count} products in {duration:.1f}s")
                 
-                return JsonResponse({
-                    'success': True,
-                    'message': f'🎯 Real-Time Trend Analysis Complete! Updated {updated_count} products at {check_end_time.strftime("%H:%M:%S")} (Duration: {duration:.1f}s)',
-                    'products': products_data,
-                    'kpi_data': {
-                        'high_demand_count': high_demand,
-                        'low_demand_count': low_demand,
-                        'price_actions_count': price_actions_count,
-                    },
-                    'last_updated': latest_update.last_trend_update.isoformat() if latest_update else None,
-                })
+                return trend_update_response(
+                    f'🎯 Real-Time Trend Analysis Complete! Updated {updated_count} products at {check_end_time.strftime("%H:%M:%S")} (Duration: {duration:.1f}s)'
+                )
                 
             except ImportError:
                 print("❌ Google AI library not available, using simulation")
-                return enhanced_simulation_ajax_update(request, products)
+                return enhanced_simulation_ajax_update(request)
             except Exception as e:
                 print(f"❌ Error in trend analysis: {e}")
                 return JsonResponse({
@@ -927,31 +772,12 @@ Example: "7.5,High demand expected"
         else:
             print("📄 Regular form submission detected")
             # Handle regular form submission (fallback)
-            return enhanced_simulation_update(request, products)
+            return enhanced_simulation_update(request)
     
-    # Calculate trend statistics for display
-    high_demand = products.filter(trend_score__gte=7).count()
-    moderate_demand = products.filter(trend_score__gte=4, trend_score__lt=7).count()
-    low_demand = products.filter(trend_score__lt=4).count()
-    
-    # Calculate price actions count (products that need price adjustments)
-    price_actions_count = 0
-    for product in products:
-        if (product.trend_score >= 7 and product.total_stock >= 100) or \
-           (product.trend_score < 3 and product.total_stock > 150):
-            price_actions_count += 1
-    
-    # Get the most recent update time
-    latest_update = products.filter(last_trend_update__isnull=False).order_by('-last_trend_update').first()
-    
-    context = {
-        'products': products,
-        'high_demand_count': high_demand,
-        'moderate_demand_count': moderate_demand,
-        'low_demand_count': low_demand,
-        'price_actions_count': price_actions_count,
-        'latest_update': latest_update.last_trend_update if latest_update else None,
-    }
+    # Trend statistics, price actions and the product list (with stock totals)
+    # come from the dashboard cache while products and stock are unchanged
+    from .dashboard_fragments import trend_overview
+    context = trend_overview()
     return render(request, 'trend_dashboard.html', context)
 
 
@@ -1032,248 +858,61 @@ def get_product_details(request, product_id):
         return JsonResponse({'error': 'Product not found'}, status=404)
 
 
-def generate_realistic_trend_score(product):
-    """Generate realistic trend score based on product characteristics"""
-    import random
-    from datetime import datetime
-    
-    base_score = 5.0  # Start with neutral
-    
-    # Category-based trends
-    category_lower = product.category.lower()
-    if 'electronics' in category_lower or 'electronic' in category_lower:
-        base_score += random.uniform(1.0, 3.0)  # Electronics generally high demand
-    elif 'food' in category_lower:
-        base_score += random.uniform(0.5, 2.0)  # Food moderate demand
-    elif 'furniture' in category_lower:
-        base_score += random.uniform(-1.0, 1.0)  # Furniture variable
-    elif 'stationery' in category_lower:
-        base_score += random.uniform(0.0, 1.5)  # Stationery steady
-    else:
-        base_score += random.uniform(-0.5, 1.5)  # Other categories
-    
-    # Stock level impact (low stock can indicate high demand)
-    if product.total_stock < 50:
-        base_score += random.uniform(1.0, 2.5)  # Low stock = high demand
-    elif product.total_stock > 200:
-        base_score += random.uniform(-1.5, 0.5)  # High stock = lower demand
-    else:
-        base_score += random.uniform(-0.5, 1.0)  # Normal stock
-    
-    # ABC Classification impact (based on current trend score)
-    calculated_abc = product.calculated_abc_classification
-    if calculated_abc == 'A':
-        base_score += random.uniform(0.5, 1.5)  # A-class items higher demand
-    elif calculated_abc == 'C':
-        base_score += random.uniform(-1.0, 0.5)  # C-class items lower demand
-    
-    # Seasonal factors
-    current_month = datetime.now().month
-    if current_month in [11, 12, 1]:  # Winter/Holiday season
-        base_score += random.uniform(0.5, 2.0)
-    elif current_month in [6, 7, 8]:  # Summer
-        if 'electronics' in category_lower:
-            base_score += random.uniform(0.5, 1.5)  # AC, fans etc.
-    
-    # Add some randomness for market volatility
-    base_score += random.uniform(-1.0, 1.0)
-    
-    # Ensure score is within bounds
-    final_score = min(10.0, max(0.0, base_score))
-    
-    return round(final_score, 1)
-
-
-def enhanced_simulation_ajax_update(request, products):
-    """AJAX version of enhanced simulation when AI is not available"""
-    import random
-    from datetime import datetime
-    
-    start_time = timezone.now()
-    print(f"--- Starting AJAX Enhanced Simulation Update at {start_time.strftime('%H:%M:%S')} ---")
-    updated_count = 0
-    
-    for product in products:
-        current_time = timezone.now().strftime('%H:%M:%S')
-        print(f"[{current_time}] Updating product: {product.name}")
-        
-        # Enhanced simulation logic
-        base_score = product.trend_score
-        old_score = base_score
-        
-        # Factor 1: Stock level impact
-        stock_factor = 0
-        if product.total_stock < 50:
-            stock_factor = random.uniform(0.5, 1.5)
-        elif product.total_stock > 200:
-            stock_factor = random.uniform(-1.0, -0.2)
-        else:
-            stock_factor = random.uniform(-0.3, 0.3)
-        
-        # Factor 2: ABC classification impact (based on current trend score)
-        abc_factor = 0
-        calculated_abc = product.calculated_abc_classification
-        if calculated_abc == 'A':
-            abc_factor = random.uniform(0.2, 0.8)
-        elif calculated_abc == 'B':
-            abc_factor = random.uniform(-0.2, 0.4)
-        else:
-            abc_factor = random.uniform(-0.5, 0.2)
-        
-        # Factor 3: Category-based trends
-        category_factor = 0
-        if 'Electronics' in product.category:
-            category_factor = random.uniform(0.3, 1.0)
-        elif 'Food' in product.category:
-            category_factor = random.uniform(-0.2, 0.5)
-        else:
-            category_factor = random.uniform(-0.3, 0.3)
-        
-        # Factor 4: Seasonal simulation
-        current_month = datetime.now().month
-        seasonal_factor = 0
-        if current_month in [11, 12, 1]:
-            seasonal_factor = random.uniform(0.5, 1.2)
-        elif current_month in [6, 7, 8]:
-            seasonal_factor = random.uniform(-0.2, 0.6)
-        else:
-            seasonal_factor = random.uniform(-0.3, 0.3)
-        
-        # Calculate new trend score
-        trend_change = stock_factor + abc_factor + category_factor + seasonal_factor
-        new_score = base_score + trend_change
-        final_score = min(10.0, max(0.0, new_score + random.uniform(-0.5, 0.5)))
-        
-        # Update the product with explicit timestamp
-        product.trend_score = round(final_score, 1)
-        product.last_trend_update = timezone.now()  # Exact current time
-        product.save(update_fields=['trend_score', 'last_trend_update'])
-        
-        update_time = product.last_trend_update.strftime('%H:%M:%S')
-        print(f"   -> Updated: {product.name} | Old: {old_score} -> New: {product.trend_score} | Time: {update_time}")
-        updated_count += 1
-    
-    end_time = timezone.now()
-    duration = (end_time - start_time).total_seconds()
-    
-    print(f"--- AJAX Simulation Complete! Updated {updated_count} products in {duration:.1f} seconds ---")
-    
-    # Get updated data for response
-    updated_products = Product.objects.all()
-    
-    # Calculate updated KPI data
-    high_demand = updated_products.filter(trend_score__gte=7).count()
-    low_demand = updated_products.filter(trend_score__lt=4).count()
-    price_actions_count = 0
-    for product in updated_products:
-        if (product.trend_score >= 7 and product.total_stock >= 100) or \
-           (product.trend_score < 3 and product.total_stock > 150):
-            price_actions_count += 1
+def trend_update_response(message):
+    """JSON reply for a trend update: refreshed product rows and KPI cards"""
+    from .dashboard_fragments import trend_overview
+    overview = trend_overview()
     
-    # Get the most recent update time
-    latest_update = updated_products.filter(last_trend_update__isnull=False).order_by('-last_trend_update').first()
-    
-    # Prepare product data for JSON response
-    products_data = []
-    for product in updated_products:
-        products_data.append({
+    products_data = [
+        {
             'id': product.id,
             'name': product.name,
             'category': product.category,
             'total_stock': product.total_stock,
             'trend_score': float(product.trend_score),
             'last_trend_update': product.last_trend_update.isoformat() if product.last_trend_update else None,
-        })
+        }
+        for product in overview['products']
+    ]
     
     return JsonResponse({
         'success': True,
-        'message': f'✅ Enhanced Simulation Complete! Updated {updated_count} products with market analysis. Completed at {end_time.strftime("%H:%M:%S")} (Duration: {duration:.1f}s)',
+        'message': message,
         'products': products_data,
         'kpi_data': {
-            'high_demand_count': high_demand,
-            'low_demand_count': low_demand,
-            'price_actions_count': price_actions_count,
+            'high_demand_count': overview['high_demand_count'],
+            'low_demand_count': overview['low_demand_count'],
+            'price_actions_count': overview['price_actions_count'],
         },
-        'last_updated': latest_update.last_trend_update.isoformat() if latest_update else None,
+        'last_updated': overview['latest_update'].isoformat() if overview['latest_update'] else None,
     })
 
 
-def enhanced_simulation_update(request, products):
-    """Fallback enhanced simulation when AI is not available"""
-    import random
-    from datetime import datetime
+def run_trend_simulation():
+    """Drift every product's trend score with the market simulation"""
+    from .trend_simulation import simulate
     
     start_time = timezone.now()
     print(f"--- Starting Enhanced Simulation Update at {start_time.strftime('%H:%M:%S')} ---")
-    updated_count = 0
-    
-    for product in products:
-        current_time = timezone.now().strftime('%H:%M:%S')
-        print(f"[{current_time}] Updating product: {product.name}")
-        
-        # Enhanced simulation logic
-        base_score = product.trend_score
-        old_score = base_score
-        
-        # Factor 1: Stock level impact
-        stock_factor = 0
-        if product.total_stock < 50:
-            stock_factor = random.uniform(0.5, 1.5)
-        elif product.total_stock > 200:
-            stock_factor = random.uniform(-1.0, -0.2)
-        else:
-            stock_factor = random.uniform(-0.3, 0.3)
-        
-        # Factor 2: ABC classification impact (based on current trend score)
-        abc_factor = 0
-        calculated_abc = product.calculated_abc_classification
-        if calculated_abc == 'A':
-            abc_factor = random.uniform(0.2, 0.8)
-        elif calculated_abc == 'B':
-            abc_factor = random.uniform(-0.2, 0.4)
-        else:
-            abc_factor = random.uniform(-0.5, 0.2)
-        
-        # Factor 3: Category-based trends
-        category_factor = 0
-        if 'Electronics' in product.category:
-            category_factor = random.uniform(0.3, 1.0)
-        elif 'Food' in product.category:
-            category_factor = random.uniform(-0.2, 0.5)
-        else:
-            category_factor = random.uniform(-0.3, 0.3)
-        
-        # Factor 4: Seasonal simulation
-        current_month = datetime.now().month
-        seasonal_factor = 0
-        if current_month in [11, 12, 1]:
-            seasonal_factor = random.uniform(0.5, 1.2)
-        elif current_month in [6, 7, 8]:
-            seasonal_factor = random.uniform(-0.2, 0.6)
-        else:
-            seasonal_factor = random.uniform(-0.3, 0.3)
-        
-        # Calculate new trend score
-        trend_change = stock_factor + abc_factor + category_factor + seasonal_factor
-        new_score = base_score + trend_change
-        final_score = min(10.0, max(0.0, new_score + random.uniform(-0.5, 0.5)))
-        
-        # Update the product with explicit timestamp
-        product.trend_score = round(final_score, 1)
-        product.last_trend_update = timezone.now()  # Exact current time
-        product.save(update_fields=['trend_score', 'last_trend_update'])
-        
-        update_time = product.last_trend_update.strftime('%H:%M:%S')
-        print(f"   -> Updated: {product.name} | Old: {old_score} -> New: {product.trend_score} | Time: {update_time}")
-        updated_count += 1
-    
+    result = simulate('drift')
     end_time = timezone.now()
     duration = (end_time - start_time).total_seconds()
+    print(f"--- Simulation Complete! Updated {result['updated']} products in {duration:.1f} seconds (seed {result['seed']}) ---")
     
-    print(f"--- Simulation Complete! Updated {updated_count} products in {duration:.1f} seconds ---")
-    messages.success(request, f'✅ Enhanced Simulation Complete! Updated {updated_count} products with market analysis. Completed at {end_time.strftime("%H:%M:%S")} (Duration: {duration:.1f}s)')
+    return f'✅ Enhanced Simulation Complete! Updated {result["updated"]} products with market analysis. Completed at {end_time.strftime("%H:%M:%S")} (Duration: {duration:.1f}s)'
+
+
+def enhanced_simulation_ajax_update(request):
+    """AJAX version of enhanced simulation when AI is not available"""
+    return trend_update_response(run_trend_simulation())
+
+
+def enhanced_simulation_update(request):
+    """Fallback enhanced simulation when AI is not available"""
+    messages.success(request, run_trend_simulation())
     return redirect('trend_dashboard')
 
+@replica_reads
 @login_required
 def admin_dashboard(request):
     # Check if user has a profile
@@ -1287,48 +926,8 @@ def admin_dashboard(request):
     print(f"🔧 DEBUG: Request method: {request.method}")
     print(f"🔧 DEBUG: POST data: {dict(request.POST) if request.method == 'POST' else 'N/A'}")
     
-    products = Product.objects.all()
-    
-    # Stock intelligence analysis
-    stock_analysis = []
-    for product in products:
-        total_stock = product.total_stock
-        days_to_expiry = product.days_to_nearest_expiry
-        
-        condition = "Normal"
-        if total_stock > 100 and product.trend_score < 3:
-            condition = "Overstock"
-        elif total_stock < 10:
-            condition = "Reorder needed"
-        elif days_to_expiry and days_to_expiry < 15:
-            condition = "Near expiry"
-        elif days_to_expiry and days_to_expiry < 0:
-            condition = "Expired"
-        
-        stock_analysis.append({
-            'product': product,
-            'total_stock': total_stock,
-            'days_to_expiry': days_to_expiry,
-            'condition': condition
-        })
-    
-    # Get sent notifications (admin messages only) - get full queryset first
-    try:
-        sent_notifications_queryset = Notification.objects.filter(
-            notification_type='admin_message'
-        ).order_by('-created_at')
-    except Exception as e:
-        # Fallback if there are any database issues
-        sent_notifications_queryset = Notification.objects.none()
-        print(f"DEBUG: Error querying notifications: {e}")
-    
-    # Count notification statistics (before slicing)
-    total_sent = sent_notifications_queryset.count()
-    unread_notifications = sent_notifications_queryset.filter(is_read=False).count()
-    read_notifications = sent_notifications_queryset.filter(is_read=True).count()
-    
-    # Now slice for display (limit to 20)
-    sent_notifications = sent_notifications_queryset[:20]
+    from .abc_analysis import ensure_current
+    ensure_current()
     
     if request.method == 'POST':
         print(f"🔧 DEBUG: Processing POST request...")
@@ -1496,101 +1095,22 @@ Notification Details:
             
             if request_id and approved_quantity:
                 try:
-                    order_request = OrderQueue.objects.get(id=request_id, status='pending')
+                    order_request = OrderQueue.objects.select_related('product').get(id=request_id, status='pending')
                     approved_quantity = int(approved_quantity)
                     product = order_request.product
                     
-                    # Check if enough stock is available in COMPANY warehouse
-                    company_stock = product.get_company_stock()
-                    if approved_quantity > company_stock:
-                        messages.error(request, f'❌ Not enough stock in company warehouse! Available: {company_stock} units, Requested: {approved_quantity} units')
-                        return redirect('admin_dashboard')
-                    
-                    # Update order request
-                    order_request.approved_quantity = approved_quantity
-                    order_request.status = 'approved'
-                    order_request.save()
-                    
-                    # Generate bill automatically
-                    from datetime import datetime
-                    bill_number = f"BILL-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-                    
-                    # Create bill
-                    bill = SalesBill.objects.create(
-                        bill_number=bill_number,
-                        created_by=order_request.requested_by,  # Bill for the inventory user who requested
-                        total_amount=0  # Will be calculated
-                    )
-                    
-                    # Add bill item
-                    item_total = product.selling_price * approved_quantity
-                    SalesBillItem.objects.create(
-                        bill=bill,
-                        product=product,
-                        quantity=approved_quantity,
-                        price=product.selling_price,
-                        total=item_total
-                    )
-                    
-                    # Update bill total
-                    bill.total_amount = item_total
-                    bill.save()
-                    
-                    # Link bill to order request
-                    order_request.bill = bill
-                    order_request.bill_generated = True
-                    order_request.save()
-                    
-                    # Deduct stock from COMPANY warehouse using FEFO logic
+                    # Approve, bill the requesting store and send the stock from the company warehouse
+                    from .order_workflow import approve_request, InvalidTransition
                     try:
-                        company_user = User.objects.get(username='company_stock')
-                        remaining_quantity = approved_quantity
-                        stock_entries = ExpiryStock.objects.filter(
-                            product=product,
-                            user=company_user,  # Only deduct from company stock
-                            quantity__gt=0
-                        ).order_by('expiry_date')
-                        
-                        for stock_entry in stock_entries:
-                            if remaining_quantity <= 0:
-                                break
-                            
-                            if stock_entry.quantity >= remaining_quantity:
-                                stock_entry.quantity -= remaining_quantity
-                                stock_entry.save()
-                                remaining_quantity = 0
-                            else:
-                                remaining_quantity -= stock_entry.quantity
-                                stock_entry.quantity = 0
-                                stock_entry.save()
-                        
-                        if remaining_quantity > 0:
-                            messages.warning(request, f'⚠️ Only {approved_quantity - remaining_quantity} units available in company warehouse. {remaining_quantity} units short!')
-                    except User.DoesNotExist:
-                        messages.error(request, '❌ Company stock user not found! Please run setup_company_stock.py')
+                        order_request, bill, short = approve_request(order_request, request.user, approved_quantity)
+                    except InvalidTransition as e:
+                        messages.error(request, f'❌ {e}')
                         return redirect('admin_dashboard')
                     
-                    # Notify inventory user
-                    Notification.objects.create(
-                        title=f"✅ Request Approved: {product.name}",
-                        message=f"📦 Product: {product.name} | "
-                               f"🔢 Requested: {order_request.quantity} units | "
-                               f"✅ Approved: {approved_quantity} units | "
-                               f"💰 Amount: ₹{item_total} | "
-                               f"📄 Bill: {bill_number} | "
-                               f"📊 Your Stock: {product.get_user_stock(order_request.requested_by)} units | "
-                               f"📅 {timezone.now().strftime('%d %b %Y, %H:%M')}",
-                        notification_type='admin_message',
-                        priority='high',
-                        target_user_role='inventory',
-                        product=product
-                    )
-                    
-                    # Update trend score automatically
-                    from inventory.trend_calculator import update_product_trend_score
-                    new_score = update_product_trend_score(product)
+                    if short > 0:
+                        messages.warning(request, f'⚠️ Only {approved_quantity - short} units available in company warehouse. {short} units short!')
                     
-                    messages.success(request, f'✅ Product request approved! Sent {approved_quantity} units of {product.name}. Bill #{bill_number} generated automatically.')
+                    messages.success(request, f'✅ Product request approved! Sent {approved_quantity} units of {product.name}. Bill #{bill.bill_number} generated automatically.')
                     return redirect('admin_dashboard')
                     
                 except OrderQueue.DoesNotExist:
@@ -1602,212 +1122,139 @@ Notification Details:
             else:
                 messages.error(request, '❌ Missing request ID or quantity!')
     
-    discount_form = DiscountForm()
-    
-    # If there were form errors, rebind the form with POST data
-    if request.method == 'POST' and 'apply_discount' in request.POST:
-        discount_form = DiscountForm(request.POST)
-    
-    orders = OrderQueue.objects.all().order_by('-created_at')
-    
-    # Count different order statuses
-    # Pending orders: Orders that admin needs to review (requested by inventory, status='pending')
-    pending_orders_count = OrderQueue.objects.filter(
-        status='pending',
-        requested_by__isnull=False  # Requested by inventory users
-    ).count()
-    
-    # Orders Placed: All orders that inventory has requested (all statuses)
-    # This shows total orders placed by inventory team
-    ordered_count = OrderQueue.objects.filter(
-        requested_by__isnull=False  # All orders requested by inventory users
-    ).count()
-    
-    # Completed Orders: Orders that admin has approved/processed (not pending or cancelled)
-    # This shows how many orders admin has completed/fulfilled
-    completed_orders_count = OrderQueue.objects.filter(
-        requested_by__isnull=False,  # Orders from inventory
-        status__in=['approved', 'partially_fulfilled', 'shipped', 'delivered', 'completed']  # Admin has taken action
-    ).count()
-    
-    # Additional counts for detailed tracking
-    actual_received_count = OrderQueue.objects.filter(status='delivered').count()
-    admin_seen_count = OrderQueue.objects.filter(message_received=True).count()
-    
-    print(f"🔧 DEBUG: Order counts:")
-    print(f"  - Pending (Waiting for Admin): {pending_orders_count}")
-    print(f"  - Orders Placed (Total by Inventory): {ordered_count}")
-    print(f"  - Completed Orders (Approved by Admin): {completed_orders_count}")
-    print(f"  - Actually Delivered: {actual_received_count}")
-    print(f"  - Admin Seen: {admin_seen_count}")
-    
-    # Count conditions for dashboard stats
-    overstock_count = sum(1 for item in stock_analysis if item['condition'] == 'Overstock')
-    reorder_count = sum(1 for item in stock_analysis if item['condition'] == 'Reorder needed')
-    near_expiry_count = sum(1 for item in stock_analysis if item['condition'] == 'Near expiry')
-    expired_count = sum(1 for item in stock_analysis if item['condition'] == 'Expired')
-    
-    print(f"🔧 DEBUG: Context data prepared:")
-    print(f"  - Products: {len(products)}")
-    print(f"  - Orders: {len(orders)}")
-    print(f"  - Notifications: {len(sent_notifications)}")
-    print(f"  - Pending Orders: {pending_orders_count}")
-    
-    # Team Management Data
-    from datetime import datetime, timedelta
-    
-    # Get all inventory users
-    inventory_users_queryset = UserProfile.objects.filter(role='inventory').select_related('user')
-    
-    # Prepare simplified team data
-    team_data = []
-    active_inventory_users = inventory_users_queryset.count()  # Just count all inventory users as active
-    
-    for profile in inventory_users_queryset:
-        user = profile.user
-        team_data.append({
-            'user': user,
-        })
+    # Count different order statuses - read from the order counters
+    # maintained by the order workflow (see order_workflow.dashboard_counts)
+    from .order_workflow import dashboard_counts
+    order_counts = dashboard_counts()
+    
+    # The tabs themselves are loaded on demand from admin_dashboard_panel
+    context = {
+        'products_count': Product.objects.count(),
+        'pending_orders_count': order_counts['pending_orders_count'],  # Inventory requests waiting for admin
+        'ordered_count': order_counts['ordered_count'],  # All orders placed by inventory team
+        'completed_orders_count': order_counts['completed_orders_count'],  # Requests admin has approved/processed
+        'actual_received_count': order_counts['actual_received_count'],
+        'admin_seen_count': order_counts['admin_seen_count'],
+    }
     
-    # Sort by join date (newest first)
-    team_data.sort(key=lambda x: x['user'].date_joined, reverse=True)
+    # Live updates start after the newest change feed event
+    from .change_feed import page_context
+    context.update(page_context())
     
+    return render(request, 'admin_dashboard.html', context)
+
+def _admin_stock_panel(request):
+    from .dashboard_fragments import admin_stock_analysis
+    return admin_stock_analysis()
+
+def _admin_orders_panel(request):
+    from .dashboard_fragments import attach_stock_totals
+
     # Get product requests from inventory users (pending only)
-    product_requests = OrderQueue.objects.filter(
+    product_requests = list(OrderQueue.objects.filter(
         requested_by__isnull=False,  # Requested by inventory user
         status='pending'
-    ).select_related('product', 'requested_by').order_by('-created_at')
-    
-    context = {
-        'stock_analysis': stock_analysis,
-        'discount_form': discount_form,
-        'orders': orders,
-        'sent_notifications': sent_notifications,
-        'total_sent': total_sent,
-        'unread_notifications': unread_notifications,
-        'read_notifications': read_notifications,
-        'overstock_count': overstock_count,
-        'reorder_count': reorder_count,
-        'near_expiry_count': near_expiry_count,
-        'expired_count': expired_count,
-        'pending_orders_count': pending_orders_count,
-        'ordered_count': ordered_count,
-        'received_count': completed_orders_count,  # Use completed count for main display
-        'actual_received_count': actual_received_count,  # Actual received orders
-        'completed_orders_count': completed_orders_count,  # Total completed orders
-        'admin_seen_count': admin_seen_count,  # Admin seen count for breakdown
-        'products': Product.objects.all(),  # Add products for notification form
-        'products_json': json.dumps([{
-            'name': product.name,
-            'category': product.category,
-            'stock': product.total_stock,
-            'trendScore': float(product.trend_score)
-        } for product in Product.objects.all()]),
-        'orders_json': json.dumps([{
-            'id': order.id,
-            'product': {
-                'name': order.product.name,
-                'stock': order.product.total_stock
-            },
-            'quantity': order.quantity,
-            'status': order.status,
-            'message_received': order.message_received,
-            'message_received_at': order.message_received_at.strftime('%B %d, %Y at %H:%M') if order.message_received_at else None,
-            'created_at': order.created_at.strftime('%B %d, %Y at %H:%M'),
-            'ordered_by': order.ordered_by.first_name or order.ordered_by.username if order.ordered_by else None,
-            'order_notes': order.order_notes or '',
-            'inventory_action': getattr(order, 'inventory_action', 'none'),
-            'inventory_action_by': getattr(order, 'inventory_action_by', None) and (order.inventory_action_by.first_name or order.inventory_action_by.username) if hasattr(order, 'inventory_action_by') else None,
-            'inventory_action_at': getattr(order, 'inventory_action_at', None) and order.inventory_action_at.strftime('%B %d, %Y at %H:%M') if hasattr(order, 'inventory_action_at') else None,
-            'admin_marked_received': getattr(order, 'admin_marked_received', False),
-            'admin_marked_received_at': getattr(order, 'admin_marked_received_at', None) and order.admin_marked_received_at.strftime('%B %d, %Y at %H:%M') if hasattr(order, 'admin_marked_received_at') else None
-        } for order in orders]),
-        
-        # Team Management Data
-        'inventory_users': team_data,
-        'active_inventory_users': active_inventory_users,
-        
-        # Product Requests from Inventory
+    ).select_related('product', 'requested_by').order_by('-created_at'))
+    attach_stock_totals([order_request.product for order_request in product_requests])
+
+    return {
+        'discount_form': DiscountForm(),
+        'orders': OrderQueue.objects.select_related('product', 'inventory_action_by').order_by('-created_at'),
         'product_requests': product_requests,
     }
-    
-    # Add Billing Management Data
-    from django.db.models import Sum, Count, Avg
-    from datetime import date
-    from collections import defaultdict
-    
-    # Get all bills
-    all_bills = SalesBill.objects.filter(
-        created_by__isnull=False
-    ).select_related('created_by__userprofile').prefetch_related('items').order_by('-created_at')
-    
-    # Get inventory users for filter (use different variable name to avoid conflict)
-    billing_inventory_users = User.objects.filter(userprofile__role='inventory')
-    
-    # Calculate summary statistics
-    total_bills_count = all_bills.count()
-    total_revenue = all_bills.aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    # Today's bills
-    today = date.today()
-    today_bills = all_bills.filter(created_at__date=today)
-    today_bills_count = today_bills.count()
-    
-    # This month's bills
-    month_bills = all_bills.filter(
-        created_at__year=today.year,
-        created_at__month=today.month
+
+def _admin_notifications_panel(request):
+    # Sent notifications (admin messages only), newest 20
+    return {
+        'sent_notifications': Notification.objects.filter(
+            notification_type='admin_message'
+        ).select_related('product').order_by('-created_at')[:20],
+    }
+
+def _admin_team_panel(request):
+    # Inventory users, newest first
+    inventory_users = [
+        {'user': profile.user}
+        for profile in UserProfile.objects.filter(role='inventory').select_related('user').order_by('-user__date_joined')
+    ]
+    return {
+        'inventory_users': inventory_users,
+        'active_inventory_users': len(inventory_users),  # Just count all inventory users as active
+    }
+
+# Bills per page of the admin billing tab
+ADMIN_BILLS_PER_PAGE = 50
+
+def _admin_billing_panel(request):
+    from datetime import datetime
+    from django.core.paginator import Paginator
+    from django.db.models import Count
+    from django.utils.dateparse import parse_date
+    from .dashboard_fragments import admin_billing
+    
+    context = dict(admin_billing())
+    
+    # Store / month / date filters, ignored when malformed
+    filters = {'store': request.GET.get('store', 'all'), 'month': request.GET.get('month', 'all'), 'date': request.GET.get('date', '')}
+    bills = SalesBill.objects.filter(created_by__isnull=False)
+    if filters['store'].isdigit():
+        bills = bills.filter(created_by_id=int(filters['store']))
+    else:
+        filters['store'] = 'all'
+    try:
+        month = datetime.strptime(filters['month'], '%Y-%m')
+        bills = bills.filter(created_at__year=month.year, created_at__month=month.month)
+    except ValueError:
+        filters['month'] = 'all'
+    try:
+        day = parse_date(filters['date'])
+    except ValueError:
+        day = None
+    if day:
+        bills = bills.filter(created_at__date=day)
+    else:
+        filters['date'] = ''
+    
+    filtered = filters != {'store': 'all', 'month': 'all', 'date': ''}
+    if filtered:
+        # Summary cards show the filtered bills
+        totals = bills.aggregate(count=Count('id'), total=Sum('total_amount'))
+        context['total_bills_count'] = totals['count']
+        context['total_revenue'] = totals['total'] or 0
+    
+    paginator = Paginator(
+        bills.select_related('created_by__userprofile').annotate(item_count=Count('items')).order_by('-created_at', '-id'),
+        ADMIN_BILLS_PER_PAGE
     )
-    month_bills_count = month_bills.count()
-    
-    # Get available months for filter
-    available_months = set()
-    for bill in all_bills:
-        month_str = bill.created_at.strftime('%Y-%m')
-        available_months.add(month_str)
-    available_months = sorted(available_months, reverse=True)
-    
-    # Calculate monthly summaries by store
-    monthly_summaries = []
-    monthly_data = defaultdict(lambda: defaultdict(lambda: {'count': 0, 'total': 0}))
-    
-    for bill in all_bills:
-        if bill.created_by:
-            try:
-                store_name = bill.created_by.userprofile.full_identity
-            except:
-                # If user has no profile, use username
-                store_name = bill.created_by.username
-            month = bill.created_at.strftime('%B %Y')
-            monthly_data[store_name][month]['count'] += 1
-            monthly_data[store_name][month]['total'] += float(bill.total_amount)
-    
-    for store_name, months in monthly_data.items():
-        for month, data in months.items():
-            monthly_summaries.append({
-                'store_name': store_name,
-                'month': month,
-                'bill_count': data['count'],
-                'total_amount': data['total'],
-                'avg_amount': data['total'] / data['count'] if data['count'] > 0 else 0
-            })
-    
-    # Sort by month (newest first)
-    monthly_summaries.sort(key=lambda x: x['month'], reverse=True)
-    
-    # Add billing data to context
     context.update({
-        'all_bills': all_bills,
-        'billing_inventory_users': billing_inventory_users,
-        'total_bills_count': total_bills_count,
-        'total_revenue': total_revenue,
-        'today_bills_count': today_bills_count,
-        'month_bills_count': month_bills_count,
-        'available_months': available_months,
-        'monthly_summaries': monthly_summaries,
+        'bills_page': paginator.get_page(request.GET.get('page')),
+        'billing_filters': filters,
+        'billing_filtered': filtered,
     })
+    return context
+
+# Tab name -> (template, context builder) for the lazily loaded admin dashboard tabs
+ADMIN_PANELS = {
+    'stock': ('panels/admin_stock.html', _admin_stock_panel),
+    'orders': ('panels/admin_orders.html', _admin_orders_panel),
+    'notifications': ('panels/admin_notifications.html', _admin_notifications_panel),
+    'team': ('panels/admin_team.html', _admin_team_panel),
+    'billing': ('panels/admin_billing.html', _admin_billing_panel),
+}
+
+@replica_reads
+@login_required
+def admin_dashboard_panel(request, name):
+    """One admin dashboard tab as an HTML fragment, fetched by lazy_panels.js when the tab is opened"""
+    from django.http import Http404, HttpResponseForbidden
     
-    return render(request, 'admin_dashboard.html', context)
+    if name not in ADMIN_PANELS:
+        raise Http404(f'Unknown panel: {name}')
+    if not hasattr(request.user, 'userprofile'):
+        return HttpResponseForbidden('User profile not found.')
+    
+    template, build_context = ADMIN_PANELS[name]
+    return render(request, template, build_context(request))
 
 @login_required
 def create_order(request):
@@ -1835,7 +1282,10 @@ def create_order(request):
                 print(f"🔧 DEBUG: Quantity to order: {quantity}")
                 
                 # Create the order
-                order = OrderQueue.objects.create(
+                from .order_workflow import create_order as create_workflow_order
+                order = create_workflow_order(
+                    changed_by=request.user,
+                    notes='Created by admin',
                     product=product,
                     quantity=quantity,
                     ordered_by=request.user,
@@ -1864,7 +1314,8 @@ def create_order(request):
                     notification_type='order_request',
                     priority='urgent',
                     target_user_role='inventory',
-                    product=product
+                    product=product,
+                    order=order
                 )
                 
                 print(f"🔧 DEBUG: Notification created: #{notification.id}")
@@ -1933,15 +1384,18 @@ def admin_mark_order_seen(request):
                         return redirect('admin_dashboard')
                 
                 # Mark order as received by admin (final step)
+                from .order_workflow import mark_received, InvalidTransition
                 old_status = order.status
-                order.status = 'received'  # Change status to received
-                
-                # Track admin action
-                if hasattr(order, 'admin_marked_received'):
-                    order.admin_marked_received = True
-                    order.admin_marked_received_at = timezone.now()
-                
-                order.save()
+                try:
+                    order = mark_received(order, request.user)
+                except InvalidTransition:
+                    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                        return JsonResponse({
+                            'success': False,
+                            'error': f'Order is already {old_status} and cannot be marked as received'
+                        })
+                    messages.error(request, f'❌ Order is already {old_status} and cannot be marked as received!')
+                    return redirect('admin_dashboard')
                 
                 print(f"🔧 DEBUG: Order marked as received by admin at: {timezone.now()}")
                 
@@ -1966,14 +1420,16 @@ def admin_mark_order_seen(request):
                     notification_type='order_completed',
                     priority='low',
                     target_user_role='inventory',
-                    product=order.product
+                    product=order.product,
+                    order=order
                 )
                 
                 print(f"🔧 DEBUG: Completion notification created for inventory team")
                 
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     # Calculate updated counts for real-time update
-                    received_count = OrderQueue.objects.filter(status='received').count()
+                    from .order_workflow import status_count
+                    received_count = status_count('received')
                     
                     return JsonResponse({
                         'success': True,
@@ -2020,11 +1476,13 @@ def update_order_status(request, order_id):
     new_status = request.POST.get('status')
     
     if new_status in ['pending', 'ordered', 'received']:
+        from .order_workflow import transition, InvalidTransition
         old_status = order.status
-        order.status = new_status
-        order.save()
-        
-        messages.success(request, f'Order status updated from {old_status} to {new_status}')
+        try:
+            transition(order, new_status, request.user)
+            messages.success(request, f'Order status updated from {old_status} to {new_status}')
+        except InvalidTransition:
+            messages.error(request, f'Order cannot go from {old_status} to {new_status}')
     else:
         messages.error(request, 'Invalid status')
     
@@ -2044,17 +1502,10 @@ def acknowledge_order_message(request):
                     notification_type='order_request'
                 )
                 
-                # Extract order ID from notification message (we'll need to find the order by product and recent creation)
-                product = notification.product
+                # The notification carries its order
+                order = notification.order
                 
-                # Find the most recent pending order for this product
-                order = OrderQueue.objects.filter(
-                    product=product,
-                    message_sent=True,
-                    message_received=False
-                ).order_by('-created_at').first()
-                
-                if not order:
+                if not order or order.message_received:
                     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({
                             'success': False,
@@ -2065,16 +1516,8 @@ def acknowledge_order_message(request):
                         return redirect('inventory_dashboard')
                 
                 # Mark order as acknowledged by inventory
-                order.message_received = True
-                order.message_received_at = timezone.now()
-                
-                # Track inventory action
-                if hasattr(order, 'inventory_action'):
-                    order.inventory_action = 'acknowledged'
-                    order.inventory_action_by = request.user
-                    order.inventory_action_at = timezone.now()
-                
-                order.save()
+                from .order_workflow import acknowledge
+                order = acknowledge(order, request.user)
                 
                 # Mark notification as read
                 notification.is_read = True
@@ -2102,13 +1545,15 @@ def acknowledge_order_message(request):
                         notification_type='admin_message',
                         priority='medium',
                         target_user_role='admin',
-                        product=order.product
+                        product=order.product,
+                        order=order
                     )
                 
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     # Calculate updated counts for real-time update
                     # Use admin seen count as completed count
-                    updated_completed_count = OrderQueue.objects.filter(message_received=True).count()
+                    from .order_workflow import dashboard_counts
+                    updated_completed_count = dashboard_counts()['admin_seen_count']
                     
                     return JsonResponse({
                         'success': True,
@@ -2161,15 +1606,11 @@ def update_order_from_notification(request):
                     notification_type='order_request'
                 )
                 
-                # Find the order by product and recent creation
-                product = notification.product
-                order = OrderQueue.objects.filter(
-                    product=product,
-                    status='pending',
-                    message_received=True
-                ).order_by('-created_at').first()
+                # The notification carries its order (must be acknowledged first)
+                from .order_workflow import transition, mark_supplier_ordered, InvalidTransition
+                order = notification.order
                 
-                if not order:
+                if not order or not order.message_received or order.status != 'pending':
                     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({
                             'success': False,
@@ -2179,17 +1620,21 @@ def update_order_from_notification(request):
                         messages.error(request, '❌ Order not found or already updated!')
                         return redirect('inventory_dashboard')
                 
-                # Update order status
+                # Update order status through the workflow
                 old_status = order.status
-                order.status = status
-                
-                # Track inventory action
-                if status == 'ordered' and hasattr(order, 'inventory_action'):
-                    order.inventory_action = 'ordered'
-                    order.inventory_action_by = request.user
-                    order.inventory_action_at = timezone.now()
-                
-                order.save()
+                try:
+                    if status == 'ordered':
+                        order = mark_supplier_ordered(order, request.user)
+                    else:
+                        order = transition(order, status, request.user)
+                except InvalidTransition:
+                    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                        return JsonResponse({
+                            'success': False,
+                            'error': f'Order cannot go from {old_status} to {status}'
+                        })
+                    messages.error(request, f'❌ Order cannot go from {old_status} to {status}!')
+                    return redirect('inventory_dashboard')
                 
                 # Mark notification as read
                 notification.is_read = True
@@ -2217,7 +1662,8 @@ def update_order_from_notification(request):
                         notification_type='admin_message',
                         priority='medium',
                         target_user_role='admin',
-                        product=order.product
+                        product=order.product,
+                        order=order
                     )
                 
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -2259,7 +1705,7 @@ def update_order_from_notification(request):
 @login_required
 def billing_working(request):
     """Working CSV billing page"""
-    return render(request, 'billing_working.html')
+    return render(request, 'billing_working.html', {'idempotency_key': new_idempotency_key()})
 
 
 @login_required
@@ -2292,103 +1738,44 @@ def billing(request):
                     messages.error(request, '❌ No products selected for billing')
                     return redirect('billing')
                 
-                # Calculate total amount
-                total_amount = Decimal('0.00')
-                for product_data in products:
-                    total_amount += Decimal(str(product_data['total']))
-                
-                # Create sequential bill number using unified function
-                bill_number = get_next_bill_number()
+                # Stock check, bill, lines and FEFO deductions in one transaction;
+                # a retried POST with the same idempotency key gets the same bill back
+                from .bill_service import create_bill
+                lines, insufficient_stock_products = resolve_bill_lines(products)
+                bill, created, rejected = create_bill(
+                    request.user, lines, idempotency_key=get_idempotency_key(request)
+                ) if lines else (None, False, [])
+                insufficient_stock_products += rejected
+                
+                if bill is None:
+                    messages.error(request, f'❌ Cannot create bill! Insufficient stock for: {", ".join(insufficient_stock_products)}')
+                    return redirect('billing')
                 
-                # Create bill
-                bill = SalesBill.objects.create(
-                    bill_number=bill_number,
-                    total_amount=total_amount,
-                    created_by=request.user  # Track who created the bill
-                )
+                if not created:
+                    messages.info(request, f'ℹ️ Bill #{bill.bill_number} was already created for this submission | Verification Code: {bill.verification_code}')
+                    return redirect('billing')
                 
                 # Auto-generate QR token for user if not exists
                 from .models import QRToken
                 user_profile = request.user.userprofile
-                qr_token, created = QRToken.objects.get_or_create(user_profile=user_profile)
+                qr_token, _ = QRToken.objects.get_or_create(user_profile=user_profile)
                 
-                # Process each product
-                insufficient_stock_products = []
-                successful_products = []
-                
-                for product_data in products:
-                    try:
-                        # Get product by name
-                        product = Product.objects.get(name=product_data['name'])
-                        quantity = int(product_data['quantity'])
-                        unit_price = Decimal(str(product_data['unitPrice']))
-                        item_total = Decimal(str(product_data['total']))
-                        
-                        # Check available stock
-                        available_stock = product.total_stock
-                        
-                        if available_stock >= quantity:
-                            # Create bill item
-                            SalesBillItem.objects.create(
-                                bill=bill,
-                                product=product,
-                                quantity=quantity,
-                                price=unit_price,
-                                total=item_total
-                            )
-                            
-                            # AUTOMATIC INVENTORY DEDUCTION using FEFO
-                            remaining_qty = quantity
-                            from datetime import date
-                            
-                            stock_batches = product.expirystock_set.filter(
-                                quantity__gt=0,
-                                expiry_date__gte=date.today()
-                            ).order_by('expiry_date')
-                            
-                            for batch in stock_batches:
-                                if remaining_qty <= 0:
-                                    break
-                                
-                                if batch.quantity >= remaining_qty:
-                                    batch.quantity -= remaining_qty
-                                    remaining_qty = 0
-                                else:
-                                    remaining_qty -= batch.quantity
-                                    batch.quantity = 0
-                                
-                                batch.save()
-                            
-                            successful_products.append(f"{product.name} ({quantity} units)")
-                            
-                            # Update stock notifications for this product
-                            update_stock_notifications_for_product(product)
-                            
-                        else:
-                            insufficient_stock_products.append(f"{product.name} (Available: {available_stock}, Requested: {quantity})")
-                    
-                    except Product.DoesNotExist:
-                        insufficient_stock_products.append(f"{product_data['name']} (Product not found)")
-                    except Exception as e:
-                        insufficient_stock_products.append(f"{product_data['name']} (Error: {str(e)})")
+                successful_products = [
+                    f"{item.product.name} ({item.quantity} units)"
+                    for item in bill.items.select_related('product')
+                ]
                 
                 # Create notifications for successful sales
-                if successful_products:
-                    Notification.objects.create(
-                        title=f"MULTI-PRODUCT SALE: Bill #{bill.bill_number}",
-                        message=f"Multi-product bill created successfully!\n"
-                               f"Products sold: {', '.join(successful_products)}\n"
-                               f"Total Amount: ₹{bill.total_amount}\n"
-                               f"Inventory automatically updated using FEFO method.",
-                        notification_type='admin_message',
-                        priority='medium',
-                        target_user_role='inventory'
-                    )
-                
-                # Generate verification code for all bills
-                if not bill.verification_code:
-                    bill.generate_verification_code()
-                    bill.save()
+                Notification.objects.create(
+                    title=f"MULTI-PRODUCT SALE: Bill #{bill.bill_number}",
+                    message=f"Multi-product bill created successfully!\n"
+                           f"Products sold: {', '.join(successful_products)}\n"
+                           f"Total Amount: ₹{bill.total_amount}\n"
+                           f"Inventory automatically updated using FEFO method.",
+                    notification_type='admin_message',
+                    priority='medium',
+                    target_user_role='inventory'
+                )
                 
                 # Try to detect if this is a shop owner order and send email
                 # Check if any of the products match a pending shop owner order
@@ -2396,27 +1783,15 @@ def billing(request):
                 shop_owner_email = None
                 shop_owner_name = None
                 
-                # Try to find a matching pending order
-                for product_data in products:
-                    try:
-                        product_obj = Product.objects.get(name=product_data['name'])
-                        # Find pending orders that include this product
-                        pending_orders = RestockOrder.objects.filter(
-                            status='pending'
-                        ).select_related('shop_owner')
-                        
-                        for order in pending_orders:
-                            # If we find a matching order, use that shop owner's email
-                            if order.shop_owner.email:
-                                shop_owner_email = order.shop_owner.email
-                                shop_owner_name = order.shop_owner.name
-                                shop_owner_obj = order.shop_owner
-                                break
-                        
-                        if shop_owner_email:
-                            break
-                    except:
-                        pass
+                # Try to find a matching pending order (the bill's products were resolved above)
+                pending_orders = RestockOrder.objects.filter(
+                    status='pending', shop_owner__email__gt=''
+                ).select_related('shop_owner')
+                for order in pending_orders[:1]:
+                    # If we find a matching order, use that shop owner's email
+                    shop_owner_email = order.shop_owner.email
+                    shop_owner_name = order.shop_owner.name
+                    shop_owner_obj = order.shop_owner
                 
                 # Send email if we found a shop owner email
                 if shop_owner_email:
@@ -2428,12 +1803,7 @@ def billing(request):
                 
                 # Show results
                 if insufficient_stock_products:
-                    if successful_products:
-                        messages.warning(request, f'⚠️ Partial success! Bill #{bill.bill_number} created for available products. Insufficient stock for: {", ".join(insufficient_stock_products)}')
-                    else:
-                        # Delete the bill if no products were processed
-                        bill.delete()
-                        messages.error(request, f'❌ Cannot create bill! Insufficient stock for: {", ".join(insufficient_stock_products)}')
+                    messages.warning(request, f'⚠️ Partial success! Bill #{bill.bill_number} created for available products. Insufficient stock for: {", ".join(insufficient_stock_products)}')
                 else:
                     messages.success(request, f'✅ Multi-product bill #{bill.bill_number} created successfully! Total: ₹{bill.total_amount} | Verification Code: {bill.verification_code}')
                 
@@ -2453,92 +1823,31 @@ def billing(request):
                 product = sales_form.cleaned_data['product']
                 quantity = sales_form.cleaned_data['quantity']
                 
-                available_stock = product.total_stock
+                from decimal import Decimal
+                from .bill_service import create_bill
+                total = product.new_price * Decimal(str(quantity))
+                bill, created, rejected = create_bill(
+                    request.user,
+                    [(product, quantity, product.new_price, total)],
+                    idempotency_key=get_idempotency_key(request)
+                )
                 
-                if available_stock >= quantity:
-                    from decimal import Decimal
-                    
-                    # Create sequential bill number using unified function
-                    bill_number = get_next_bill_number()
-                    
-                    bill = SalesBill.objects.create(
-                        bill_number=bill_number,
-                        total_amount=product.new_price * Decimal(str(quantity)),
-                        created_by=request.user  # Track who created the bill
-                    )
-                    
+                if bill is None:
+                    messages.error(request, f'❌ Insufficient stock! {", ".join(rejected)}')
+                elif not created:
+                    messages.info(request, f'ℹ️ Bill #{bill.bill_number} was already created for this submission')
+                    return redirect('billing')
+                else:
                     # Auto-generate QR token for user if not exists
                     from .models import QRToken
-                    user_profile = request.user.userprofile
-                    qr_token, created = QRToken.objects.get_or_create(user_profile=user_profile)
-                    
-                    SalesBillItem.objects.create(
-                        bill=bill,
-                        product=product,
-                        quantity=quantity,
-                        price=product.new_price,
-                        total=product.new_price * Decimal(str(quantity))
-                    )
-                    
-                    # FEFO stock deduction
-                    remaining_qty = quantity
-                    from datetime import date
-                    stock_batches = product.expirystock_set.filter(
-                        quantity__gt=0,
-                        expiry_date__gte=date.today()
-                    ).order_by('expiry_date')
-                    
-                    for batch in stock_batches:
-                        if remaining_qty <= 0:
-                            break
-                        
-                        if batch.quantity >= remaining_qty:
-                            batch.quantity -= remaining_qty
-                            remaining_qty = 0
-                        else:
-                            remaining_qty -= batch.quantity
-                            batch.quantity = 0
-                        
-                        batch.save()
+                    QRToken.objects.get_or_create(user_profile=request.user.userprofile)
                     
                     messages.success(request, f'✅ Single product bill #{bill.bill_number} created successfully!')
                     return redirect('billing')
-                else:
-                    messages.error(request, f'❌ Insufficient stock! Available: {available_stock} units')
     
     # Render the multi-product billing template
     sales_form = SalesForm()
     
-    # Show only bills created by the current user
-    recent_bills = SalesBill.objects.filter(
-        created_by=request.user
-    ).prefetch_related('items__product').order_by('-created_at')[:10]
-    
-    from datetime import date
-    from django.db.models import Sum
-    
-    today = date.today()
-    
-    # Filter today's bills by current user
-    today_bills = SalesBill.objects.filter(
-        created_at__date=today,
-        created_by=request.user
-    )
-    today_sales_count = today_bills.count()
-    today_sales_amount = today_bills.aggregate(total=Sum('total_amount'))['total'] or 0
-    
-    current_month = today.month
-    current_year = today.year
-    
-    # Filter monthly bills by current user
-    monthly_bills = SalesBill.objects.filter(
-        created_at__year=current_year,
-        created_at__month=current_month,
-        created_by=request.user
-    )
-    monthly_sales_count = monthly_bills.count()
-    monthly_sales_amount = monthly_bills.aggregate(total=Sum('total_amount'))['total'] or 0
-    
     # Get shop owners and pending orders
     from .models import ShopOwner, RestockOrder
     shop_owners = ShopOwner.objects.all()
@@ -2546,16 +1855,15 @@ def billing(request):
     
     context = {
         'sales_form': sales_form,
-        'recent_bills': recent_bills,
-        'today_sales_count': today_sales_count,
-        'today_sales_amount': today_sales_amount,
-        'monthly_sales_count': monthly_sales_count,
-        'monthly_sales_amount': monthly_sales_amount,
-        'current_month_name': today.strftime('%B %Y'),
         'shop_owners': shop_owners,
         'pending_orders': pending_orders,
+        'idempotency_key': new_idempotency_key(),  # One bill per rendered form, even if submitted twice
     }
     
+    # Recent bills and today/month sales totals for the current user (cached until a bill changes)
+    from .dashboard_fragments import sales_summary
+    context.update(sales_summary(request.user))
+    
     # Use the tabbed billing template
     return render(request, 'billing.html', context)
 
@@ -2563,22 +1871,21 @@ def billing(request):
 def get_bill_details(request, bill_id):
     """AJAX endpoint to get bill details - only for bills created by current user"""
     try:
+        from .bill_repository import BillRepository
+        
         # Only allow users to view their own bills
-        bill = SalesBill.objects.prefetch_related('items__product').get(
-            id=bill_id,
-            created_by=request.user
-        )
+        bill = BillRepository.get(id=bill_id, created_by=request.user)
         bill_data = {
             'bill_number': bill.bill_number,
             'created_at': bill.created_at.strftime('%b %d, %Y %H:%M'),
             'total_amount': str(bill.total_amount),
-            'created_by': bill.created_by.first_name or bill.created_by.username if bill.created_by else 'Unknown',
+            'created_by': bill.created_by_name,
             'items': []
         }
         
-        for item in bill.items.all():
+        for item in bill.items:
             bill_data['items'].append({
-                'product_name': item.product.name,
+                'product_name': item.product_name,
                 'quantity': item.quantity,
                 'price': str(item.price),
                 'total': str(item.total)
@@ -2634,6 +1941,7 @@ def get_product_details(request, product_id):
     except Product.DoesNotExist:
         return JsonResponse({'error': 'Product not found'}, status=404)
 
+@replica_reads
 @login_required
 def search_products_api(request):
     """API endpoint to search products with their exact inventory quantities"""
@@ -2642,15 +1950,15 @@ def search_products_api(request):
     if not query:
         return JsonResponse({'products': []})
     
-    # Search products by name
-    products = Product.objects.filter(
+    # Search products by name, with the stock this cashier can bill (their store's)
+    from .bill_service import with_sellable_stock
+    products = with_sellable_stock(Product.objects.filter(
         name__icontains=query
-    ).order_by('name')[:10]
+    ), request.user).order_by('name')[:10]
     
     products_data = []
     for product in products:
-        # Get exact available quantity for each product
-        available_qty = product.total_stock
+        available_qty = product.sellable_stock
         
         products_data.append({
             'id': product.id,
@@ -2675,6 +1983,7 @@ def mark_notification_read(request, notification_id):
     except Notification.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Notification not found'})
 
+@replica_reads
 @login_required
 def search_products(request):
     """AJAX endpoint for product autocomplete search"""
@@ -2710,146 +2019,10 @@ def apply_recommendation(request):
         try:
             product = Product.objects.get(id=product_id)
             
-            # Determine the recommendation based on trend score and stock
-            recommendation_applied = ""
-            
-            if product.trend_score >= 7 and product.total_stock < 100:
-                # High demand, low stock - Increase stock recommendation
-                recommendation_applied = "Increase Stock recommendation noted"
-                
-                # Create AI recommendation record
-                if AIRecommendation:
-                    AIRecommendation.objects.update_or_create(
-                        product=product,
-                        recommendation_type='increase_stock',
-                        status='pending',
-                        defaults={
-                            'recommendation_text': f'Increase stock for {product.name} due to high demand',
-                            'trend_score': product.trend_score,
-                            'stock_level': product.total_stock,
-                            'suggested_quantity': max(200, product.total_stock * 2),
-                            'applied_by': request.user.username,
-                            'applied_at': timezone.now(),
-                            'status': 'applied'
-                        }
-                    )
-                
-            elif product.trend_score >= 7 and product.total_stock >= 100:
-                # High demand, good stock - Raise price
-                from decimal import Decimal
-                old_price = product.new_price
-                new_price = old_price * Decimal('1.10')  # 10% increase
-                product.new_price = new_price
-                product.save(update_fields=['new_price'])
-                
-                recommendation_applied = f"Price raised from ₹{old_price} to ₹{new_price} (10% increase)"
-                
-                # Create AI recommendation record
-                if AIRecommendation:
-                    AIRecommendation.objects.update_or_create(
-                        product=product,
-                        recommendation_type='raise_price',
-                        status='pending',
-                        defaults={
-                            'recommendation_text': f'Raise price for {product.name} due to high demand',
-                            'trend_score': product.trend_score,
-                            'stock_level': product.total_stock,
-                            'suggested_value': new_price,
-                            'applied_by': request.user.username,
-                            'applied_at': timezone.now(),
-                            'status': 'applied'
-                        }
-                    )
-                
-            elif product.trend_score < 3 and product.total_stock > 150:
-                # Low demand, overstock - Apply discount
-                from decimal import Decimal
-                old_price = product.new_price
-                discount_percent = 15  # 15% discount
-                new_price = old_price * (Decimal('1') - Decimal(str(discount_percent)) / Decimal('100'))
-                product.new_price = new_price
-                product.discount_percentage = discount_percent
-                product.save(update_fields=['new_price', 'discount_percentage'])
-                
-                recommendation_applied = f"Discount applied: {discount_percent}% off. Price reduced from ₹{old_price} to ₹{new_price}"
-                
-                # Create AI recommendation record
-                if AIRecommendation:
-                    AIRecommendation.objects.update_or_create(
-                        product=product,
-                        recommendation_type='apply_discount',
-                        status='pending',
-                        defaults={
-                            'recommendation_text': f'Apply discount for {product.name} due to low demand and overstock',
-                            'trend_score': product.trend_score,
-                            'stock_level': product.total_stock,
-                            'suggested_value': Decimal(str(discount_percent)),
-                            'applied_by': request.user.username,
-                            'applied_at': timezone.now(),
-                            'status': 'applied'
-                        }
-                    )
-                
-            elif product.trend_score < 3:
-                # Low demand - Reduce orders
-                recommendation_applied = "Reduce orders recommendation noted for low demand product"
-                
-                # Create AI recommendation record
-                if AIRecommendation:
-                    AIRecommendation.objects.update_or_create(
-                        product=product,
-                        recommendation_type='reduce_orders',
-                        status='pending',
-                        defaults={
-                            'recommendation_text': f'Reduce future orders for {product.name} due to low demand',
-                            'trend_score': product.trend_score,
-                            'stock_level': product.total_stock,
-                            'applied_by': request.user.username,
-                            'applied_at': timezone.now(),
-                            'status': 'applied'
-                        }
-                    )
-                
-            elif product.total_stock < 50:
-                # Low stock - Reorder soon
-                recommendation_applied = "Reorder recommendation noted for low stock product"
-                
-                # Create AI recommendation record
-                if AIRecommendation:
-                    AIRecommendation.objects.update_or_create(
-                        product=product,
-                        recommendation_type='reorder_soon',
-                        status='pending',
-                        defaults={
-                            'recommendation_text': f'Reorder {product.name} soon due to low stock',
-                            'trend_score': product.trend_score,
-                            'stock_level': product.total_stock,
-                            'suggested_quantity': max(100, product.total_stock * 3),
-                            'applied_by': request.user.username,
-                            'applied_at': timezone.now(),
-                            'status': 'applied'
-                        }
-                    )
-                
-            else:
-                # Monitor - No specific action
-                recommendation_applied = "Product marked for monitoring"
-                
-                # Create AI recommendation record
-                if AIRecommendation:
-                    AIRecommendation.objects.update_or_create(
-                        product=product,
-                        recommendation_type='monitor',
-                        status='pending',
-                        defaults={
-                            'recommendation_text': f'Continue monitoring {product.name} - stable conditions',
-                            'trend_score': product.trend_score,
-                            'stock_level': product.total_stock,
-                            'applied_by': request.user.username,
-                            'applied_at': timezone.now(),
-                            'status': 'applied'
-                        }
-                    )
+            # Decide with the recommendation engine (one stock read) and apply it
+            from .recommendations import refresh_product, apply_recommendations
+            recommendation = refresh_product(product)
+            recommendation_applied = apply_recommendations([recommendation], request.user)[recommendation.id]
             
             return JsonResponse({
                 'success': True,
@@ -2922,6 +2095,288 @@ def dismiss_recommendation(request):
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
+@login_required
+def recommendation_queue(request):
+    """
+    Ranked actions queue of pending AI recommendations for the whole catalog
+    ?type=<recommendation_type>&limit=50&offset=0&include_monitor=1
+    Recommendations are recomputed in one batch whenever products or stock changed.
+    """
+    from . import dashboard_cache
+    from .recommendations import generate_recommendations, actions_queue, to_json
+    
+    dashboard_cache.run_once_per_version(
+        'generate_recommendations',
+        generate_recommendations,
+        depends_on=[dashboard_cache.PRODUCTS, dashboard_cache.STOCK],
+        scope=date.today().isoformat()
+    )
+    
+    try:
+        limit = min(int(request.GET.get('limit', 50)), 500)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit and offset must be numbers'}, status=400)
+    
+    queue = actions_queue(
+        recommendation_type=request.GET.get('type') or None,
+        include_monitor=request.GET.get('include_monitor') == '1'
+    )
+    
+    return JsonResponse({
+        'success': True,
+        'total': queue.count(),
+        'recommendations': [to_json(recommendation) for recommendation in queue[offset:offset + limit]],
+    })
+
+@login_required
+def bulk_recommendation_action(request):
+    """
+    Apply or dismiss many pending recommendations at once (admin only)
+    POST action=apply|dismiss and ids=1,2,3 (or repeated ids), or type=<recommendation_type> for all of a type
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+    
+    try:
+        if request.user.userprofile.role != 'admin':
+            return JsonResponse({'success': False, 'error': 'Permission denied. Only admin can apply recommendations.'}, status=403)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'User profile not found.'}, status=403)
+    
+    from .recommendations import apply_recommendations, dismiss_recommendations
+    
+    action = request.POST.get('action')
+    if action not in ['apply', 'dismiss']:
+        return JsonResponse({'success': False, 'error': 'action must be apply or dismiss'}, status=400)
+    
+    recommendations = AIRecommendation.objects.filter(status='pending').select_related('product')
+    recommendation_type = request.POST.get('type')
+    if recommendation_type:
+        recommendations = recommendations.filter(recommendation_type=recommendation_type)
+    else:
+        try:
+            ids = [int(value) for raw in request.POST.getlist('ids') for value in raw.split(',') if value.strip()]
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'ids must be numbers'}, status=400)
+        if not ids:
+            return JsonResponse({'success': False, 'error': 'Provide ids or a recommendation type'}, status=400)
+        recommendations = recommendations.filter(id__in=ids)
+    
+    recommendations = list(recommendations)
+    
+    if action == 'apply':
+        results = apply_recommendations(recommendations, request.user)
+        return JsonResponse({
+            'success': True,
+            'message': f'✅ Applied {len(results)} recommendations',
+            'applied': len(results),
+            'results': [
+                {'id': recommendation.id, 'product_name': recommendation.product.name, 'message': results[recommendation.id]}
+                for recommendation in recommendations if recommendation.id in results
+            ],
+        })
+    
+    dismissed = dismiss_recommendations(recommendations, request.user)
+    return JsonResponse({'success': True, 'message': f'Dismissed {dismissed} recommendations', 'dismissed': dismissed})
+
+@replica_reads
+@login_required
+def trend_history(request):
+    """
+    Trend score history for charts
+    GET ?days=365 (max 1825) &product=<id> (repeatable, default all) &source=ai|computed|simulated
+        &points=120 (per product; longer ranges are averaged by week or month)
+    """
+    from .trend_history import history, SOURCES, MAX_POINTS
+    
+    try:
+        days = min(max(int(request.GET.get('days', 365)), 1), 1825)
+        points = min(max(int(request.GET.get('points', MAX_POINTS)), 10), 366)
+        product_ids = [int(product_id) for product_id in request.GET.getlist('product')] or None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'days, points and product must be numbers'}, status=400)
+    
+    source = request.GET.get('source') or None
+    if source is not None and source not in SOURCES:
+        return JsonResponse({'success': False, 'error': f'source must be one of {", ".join(SOURCES)}'}, status=400)
+    
+    data = history(product_ids, days=days, source=source, max_points=points)
+    return JsonResponse({'success': True, **data})
+
+@login_required
+def replenishment_plan(request):
+    """
+    Replenishment planner (admin only)
+    GET: reorder point, EOQ and days of cover per product and stock owner - preview, nothing is written
+         ?all=1 also lists lines that do not need an order, &limit=100&offset=0
+    POST: create OrderQueue drafts for every line that needs an order (skips products with an open order)
+    """
+    try:
+        if request.user.userprofile.role != 'admin':
+            return JsonResponse({'success': False, 'error': 'Permission denied. Only admin can plan replenishment.'}, status=403)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'User profile not found.'}, status=403)
+    
+    from .replenishment import plan, create_drafts
+    
+    if request.method == 'POST':
+        created, skipped = create_drafts(plan(), created_by=request.user)
+        return JsonResponse({
+            'success': True,
+            'message': f'✅ Created {len(created)} draft orders ({skipped} already covered by open orders)',
+            'created': len(created),
+            'skipped': skipped,
+            'draft_ids': [order.id for order in created],
+        })
+    
+    try:
+        limit = min(int(request.GET.get('limit', 100)), 1000)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit and offset must be numbers'}, status=400)
+    
+    lines = plan(include_ok=request.GET.get('all') == '1')
+    return JsonResponse({
+        'success': True,
+        'total': len(lines),
+        'lines': lines[offset:offset + limit],
+    })
+
+@login_required
+def bulk_draft_action(request):
+    """
+    Approve or cancel planner drafts in one go (admin only)
+    POST action=approve|cancel and ids=1,2,3 (or repeated ids), or all=1 for every draft
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+    
+    try:
+        if request.user.userprofile.role != 'admin':
+            return JsonResponse({'success': False, 'error': 'Permission denied. Only admin can approve orders.'}, status=403)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'User profile not found.'}, status=403)
+    
+    from .replenishment import approve_drafts, cancel_drafts
+    
+    action = request.POST.get('action')
+    if action not in ['approve', 'cancel']:
+        return JsonResponse({'success': False, 'error': 'action must be approve or cancel'}, status=400)
+    
+    drafts = OrderQueue.objects.filter(status='draft').select_related('product').order_by('id')
+    if request.POST.get('all') != '1':
+        try:
+            ids = [int(value) for raw in request.POST.getlist('ids') for value in raw.split(',') if value.strip()]
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'ids must be numbers'}, status=400)
+        if not ids:
+            return JsonResponse({'success': False, 'error': 'Provide ids or all=1'}, status=400)
+        drafts = drafts.filter(id__in=ids)
+    
+    drafts = list(drafts)
+    
+    if action == 'approve':
+        results = approve_drafts(drafts, request.user)
+        approved = sum(1 for result in results if result['success'])
+        return JsonResponse({
+            'success': True,
+            'message': f'✅ Approved {approved} of {len(results)} draft orders',
+            'approved': approved,
+            'results': results,
+        })
+    
+    cancelled = cancel_drafts(drafts, request.user)
+    return JsonResponse({'success': True, 'message': f'Cancelled {cancelled} draft orders', 'cancelled': cancelled})
+
+@login_required
+def stock_transfer(request):
+    """
+    Move stock between owners as one transfer document (admin only)
+    POST to_user=<username>, lines=[{"product_id": 1, "quantity": 5}, ...] (JSON),
+    optional from_user=<username> (default: the company warehouse) and reason
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+    
+    try:
+        if request.user.userprofile.role != 'admin':
+            return JsonResponse({'success': False, 'error': 'Permission denied. Only admin can transfer stock.'}, status=403)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'User profile not found.'}, status=403)
+    
+    from .stores import warehouse_user
+    from .transfers import transfer, TransferError
+    
+    try:
+        lines = [(int(line['product_id']), int(line['quantity'])) for line in json.loads(request.POST.get('lines', '[]'))]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'success': False, 'error': 'lines must be a JSON list of {product_id, quantity}'}, status=400)
+    
+    from_username = request.POST.get('from_user')
+    from_user = User.objects.filter(username=from_username).first() if from_username else warehouse_user()
+    to_user = User.objects.filter(username=request.POST.get('to_user', '')).first()
+    if from_user is None or to_user is None:
+        return JsonResponse({'success': False, 'error': 'Unknown from_user or to_user'}, status=400)
+    
+    try:
+        document = transfer(lines, from_user, to_user, request.user, reason=request.POST.get('reason', ''))
+    except TransferError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'✅ Transfer {document.reference}: {len(lines)} lines from {from_user.username} to {to_user.username}',
+        'reference': document.reference,
+        'lines': [{'product_id': line.product_id, 'quantity': line.quantity} for line in document.lines.all()],
+    })
+
+@login_required
+def bulk_pricing(request):
+    """
+    Reprice every product matching a filter in one UPDATE (admin only)
+    POST filters: category, abc (A/B/C), trend_min, trend_max, stock_min, stock_max
+    POST rule: rule=discount|markup|reset, percent, ending (e.g. 0.99), floor_at_cost=1
+    Nothing is written unless apply=1 - otherwise returns a dry-run preview.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+    
+    try:
+        if request.user.userprofile.role != 'admin':
+            return JsonResponse({'success': False, 'error': 'Permission denied. Only admin can change prices.'}, status=403)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'User profile not found.'}, status=403)
+    
+    from .pricing import select_products, reprice, PricingError
+    
+    try:
+        products = select_products(
+            category=request.POST.get('category'),
+            abc=request.POST.get('abc'),
+            trend_min=request.POST.get('trend_min'),
+            trend_max=request.POST.get('trend_max'),
+            stock_min=request.POST.get('stock_min'),
+            stock_max=request.POST.get('stock_max')
+        )
+        result = reprice(
+            products,
+            rule=request.POST.get('rule', 'discount'),
+            percent=request.POST.get('percent'),
+            ending=request.POST.get('ending'),
+            floor_at_cost=request.POST.get('floor_at_cost') == '1',
+            dry_run=request.POST.get('apply') != '1'
+        )
+    except PricingError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    if result['dry_run']:
+        result['message'] = f"Preview: {result['matched']} products would be repriced"
+    else:
+        result['message'] = f"✅ Repriced {result['updated']} products"
+    result['success'] = True
+    return JsonResponse(result)
+
 def home_view(request):
     """
     Home view that handles persistent login sessions.
@@ -2958,6 +2413,7 @@ def test_eye_icon(request):
     
     return HttpResponse(content)
 
+@replica_reads
 @login_required
 def product_autocomplete_api(request):
     """API endpoint for product autocomplete with category information"""
@@ -3058,6 +2514,8 @@ def delete_team_member(request):
                 inventory_action_by=None,
                 inventory_action='none'
             )
+            from . import dashboard_cache
+            dashboard_cache.bump_version_on_commit(dashboard_cache.ORDERS)
             print(f"🔧 DEBUG: Updated {orders_updated} order queue entries")
             
             # 2. The user deletion will automatically cascade delete:
@@ -3270,37 +2728,12 @@ def get_bill_details_api(request):
         return JsonResponse({'success': False, 'error': 'Bill number is required'})
     
     try:
-        bill = SalesBill.objects.get(bill_number=bill_number)
-        
-        # Get bill items
-        items = []
-        for item in bill.items.all():
-            items.append({
-                'product_name': item.product.name,
-                'quantity': item.quantity,
-                'price': float(item.price),
-                'total': float(item.total)
-            })
+        from .bill_repository import BillRepository
         
-        # Get store information
-        try:
-            store_name = bill.created_by.userprofile.full_identity if bill.created_by else 'N/A'
-            store_location = bill.created_by.userprofile.store_location if bill.created_by and bill.created_by.userprofile.store_location else 'N/A'
-        except:
-            # If user has no profile, use username
-            store_name = bill.created_by.username if bill.created_by else 'N/A'
-            store_location = 'N/A'
-        
-        bill_data = {
-            'bill_number': bill.bill_number,
-            'created_at': bill.created_at.strftime('%d %B %Y, %I:%M %p'),
-            'total_amount': float(bill.total_amount),
-            'store_name': store_name,
-            'store_location': store_location,
-            'items': items
-        }
+        # Bill, store profile and all items with product names in two queries
+        bill = BillRepository.get(bill_number=bill_number)
         
-        return JsonResponse({'success': True, 'bill': bill_data})
+        return JsonResponse({'success': True, 'bill': bill.to_json()})
         
     except SalesBill.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Bill not found'})
@@ -3312,6 +2745,7 @@ def get_bill_details_api(request):
 # OFFLINE RECOVERY FEATURE (from LedgerX)
 # ============================================
 
+@replica_reads
 def offline_ledger(request, token):
     """
     Offline Recovery View: Display transaction history using QR token
@@ -3323,9 +2757,6 @@ def offline_ledger(request, token):
         # Find the QR token
         qr_token = get_object_or_404(QRToken, secure_token=token, is_active=True)
         
-        # Mark token as accessed
-        qr_token.mark_accessed()
-        
         # Get user profile and transaction history
         user_profile = qr_token.user_profile
         user = user_profile.user
@@ -3334,29 +2765,21 @@ def offline_ledger(request, token):
         requested_bill_number = request.GET.get('bill')
         highlighted_bill = None
         
-        # Get all bills created by this user
-        bills = SalesBill.objects.filter(created_by=user).order_by('-created_at')[:50]
+        # Get all bills created by this user with their items (two queries in total)
+        from .bill_repository import BillRepository
+        bills = BillRepository.list(
+            SalesBill.objects.filter(created_by=user).order_by('-created_at')[:50]
+        )
         
         # Get bill details with items
         transaction_history = []
         for bill in bills:
-            items = []
-            total_quantity = 0
-            for item in bill.items.all():
-                items.append({
-                    'product_name': item.product.name,
-                    'quantity': item.quantity,
-                    'price': item.price,
-                    'total': item.total
-                })
-                total_quantity += item.quantity
-            
             bill_data = {
                 'bill_number': bill.bill_number,
                 'created_at': bill.created_at,
                 'total_amount': bill.total_amount,
-                'total_quantity': total_quantity,
-                'items': items,
+                'total_quantity': bill.total_quantity,
+                'items': bill.items,
                 'is_highlighted': bill.bill_number == requested_bill_number
             }
             
@@ -3365,6 +2788,9 @@ def offline_ledger(request, token):
             
             transaction_history.append(bill_data)
         
+        # Mark token as accessed (after the reads, which may come from the replica)
+        qr_token.mark_accessed()
+        
         context = {
             'user_profile': user_profile,
             'user': user,
@@ -3403,10 +2829,13 @@ def generate_qr_token(request):
         if created:
             messages.success(request, '✅ Digital Ledger QR code generated successfully!')
         
+        from .qr_sheets import render_qr_svg
+        
         context = {
             'qr_token': qr_token,
             'qr_url': qr_url,
-            'qr_data': qr_url  # This will be used to generate QR code
+            'qr_data': qr_url,
+            'qr_svg': render_qr_svg(qr_url),  # Rendered here so the page needs no QR script
         }
         
         return render(request, 'qr_token_display.html', context)
@@ -3508,51 +2937,109 @@ def get_bill_qr_image(request, bill_number):
 
 
 @login_required
-def qr_test_page(request):
+def bill_qr_sheet(request):
     """
-    Test page for QR code system verification
+    Generate a printable sheet of QR codes for many bills at once
+    Accepts ?from=YYYY-MM-DD&to=YYYY-MM-DD and/or ?bills=BILL-1,BILL-2
+    and ?format=pdf|png. Only the current user's bills are included.
+    Selections over MAX_WEB_TILES bills are rejected - print those with
+    the print_bill_qr_sheet management command.
     """
-    return render(request, 'qr_test_page.html')
+    try:
+        from django.http import HttpResponse
+        from django.utils.dateparse import parse_date
+        from .qr_sheets import select_bills, get_bill_qr_entries, render_qr_sheet, MAX_WEB_TILES
 
+        output_format = request.GET.get('format', 'pdf').lower()
+        if output_format not in ['pdf', 'png']:
+            return JsonResponse({'success': False, 'error': 'Format must be pdf or png'}, status=400)
 
-def individual_bill_view(request, bill_number):
-    """
-    Public view for individual bill details via QR code
-    Shows ONLY the specific bill's information
-    No login required - accessible via QR code
-    """
-    try:
-        # Get the bill by bill number
-        bill = get_object_or_404(SalesBill, bill_number=bill_number)
-        
-        # Get bill items with product details
-        items = []
-        total_quantity = 0
-        for item in bill.items.all():
-            items.append({
-                'product_name': item.product.name,
-                'quantity': item.quantity,
-                'price': item.price,
-                'total': item.total
-            })
-            total_quantity += item.quantity
-        
-        # Get user/store information
-        user = bill.created_by
-        user_profile = user.userprofile if hasattr(user, 'userprofile') else None
+        date_from = parse_date(request.GET.get('from', '')) if request.GET.get('from') else None
+        date_to = parse_date(request.GET.get('to', '')) if request.GET.get('to') else None
+        bill_numbers = [number.strip() for number in request.GET.get('bills', '').split(',') if number.strip()]
+
+        if not (date_from or date_to or bill_numbers):
+            return JsonResponse({'success': False, 'error': 'Provide a date range or a list of bill numbers'}, status=400)
+
+        bills = select_bills(
+            SalesBill.objects.filter(created_by=request.user),
+            date_from=date_from,
+            date_to=date_to,
+            bill_numbers=bill_numbers
+        )
+
+        bill_count = bills.count()
+        if bill_count > MAX_WEB_TILES:
+            return JsonResponse({
+                'success': False,
+                'error': f'{bill_count} bills selected, at most {MAX_WEB_TILES} per sheet here. '
+                         f'Narrow the date range or run: python manage.py print_bill_qr_sheet'
+            }, status=400)
+
+        entries = get_bill_qr_entries(bills, request.build_absolute_uri('/'))
+        if not entries:
+            return JsonResponse({'success': False, 'error': 'No bills found for the selection'}, status=404)
+
+        # Rendered in this process: no worker pool inside a web request
+        sheet = render_qr_sheet(entries, output_format=output_format, max_workers=1)
+
+        content_type = 'application/pdf' if output_format == 'pdf' else 'image/png'
+        response = HttpResponse(sheet, content_type=content_type)
+        response['Content-Disposition'] = f'inline; filename="bill_qr_sheet_{len(entries)}.{output_format}"'
+        return response
+
+    except ImportError:
+        return JsonResponse({
+            'success': False,
+            'error': 'QR code library not installed. Run: pip install qrcode[pil]'
+        }, status=500)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+
+@login_required
+def qr_test_page(request):
+    """
+    Test page for QR code system verification
+    """
+    return render(request, 'qr_test_page.html')
+
+
+@login_required
+def bill_qr_svg(request, bill_number):
+    """QR code (SVG) linking to the individual bill page - used on printed bills"""
+    from django.http import HttpResponse
+    from django.urls import reverse
+    from .qr_sheets import render_qr_svg
+    
+    bill = get_object_or_404(SalesBill, bill_number=bill_number)
+    bill_url = request.build_absolute_uri(reverse('individual_bill_view', args=[bill.bill_number]))
+    response = HttpResponse(render_qr_svg(bill_url), content_type='image/svg+xml')
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@replica_reads
+def individual_bill_view(request, bill_number):
+    """
+    Public view for individual bill details via QR code
+    Shows ONLY the specific bill's information
+    No login required - accessible via QR code
+    """
+    try:
+        from .bill_repository import BillRepository
         
-        bill_data = {
-            'bill_number': bill.bill_number,
-            'created_at': bill.created_at,
-            'total_amount': bill.total_amount,
-            'total_quantity': total_quantity,
-            'items': items,
-        }
+        # Get the bill with items, products and store profile in two queries
+        bill = get_object_or_404(BillRepository.queryset(), bill_number=bill_number)
+        bill = BillRepository.to_dto(bill)
         
         context = {
-            'bill': bill_data,
-            'user_profile': user_profile,
-            'user': user,
+            'bill': bill,
+            'user_profile': bill.user_profile,
+            'user': bill.user,
             'is_individual_bill': True
         }
         
@@ -3599,7 +3086,7 @@ def csv_billing(request):
                 return redirect('billing')
             
             # Parse products from CSV
-            products_data = []
+            parsed = []
             errors = []
             line_number = 1
             
@@ -3621,26 +3108,30 @@ def csv_billing(request):
                     errors.append(f"Line {line_number}: Invalid quantity '{quantity_str}' for {product_name}")
                     continue
                 
-                # Find product
-                try:
-                    product = Product.objects.get(name__iexact=product_name)
-                    
-                    # Check stock availability
-                    available_stock = product.total_stock
-                    if available_stock < quantity:
-                        errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
-                        continue
-                    
-                    products_data.append({
-                        'name': product.name,
-                        'quantity': quantity,
-                        'unitPrice': float(product.new_price),
-                        'total': float(product.new_price * quantity)
-                    })
-                    
-                except Product.DoesNotExist:
+                parsed.append((line_number, product_name, quantity))
+            
+            # Every product named in the file, with the stock this cashier can bill, in one query
+            from .bill_service import with_sellable_stock
+            from .product_lookup import resolve
+            products = resolve(
+                names=[product_name for _, product_name, _ in parsed],
+                queryset=with_sellable_stock(Product.objects.all(), request.user)
+            )
+            
+            lines = []
+            for line_number, product_name, quantity in parsed:
+                product = products.get(name=product_name)
+                if product is None:
                     errors.append(f"Line {line_number}: Product '{product_name}' not found")
                     continue
+                
+                # Check stock availability
+                available_stock = product.sellable_stock
+                if available_stock < quantity:
+                    errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
+                    continue
+                
+                lines.append((product, quantity, product.new_price, product.new_price * quantity))
             
             # Show errors if any
             if errors:
@@ -3649,93 +3140,43 @@ def csv_billing(request):
                     error_message += f"\n... and {len(errors) - 10} more errors"
                 messages.error(request, f'❌ {error_message}')
                 
-                if not products_data:
+                if not lines:
                     return redirect('billing')
             
             # If we have valid products, create the bill
-            if products_data:
-                # Calculate total amount
-                total_amount = Decimal('0.00')
-                for product_data in products_data:
-                    total_amount += Decimal(str(product_data['total']))
-                
-                # Create sequential bill number
-                bill_number = get_next_bill_number()
-                
-                # Create bill
-                bill = SalesBill.objects.create(
-                    bill_number=bill_number,
-                    total_amount=total_amount,
-                    created_by=request.user
+            bill = None
+            if lines:
+                # Stock check, bill, lines and FEFO deductions in one transaction
+                from .bill_service import create_bill
+                bill, created, rejected = create_bill(
+                    request.user, lines, idempotency_key=get_idempotency_key(request)
                 )
-                
+                errors.extend(rejected)
+            
+            if bill is not None and not created:
+                messages.info(request, f'ℹ️ Bill #{bill.bill_number} was already created for this upload')
+            elif bill is not None:
                 # Auto-generate QR token for user if not exists
                 from .models import QRToken
-                user_profile = request.user.userprofile
-                qr_token, created = QRToken.objects.get_or_create(user_profile=user_profile)
+                QRToken.objects.get_or_create(user_profile=request.user.userprofile)
                 
-                # Process each product
-                successful_products = []
-                
-                for product_data in products_data:
-                    try:
-                        product = Product.objects.get(name=product_data['name'])
-                        quantity = int(product_data['quantity'])
-                        unit_price = Decimal(str(product_data['unitPrice']))
-                        item_total = Decimal(str(product_data['total']))
-                        
-                        # Create bill item
-                        SalesBillItem.objects.create(
-                            bill=bill,
-                            product=product,
-                            quantity=quantity,
-                            price=unit_price,
-                            total=item_total
-                        )
-                        
-                        # AUTOMATIC INVENTORY DEDUCTION using FEFO
-                        remaining_qty = quantity
-                        from datetime import date
-                        
-                        stock_batches = product.expirystock_set.filter(
-                            quantity__gt=0,
-                            expiry_date__gte=date.today()
-                        ).order_by('expiry_date')
-                        
-                        for batch in stock_batches:
-                            if remaining_qty <= 0:
-                                break
-                            
-                            if batch.quantity >= remaining_qty:
-                                batch.quantity -= remaining_qty
-                                remaining_qty = 0
-                            else:
-                                remaining_qty -= batch.quantity
-                                batch.quantity = 0
-                            
-                            batch.save()
-                        
-                        successful_products.append(f"{product.name} ({quantity} units)")
-                        
-                        # Update stock notifications for this product
-                        update_stock_notifications_for_product(product)
-                        
-                    except Exception as e:
-                        errors.append(f"Error processing {product_data['name']}: {str(e)}")
+                successful_products = [
+                    f"{item.product.name} ({item.quantity} units)"
+                    for item in bill.items.select_related('product')
+                ]
                 
                 # Create notification
-                if successful_products:
-                    Notification.objects.create(
-                        title=f"CSV BULK BILLING: Bill #{bill.bill_number}",
-                        message=f"Bulk bill created from CSV upload!\n"
-                               f"Products sold: {', '.join(successful_products)}\n"
-                               f"Total Amount: ₹{bill.total_amount}\n"
-                               f"Inventory automatically updated using FEFO method.\n"
-                               f"Uploaded by: {request.user.first_name or request.user.username}",
-                        notification_type='admin_message',
-                        priority='medium',
-                        target_user_role='inventory'
-                    )
+                Notification.objects.create(
+                    title=f"CSV BULK BILLING: Bill #{bill.bill_number}",
+                    message=f"Bulk bill created from CSV upload!\n"
+                           f"Products sold: {', '.join(successful_products)}\n"
+                           f"Total Amount: ₹{bill.total_amount}\n"
+                           f"Inventory automatically updated using FEFO method.\n"
+                           f"Uploaded by: {request.user.first_name or request.user.username}",
+                    notification_type='admin_message',
+                    priority='medium',
+                    target_user_role='inventory'
+                )
                 
                 success_msg = (f'✅ CSV bill #{bill.bill_number} created successfully! '
                               f'Total: ₹{bill.total_amount} | {len(successful_products)} products processed')
@@ -3869,7 +3310,7 @@ def process_shop_owner_order(request):
             return redirect('billing')
         
         # Parse products from CSV
-        products_data = []
+        parsed = []
         errors = []
         line_number = 1
         
@@ -3893,29 +3334,33 @@ def process_shop_owner_order(request):
                 errors.append(f"Line {line_number}: Invalid quantity '{quantity_str}' for {product_name}")
                 continue
             
-            # Find product
-            try:
-                product = Product.objects.get(name__iexact=product_name)
-                
-                # Check stock availability
-                available_stock = product.total_stock
-                if available_stock < quantity:
-                    errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
-                    continue
-                
-                products_data.append({
-                    'name': product.name,
-                    'quantity': quantity,
-                    'unitPrice': float(product.new_price),
-                    'total': float(product.new_price * quantity)
-                })
-                
-            except Product.DoesNotExist:
+            parsed.append((line_number, product_name, quantity))
+        
+        # Every product named in the file, with the stock this cashier can bill, in one query
+        from .bill_service import with_sellable_stock
+        from .product_lookup import resolve
+        products = resolve(
+            names=[product_name for _, product_name, _ in parsed],
+            queryset=with_sellable_stock(Product.objects.all(), request.user)
+        )
+        
+        lines = []
+        for line_number, product_name, quantity in parsed:
+            product = products.get(name=product_name)
+            if product is None:
                 errors.append(f"Line {line_number}: Product '{product_name}' not found")
                 continue
+            
+            # Check stock availability
+            available_stock = product.sellable_stock
+            if available_stock < quantity:
+                errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
+                continue
+            
+            lines.append((product, quantity, product.new_price, product.new_price * quantity))
         
         # Show errors if any
-        if errors and not products_data:
+        if errors and not lines:
             error_message = "CSV processing errors:\n" + "\n".join(errors[:10])
             if len(errors) > 10:
                 error_message += f"\n... and {len(errors) - 10} more errors"
@@ -3923,75 +3368,26 @@ def process_shop_owner_order(request):
             return redirect('billing')
         
         # If we have valid products, create the bill
-        if products_data:
-            # Calculate total amount
-            total_amount = Decimal('0.00')
-            for product_data in products_data:
-                total_amount += Decimal(str(product_data['total']))
-            
-            # Create sequential bill number
-            bill_number = get_next_bill_number()
-            
-            # Create bill
-            bill = SalesBill.objects.create(
-                bill_number=bill_number,
-                total_amount=total_amount,
-                created_by=request.user
+        bill = None
+        if lines:
+            # Stock check, bill, lines and FEFO deductions in one transaction
+            from .bill_service import create_bill
+            bill, created, rejected = create_bill(
+                request.user, lines, idempotency_key=get_idempotency_key(request)
             )
-            
+            errors.extend(rejected)
+        
+        if bill is not None and not created:
+            messages.info(request, f'ℹ️ Bill #{bill.bill_number} was already created for this order')
+        elif bill is not None:
             # Auto-generate QR token for user if not exists
             from .models import QRToken
-            user_profile = request.user.userprofile
-            qr_token, created = QRToken.objects.get_or_create(user_profile=user_profile)
-            
-            # Process each product
-            successful_products = []
+            QRToken.objects.get_or_create(user_profile=request.user.userprofile)
             
-            for product_data in products_data:
-                try:
-                    product = Product.objects.get(name=product_data['name'])
-                    quantity = int(product_data['quantity'])
-                    unit_price = Decimal(str(product_data['unitPrice']))
-                    item_total = Decimal(str(product_data['total']))
-                    
-                    # Create bill item
-                    SalesBillItem.objects.create(
-                        bill=bill,
-                        product=product,
-                        quantity=quantity,
-                        price=unit_price,
-                        total=item_total
-                    )
-                    
-                    # AUTOMATIC INVENTORY DEDUCTION using FEFO
-                    remaining_qty = quantity
-                    from datetime import date
-                    
-                    stock_batches = product.expirystock_set.filter(
-                        quantity__gt=0,
-                        expiry_date__gte=date.today()
-                    ).order_by('expiry_date')
-                    
-                    for batch in stock_batches:
-                        if remaining_qty <= 0:
-                            break
-                        
-                        if batch.quantity >= remaining_qty:
-                            batch.quantity -= remaining_qty
-                            remaining_qty = 0
-                        else:
-                            remaining_qty -= batch.quantity
-                            batch.quantity = 0
-                        
-                        batch.save()
-                    
-                    successful_products.append(f"{product.name} ({quantity} units)")
-                    
-                    # Update stock notifications for this product
-                    update_stock_notifications_for_product(product)
-                    
-                except Exception as e:
-                    errors.append(f"Error processing {product_data['name']}: {str(e)}")
+            successful_products = [
+                f"{item.product.name} ({item.quantity} units)"
+                for item in bill.items.select_related('product')
+            ]
             
             # Mark order as processed
             order.mark_processed(bill, request.user)
@@ -4011,9 +3407,6 @@ def process_shop_owner_order(request):
                     messages.warning(request, f'⚠️ Bill created but email failed: {email_message}')
             else:
                 print(f"DEBUG: No email address for shop owner")
-                # Generate verification code even if no email
-                bill.generate_verification_code()
-                bill.save()
                 messages.info(request, f'📋 Verification code: {bill.verification_code} (No email address for shop owner)')
             
             # Create notification
@@ -4128,7 +3521,7 @@ def load_shop_owner_csv(request):
             })
         
         # Parse products
-        products_data = []
+        parsed = []
         errors = []
         line_number = 1
         
@@ -4151,34 +3544,20 @@ def load_shop_owner_csv(request):
                 errors.append(f"Line {line_number}: Invalid quantity '{quantity_str}' for {product_name}")
                 continue
             
-            # Find product
-            try:
-                product = Product.objects.get(name__iexact=product_name)
-                available_stock = product.total_stock
-                
-                if available_stock < quantity:
-                    errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
-                    # Still add to list but mark as error
-                    products_data.append({
-                        'id': product.id,
-                        'name': product.name,
-                        'quantity': quantity,
-                        'unitPrice': float(product.new_price),
-                        'total': float(product.new_price * quantity),
-                        'error': f'Insufficient stock (Available: {available_stock})',
-                        'hasError': True
-                    })
-                else:
-                    products_data.append({
-                        'id': product.id,
-                        'name': product.name,
-                        'quantity': quantity,
-                        'unitPrice': float(product.new_price),
-                        'total': float(product.new_price * quantity),
-                        'hasError': False
-                    })
-                
-            except Product.DoesNotExist:
+            parsed.append((line_number, product_name, quantity))
+        
+        # Every product named in the file, with the stock this cashier can bill, in one query
+        from .bill_service import with_sellable_stock
+        from .product_lookup import resolve
+        products = resolve(
+            names=[product_name for _, product_name, _ in parsed],
+            queryset=with_sellable_stock(Product.objects.all(), request.user)
+        )
+        
+        products_data = []
+        for line_number, product_name, quantity in parsed:
+            product = products.get(name=product_name)
+            if product is None:
                 errors.append(f"Line {line_number}: Product '{product_name}' not found")
                 # Add as error item
                 products_data.append({
@@ -4190,6 +3569,30 @@ def load_shop_owner_csv(request):
                     'error': 'Product not found',
                     'hasError': True
                 })
+                continue
+            
+            available_stock = product.sellable_stock
+            if available_stock < quantity:
+                errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
+                # Still add to list but mark as error
+                products_data.append({
+                    'id': product.id,
+                    'name': product.name,
+                    'quantity': quantity,
+                    'unitPrice': float(product.new_price),
+                    'total': float(product.new_price * quantity),
+                    'error': f'Insufficient stock (Available: {available_stock})',
+                    'hasError': True
+                })
+            else:
+                products_data.append({
+                    'id': product.id,
+                    'name': product.name,
+                    'quantity': quantity,
+                    'unitPrice': float(product.new_price),
+                    'total': float(product.new_price * quantity),
+                    'hasError': False
+                })
         
         return JsonResponse({
             'success': True,
@@ -4216,57 +3619,21 @@ def send_bill_email(bill, shop_owner):
     from django.template.loader import render_to_string
     from django.conf import settings
     
+    from .bill_repository import BillRepository
+    
     # Generate verification code if not exists
     if not bill.verification_code:
         bill.generate_verification_code()
         bill.save()
     
-    # Get bill items
-    items = bill.items.all()
-    
-    # Prepare email context
-    context = {
-        'shop_owner': shop_owner,
-        'bill': bill,
-        'items': items,
-        'verification_code': bill.verification_code,
-    }
+    # Load bill items with product names in one query
+    bill_dto = BillRepository.get(id=bill.id)
     
     # Email subject
     subject = f'Bill #{bill.bill_number} - NeuroStock Inventory'
     
     # Email body (plain text)
-    message = f"""
-Dear {shop_owner.name},
-
-Your restock order has been processed successfully!
-
-Bill Details:
--------------
-Bill Number: {bill.bill_number}
-Verification Code: {bill.verification_code}
-Date: {bill.created_at.strftime('%B %d, %Y at %H:%M')}
-Total Amount: ₹{bill.total_amount}
-
-Products:
----------
-"""
-    
-    for item in items:
-        message += f"• {item.product.name}: {item.quantity} units @ ₹{item.price} = ₹{item.total}\n"
-    
-    message += f"""
----------
-Grand Total: ₹{bill.total_amount}
-
-IMPORTANT: Your Verification Code is {bill.verification_code}
-Please keep this code safe for your records.
-
-Thank you for your business!
-
-Best regards,
-NeuroStock Inventory Management
-"""
+    message = bill_dto.to_email_text(shop_owner.name, 'Your restock order has been processed successfully!')
     
     # Send email
     try:
@@ -4304,6 +3671,8 @@ def send_bill_email_manual(request, bill_id):
         if not email:
             return JsonResponse({'success': False, 'error': 'Email address required'})
         
+        from .bill_repository import BillRepository
+        
         # Get bill
         bill = SalesBill.objects.get(id=bill_id, created_by=request.user)
         
@@ -4312,44 +3681,14 @@ def send_bill_email_manual(request, bill_id):
             bill.generate_verification_code()
             bill.save()
         
-        # Get bill items
-        items = bill.items.all()
+        # Load bill items with product names in one query
+        bill_dto = BillRepository.get(id=bill.id)
         
         # Email subject
         subject = f'Bill #{bill.bill_number} - NeuroStock Inventory'
         
         # Email body
-        message = f"""
-Dear Customer,
-
-Your bill details from NeuroStock Inventory:
-
-Bill Details:
--------------
-Bill Number: {bill.bill_number}
-Verification Code: {bill.verification_code}
-Date: {bill.created_at.strftime('%B %d, %Y at %H:%M')}
-Total Amount: ₹{bill.total_amount}
-
-Products:
----------
-"""
-        
-        for item in items:
-            message += f"• {item.product.name}: {item.quantity} units @ ₹{item.price} = ₹{item.total}\n"
-        
-        message += f"""
----------
-Grand Total: ₹{bill.total_amount}
-
-IMPORTANT: Your Verification Code is {bill.verification_code}
-Please keep this code safe for your records.
-
-Thank you for your business!
-
-Best regards,
-NeuroStock Inventory Management
-"""
+        message = bill_dto.to_email_text('Customer', 'Your bill details from NeuroStock Inventory:')
         
         # Send email
         from django.core.mail import send_mail
@@ -4485,7 +3824,7 @@ def load_complete_csv(request):
         
         print(f"DEBUG: Using name column: '{name_column}', quantity column: '{quantity_column}'")
         
-        products_data = []
+        parsed = []
         errors = []
         
         for row_num, row in enumerate(csv_reader, start=3):
@@ -4506,34 +3845,43 @@ def load_complete_csv(request):
                 errors.append(f"Invalid quantity '{quantity_str}' for {product_name}")
                 continue
             
-            # Find product in database
-            try:
-                product = Product.objects.get(name__iexact=product_name)
-                available_stock = product.total_stock
-                
-                if available_stock < quantity:
-                    products_data.append({
-                        'id': product.id,
-                        'name': product.name,
-                        'quantity': quantity,
-                        'unitPrice': float(product.new_price),
-                        'total': float(product.new_price * quantity),
-                        'hasError': True,
-                        'error': f'Insufficient stock (Available: {available_stock})'
-                    })
-                else:
-                    products_data.append({
-                        'id': product.id,
-                        'name': product.name,
-                        'quantity': quantity,
-                        'unitPrice': float(product.new_price),
-                        'total': float(product.new_price * quantity),
-                        'hasError': False
-                    })
-                
-            except Product.DoesNotExist:
+            parsed.append((product_name, quantity))
+        
+        # Every product named in the file, with the stock this cashier can bill, in one query
+        from .bill_service import with_sellable_stock
+        from .product_lookup import resolve
+        products = resolve(
+            names=[product_name for product_name, _ in parsed],
+            queryset=with_sellable_stock(Product.objects.all(), request.user)
+        )
+        
+        products_data = []
+        for product_name, quantity in parsed:
+            product = products.get(name=product_name)
+            if product is None:
                 errors.append(f"Product '{product_name}' not found in inventory")
                 continue
+            
+            available_stock = product.sellable_stock
+            if available_stock < quantity:
+                products_data.append({
+                    'id': product.id,
+                    'name': product.name,
+                    'quantity': quantity,
+                    'unitPrice': float(product.new_price),
+                    'total': float(product.new_price * quantity),
+                    'hasError': True,
+                    'error': f'Insufficient stock (Available: {available_stock})'
+                })
+            else:
+                products_data.append({
+                    'id': product.id,
+                    'name': product.name,
+                    'quantity': quantity,
+                    'unitPrice': float(product.new_price),
+                    'total': float(product.new_price * quantity),
+                    'hasError': False
+                })
         
         if not products_data:
             return JsonResponse({'success': False, 'error': 'No valid products found', 'errors': errors})
@@ -4582,75 +3930,31 @@ def process_csv_shop_owner_order(request):
             messages.error(request, '❌ No products to process')
             return redirect('billing')
         
-        # Calculate total amount
-        total_amount = Decimal('0.00')
-        for product_data in products_data:
-            total_amount += Decimal(str(product_data['total']))
-        
-        # Create bill
-        bill_number = get_next_bill_number()
-        bill = SalesBill.objects.create(
-            bill_number=bill_number,
-            total_amount=total_amount,
-            created_by=request.user
-        )
+        # Products by id (name as fallback) in one query; stock check, bill,
+        # lines and FEFO deductions in one transaction
+        from .bill_service import create_bill
+        lines, errors = resolve_bill_lines(products_data)
+        bill, created, rejected = create_bill(
+            request.user, lines, idempotency_key=get_idempotency_key(request)
+        ) if lines else (None, False, [])
+        errors += rejected
+        
+        if bill is None:
+            messages.error(request, f'❌ Cannot create bill! {", ".join(errors)}')
+            return redirect('billing')
         
-        # Generate verification code
-        bill.generate_verification_code()
-        bill.save()
+        if not created:
+            messages.info(request, f'ℹ️ Bill #{bill.bill_number} was already created for this order | Verification Code: {bill.verification_code}')
+            return redirect('billing')
         
         # Auto-generate QR token
         from .models import QRToken
-        user_profile = request.user.userprofile
-        qr_token, created = QRToken.objects.get_or_create(user_profile=user_profile)
+        QRToken.objects.get_or_create(user_profile=request.user.userprofile)
         
-        # Process each product
-        successful_products = []
-        errors = []
-        
-        for product_data in products_data:
-            try:
-                product = Product.objects.get(id=product_data['id'])
-                quantity = int(product_data['quantity'])
-                unit_price = Decimal(str(product_data['unitPrice']))
-                item_total = Decimal(str(product_data['total']))
-                
-                # Create bill item
-                SalesBillItem.objects.create(
-                    bill=bill,
-                    product=product,
-                    quantity=quantity,
-                    price=unit_price,
-                    total=item_total
-                )
-                
-                # AUTOMATIC INVENTORY DEDUCTION using FEFO
-                remaining_qty = quantity
-                from datetime import date
-                
-                stock_batches = product.expirystock_set.filter(
-                    quantity__gt=0,
-                    expiry_date__gte=date.today()
-                ).order_by('expiry_date')
-                
-                for batch in stock_batches:
-                    if remaining_qty <= 0:
-                        break
-                    
-                    if batch.quantity >= remaining_qty:
-                        batch.quantity -= remaining_qty
-                        remaining_qty = 0
-                    else:
-                        remaining_qty -= batch.quantity
-                        batch.quantity = 0
-                    
-                    batch.save()
-                
-                successful_products.append(f"{product.name} ({quantity} units)")
-                update_stock_notifications_for_product(product)
-                
-            except Exception as e:
-                errors.append(f"Error processing {product_data['name']}: {str(e)}")
+        successful_products = [
+            f"{item.product.name} ({item.quantity} units)"
+            for item in bill.items.select_related('product')
+        ]
         
         # Send email automatically
         class TempShopOwner:
@@ -4817,7 +4121,7 @@ def process_complete_csv_order(request):
             return redirect('billing')
         
         # Parse products
-        products_data = []
+        parsed = []
         errors = []
         line_number = 4  # Starting from line 4 (after headers)
         
@@ -4839,100 +4143,60 @@ def process_complete_csv_order(request):
                 errors.append(f"Line {line_number}: Invalid quantity '{quantity_str}' for {product_name}")
                 continue
             
-            # Find product
-            try:
-                product = Product.objects.get(name__iexact=product_name)
-                available_stock = product.total_stock
-                
-                if available_stock < quantity:
-                    errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
-                    continue
-                
-                products_data.append({
-                    'name': product.name,
-                    'quantity': quantity,
-                    'unitPrice': float(product.new_price),
-                    'total': float(product.new_price * quantity)
-                })
-                
-            except Product.DoesNotExist:
+            parsed.append((line_number, product_name, quantity))
+        
+        # Every product named in the file, with the stock this cashier can bill, in one query
+        from .bill_service import with_sellable_stock
+        from .product_lookup import resolve
+        products = resolve(
+            names=[product_name for _, product_name, _ in parsed],
+            queryset=with_sellable_stock(Product.objects.all(), request.user)
+        )
+        
+        lines = []
+        for line_number, product_name, quantity in parsed:
+            product = products.get(name=product_name)
+            if product is None:
                 errors.append(f"Line {line_number}: Product '{product_name}' not found")
                 continue
+            
+            available_stock = product.sellable_stock
+            if available_stock < quantity:
+                errors.append(f"Line {line_number}: Insufficient stock for {product_name} (Available: {available_stock}, Requested: {quantity})")
+                continue
+            
+            lines.append((product, quantity, product.new_price, product.new_price * quantity))
         
         # Show errors if no valid products
-        if not products_data:
+        if not lines:
             error_message = "No valid products found.\n" + "\n".join(errors[:10])
             messages.error(request, f'❌ {error_message}')
             return redirect('billing')
         
-        # Calculate total amount
-        total_amount = Decimal('0.00')
-        for product_data in products_data:
-            total_amount += Decimal(str(product_data['total']))
-        
-        # Create bill
-        bill_number = get_next_bill_number()
-        bill = SalesBill.objects.create(
-            bill_number=bill_number,
-            total_amount=total_amount,
-            created_by=request.user
+        # Stock check, bill, lines and FEFO deductions in one transaction
+        from .bill_service import create_bill
+        bill, created, rejected = create_bill(
+            request.user, lines, idempotency_key=get_idempotency_key(request)
         )
+        errors += rejected
         
-        # Generate verification code
-        bill.generate_verification_code()
-        bill.save()
+        if bill is None:
+            error_message = "No valid products found.\n" + "\n".join(errors[:10])
+            messages.error(request, f'❌ {error_message}')
+            return redirect('billing')
+        
+        if not created:
+            messages.info(request, f'ℹ️ Bill #{bill.bill_number} was already created for this upload')
+            return redirect('billing')
         
         # Auto-generate QR token
         from .models import QRToken
-        user_profile = request.user.userprofile
-        qr_token, created = QRToken.objects.get_or_create(user_profile=user_profile)
+        QRToken.objects.get_or_create(user_profile=request.user.userprofile)
         
-        # Process each product
-        successful_products = []
-        
-        for product_data in products_data:
-            try:
-                product = Product.objects.get(name=product_data['name'])
-                quantity = int(product_data['quantity'])
-                unit_price = Decimal(str(product_data['unitPrice']))
-                item_total = Decimal(str(product_data['total']))
-                
-                # Create bill item
-                SalesBillItem.objects.create(
-                    bill=bill,
-                    product=product,
-                    quantity=quantity,
-                    price=unit_price,
-                    total=item_total
-                )
-                
-                # AUTOMATIC INVENTORY DEDUCTION using FEFO
-                remaining_qty = quantity
-                from datetime import date
-                
-                stock_batches = product.expirystock_set.filter(
-                    quantity__gt=0,
-                    expiry_date__gte=date.today()
-                ).order_by('expiry_date')
-                
-                for batch in stock_batches:
-                    if remaining_qty <= 0:
-                        break
-                    
-                    if batch.quantity >= remaining_qty:
-                        batch.quantity -= remaining_qty
-                        remaining_qty = 0
-                    else:
-                        remaining_qty -= batch.quantity
-                        batch.quantity = 0
-                    
-                    batch.save()
-                
-                successful_products.append(f"{product.name} ({quantity} units)")
-                update_stock_notifications_for_product(product)
-                
-            except Exception as e:
-                errors.append(f"Error processing {product_data['name']}: {str(e)}")
+        successful_products = [
+            f"{item.product.name} ({item.quantity} units)"
+            for item in bill.items.select_related('product')
+        ]
         
         # Send email
         if shop_email:
@@ -4984,3 +4248,74 @@ def process_complete_csv_order(request):
     except Exception as e:
         messages.error(request, f'❌ Error processing CSV: {str(e)}')
         return redirect('billing')
+
+@login_required
+def change_feed_poll(request):
+    """
+    Long-poll the change feed: ?cursor=<last seen event id>&timeout=<seconds>
+    Returns the events after the cursor as soon as there are any.
+    Without a cursor, returns the current head cursor to start from.
+    """
+    from . import change_feed
+    
+    cursor = request.GET.get('cursor')
+    if cursor in (None, ''):
+        return JsonResponse({'success': True, 'cursor': change_feed.head_cursor(), 'events': []})
+    
+    try:
+        cursor = int(cursor)
+        timeout = float(request.GET.get('timeout', change_feed.max_wait()))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'cursor and timeout must be numbers'}, status=400)
+    
+    events = change_feed.wait_for_events(request.user, cursor, timeout=max(timeout, 0))
+    
+    return JsonResponse({
+        'success': True,
+        'cursor': events[-1].id if events else cursor,
+        'events': [event.to_json() for event in events],
+    })
+
+@login_required
+def change_feed_stream(request):
+    """
+    Server-Sent Events stream of the change feed
+    Resumes from the Last-Event-ID header (sent by EventSource on reconnect) or ?cursor=.
+    The stream ends after CHANGE_FEED_STREAM_SECONDS and the browser reconnects,
+    so a worker is never held by one client indefinitely. Needs threaded or
+    async workers - dashboards only use it with CHANGE_FEED_TRANSPORT=sse.
+    """
+    import time
+    from django.http import StreamingHttpResponse
+    from . import change_feed
+    
+    try:
+        cursor = int(request.headers.get('Last-Event-ID') or request.GET.get('cursor') or change_feed.head_cursor())
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'cursor must be a number'}, status=400)
+    
+    user = request.user
+    role = change_feed.get_user_role(user)
+    
+    def stream(cursor):
+        yield 'retry: 3000\n\n'
+        deadline = time.monotonic() + change_feed.stream_seconds()
+        last_sent = time.monotonic()
+        while time.monotonic() < deadline:
+            events = change_feed.events_since(user, cursor, role)
+            for event in events:
+                cursor = event.id
+                yield change_feed.format_sse(event)
+            if events:
+                last_sent = time.monotonic()
+                continue
+            if time.monotonic() - last_sent >= 15:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+                last_sent = time.monotonic()
+            time.sleep(change_feed.POLL_INTERVAL)
+    
+    response = StreamingHttpResponse(stream(cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
@@ -5,7 +5,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_inventory.settings')
 django.setup()
 
 from django.contrib.auth.models import User
-from inventory.models import UserProfile, Product, ExpiryStock
+from inventory.models import UserProfile, Product, ExpiryStock, Store
+from inventory.stock_ledger import add_batch, rebuild_projections
 from datetime import date, timedelta
 
 print("🏢 Setting up Company Stock System...")
@@ -33,11 +34,24 @@ except User.DoesNotExist:
     )
     print("✅ Created company stock user")
 
+# The company user holds the stock of the warehouse store
+warehouse, created = Store.objects.get_or_create(
+    is_warehouse=True,
+    defaults={'name': 'Company Warehouse', 'location': 'Main Distribution Center'}
+)
+profile = company_user.userprofile
+if profile.store_id != warehouse.id:
+    profile.store = warehouse
+    profile.save()
+    print(f"✅ Company stock user linked to {warehouse}")
+
 # Transfer all unassigned stock to company
 unassigned_stock = ExpiryStock.objects.filter(user__isnull=True)
 count = unassigned_stock.count()
 if count > 0:
-    unassigned_stock.update(user=company_user)
+    unassigned_stock.update(user=company_user, store=warehouse)
+    # update() bypasses the stock ledger - recompute the on-hand projection
+    rebuild_projections()
     print(f"✅ Transferred {count} unassigned stock entries to company")
 
 # Add initial company stock for all products
@@ -56,12 +70,12 @@ for product in products:
         quantity = 200  # Default company stock
         expiry_date = date.today() + timedelta(days=365)  # 1 year expiry
         
-        ExpiryStock.objects.create(
+        add_batch(ExpiryStock(
             product=product,
             quantity=quantity,
             expiry_date=expiry_date,
             user=company_user
-        )
+        ), None, reason='Initial stock')
         print(f"  ✅ Added {quantity} units of {product.name} to company stock")
 
 print("\n" + "=" * 50)
@@ -0,0 +1,12 @@
+"""
+Settings for the test suite: the primary database plus a 'replica' alias
+mirroring it, so the read replica routing (inventory/db_routing.py) runs
+against two aliases. Run with:
+
+    python manage.py test inventory --settings=smart_inventory.test_settings
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
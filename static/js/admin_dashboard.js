@@ -0,0 +1,982 @@
+/*
+ * NeuroStock admin dashboard
+ * Tabs, order approval, team and bill panels of admin_dashboard.html.
+ * The tab contents arrive through lazy_panels.js ('neurostock:panel-loaded').
+ *
+ * <script src="{% static 'js/admin_dashboard.js' %}" data-print-css="{% static 'vendor/bootstrap-5.3.3/css/bootstrap.min.css' %}"></script>
+ */
+
+// Stylesheet for printed bills (absolute, the print window has no base URL of its own)
+const PRINT_STYLESHEET = new URL(document.currentScript.dataset.printCss, window.location.href).href;
+
+// Initialize admin dashboard
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('🚀 Admin dashboard loaded successfully');
+    
+    // Initialize order form handling (the order modal is part of the page)
+    initializeOrderForm();
+    
+    console.log('✅ Admin dashboard initialization complete');
+});
+
+// Tabs are loaded on demand by lazy_panels.js - wire up each one as it arrives
+document.addEventListener('neurostock:panel-loaded', function(e) {
+    const pane = e.detail.pane;
+    
+    switch (e.detail.name) {
+        case 'stock-intelligence-panel':
+            // Initialize tooltips
+            pane.querySelectorAll('[data-bs-toggle="tooltip"]').forEach(function(tooltipTriggerEl) {
+                new bootstrap.Tooltip(tooltipTriggerEl);
+            });
+            
+            // Set progress bar widths based on trend scores
+            pane.querySelectorAll('.progress-bar[data-trend-score]').forEach(function(bar) {
+                const score = parseInt(bar.dataset.trendScore) || 0;
+                bar.style.width = (score * 10) + '%';
+            });
+            break;
+        case 'actions-orders-panel':
+            // Initialize notification form enhancements
+            initializeNotificationForm();
+            initializeProductAutocomplete();
+            break;
+        case 'billing-management-panel':
+            initializeBillingFilters();
+            break;
+    }
+});
+
+function initializeOrderForm() {
+    console.log('📋 Initializing order form...');
+    
+    const orderForm = document.getElementById('orderForm');
+    if (!orderForm) {
+        console.error('❌ Order form not found');
+        return;
+    }
+    
+    orderForm.addEventListener('submit', function(e) {
+        console.log('📤 Order form submitted');
+        
+        const productName = document.getElementById('orderProductName').value.trim();
+        const quantity = document.getElementById('orderQuantity').value.trim();
+        
+        console.log('📋 Form data:');
+        console.log('   - Product:', productName);
+        console.log('   - Quantity:', quantity);
+        
+        if (!productName) {
+            e.preventDefault();
+            alert('Error: Product name is missing. Please try again.');
+            return false;
+        }
+        
+        if (!quantity || parseInt(quantity) < 1) {
+            e.preventDefault();
+            alert('Error: Please enter a valid quantity (minimum 1).');
+            document.getElementById('orderQuantity').focus();
+            return false;
+        }
+        
+        // Show loading state
+        const submitBtn = this.querySelector('button[type="submit"]');
+        const originalText = submitBtn.innerHTML;
+        submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Creating Order...';
+        submitBtn.disabled = true;
+        
+        console.log('✅ Form validation passed, submitting...');
+        
+        // Re-enable button after delay (in case of errors)
+        setTimeout(() => {
+            submitBtn.innerHTML = originalText;
+            submitBtn.disabled = false;
+        }, 10000);
+        
+        return true;
+    });
+    
+    console.log('✅ Order form initialized');
+}
+
+function initializeNotificationForm() {
+    const productNameInput = document.getElementById('product_name');
+    const productCategoryInput = document.getElementById('product_category');
+    
+    if (productNameInput && productCategoryInput) {
+        // Auto-suggest category based on product name
+        productNameInput.addEventListener('input', function() {
+            const productName = this.value.trim().toLowerCase();
+            
+            // Simple category suggestions based on common product names
+            let suggestedCategory = '';
+            
+            if (productName.includes('milk') || productName.includes('cheese') || productName.includes('butter')) {
+                suggestedCategory = 'Dairy';
+            } else if (productName.includes('bread') || productName.includes('biscuit') || productName.includes('cake')) {
+                suggestedCategory = 'Bakery';
+            } else if (productName.includes('apple') || productName.includes('banana') || productName.includes('orange')) {
+                suggestedCategory = 'Fruits';
+            } else if (productName.includes('rice') || productName.includes('wheat') || productName.includes('flour')) {
+                suggestedCategory = 'Grains';
+            } else if (productName.includes('soap') || productName.includes('shampoo') || productName.includes('detergent')) {
+                suggestedCategory = 'Personal Care';
+            }
+            
+            if (suggestedCategory && !productCategoryInput.value) {
+                productCategoryInput.value = suggestedCategory;
+                // Add visual feedback
+                productCategoryInput.style.backgroundColor = '#e8f5e8';
+                setTimeout(() => {
+                    productCategoryInput.style.backgroundColor = '';
+                }, 1000);
+            }
+        });
+        
+        // Enhanced form validation and submission
+        const notificationForm = productNameInput.closest('form');
+        if (notificationForm) {
+            notificationForm.addEventListener('submit', function(e) {
+                const productName = document.getElementById('product_name').value.trim();
+                const category = document.getElementById('product_category').value.trim();
+                const title = document.getElementById('notification_title').value.trim();
+                const message = document.getElementById('admin_recommendation').value.trim();
+                
+                if (!productName || !category || !title || !message) {
+                    e.preventDefault();
+                    showErrorMessage('Please fill in all required fields.');
+                    return false;
+                }
+                
+                // Show loading state
+                this.classList.add('submitting');
+                const submitBtn = this.querySelector('button[type="submit"]');
+                const originalText = submitBtn.innerHTML;
+                submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Sending Notification...';
+                submitBtn.disabled = true;
+                
+                // Re-enable button after delay (in case of errors)
+                setTimeout(() => {
+                    this.classList.remove('submitting');
+                    submitBtn.innerHTML = originalText;
+                    submitBtn.disabled = false;
+                }, 8000);
+            });
+        }
+    }
+    
+    // Initialize discount form enhancements
+    const discountForm = document.querySelector('.discount-form');
+    if (discountForm) {
+        discountForm.addEventListener('submit', function(e) {
+            const productSelect = this.querySelector('select[name="product"]');
+            const discountInput = this.querySelector('input[name="discount_percentage"]');
+            
+            if (!productSelect.value) {
+                e.preventDefault();
+                showErrorMessage('Please select a product for discount.');
+                productSelect.focus();
+                return false;
+            }
+            
+            const discountValue = parseFloat(discountInput.value);
+            if (isNaN(discountValue) || discountValue < 0 || discountValue > 100) {
+                e.preventDefault();
+                showErrorMessage('Please enter a valid discount percentage (0-100).');
+                discountInput.focus();
+                return false;
+            }
+            
+            // Show loading state
+            this.classList.add('submitting');
+            const submitBtn = this.querySelector('button[type="submit"]');
+            const originalText = submitBtn.innerHTML;
+            submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Applying Discount...';
+            submitBtn.disabled = true;
+            
+            // Re-enable button after delay (in case of errors)
+            setTimeout(() => {
+                this.classList.remove('submitting');
+                submitBtn.innerHTML = originalText;
+                submitBtn.disabled = false;
+            }, 8000);
+        });
+        
+        // Real-time discount preview
+        const discountInput = discountForm.querySelector('input[name="discount_percentage"]');
+        if (discountInput) {
+            discountInput.addEventListener('input', function() {
+                const value = parseFloat(this.value);
+                const inputGroup = this.closest('.input-group');
+                const percentSpan = inputGroup.querySelector('.input-group-text:last-child');
+                
+                if (!isNaN(value) && value >= 0 && value <= 100) {
+                    percentSpan.style.backgroundColor = '#28a745';
+                    percentSpan.style.color = 'white';
+                    percentSpan.style.borderColor = '#28a745';
+                } else {
+                    percentSpan.style.backgroundColor = '#dc3545';
+                    percentSpan.style.color = 'white';
+                    percentSpan.style.borderColor = '#dc3545';
+                }
+            });
+        }
+    }
+}
+
+function showErrorMessage(message) {
+    // Create error message toast
+    const alertDiv = document.createElement('div');
+    alertDiv.className = 'alert alert-danger alert-dismissible fade show position-fixed';
+    alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+    alertDiv.innerHTML = `
+        <i class="fas fa-exclamation-triangle me-2"></i>${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+    
+    document.body.appendChild(alertDiv);
+    
+    // Auto-remove after 4 seconds
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 4000);
+}
+
+function setDiscountProduct(productId, productName) {
+    const productSelect = document.querySelector('select[name="product"]');
+    if (productSelect) {
+        productSelect.value = productId;
+    }
+    
+    // Switch to actions tab
+    const actionsTab = document.getElementById('actions-orders-tab');
+    if (actionsTab) {
+        actionsTab.click();
+    }
+}
+
+function populateOrderModal(productName, productId, currentStock) {
+    console.log('� DEBUG: populateOrderModal function called');
+    console.log('📦 Parameters received:');
+    console.log('   - Product Name:', productName);
+    console.log('   - Product ID:', productId);
+    console.log('   - Current Stock:', currentStock);
+    
+    // Check if modal exists
+    const modal = document.getElementById('orderModal');
+    if (!modal) {
+        console.error('❌ Order modal not found!');
+        alert('Error: Order modal not found. Please refresh the page.');
+        return;
+    }
+    
+    // Populate product name field
+    const productNameField = document.getElementById('orderProductName');
+    if (productNameField) {
+        productNameField.value = productName;
+        console.log('✅ Product name field populated:', productName);
+    } else {
+        console.error('❌ Product name field not found');
+    }
+    
+    // Populate hidden product ID field
+    const productIdField = document.getElementById('orderProductId');
+    if (productIdField) {
+        productIdField.value = productId;
+        console.log('✅ Product ID field populated:', productId);
+    } else {
+        console.error('❌ Product ID field not found');
+    }
+    
+    // Populate current stock display
+    const currentStockSpan = document.getElementById('orderCurrentStock');
+    if (currentStockSpan) {
+        currentStockSpan.textContent = currentStock;
+        console.log('✅ Current stock display populated:', currentStock);
+    } else {
+        console.error('❌ Current stock span not found');
+    }
+    
+    // Clear and focus quantity field
+    const quantityField = document.getElementById('orderQuantity');
+    if (quantityField) {
+        quantityField.value = '';
+        setTimeout(() => quantityField.focus(), 500); // Focus after modal opens
+        console.log('✅ Quantity field cleared and will be focused');
+    } else {
+        console.error('❌ Quantity field not found');
+    }
+    
+    // Clear notes field
+    const notesField = document.getElementById('orderNotes');
+    if (notesField) {
+        notesField.value = '';
+        console.log('✅ Notes field cleared');
+    } else {
+        console.error('❌ Notes field not found');
+    }
+    
+    // Show the modal
+    try {
+        const orderModal = new bootstrap.Modal(modal);
+        orderModal.show();
+        console.log('✅ Order modal shown successfully');
+        
+        // Add event listener for when modal is shown
+        modal.addEventListener('shown.bs.modal', function() {
+            console.log('🎯 Modal is now visible, focusing quantity field');
+            if (quantityField) {
+                quantityField.focus();
+            }
+        }, { once: true });
+        
+    } catch (error) {
+        console.error('❌ Error showing modal:', error);
+        alert('Error showing order modal: ' + error.message);
+    }
+}
+
+function markOrderAsSeen(orderId) {
+    console.log('👁️ Admin marking order as seen:', orderId);
+    
+    // Show confirmation dialog
+    if (!confirm('Mark this order as seen?\n\nThis will indicate that you have reviewed the order details.')) {
+        return;
+    }
+    
+    // Get the button element
+    const button = document.querySelector(`button[data-order-id="${orderId}"]`);
+    if (!button) {
+        alert('Error: Button not found');
+        return;
+    }
+    
+    // Show loading state
+    const originalHTML = button.innerHTML;
+    button.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Marking...';
+    button.disabled = true;
+    
+    // Get CSRF token
+    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+    if (!csrfToken) {
+        alert('Error: CSRF token not found. Please refresh the page.');
+        button.innerHTML = originalHTML;
+        button.disabled = false;
+        return;
+    }
+    
+    // Create form data
+    const formData = new FormData();
+    formData.append('csrfmiddlewaretoken', csrfToken.value);
+    formData.append('order_id', orderId);
+    
+    // Send AJAX request
+    fetch('/admin-mark-order-seen/', {
+        method: 'POST',
+        body: formData,
+        headers: {
+            'X-Requested-With': 'XMLHttpRequest'
+        }
+    })
+    .then(response => {
+        console.log('Response status:', response.status);
+        return response.json();
+    })
+    .then(data => {
+        console.log('Response data:', data);
+        
+        if (data.success) {
+            // Update button to success state
+            button.innerHTML = '<i class="fas fa-check-circle me-1"></i>Received';
+            button.className = 'btn btn-sm btn-success receive-status-btn';
+            button.disabled = true;
+            button.title = `✅ Marked as seen by admin on ${data.seen_at}`;
+            
+            // Update completed orders count in header
+            if (data.updated_completed_count) {
+                const completedCountBadges = document.querySelectorAll('.badge.bg-info.fs-6');
+                completedCountBadges.forEach(badge => {
+                    if (badge.parentElement.querySelector('small')?.textContent.includes('Completed Orders')) {
+                        badge.textContent = data.updated_completed_count;
+                    }
+                });
+                
+                // Update statistics panel count
+                const statsCompletedElements = document.querySelectorAll('.text-info');
+                statsCompletedElements.forEach(element => {
+                    if (element.tagName === 'H3' && element.closest('.card-body')?.querySelector('h6')?.textContent.includes('Completed Orders')) {
+                        element.textContent = data.updated_completed_count;
+                    }
+                });
+            }
+            
+            // Show success message
+            showSuccessMessage('✅ Order marked as seen! Completed orders count updated.');
+            
+            // Update status badge if it's pending
+            const statusCell = button.closest('tr').querySelector('td:nth-child(3)');
+            if (statusCell && statusCell.textContent.includes('Pending')) {
+                statusCell.innerHTML = '<span class="badge bg-info order-status-badge"><i class="fas fa-eye me-1"></i>Seen by Admin</span>';
+            }
+            
+        } else {
+            console.error('Server error:', data.error);
+            alert('Error: ' + (data.error || 'Failed to mark order as seen'));
+            
+            // Restore button state
+            button.innerHTML = originalHTML;
+            button.disabled = false;
+        }
+    })
+    .catch(error => {
+        console.error('Network error:', error);
+        alert('Network error. Please check your connection and try again.');
+        
+        // Restore button state
+        button.innerHTML = originalHTML;
+        button.disabled = false;
+    });
+}
+
+function showSuccessMessage(message) {
+    // Create a temporary success message
+    const alertDiv = document.createElement('div');
+    alertDiv.className = 'alert alert-success alert-dismissible fade show position-fixed';
+    alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+    alertDiv.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+    
+    document.body.appendChild(alertDiv);
+    
+    // Auto-remove after 3 seconds
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 3000);
+}
+
+// Product Autocomplete Functionality
+function initializeProductAutocomplete() {
+    const productNameInput = document.getElementById('product_name');
+    const productCategoryInput = document.getElementById('product_category');
+    const suggestionsDiv = document.getElementById('product_suggestions');
+    let debounceTimer;
+    
+    if (productNameInput && productCategoryInput && suggestionsDiv) {
+        // Handle input events for product autocomplete
+        productNameInput.addEventListener('input', function() {
+            const query = this.value.trim();
+            
+            // Clear previous timer
+            clearTimeout(debounceTimer);
+            
+            if (query.length < 1) {
+                hideSuggestions();
+                return;
+            }
+            
+            // Debounce the search to avoid too many requests
+            debounceTimer = setTimeout(() => {
+                searchProducts(query);
+            }, 300);
+        });
+        
+        // Hide suggestions when clicking outside
+        document.addEventListener('click', function(e) {
+            if (!productNameInput.contains(e.target) && !suggestionsDiv.contains(e.target)) {
+                hideSuggestions();
+            }
+        });
+        
+        // Handle keyboard navigation
+        productNameInput.addEventListener('keydown', function(e) {
+            const suggestions = suggestionsDiv.querySelectorAll('.dropdown-item');
+            const activeSuggestion = suggestionsDiv.querySelector('.dropdown-item.active');
+            
+            if (e.key === 'ArrowDown') {
+                e.preventDefault();
+                if (activeSuggestion) {
+                    activeSuggestion.classList.remove('active');
+                    const next = activeSuggestion.nextElementSibling;
+                    if (next) {
+                        next.classList.add('active');
+                    } else {
+                        suggestions[0]?.classList.add('active');
+                    }
+                } else {
+                    suggestions[0]?.classList.add('active');
+                }
+            } else if (e.key === 'ArrowUp') {
+                e.preventDefault();
+                if (activeSuggestion) {
+                    activeSuggestion.classList.remove('active');
+                    const prev = activeSuggestion.previousElementSibling;
+                    if (prev) {
+                        prev.classList.add('active');
+                    } else {
+                        suggestions[suggestions.length - 1]?.classList.add('active');
+                    }
+                } else {
+                    suggestions[suggestions.length - 1]?.classList.add('active');
+                }
+            } else if (e.key === 'Enter') {
+                e.preventDefault();
+                if (activeSuggestion) {
+                    activeSuggestion.click();
+                }
+            } else if (e.key === 'Escape') {
+                hideSuggestions();
+            }
+        });
+    }
+    
+    function searchProducts(query) {
+        fetch(`/api/product-autocomplete/?q=${encodeURIComponent(query)}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.products && data.products.length > 0) {
+                    showSuggestions(data.products);
+                } else {
+                    hideSuggestions();
+                }
+            })
+            .catch(error => {
+                console.error('Error searching products:', error);
+                hideSuggestions();
+            });
+    }
+    
+    function showSuggestions(products) {
+        suggestionsDiv.innerHTML = '';
+        
+        products.forEach(product => {
+            const item = document.createElement('a');
+            item.className = 'dropdown-item d-flex justify-content-between align-items-center';
+            item.href = '#';
+            item.innerHTML = `
+                <div>
+                    <strong>${product.name}</strong>
+                    <br>
+                    <small class="text-muted">${product.category}</small>
+                </div>
+                <i class="fas fa-arrow-right text-primary"></i>
+            `;
+            
+            item.addEventListener('click', function(e) {
+                e.preventDefault();
+                selectProduct(product);
+            });
+            
+            suggestionsDiv.appendChild(item);
+        });
+        
+        suggestionsDiv.style.display = 'block';
+        suggestionsDiv.classList.add('show');
+    }
+    
+    function hideSuggestions() {
+        suggestionsDiv.style.display = 'none';
+        suggestionsDiv.classList.remove('show');
+        // Remove active class from all items
+        suggestionsDiv.querySelectorAll('.dropdown-item').forEach(item => {
+            item.classList.remove('active');
+        });
+    }
+    
+    function selectProduct(product) {
+        productNameInput.value = product.name;
+        productCategoryInput.value = product.category;
+        
+        // Remove readonly attribute temporarily to allow form submission
+        productCategoryInput.removeAttribute('readonly');
+        
+        // Add readonly back after a short delay
+        setTimeout(() => {
+            productCategoryInput.setAttribute('readonly', true);
+        }, 100);
+        
+        hideSuggestions();
+        
+        // Show success feedback
+        productNameInput.classList.add('is-valid');
+        productCategoryInput.classList.add('is-valid');
+        
+        setTimeout(() => {
+            productNameInput.classList.remove('is-valid');
+            productCategoryInput.classList.remove('is-valid');
+        }, 2000);
+    }
+}
+
+// Event delegation for admin mark seen buttons
+document.addEventListener('click', function(e) {
+    if (e.target.closest('.admin-mark-seen-btn')) {
+        e.preventDefault();
+        const button = e.target.closest('.admin-mark-seen-btn');
+        const orderId = button.getAttribute('data-order-id');
+        if (orderId) {
+            markOrderAsSeen(orderId);
+        }
+    }
+});
+
+// Team Management Functions - Delete functionality
+function deleteTeamMember(userId, username) {
+    console.log('🔧 DEBUG: Delete function called for user:', userId, username);
+    
+    // Confirmation dialog
+    const confirmDelete = confirm(
+        `⚠️ DELETE TEAM MEMBER\n\n` +
+        `Are you sure you want to remove "${username}" from your inventory team?\n\n` +
+        `This action will:\n` +
+        `• Remove their access to the inventory system\n` +
+        `• Delete their user account permanently\n` +
+        `• Remove them from all orders and notifications\n` +
+        `• Cannot be undone\n\n` +
+        `Click OK to confirm deletion.`
+    );
+    
+    if (confirmDelete) {
+        console.log('🔧 DEBUG: First confirmation passed');
+        
+        const confirmText = prompt(`To confirm deletion of "${username}", type "DELETE" (in capital letters):`);
+        
+        if (confirmText === 'DELETE') {
+            console.log('🔧 DEBUG: Second confirmation passed, proceeding with deletion');
+            
+            // Show loading state
+            const button = document.querySelector(`button[onclick*="deleteTeamMember('${userId}'"]`);
+            console.log('🔧 DEBUG: Found button:', button);
+            
+            if (button) {
+                const originalHTML = button.innerHTML;
+                button.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Deleting...';
+                button.disabled = true;
+            }
+            
+            // Get CSRF token
+            const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]');
+            console.log('🔧 DEBUG: CSRF token found:', csrfToken);
+            
+            if (!csrfToken) {
+                alert('Error: CSRF token not found. Please refresh the page.');
+                if (button) {
+                    button.innerHTML = originalHTML;
+                    button.disabled = false;
+                }
+                return;
+            }
+            
+            console.log('🔧 DEBUG: Sending delete request...');
+            
+            // Send delete request
+            fetch('/delete-team-member/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                    'X-Requested-With': 'XMLHttpRequest'
+                },
+                body: `csrfmiddlewaretoken=${csrfToken.value}&user_id=${userId}`
+            })
+            .then(response => {
+                console.log('🔧 DEBUG: Response received:', response.status);
+                return response.json();
+            })
+            .then(data => {
+                console.log('🔧 DEBUG: Response data:', data);
+                
+                if (data.success) {
+                    console.log('🔧 DEBUG: Delete successful, removing row');
+                    
+                    // Remove the row from table
+                    const row = button.closest('tr');
+                    if (row) {
+                        row.style.transition = 'all 0.3s ease';
+                        row.style.opacity = '0';
+                        row.style.transform = 'translateX(-100%)';
+                        
+                        setTimeout(() => {
+                            row.remove();
+                            
+                            // Update team count if badge exists
+                            const badge = document.querySelector('.badge.bg-primary.fs-6');
+                            if (badge) {
+                                const currentCount = parseInt(badge.textContent.match(/\\d+/)[0]);
+                                if (currentCount > 0) {
+                                    badge.textContent = `${currentCount - 1} Team Members`;
+                                }
+                            }
+                            
+                            // Show success message
+                            alert(`✅ Team member "${username}" has been successfully deleted from the system.`);
+                        }, 300);
+                    }
+                } else {
+                    console.log('🔧 DEBUG: Delete failed:', data.error);
+                    alert(`❌ Error: ${data.error || 'Failed to delete team member'}`);
+                    // Restore button
+                    if (button) {
+                        button.innerHTML = originalHTML;
+                        button.disabled = false;
+                    }
+                }
+            })
+            .catch(error => {
+                console.error('🔧 DEBUG: Network error:', error);
+                alert('❌ Network error occurred. Please try again.');
+                // Restore button
+                if (button) {
+                    button.innerHTML = originalHTML;
+                    button.disabled = false;
+                }
+            });
+        } else if (confirmText !== null) {
+            console.log('🔧 DEBUG: Second confirmation failed');
+            alert('❌ Deletion cancelled. You must type "DELETE" exactly to confirm.');
+        }
+    } else {
+        console.log('🔧 DEBUG: First confirmation cancelled');
+    }
+}
+
+// Billing Management Functions
+function resetBillingFilters() {
+    document.getElementById('storeFilter').value = 'all';
+    document.getElementById('monthFilter').value = 'all';
+    document.getElementById('dateFilter').value = '';
+    filterBillingTable();
+}
+
+// Filtering and paging happen on the server - fetch the billing panel again with them
+function filterBillingTable(page) {
+    const pane = document.getElementById('billing-management-panel');
+    const url = new URL(pane.dataset.panelUrl, window.location.href);
+    
+    url.search = '';
+    url.searchParams.set('store', document.getElementById('storeFilter').value);
+    url.searchParams.set('month', document.getElementById('monthFilter').value);
+    const dateFilter = document.getElementById('dateFilter').value;
+    if (dateFilter) {
+        url.searchParams.set('date', dateFilter);
+    }
+    if (page) {
+        url.searchParams.set('page', page);
+    }
+    
+    pane.dataset.panelUrl = url.pathname + url.search;
+    NeuroStockPanels.reload('billing-management-panel');
+}
+
+function viewBillDetails(billNumber) {
+    console.log('📄 Viewing bill:', billNumber);
+    
+    // Show modal
+    const modal = new bootstrap.Modal(document.getElementById('billDetailsModal'));
+    modal.show();
+    
+    // Fetch bill details
+    fetch(`/get-bill-details/?bill_number=${billNumber}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                const bill = data.bill;
+                let itemsHtml = '';
+                
+                bill.items.forEach(item => {
+                    itemsHtml += `
+                        <tr>
+                            <td>${item.product_name}</td>
+                            <td class="text-center">${item.quantity}</td>
+                            <td class="text-end">₹${parseFloat(item.price).toFixed(2)}</td>
+                            <td class="text-end"><strong>₹${parseFloat(item.total).toFixed(2)}</strong></td>
+                        </tr>
+                    `;
+                });
+                
+                const content = `
+                    <div class="bill-details">
+                        <div class="row mb-4">
+                            <div class="col-md-6">
+                                <h6 class="text-muted mb-2">Bill Information</h6>
+                                <p class="mb-1"><strong>Bill Number:</strong> ${bill.bill_number}</p>
+                                <p class="mb-1"><strong>Date:</strong> ${bill.created_at}</p>
+                            </div>
+                            <div class="col-md-6">
+                                <h6 class="text-muted mb-2">Store Information</h6>
+                                <p class="mb-1"><strong>Store:</strong> ${bill.store_name}</p>
+                                <p class="mb-1"><strong>Location:</strong> ${bill.store_location || 'N/A'}</p>
+                            </div>
+                        </div>
+                        
+                        <h6 class="text-muted mb-3">Items</h6>
+                        <div class="table-responsive">
+                            <table class="table table-bordered">
+                                <thead class="table-light">
+                                    <tr>
+                                        <th>Product</th>
+                                        <th class="text-center">Quantity</th>
+                                        <th class="text-end">Price</th>
+                                        <th class="text-end">Total</th>
+                                    </tr>
+                                </thead>
+                                <tbody>
+                                    ${itemsHtml}
+                                </tbody>
+                                <tfoot class="table-light">
+                                    <tr>
+                                        <td colspan="3" class="text-end"><strong>Grand Total:</strong></td>
+                                        <td class="text-end"><strong class="text-success fs-5">₹${parseFloat(bill.total_amount).toFixed(2)}</strong></td>
+                                    </tr>
+                                </tfoot>
+                            </table>
+                        </div>
+                    </div>
+                `;
+                
+                document.getElementById('billDetailsContent').innerHTML = content;
+            } else {
+                document.getElementById('billDetailsContent').innerHTML = `
+                    <div class="alert alert-danger">
+                        <i class="fas fa-exclamation-circle me-2"></i>
+                        ${data.error || 'Failed to load bill details'}
+                    </div>
+                `;
+            }
+        })
+        .catch(error => {
+            console.error('Error fetching bill details:', error);
+            document.getElementById('billDetailsContent').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-circle me-2"></i>
+                    Error loading bill details. Please try again.
+                </div>
+            `;
+        });
+}
+
+function printBill() {
+    const content = document.getElementById('billDetailsContent').innerHTML;
+    const printWindow = window.open('', '', 'height=600,width=800');
+    
+    printWindow.document.write(`
+        <html>
+        <head>
+            <title>Print Bill</title>
+            <link href="${PRINT_STYLESHEET}" rel="stylesheet">
+            <style>
+                @media print {
+                    body {
+                        background-color: white !important;
+                        color: black !important;
+                        margin: 20px;
+                    }
+                    .bill-details {
+                        background-color: white !important;
+                    }
+                    table {
+                        border-collapse: collapse;
+                        width: 100%;
+                    }
+                    th, td {
+                        border: 1px solid #000 !important;
+                        padding: 8px;
+                        text-align: left;
+                    }
+                    .table-bordered {
+                        border: 2px solid #000 !important;
+                    }
+                    .text-success {
+                        color: #000 !important;
+                        font-weight: bold;
+                    }
+                }
+                body {
+                    background-color: white;
+                    font-family: Arial, sans-serif;
+                    padding: 20px;
+                }
+                .bill-header {
+                    text-align: center;
+                    margin-bottom: 30px;
+                    border-bottom: 2px solid #000;
+                    padding-bottom: 10px;
+                }
+                .bill-details {
+                    background-color: white;
+                }
+                table {
+                    width: 100%;
+                    border-collapse: collapse;
+                    margin-top: 20px;
+                }
+                th, td {
+                    border: 1px solid #000;
+                    padding: 10px;
+                    text-align: left;
+                }
+                th {
+                    background-color: #f8f9fa;
+                    font-weight: bold;
+                }
+                .text-end {
+                    text-align: right;
+                }
+                .text-center {
+                    text-align: center;
+                }
+                .total-row {
+                    background-color: #f8f9fa;
+                    font-weight: bold;
+                    font-size: 1.1em;
+                }
+            </style>
+        </head>
+        <body>
+            <div class="bill-header">
+                <h2>NeuroStock Inventory Management</h2>
+                <p>Bill Invoice</p>
+            </div>
+            ${content}
+        </body>
+        </html>
+    `);
+    
+    printWindow.document.close();
+    
+    // Wait for content to load then print
+    setTimeout(() => {
+        printWindow.print();
+        // Close window after printing
+        setTimeout(() => {
+            printWindow.close();
+        }, 100);
+    }, 250);
+}
+
+// Add event listeners for billing filters
+function initializeBillingFilters() {
+    const storeFilter = document.getElementById('storeFilter');
+    const monthFilter = document.getElementById('monthFilter');
+    const dateFilter = document.getElementById('dateFilter');
+    
+    if (storeFilter) {
+        storeFilter.addEventListener('change', () => filterBillingTable());
+    }
+    if (monthFilter) {
+        monthFilter.addEventListener('change', () => filterBillingTable());
+    }
+    if (dateFilter) {
+        dateFilter.addEventListener('change', () => filterBillingTable());
+    }
+    
+    document.querySelectorAll('#billing-management-panel [data-billing-page]').forEach(function(button) {
+        button.addEventListener('click', function() {
+            filterBillingTable(button.dataset.billingPage);
+        });
+    });
+}
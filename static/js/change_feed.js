@@ -0,0 +1,93 @@
+/*
+ * NeuroStock change feed client
+ * Receives notification, stock and order changes by long-polling
+ * /api/changes/, or from /api/changes/stream/ (Server-Sent Events) when the
+ * server runs with CHANGE_FEED_TRANSPORT=sse.
+ * Every event is dispatched on document as 'neurostock:<topic>' and
+ * 'neurostock:change' with the event as detail. NeuroStockFeed.showAlert and
+ * NeuroStockFeed.showRefreshBanner are small helpers for the dashboards.
+ *
+ * <script src="{% static 'js/change_feed.js' %}" data-cursor="{{ change_cursor }}" data-transport="{{ change_transport }}"></script>
+ */
+(function () {
+    const script = document.currentScript;
+    let cursor = parseInt((script && script.dataset.cursor) || '0', 10);
+    const transport = (script && script.dataset.transport) || 'poll';
+
+    function dispatch(event) {
+        if (event.id <= cursor) {
+            return;
+        }
+        cursor = event.id;
+        document.dispatchEvent(new CustomEvent('neurostock:' + event.topic, { detail: event }));
+        document.dispatchEvent(new CustomEvent('neurostock:change', { detail: event }));
+    }
+
+    function startStream() {
+        const source = new EventSource('/api/changes/stream/?cursor=' + cursor);
+        ['notification', 'stock', 'order'].forEach(function (topic) {
+            source.addEventListener(topic, function (e) {
+                dispatch(JSON.parse(e.data));
+            });
+        });
+        // EventSource reconnects by itself and resumes via Last-Event-ID
+    }
+
+    function poll() {
+        fetch('/api/changes/?cursor=' + cursor, { credentials: 'same-origin' })
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                (data.events || []).forEach(dispatch);
+                cursor = Math.max(cursor, data.cursor || 0);
+                poll();
+            })
+            .catch(function () {
+                setTimeout(poll, 5000);
+            });
+    }
+
+    // Floating alert for a single event (text only, never HTML from the feed)
+    function showAlert(title, message, level) {
+        const alertDiv = document.createElement('div');
+        alertDiv.className = 'alert alert-' + (level || 'info') + ' alert-dismissible fade show position-fixed';
+        alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px; max-width: 420px;';
+        const strong = document.createElement('strong');
+        strong.textContent = title;
+        const body = document.createElement('div');
+        body.className = 'small';
+        body.textContent = message || '';
+        const close = document.createElement('button');
+        close.type = 'button';
+        close.className = 'btn-close';
+        close.setAttribute('data-bs-dismiss', 'alert');
+        alertDiv.append(strong, body, close);
+        document.body.appendChild(alertDiv);
+        setTimeout(function () { alertDiv.remove(); }, 8000);
+    }
+
+    // One banner collecting changes that need a reload to be shown in full
+    let pendingChanges = 0;
+    function showRefreshBanner(label) {
+        pendingChanges += 1;
+        let banner = document.getElementById('liveChangesBanner');
+        if (!banner) {
+            banner = document.createElement('div');
+            banner.id = 'liveChangesBanner';
+            banner.className = 'alert alert-info position-fixed d-flex align-items-center';
+            banner.style.cssText = 'bottom: 20px; right: 20px; z-index: 9999;';
+            banner.innerHTML = '<i class="fas fa-sync-alt me-2"></i><span></span>' +
+                '<button type="button" class="btn btn-sm btn-primary ms-3">Refresh</button>';
+            banner.querySelector('button').addEventListener('click', function () { location.reload(); });
+            document.body.appendChild(banner);
+        }
+        banner.querySelector('span').textContent = pendingChanges + ' new ' + (label || 'change') + (pendingChanges > 1 ? 's' : '');
+    }
+
+    window.NeuroStockFeed = { showAlert: showAlert, showRefreshBanner: showRefreshBanner };
+
+    if (transport === 'sse' && window.EventSource) {
+        startStream();
+    } else {
+        poll();
+    }
+})();
@@ -0,0 +1,87 @@
+/*
+ * NeuroStock lazy dashboard panels
+ * Tab panes with a data-panel-url start out as a spinner and are fetched the
+ * first time their tab is opened (the active pane right away), so hidden tabs
+ * cost nothing until they are needed. After a panel's HTML is in place
+ * 'neurostock:panel-loaded' is dispatched on document with {name, pane} as
+ * detail (name is the pane id) so page scripts can wire up its forms.
+ * NeuroStockPanels.reload(name) fetches an already loaded panel again.
+ *
+ * <div class="tab-pane" id="..." data-panel-url="{% url '...' %}">...</div>
+ * <script src="{% static 'js/lazy_panels.js' %}"></script>
+ */
+(function () {
+    function load(pane) {
+        if (pane.dataset.panelState === 'loading') {
+            return;
+        }
+        pane.dataset.panelState = 'loading';
+
+        fetch(pane.dataset.panelUrl, {
+            credentials: 'same-origin',
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error('HTTP ' + response.status);
+                }
+                return response.text();
+            })
+            .then(function (html) {
+                pane.innerHTML = html;
+                pane.dataset.panelState = 'loaded';
+                document.dispatchEvent(new CustomEvent('neurostock:panel-loaded', {
+                    detail: { name: pane.id, pane: pane }
+                }));
+            })
+            .catch(function (error) {
+                console.error('Error loading panel ' + pane.id + ':', error);
+                pane.dataset.panelState = '';
+                pane.innerHTML =
+                    '<div class="alert alert-danger d-flex justify-content-between align-items-center">' +
+                    '<span><i class="fas fa-exclamation-triangle me-2"></i>Could not load this panel.</span>' +
+                    '<button type="button" class="btn btn-sm btn-outline-danger" data-panel-retry>Retry</button>' +
+                    '</div>';
+            });
+    }
+
+    function loadOnce(pane) {
+        if (pane && pane.dataset.panelUrl && !pane.dataset.panelState) {
+            load(pane);
+        }
+    }
+
+    // Fetch as soon as a tab starts to show, not after its fade-in
+    document.addEventListener('show.bs.tab', function (e) {
+        const target = e.target.getAttribute('data-bs-target');
+        if (target) {
+            loadOnce(document.querySelector(target));
+        }
+    });
+
+    document.addEventListener('click', function (e) {
+        const retry = e.target.closest('[data-panel-retry]');
+        if (retry) {
+            load(retry.closest('[data-panel-url]'));
+        }
+    });
+
+    function loadActive() {
+        document.querySelectorAll('.tab-pane.active[data-panel-url]').forEach(loadOnce);
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', loadActive);
+    } else {
+        loadActive();
+    }
+
+    function reload(name) {
+        const pane = document.getElementById(name);
+        if (pane && pane.dataset.panelState === 'loaded') {
+            load(pane);
+        }
+    }
+
+    window.NeuroStockPanels = { reload: reload };
+})();
@@ -0,0 +1,1008 @@
+/*
+ * NeuroStock trend dashboard
+ * Real-time trend analysis, product table updates, score sparklines and
+ * recommendation actions of trend_dashboard.html.
+ *
+ * <script src="{% static 'js/trend_dashboard.js' %}" data-history-url="{% url 'trend_history' %}"></script>
+ */
+
+const TREND_HISTORY_URL = document.currentScript.dataset.historyUrl;
+
+// Enhanced real-time functionality for AI Market Trend Intelligence Engine
+function updateCurrentTime() {
+    const now = new Date();
+    const timeString = now.toLocaleTimeString('en-US', {
+        hour: '2-digit',
+        minute: '2-digit',
+        second: '2-digit',
+        hour12: true
+    });
+    
+    const dateString = now.toLocaleDateString('en-US', {
+        month: 'short',
+        day: 'numeric'
+    });
+    
+    // Update KPI card time display
+    const currentTimeDisplay = document.getElementById('current-time-display');
+    if (currentTimeDisplay) {
+        currentTimeDisplay.textContent = timeString;
+    }
+    
+    // Update last updated time
+    const lastUpdated = document.getElementById('last-updated');
+    if (lastUpdated) {
+        lastUpdated.textContent = `${dateString}, ${timeString}`;
+    }
+    
+    // Update all relative time displays
+    updateRelativeTimes();
+}
+
+function updateRelativeTimes() {
+    const now = new Date();
+    const timeDisplays = document.querySelectorAll('.update-time-display');
+    
+    timeDisplays.forEach(display => {
+        const updateTimeStr = display.getAttribute('data-update-time');
+        if (updateTimeStr) {
+            const updateTime = new Date(updateTimeStr);
+            const diffMs = now - updateTime;
+            const diffMinutes = Math.floor(diffMs / (1000 * 60));
+            const diffHours = Math.floor(diffMinutes / 60);
+            const diffDays = Math.floor(diffHours / 24);
+            
+            let relativeText = '';
+            if (diffMinutes < 1) {
+                relativeText = 'Updated just now';
+            } else if (diffMinutes < 60) {
+                relativeText = `Updated ${diffMinutes} minute${diffMinutes !== 1 ? 's' : ''} ago`;
+            } else if (diffHours < 24) {
+                relativeText = `Updated ${diffHours} hour${diffHours !== 1 ? 's' : ''} ago`;
+            } else {
+                relativeText = `Updated ${diffDays} day${diffDays !== 1 ? 's' : ''} ago`;
+            }
+            
+            display.textContent = relativeText;
+        } else {
+            display.textContent = 'Not analyzed yet';
+        }
+    });
+}
+
+// Initialize trend analysis dashboard
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('🚀 Trend dashboard loaded successfully');
+    
+    updateCurrentTime();
+    setInterval(updateCurrentTime, 1000);
+    
+    // Set up trend score visualizations
+    setupTrendScoreVisuals();
+    
+    // Set up KPI progress bars
+    setupKPIProgressBars();
+    
+    // Set up stock level indicators
+    setupStockIndicators();
+    
+    // Score history sparklines
+    loadTrendSparklines();
+    
+    console.log('✅ Dashboard initialization complete');
+});
+
+function setupTrendScoreVisuals() {
+    // Progress bars in trend score column
+    const progressBars = document.querySelectorAll('.progress-bar[data-trend-score]');
+    const trendScoreTexts = document.querySelectorAll('.trend-score-text[data-trend-score]');
+    
+    progressBars.forEach(bar => {
+        const score = parseFloat(bar.getAttribute('data-trend-score'));
+        bar.style.width = (score * 10) + '%';
+        
+        if (score >= 7) {
+            bar.classList.add('bg-success');
+        } else if (score >= 4) {
+            bar.classList.add('bg-warning');
+        } else {
+            bar.classList.add('bg-danger');
+        }
+    });
+    
+    trendScoreTexts.forEach(text => {
+        const score = parseFloat(text.getAttribute('data-trend-score'));
+        if (score >= 7) {
+            text.classList.add('text-success');
+        } else if (score >= 4) {
+            text.classList.add('text-warning');
+        } else {
+            text.classList.add('text-danger');
+        }
+    });
+}
+
+function setupKPIProgressBars() {
+    // Calculate percentages for KPI cards
+    const trendRows = document.querySelectorAll('.trend-row');
+    const totalProducts = trendRows.length;
+    
+    let highDemandCount = 0;
+    let lowDemandCount = 0;
+    
+    trendRows.forEach(row => {
+        const score = parseFloat(row.getAttribute('data-trend-score'));
+        if (score >= 7) highDemandCount++;
+        if (score < 4) lowDemandCount++;
+    });
+    
+    const highPercentage = totalProducts > 0 ? (highDemandCount / totalProducts) * 100 : 0;
+    const lowPercentage = totalProducts > 0 ? (lowDemandCount / totalProducts) * 100 : 0;
+    
+    const highProgress = document.getElementById('high-demand-progress');
+    const lowProgress = document.getElementById('low-demand-progress');
+    
+    if (highProgress) highProgress.style.width = highPercentage + '%';
+    if (lowProgress) lowProgress.style.width = lowPercentage + '%';
+}
+
+function setupStockIndicators() {
+    // Stock level indicators
+    const stockIndicators = document.querySelectorAll('.stock-indicator');
+    
+    stockIndicators.forEach(indicator => {
+        const stock = parseInt(indicator.getAttribute('data-stock'));
+        
+        if (stock < 50) {
+            indicator.innerHTML = '<i class="fas fa-circle text-danger"></i>';
+            indicator.title = 'Low Stock';
+        } else if (stock < 100) {
+            indicator.innerHTML = '<i class="fas fa-circle text-warning"></i>';
+            indicator.title = 'Medium Stock';
+        } else {
+            indicator.innerHTML = '<i class="fas fa-circle text-success"></i>';
+            indicator.title = 'Good Stock';
+        }
+    });
+}
+
+function setupTrendUpdateForm() {
+    // Remove old form-based setup since we're using AJAX now
+}
+
+// Simple function to start trend analysis
+function startTrendAnalysis() {
+    console.log('🎯 Trend Analysis button clicked!');
+    
+    // Call the main function
+    runTrendAnalysis();
+}
+
+// Real-time trend analysis function
+function runTrendAnalysis() {
+    try {
+        console.log('🚀 Starting Real-Time Trend Analysis...');
+        
+        const button = document.getElementById('update-btn');
+        const btnText = document.getElementById('btn-text');
+        const icon = document.getElementById('update-icon');
+        
+        console.log('📋 Elements found:', { button, btnText, icon });
+        
+        if (!button) {
+            console.error('❌ Button element not found!');
+            alert('Error: Button element not found!');
+            return;
+        }
+        
+        // Disable button and show loading state
+        button.disabled = true;
+        if (btnText) btnText.textContent = 'Analyzing Market Trends...';
+        if (icon) icon.className = 'fas fa-spinner fa-spin me-2';
+        
+        // Show analysis overlay
+        try {
+            showAnalysisOverlay();
+        } catch (overlayError) {
+            console.error('❌ Error showing overlay:', overlayError);
+        }
+        
+        // Get CSRF token
+        const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+        console.log('🔐 CSRF Token:', csrfToken ? 'Found' : 'Not found');
+        
+        if (!csrfToken) {
+            console.error('❌ CSRF token not found!');
+            alert('Error: CSRF token not found!');
+            // Reset button
+            button.disabled = false;
+            if (btnText) btnText.textContent = 'Run Trend Analysis';
+            if (icon) icon.className = 'fas fa-sync-alt me-2';
+            return;
+        }
+        
+        console.log('📡 Making Real-Time AJAX request to /trends/');
+        
+        // Make AJAX request to update trends
+        fetch('/trends/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-CSRFToken': csrfToken,
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+            body: 'update_trends=1'
+        })
+        .then(response => {
+            console.log('📥 Response received:', response.status, response.statusText);
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('📊 Real-Time Data received:', data);
+            
+            // Remove overlay
+            const overlay = document.querySelector('.position-fixed');
+            if (overlay) overlay.remove();
+            
+            if (data.success) {
+                console.log('✅ Success! Updating UI with real-time data...');
+                
+                // Update KPI cards with new real-time data
+                try {
+                    updateKPICards(data.kpi_data);
+                } catch (kpiError) {
+                    console.error('❌ Error updating KPI cards:', kpiError);
+                }
+                
+                // Update product table with new trend scores
+                try {
+                    updateProductTable(data.products);
+                } catch (tableError) {
+                    console.error('❌ Error updating product table:', tableError);
+                }
+                
+                // Update last updated time
+                try {
+                    updateLastUpdatedTime(data.last_updated);
+                } catch (timeError) {
+                    console.error('❌ Error updating time:', timeError);
+                }
+                
+                // Show success message with real-time info
+                try {
+                    showToast('success', 'Real-Time Analysis Complete', data.message);
+                } catch (toastError) {
+                    console.error('❌ Error showing toast:', toastError);
+                    alert('Analysis completed successfully!');
+                }
+            } else {
+                console.log('❌ Error in response:', data.error);
+                alert('Analysis failed: ' + (data.error || 'Unknown error'));
+            }
+            
+            // Reset button
+            button.disabled = false;
+            if (btnText) btnText.textContent = 'Run Trend Analysis';
+            if (icon) icon.className = 'fas fa-sync-alt me-2';
+        })
+        .catch(error => {
+            console.error('💥 Network Error:', error);
+            
+            // Remove overlay
+            const overlay = document.querySelector('.position-fixed');
+            if (overlay) overlay.remove();
+            
+            // Reset button
+            button.disabled = false;
+            if (btnText) btnText.textContent = 'Run Trend Analysis';
+            if (icon) icon.className = 'fas fa-sync-alt me-2';
+            
+            alert('Network Error: ' + error.message);
+        });
+        
+    } catch (error) {
+        console.error('💥 JavaScript Error in runTrendAnalysis:', error);
+        alert('JavaScript Error: ' + error.message);
+    }
+}
+
+// Update KPI cards with new data
+function updateKPICards(kpiData) {
+    // Update High Demand count
+    const highDemandElement = document.querySelector('.text-success.fw-bold');
+    if (highDemandElement) {
+        highDemandElement.textContent = kpiData.high_demand_count;
+    }
+    
+    // Update Low Demand count
+    const lowDemandElement = document.querySelector('.text-danger.fw-bold');
+    if (lowDemandElement) {
+        lowDemandElement.textContent = kpiData.low_demand_count;
+    }
+    
+    // Update Price Actions count
+    const priceActionsElement = document.querySelector('.text-warning.fw-bold');
+    if (priceActionsElement) {
+        priceActionsElement.textContent = kpiData.price_actions_count;
+    }
+    
+    // Update progress bars
+    setupKPIProgressBars();
+}
+
+// Update product table with new data
+function updateProductTable(products) {
+    const tbody = document.querySelector('table tbody');
+    if (!tbody) return;
+    
+    // Clear existing rows
+    tbody.innerHTML = '';
+    
+    if (products.length === 0) {
+        tbody.innerHTML = `
+            <tr>
+                <td colspan="7" class="text-center py-5">
+                    <div class="text-muted">
+                        <i class="fas fa-chart-line fa-3x mb-3 opacity-50"></i>
+                        <h5>No products available for trend analysis</h5>
+                        <p>Add products to start AI-powered trend analysis</p>
+                    </div>
+                </td>
+            </tr>
+        `;
+        return;
+    }
+    
+    // Add updated product rows
+    products.forEach(product => {
+        const row = createProductRow(product);
+        tbody.appendChild(row);
+    });
+    
+    // Re-setup visualizations
+    setupTrendScoreVisuals();
+    setupStockIndicators();
+    loadTrendSparklines();
+}
+
+// Trend score history (last 90 days) as a sparkline under each score
+function loadTrendSparklines() {
+    fetch(TREND_HISTORY_URL + '?days=90')
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) return;
+            document.querySelectorAll('.trend-row[data-product-id]').forEach(row => {
+                const container = row.querySelector('.trend-score-container');
+                const values = data.series[row.getAttribute('data-product-id')];
+                if (!container || !values) return;
+                
+                const old = container.querySelector('.trend-sparkline');
+                if (old) old.remove();
+                container.appendChild(createSparkline(values, data.bucket));
+            });
+        })
+        .catch(error => console.error('❌ Error loading trend history:', error));
+}
+
+function createSparkline(values, bucket) {
+    const width = 100, height = 24;
+    const points = [];
+    values.forEach((value, i) => {
+        if (value === null) return;
+        const x = values.length > 1 ? (i / (values.length - 1)) * width : width;
+        const y = height - (value / 10) * height;
+        points.push(`${x.toFixed(1)},${y.toFixed(1)}`);
+    });
+    
+    const known = values.filter(value => value !== null);
+    const rising = known.length < 2 || known[known.length - 1] >= known[0];
+    const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+    svg.setAttribute('class', 'trend-sparkline d-block mt-1');
+    svg.setAttribute('width', width);
+    svg.setAttribute('height', height);
+    svg.setAttribute('viewBox', `0 0 ${width} ${height}`);
+    svg.innerHTML = `<title>${known.length} ${bucket}s of history</title>` +
+        `<polyline fill="none" stroke="${rising ? '#198754' : '#dc3545'}" stroke-width="1.5" points="${points.join(' ')}"/>`;
+    return svg;
+}
+
+// Create a product table row
+function createProductRow(product) {
+    const row = document.createElement('tr');
+    row.className = 'trend-row';
+    row.setAttribute('data-trend-score', product.trend_score);
+    row.setAttribute('data-product-id', product.id);
+    
+    // Determine market status
+    let marketStatus = '';
+    if (product.trend_score >= 7) {
+        marketStatus = '<span class="badge bg-success"><i class="fas fa-fire me-1"></i>High Demand</span>';
+    } else if (product.trend_score >= 4) {
+        marketStatus = '<span class="badge bg-warning"><i class="fas fa-minus me-1"></i>Moderate</span>';
+    } else {
+        marketStatus = '<span class="badge bg-danger"><i class="fas fa-arrow-down me-1"></i>Low Demand</span>';
+    }
+    
+    // Determine AI recommendation
+    let recommendation = '';
+    if (product.trend_score >= 7 && product.total_stock < 100) {
+        recommendation = `
+            <div class="recommendation-item">
+                <i class="fas fa-arrow-up text-success me-1"></i>
+                <strong>Increase Stock</strong>
+            </div>
+            <small class="text-muted">High demand, low inventory</small>
+        `;
+    } else if (product.trend_score >= 7 && product.total_stock >= 100) {
+        recommendation = `
+            <div class="recommendation-item">
+                <i class="fas fa-dollar-sign text-success me-1"></i>
+                <strong>Raise Price</strong>
+            </div>
+            <small class="text-muted">High demand, good stock</small>
+        `;
+    } else if (product.trend_score < 3 && product.total_stock > 150) {
+        recommendation = `
+            <div class="recommendation-item">
+                <i class="fas fa-percentage text-danger me-1"></i>
+                <strong>Apply Discount</strong>
+            </div>
+            <small class="text-muted">Low demand, overstock</small>
+        `;
+    } else if (product.trend_score < 3) {
+        recommendation = `
+            <div class="recommendation-item">
+                <i class="fas fa-pause text-warning me-1"></i>
+                <strong>Reduce Orders</strong>
+            </div>
+            <small class="text-muted">Low demand detected</small>
+        `;
+    } else if (product.total_stock < 50) {
+        recommendation = `
+            <div class="recommendation-item">
+                <i class="fas fa-shopping-cart text-info me-1"></i>
+                <strong>Reorder Soon</strong>
+            </div>
+            <small class="text-muted">Stock running low</small>
+        `;
+    } else {
+        recommendation = `
+            <div class="recommendation-item">
+                <i class="fas fa-eye text-muted me-1"></i>
+                <strong>Monitor</strong>
+            </div>
+            <small class="text-muted">Stable conditions</small>
+        `;
+    }
+    
+    // Format last update time
+    let lastUpdate = 'Not analyzed yet';
+    if (product.last_trend_update) {
+        const updateDate = new Date(product.last_trend_update);
+        const now = new Date();
+        const diffMinutes = Math.floor((now - updateDate) / (1000 * 60));
+        
+        if (diffMinutes < 1) {
+            lastUpdate = 'Just now';
+        } else if (diffMinutes < 60) {
+            lastUpdate = `${diffMinutes} minutes ago`;
+        } else {
+            lastUpdate = `Updated ${updateDate.toLocaleString()}`;
+        }
+    }
+    
+    row.innerHTML = `
+        <td>
+            <div class="d-flex align-items-center">
+                <div class="product-avatar me-2">
+                    <i class="fas fa-box text-primary"></i>
+                </div>
+                <div>
+                    <div class="fw-bold">${product.name}</div>
+                    <small class="text-muted">ID: #${product.id}</small>
+                </div>
+            </div>
+        </td>
+        <td>
+            <span class="badge bg-light text-dark">${product.category}</span>
+        </td>
+        <td>
+            <div class="d-flex align-items-center">
+                <div class="stock-indicator me-2" data-stock="${product.total_stock}"></div>
+                <div>
+                    <div class="fw-bold">${product.total_stock}</div>
+                    <small class="text-muted">units</small>
+                </div>
+            </div>
+        </td>
+        <td>
+            <div class="trend-score-container">
+                <div class="d-flex align-items-center mb-1">
+                    <div class="trend-progress me-2">
+                        <div class="progress" style="width: 60px; height: 8px;">
+                            <div class="progress-bar" data-trend-score="${product.trend_score}"></div>
+                        </div>
+                    </div>
+                    <span class="fw-bold trend-score-text" data-trend-score="${product.trend_score}">
+                        ${product.trend_score.toFixed(1)}/10
+                    </span>
+                </div>
+                <small class="text-muted">${lastUpdate}</small>
+            </div>
+        </td>
+        <td>${marketStatus}</td>
+        <td>
+            <div class="recommendation-cell">
+                ${recommendation}
+            </div>
+        </td>
+        <td>
+            <div class="btn-group" role="group">
+                <button type="button" class="btn btn-outline-primary btn-sm" 
+                        onclick="viewProductDetails(${product.id})" 
+                        title="View Details">
+                    <i class="fas fa-eye"></i>
+                </button>
+                <button type="button" class="btn btn-outline-success btn-sm" 
+                        onclick="applyRecommendation(${product.id})" 
+                        title="Apply Recommendation">
+                    <i class="fas fa-check"></i>
+                </button>
+                <button type="button" class="btn btn-outline-danger btn-sm" 
+                        onclick="dismissRecommendation(${product.id})" 
+                        title="Dismiss Recommendation">
+                    <i class="fas fa-times"></i>
+                </button>
+            </div>
+        </td>
+    `;
+    
+    return row;
+}
+
+// Update last updated time
+function updateLastUpdatedTime(lastUpdated) {
+    const lastUpdatedElement = document.getElementById('last-updated');
+    if (lastUpdatedElement && lastUpdated) {
+        const updateDate = new Date(lastUpdated);
+        lastUpdatedElement.textContent = updateDate.toLocaleDateString('en-US', {
+            month: 'short',
+            day: 'numeric',
+            hour: '2-digit',
+            minute: '2-digit'
+        });
+    }
+}
+
+// Action button functions
+function viewProductDetails(productId, buttonElement) {
+    console.log('📋 View Details clicked for product:', productId);
+    
+    if (!buttonElement) {
+        console.error('Button element not provided');
+        return;
+    }
+    
+    const originalContent = buttonElement.innerHTML;
+    buttonElement.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
+    buttonElement.disabled = true;
+    
+    console.log('🔄 Fetching product details from:', `/product-details/${productId}/`);
+    
+    fetch(`/product-details/${productId}/`)
+        .then(response => {
+            console.log('📡 Response received:', response.status);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('📦 Data received:', data);
+            if (data.name || data.product) {
+                showProductDetailsModal(data);
+            } else {
+                showToast('error', 'Error', 'Product details not found');
+            }
+        })
+        .catch(error => {
+            console.error('❌ Error:', error);
+            showToast('error', 'Error', 'Failed to load product details: ' + error.message);
+        })
+        .finally(() => {
+            buttonElement.innerHTML = originalContent;
+            buttonElement.disabled = false;
+        });
+}
+
+function applyRecommendation(productId, buttonElement) {
+    console.log('✅ Apply clicked for product:', productId);
+    
+    if (!buttonElement) {
+        console.error('Button element not provided');
+        return;
+    }
+    
+    const originalContent = buttonElement.innerHTML;
+    buttonElement.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
+    buttonElement.disabled = true;
+    
+    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+    
+    if (!csrfToken) {
+        console.error('CSRF token not found');
+        showToast('error', 'Error', 'Security token not found');
+        buttonElement.innerHTML = originalContent;
+        buttonElement.disabled = false;
+        return;
+    }
+    
+    console.log('🔄 Applying recommendation to:', `/apply-recommendation/`);
+    
+    fetch('/apply-recommendation/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'X-CSRFToken': csrfToken,
+            'X-Requested-With': 'XMLHttpRequest'
+        },
+        body: `product_id=${productId}`
+    })
+    .then(response => {
+        console.log('📡 Response received:', response.status);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        console.log('📦 Data received:', data);
+        if (data.success) {
+            showToast('success', 'Applied', data.message || 'Recommendation applied successfully');
+            // Optionally refresh the page after 1 second
+            setTimeout(() => {
+                location.reload();
+            }, 1000);
+        } else {
+            showToast('error', 'Failed', data.error || 'Failed to apply recommendation');
+        }
+    })
+    .catch(error => {
+        console.error('❌ Error:', error);
+        showToast('error', 'Error', 'Network error: ' + error.message);
+    })
+    .finally(() => {
+        buttonElement.innerHTML = originalContent;
+        buttonElement.disabled = false;
+    });
+}
+
+function dismissRecommendation(productId) {
+    const button = event.target.closest('button');
+    const originalContent = button.innerHTML;
+    button.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
+    button.disabled = true;
+    
+    const csrfToken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+    
+    fetch('/dismiss-recommendation/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'X-CSRFToken': csrfToken,
+            'X-Requested-With': 'XMLHttpRequest'
+        },
+        body: `product_id=${productId}`
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showToast('success', 'Dismissed', data.message);
+        } else {
+            showToast('error', 'Failed', data.error || 'Failed to dismiss recommendation');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showToast('error', 'Error', 'Network error occurred');
+    })
+    .finally(() => {
+        button.innerHTML = originalContent;
+        button.disabled = false;
+    });
+}
+
+// Show product details modal
+function showProductDetailsModal(data) {
+    const product = data.product || data; // Handle both formats
+    const recentStock = data.recent_stock || [];
+    const recentSales = data.recent_sales || [];
+    const metrics = data.metrics || {};
+    
+    const modalHTML = `
+        <div class="modal fade" id="productDetailsModal" tabindex="-1">
+            <div class="modal-dialog modal-lg">
+                <div class="modal-content">
+                    <div class="modal-header bg-primary text-white">
+                        <h5 class="modal-title">
+                            <i class="fas fa-box me-2"></i>${product.name} - Detailed Analysis
+                        </h5>
+                        <button type="button" class="btn-close btn-close-white" data-bs-dismiss="modal"></button>
+                    </div>
+                    <div class="modal-body">
+                        <div class="row">
+                            <div class="col-md-6">
+                                <h6 class="fw-bold mb-3">Product Information</h6>
+                                <table class="table table-sm">
+                                    <tr><td><strong>Category:</strong></td><td>${product.category}</td></tr>
+                                    <tr><td><strong>Cost Price:</strong></td><td>₹${product.cost_price}</td></tr>
+                                    <tr><td><strong>Selling Price:</strong></td><td>₹${product.selling_price}</td></tr>
+                                    <tr><td><strong>Current Price:</strong></td><td>₹${product.current_price}</td></tr>
+                                    <tr><td><strong>ABC Class:</strong></td><td>${product.abc_classification || product.calculated_abc_classification}</td></tr>
+                                    <tr><td><strong>Total Stock:</strong></td><td>${product.total_stock} units</td></tr>
+                                    <tr><td><strong>Trend Score:</strong></td><td>${parseFloat(product.trend_score).toFixed(1)}/10</td></tr>
+                                </table>
+                            </div>
+                            <div class="col-md-6">
+                                <h6 class="fw-bold mb-3">Performance Metrics</h6>
+                                <table class="table table-sm">
+                                    <tr><td><strong>Sales This Month:</strong></td><td>${metrics.total_sales_this_month || 0} units</td></tr>
+                                    <tr><td><strong>Stock Turnover:</strong></td><td>${metrics.stock_turnover || 0}</td></tr>
+                                    <tr><td><strong>Days of Stock:</strong></td><td>${metrics.days_of_stock || 'N/A'} days</td></tr>
+                                </table>
+                                
+                                <h6 class="fw-bold mb-3 mt-4">Recent Stock Entries</h6>
+                                <div class="table-responsive" style="max-height: 150px; overflow-y: auto;">
+                                    ${recentStock.length > 0 ? `
+                                    <table class="table table-sm">
+                                        <thead><tr><th>Quantity</th><th>Expiry</th><th>Added</th></tr></thead>
+                                        <tbody>
+                                            ${recentStock.map(stock => `
+                                                <tr>
+                                                    <td>${stock.quantity}</td>
+                                                    <td>${stock.expiry_date}</td>
+                                                    <td>${stock.created_at}</td>
+                                                </tr>
+                                            `).join('')}
+                                        </tbody>
+                                    </table>
+                                    ` : '<p class="text-muted small">No recent stock entries</p>'}
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                    <div class="modal-footer">
+                        <button type="button" class="btn btn-secondary" data-bs-dismiss="modal">Close</button>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+    
+    // Remove existing modal if any
+    const existingModal = document.getElementById('productDetailsModal');
+    if (existingModal) {
+        existingModal.remove();
+    }
+    
+    // Add modal to body
+    document.body.insertAdjacentHTML('beforeend', modalHTML);
+    
+    // Show modal
+    const modal = new bootstrap.Modal(document.getElementById('productDetailsModal'));
+    modal.show();
+}
+
+function showAnalysisOverlay() {
+    const overlay = document.createElement('div');
+    overlay.className = 'position-fixed top-0 start-0 w-100 h-100 d-flex align-items-center justify-content-center';
+    overlay.style.backgroundColor = 'rgba(0,0,0,0.8)';
+    overlay.style.zIndex = '9999';
+    
+    const now = new Date();
+    const analysisTime = now.toLocaleTimeString('en-US', {
+        hour: '2-digit',
+        minute: '2-digit',
+        second: '2-digit',
+        hour12: true
+    });
+    
+    overlay.innerHTML = `
+        <div class="card shadow-lg border-0" style="min-width: 500px; max-width: 600px;">
+            <div class="card-header bg-primary text-white text-center">
+                <h4 class="mb-0">
+                    <i class="fas fa-brain me-2"></i>Real-Time Market Trend Analysis
+                </h4>
+            </div>
+            <div class="card-body text-center p-4">
+                <div class="mb-4">
+                    <div class="spinner-border text-primary mb-3" role="status" style="width: 4rem; height: 4rem;">
+                        <span class="visually-hidden">Loading...</span>
+                    </div>
+                    <h5 class="text-primary mb-2">🎯 Analyzing Current Market Trends</h5>
+                    <p class="text-muted mb-3">AI is checking real-time market conditions, demand patterns, and pricing opportunities...</p>
+                </div>
+                
+                <div class="row text-start mb-4">
+                    <div class="col-6">
+                        <div class="d-flex align-items-center mb-2">
+                            <i class="fas fa-check-circle text-success me-2"></i>
+                            <small>Market Data Collection</small>
+                        </div>
+                        <div class="d-flex align-items-center mb-2">
+                            <i class="fas fa-spinner fa-spin text-primary me-2"></i>
+                            <small>Real-Time Trend Analysis</small>
+                        </div>
+                        <div class="d-flex align-items-center">
+                            <i class="fas fa-clock text-muted me-2"></i>
+                            <small>Price Optimization</small>
+                        </div>
+                    </div>
+                    <div class="col-6">
+                        <div class="d-flex align-items-center mb-2">
+                            <i class="fas fa-clock text-muted me-2"></i>
+                            <small>Stock Level Assessment</small>
+                        </div>
+                        <div class="d-flex align-items-center mb-2">
+                            <i class="fas fa-clock text-muted me-2"></i>
+                            <small>Demand Forecasting</small>
+                        </div>
+                        <div class="d-flex align-items-center">
+                            <i class="fas fa-clock text-muted me-2"></i>
+                            <small>Report Generation</small>
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="alert alert-info mb-3">
+                    <i class="fas fa-clock me-1"></i>
+                    <strong>Analysis Started:</strong> ${analysisTime}
+                </div>
+                
+                <div class="progress mb-3" style="height: 12px;">
+                    <div class="progress-bar progress-bar-striped progress-bar-animated bg-primary" 
+                         style="width: 100%"></div>
+                </div>
+                
+                <div class="row text-center">
+                    <div class="col-4">
+                        <div class="small text-muted">
+                            <i class="fas fa-robot d-block mb-1"></i>
+                            AI Engine
+                        </div>
+                    </div>
+                    <div class="col-4">
+                        <div class="small text-muted">
+                            <i class="fas fa-database d-block mb-1"></i>
+                            Live Data
+                        </div>
+                    </div>
+                    <div class="col-4">
+                        <div class="small text-muted">
+                            <i class="fas fa-chart-line d-block mb-1"></i>
+                            Market Intelligence
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+    
+    document.body.appendChild(overlay);
+}
+
+// Utility function for toast notifications
+function showToast(type, title, message) {
+    const toastContainer = document.querySelector('.toast-container') || createToastContainer();
+    const toastId = 'toast-' + Date.now();
+    
+    const bgClass = type === 'success' ? 'bg-success' : type === 'error' ? 'bg-danger' : type === 'warning' ? 'bg-warning' : 'bg-info';
+    const icon = type === 'success' ? 'check-circle' : type === 'error' ? 'exclamation-triangle' : type === 'warning' ? 'exclamation-triangle' : 'info-circle';
+    
+    const toastHTML = `
+        <div id="${toastId}" class="toast" role="alert">
+            <div class="toast-header ${bgClass} text-white">
+                <i class="fas fa-${icon} me-2"></i>
+                <strong class="me-auto">${title}</strong>
+                <button type="button" class="btn-close btn-close-white" data-bs-dismiss="toast"></button>
+            </div>
+            <div class="toast-body">
+                ${message}
+            </div>
+        </div>
+    `;
+    
+    toastContainer.insertAdjacentHTML('beforeend', toastHTML);
+    
+    const toastElement = document.getElementById(toastId);
+    const toast = new bootstrap.Toast(toastElement, { autohide: true, delay: 5000 });
+    toast.show();
+    
+    toastElement.addEventListener('hidden.bs.toast', function() {
+        this.remove();
+    });
+}
+
+function createToastContainer() {
+    const container = document.createElement('div');
+    container.className = 'toast-container position-fixed top-0 end-0 p-3';
+    container.style.zIndex = '9999';
+    document.body.appendChild(container);
+    return container;
+}
+
+function refreshAnalysis() {
+    const button = event.target.closest('button');
+    const originalContent = button.innerHTML;
+    button.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Refreshing...';
+    button.disabled = true;
+    
+    setTimeout(() => {
+        location.reload();
+    }, 2000);
+}
+
+// Add custom CSS for enhanced styling
+const style = document.createElement('style');
+style.textContent = `
+    .bg-gradient-primary {
+        background: linear-gradient(135deg, #007bff 0%, #0056b3 100%);
+    }
+    
+    .kpi-icon {
+        width: 48px;
+        height: 48px;
+        border-radius: 12px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        font-size: 1.5rem;
+    }
+    
+    .status-indicator {
+        width: 8px;
+        height: 8px;
+        border-radius: 50%;
+        display: inline-block;
+        animation: pulse 2s infinite;
+    }
+    
+    @keyframes pulse {
+        0% { opacity: 1; }
+        50% { opacity: 0.5; }
+        100% { opacity: 1; }
+    }
+    
+    .product-avatar {
+        width: 32px;
+        height: 32px;
+        background: rgba(0, 123, 255, 0.1);
+        border-radius: 8px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+    }
+    
+    .trend-row:hover {
+        background-color: rgba(0, 123, 255, 0.05);
+        transform: translateY(-1px);
+        transition: all 0.2s ease;
+    }
+    
+    .recommendation-cell {
+        min-width: 200px;
+    }
+    
+    .recommendation-item {
+        font-weight: 600;
+        margin-bottom: 2px;
+    }
+    
+    .card {
+        transition: all 0.2s ease;
+    }
+`;
+document.head.appendChild(style);